@@ -140,6 +140,9 @@ if 'loc_cache' not in CACHES:
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     }
+CONFIG_MODEL_PROCESS_CACHE_TIMEOUT = ENV_TOKENS.get(
+    'CONFIG_MODEL_PROCESS_CACHE_TIMEOUT', CONFIG_MODEL_PROCESS_CACHE_TIMEOUT
+)
 
 SESSION_COOKIE_DOMAIN = ENV_TOKENS.get('SESSION_COOKIE_DOMAIN')
 SESSION_COOKIE_HTTPONLY = ENV_TOKENS.get('SESSION_COOKIE_HTTPONLY', True)
@@ -266,6 +269,15 @@ else:
 
 DATABASES = AUTH_TOKENS['DATABASES']
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
+XML_MODULESTORE_LAZY = ENV_TOKENS.get('XML_MODULESTORE_LAZY', XML_MODULESTORE_LAZY)
+XML_MODULESTORE_INDEX_CACHE_DIR = ENV_TOKENS.get('XML_MODULESTORE_INDEX_CACHE_DIR', XML_MODULESTORE_INDEX_CACHE_DIR)
+update_module_store_settings(
+    MODULESTORE,
+    xml_store_options={
+        'lazy': XML_MODULESTORE_LAZY,
+        'index_cache_dir': XML_MODULESTORE_INDEX_CACHE_DIR,
+    },
+)
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
 # Datadog for events!
@@ -37,6 +37,7 @@ import lms.envs.common
 from lms.envs.common import (
     USE_TZ, TECH_SUPPORT_EMAIL, PLATFORM_NAME, BUGS_EMAIL, DOC_STORE_CONFIG, DATA_DIR, ALL_LANGUAGES, WIKI_ENABLED,
     update_module_store_settings, ASSET_IGNORE_REGEX, COPYRIGHT_YEAR, PARENTAL_CONSENT_AGE_LIMIT, COMP_THEME_DIR,
+    XML_MODULESTORE_LAZY, XML_MODULESTORE_INDEX_CACHE_DIR,
     # The following PROFILE_IMAGE_* settings are included as they are
     # indirectly accessed through the email opt-in API, which is
     # technically accessible through the CMS via legacy URLs.
@@ -1096,3 +1097,9 @@ PROCTORING_BACKEND_PROVIDER = {
     'options': {},
 }
 PROCTORING_SETTINGS = {}
+
+###################### Configuration models ######################
+# Seconds for which each process reuses the configuration models it has read
+# before checking whether they have been changed.  0 reads them from the
+# 'configuration' cache every time (once per request, within a request).
+CONFIG_MODEL_PROCESS_CACHE_TIMEOUT = 0
@@ -1,16 +1,35 @@
 """
 Django Model baseclass for database-backed configuration.
 """
+import copy
+import threading
+import time
+from uuid import uuid4
+
+import dogstats_wrapper as dog_stats_api
+from django.conf import settings
 from django.db import connection, models
 from django.contrib.auth.models import User
 from django.core.cache import get_cache, InvalidCacheBackendError
 from django.utils.translation import ugettext_lazy as _
 
+import request_cache
+
 try:
     cache = get_cache('configuration')  # pylint: disable=invalid-name
 except InvalidCacheBackendError:
     from django.core.cache import cache
 
+# Model name -> {'version', 'created', 'expires', 'entries'}: the current
+# entries this process has read, see ConfigurationModel._process_cache.
+_PROCESS_CACHE = {}
+
+# How long, in seconds, a model's version stamp is kept in the cache.  It has
+# to outlive the entries that depend on it, so it is the longest relative
+# timeout memcached accepts.
+VERSION_STAMP_TIMEOUT = 60 * 60 * 24 * 30
+_PROCESS_CACHE_LOCK = threading.Lock()
+
 
 class ConfigurationModelManager(models.Manager):
     """
@@ -96,9 +115,17 @@ class ConfigurationModel(models.Model):
         # Always create a new entry, instead of updating an existing model
         self.pk = None  # pylint: disable=invalid-name
         super(ConfigurationModel, self).save(*args, **kwargs)
-        cache.delete(self.cache_key_name(*[getattr(self, key) for key in self.KEY_FIELDS]))
+        cache_key = self.cache_key_name(*[getattr(self, key) for key in self.KEY_FIELDS])
+        cache.delete(cache_key)
         if self.KEY_FIELDS:
             cache.delete(self.key_values_cache_key_name())
+        # Let every process know its copies of this model's entries are stale.
+        cache.set(self.version_cache_key_name(), uuid4().hex, VERSION_STAMP_TIMEOUT)
+        with _PROCESS_CACHE_LOCK:
+            _PROCESS_CACHE.pop(self.__class__.__name__, None)
+        memo = self._request_cache()
+        if memo is not None:
+            memo.pop(cache_key, None)
 
     @classmethod
     def cache_key_name(cls, *args):
@@ -112,15 +139,97 @@ class ConfigurationModel(models.Model):
         else:
             return 'configuration/{}/current'.format(cls.__name__)
 
+    @classmethod
+    def version_cache_key_name(cls):
+        """Return the name of the key of the version stamp that changes each time the configuration is saved"""
+        return 'configuration/{}/version'.format(cls.__name__)
+
+    @classmethod
+    def _request_cache(cls):
+        """
+        Return the dict of current entries read during this request, or None
+        outside of a request.
+        """
+        if request_cache.get_request() is None:
+            return None
+        return request_cache.get_cache('configuration')
+
+    @classmethod
+    def _process_cache(cls):
+        """
+        Return the dict of current entries this process has read, or None if
+        settings.CONFIG_MODEL_PROCESS_CACHE_TIMEOUT is not set.
+
+        The entries are reused for CONFIG_MODEL_PROCESS_CACHE_TIMEOUT seconds,
+        after which the model's version stamp is checked, and they are
+        dropped if the configuration has been saved since they were read, if
+        the stamp has been lost, or once they are older than the model's
+        `cache_timeout`.
+        """
+        timeout = getattr(settings, 'CONFIG_MODEL_PROCESS_CACHE_TIMEOUT', 0)
+        if not timeout:
+            return None
+
+        now = time.time()
+        with _PROCESS_CACHE_LOCK:
+            state = _PROCESS_CACHE.get(cls.__name__)
+            if state is not None and now < state['expires']:
+                return state['entries']
+
+        version = cache.get(cls.version_cache_key_name())
+        stale = version is None
+        if stale:
+            # Without a stamp there's no telling when the entries were saved,
+            # so start a new one for the entries read from now on.
+            cache.add(cls.version_cache_key_name(), uuid4().hex, VERSION_STAMP_TIMEOUT)
+            version = cache.get(cls.version_cache_key_name())
+        with _PROCESS_CACHE_LOCK:
+            state = _PROCESS_CACHE.get(cls.__name__)
+            if (
+                    stale or state is None or state['version'] != version or
+                    now >= state['created'] + cls.cache_timeout
+            ):
+                state = _PROCESS_CACHE[cls.__name__] = {'version': version, 'created': now, 'entries': {}}
+            state['expires'] = now + timeout
+            return state['entries']
+
     @classmethod
     def current(cls, *args):
         """
-        Return the active configuration entry, either from cache,
-        from the database, or by creating a new empty entry (which is not
-        persisted).
+        Return the active configuration entry, either from this request's or
+        this process's cache, from cache, from the database, or by creating a
+        new empty entry (which is not persisted).
+
+        Callers may modify the entry they get, so each call returns its own
+        copy, whichever cache it came from.
+        """
+        cache_key = cls.cache_key_name(*args)
+        memo = cls._request_cache()
+        if memo is not None and cache_key in memo:
+            cls._record_lookup('request')
+            return copy.copy(memo[cache_key])
+
+        process_entries = cls._process_cache()
+        if process_entries is not None and cache_key in process_entries:
+            current = process_entries[cache_key]
+            cls._record_lookup('process')
+        else:
+            current = cls._current_from_cache(cache_key, args)
+            if process_entries is not None:
+                process_entries[cache_key] = current
+
+        if memo is not None:
+            memo[cache_key] = current
+        return copy.copy(current)
+
+    @classmethod
+    def _current_from_cache(cls, cache_key, args):
+        """
+        Return the active configuration entry from cache or the database.
         """
-        cached = cache.get(cls.cache_key_name(*args))
+        cached = cache.get(cache_key)
         if cached is not None:
+            cls._record_lookup('cache')
             return cached
 
         key_dict = dict(zip(cls.KEY_FIELDS, args))
@@ -129,9 +238,18 @@ class ConfigurationModel(models.Model):
         except IndexError:
             current = cls(**key_dict)
 
-        cache.set(cls.cache_key_name(*args), current, cls.cache_timeout)
+        cache.set(cache_key, current, cls.cache_timeout)
+        cls._record_lookup('database')
         return current
 
+    @classmethod
+    def _record_lookup(cls, source):
+        """Count where a current entry was found, per model."""
+        dog_stats_api.increment(
+            'config_models.current',
+            tags=[u'model:{}'.format(cls.__name__), u'source:{}'.format(source)]
+        )
+
     @classmethod
     def is_enabled(cls):
         """Returns True if this feature is configured as enabled, else False."""
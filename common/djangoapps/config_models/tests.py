@@ -3,17 +3,23 @@
 Tests of ConfigurationModel
 """
 
+import time
+
 import ddt
 from django.contrib.auth.models import User
+from django.core.cache import get_cache
 from django.db import models
 from django.test import TestCase
+from django.test.utils import override_settings
 from rest_framework.test import APIRequestFactory
 
 from freezegun import freeze_time
 
 from mock import patch, Mock
+import config_models.models
 from config_models.models import ConfigurationModel
 from config_models.views import ConfigurationModelCurrentAPIView
+from request_cache.middleware import RequestCache
 
 
 class ExampleConfig(ConfigurationModel):
@@ -295,6 +301,92 @@ class KeyedConfigurationModelTests(TestCase):
         self.assertEquals(ExampleKeyedConfig.key_values(), fake_result)
 
 
+@ddt.ddt
+@patch('config_models.models.cache', get_cache('django.core.cache.backends.locmem.LocMemCache'))
+class CurrentCachingTests(TestCase):
+    """
+    Tests of the request and process caches used by ConfigurationModel.current
+    """
+    def setUp(self):
+        super(CurrentCachingTests, self).setUp()
+        config_models.models.cache.clear()
+        self.addCleanup(config_models.models._PROCESS_CACHE.clear)  # pylint: disable=protected-access
+        ExampleConfig(string_field='first').save()
+
+    def test_request_cache(self):
+        RequestCache().process_request(Mock())
+        self.addCleanup(RequestCache.clear_request_cache)
+
+        with patch.object(config_models.models.cache, 'get', return_value=None) as mock_get:
+            self.assertEqual(ExampleConfig.current().string_field, 'first')
+            self.assertEqual(ExampleConfig.current().string_field, 'first')
+            self.assertEqual(mock_get.call_count, 1)
+
+        ExampleConfig(string_field='second').save()
+        self.assertEqual(ExampleConfig.current().string_field, 'second')
+
+    def test_no_process_cache(self):
+        ExampleConfig.current()
+        with patch.object(config_models.models.cache, 'get', return_value=None) as mock_get:
+            ExampleConfig.current()
+            self.assertEqual(mock_get.call_count, 1)
+
+    @override_settings(CONFIG_MODEL_PROCESS_CACHE_TIMEOUT=60)
+    def test_process_cache(self):
+        self.assertEqual(ExampleConfig.current().string_field, 'first')
+        with patch.object(config_models.models.cache, 'get') as mock_get:
+            self.assertEqual(ExampleConfig.current().string_field, 'first')
+            self.assertFalse(mock_get.called)
+
+        # Another process changes the configuration.
+        with patch('config_models.models._PROCESS_CACHE', {}):
+            ExampleConfig(string_field='second').save()
+
+        # Until the timeout, this process keeps using what it read...
+        self.assertEqual(ExampleConfig.current().string_field, 'first')
+        # ...and then notices that the configuration has changed.
+        with patch('config_models.models.time.time', return_value=time.time() + 61):
+            self.assertEqual(ExampleConfig.current().string_field, 'second')
+
+    @override_settings(CONFIG_MODEL_PROCESS_CACHE_TIMEOUT=60)
+    def test_process_cache_save(self):
+        self.assertEqual(ExampleConfig.current().string_field, 'first')
+        ExampleConfig(string_field='second').save()
+        self.assertEqual(ExampleConfig.current().string_field, 'second')
+
+    @override_settings(CONFIG_MODEL_PROCESS_CACHE_TIMEOUT=60)
+    def test_process_cache_version_lost(self):
+        self.assertEqual(ExampleConfig.current().string_field, 'first')
+        with patch('config_models.models._PROCESS_CACHE', {}):
+            ExampleConfig(string_field='second').save()
+        # The version stamp is evicted along with the shared cache's entries.
+        config_models.models.cache.clear()
+
+        with patch('config_models.models.time.time', return_value=time.time() + 61):
+            self.assertEqual(ExampleConfig.current().string_field, 'second')
+
+    @override_settings(CONFIG_MODEL_PROCESS_CACHE_TIMEOUT=60)
+    def test_process_cache_max_age(self):
+        self.assertEqual(ExampleConfig.current().string_field, 'first')
+        # A change that didn't go through save(), so the version is unchanged.
+        ExampleConfig.objects.update(string_field='second')
+        config_models.models.cache.delete(ExampleConfig.cache_key_name())
+
+        later = time.time() + 61
+        with patch('config_models.models.time.time', return_value=later):
+            self.assertEqual(ExampleConfig.current().string_field, 'first')
+        with patch('config_models.models.time.time', return_value=later + ExampleConfig.cache_timeout):
+            self.assertEqual(ExampleConfig.current().string_field, 'second')
+
+    @ddt.data(0, 60)
+    def test_entries_not_shared(self, process_cache_timeout):
+        RequestCache().process_request(Mock())
+        self.addCleanup(RequestCache.clear_request_cache)
+        with override_settings(CONFIG_MODEL_PROCESS_CACHE_TIMEOUT=process_cache_timeout):
+            ExampleConfig.current().string_field = 'changed'
+            self.assertEqual(ExampleConfig.current().string_field, 'first')
+
+
 @ddt.ddt
 class ConfigurationModelAPITests(TestCase):
     """
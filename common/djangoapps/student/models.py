@@ -53,6 +53,7 @@ from openedx.core.djangoapps.commerce.utils import ecommerce_api_client, ECOMMER
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from util.model_utils import emit_field_changed_events, get_changed_fields_dict
 from util.query import use_read_replica_if_available
+from request_cache.middleware import RequestCache
 from util.milestones_helpers import is_entrance_exams_enabled
 
 
@@ -100,20 +101,23 @@ class AnonymousUserId(models.Model):
     unique_together = (user, course_id)
 
 
-def anonymous_id_for_user(user, course_id, save=True):
-    """
-    Return a unique id for a (user, course) pair, suitable for inserting
-    into e.g. personalized survey links.
+# How long the user of an anonymous id is cached for by `user_by_anonymous_id`.
+ANONYMOUS_USER_ID_CACHE_TIMEOUT = 24 * 60 * 60
+# How many AnonymousUserId rows are inserted per query.
+ANONYMOUS_USER_ID_BATCH_SIZE = 1000
 
-    If user is an `AnonymousUser`, returns `None`
 
-    Keyword arguments:
-    save -- Whether the id should be saved in an AnonymousUserId object.
+def _anonymous_user_id_cache_key(uid):
     """
-    # This part is for ability to get xblock instance in xblock_noauth handlers, where user is unauthenticated.
-    if user.is_anonymous():
-        return None
+    Return the cache key of the id of the user with anonymous id `uid`.
+    """
+    return u"student.anonymous_user_id.{}".format(uid)
+
 
+def _compute_anonymous_id(user, course_id):
+    """
+    Return the anonymous id of `user` in `course_id`, and remember it on `user`.
+    """
     cached_id = getattr(user, '_anonymous_id', {}).get(course_id)
     if cached_id is not None:
         return cached_id
@@ -130,6 +134,42 @@ def anonymous_id_for_user(user, course_id, save=True):
         user._anonymous_id = {}  # pylint: disable=protected-access
 
     user._anonymous_id[course_id] = digest  # pylint: disable=protected-access
+    return digest
+
+
+def _log_anonymous_id_mismatch(user, course_id, stored_id, digest):
+    """
+    Log that the anonymous id stored for a user doesn't match the one computed.
+    """
+    log.error(
+        u"Stored anonymous user id %r for user %r "
+        u"in course %r doesn't match computed id %r",
+        user,
+        course_id,
+        stored_id,
+        digest
+    )
+
+
+def anonymous_id_for_user(user, course_id, save=True):
+    """
+    Return a unique id for a (user, course) pair, suitable for inserting
+    into e.g. personalized survey links.
+
+    If user is an `AnonymousUser`, returns `None`
+
+    Keyword arguments:
+    save -- Whether the id should be saved in an AnonymousUserId object.
+    """
+    # This part is for ability to get xblock instance in xblock_noauth handlers, where user is unauthenticated.
+    if user.is_anonymous():
+        return None
+
+    cached_id = getattr(user, '_anonymous_id', {}).get(course_id)
+    if cached_id is not None:
+        return cached_id
+
+    digest = _compute_anonymous_id(user, course_id)
 
     if save is False:
         return digest
@@ -141,14 +181,7 @@ def anonymous_id_for_user(user, course_id, save=True):
             course_id=course_id
         )
         if anonymous_user_id.anonymous_user_id != digest:
-            log.error(
-                u"Stored anonymous user id %r for user %r "
-                u"in course %r doesn't match computed id %r",
-                user,
-                course_id,
-                anonymous_user_id.anonymous_user_id,
-                digest
-            )
+            _log_anonymous_id_mismatch(user, course_id, anonymous_user_id.anonymous_user_id, digest)
     except IntegrityError:
         # Another thread has already created this entry, so
         # continue
@@ -157,6 +190,56 @@ def anonymous_id_for_user(user, course_id, save=True):
     return digest
 
 
+def anonymous_ids_for_users(users, course_id, save=True):
+    """
+    Return a dict mapping the id of each of `users` to its unique id in
+    `course_id`, as `anonymous_id_for_user` would.
+
+    The ids are computed for all of the users at once, and those that
+    aren't saved yet are saved with a few bulk inserts, rather than with a
+    query or two for each user.
+
+    Keyword arguments:
+    save -- Whether the ids should be saved in AnonymousUserId objects.
+    """
+    users = [user for user in users if not user.is_anonymous()]
+    digests = {user.id: _compute_anonymous_id(user, course_id) for user in users}
+    if not save or not digests:
+        return digests
+
+    users_by_id = {user.id: user for user in users}
+    user_ids = list(digests)
+    missing = []
+    for start in xrange(0, len(user_ids), ANONYMOUS_USER_ID_BATCH_SIZE):
+        batch = user_ids[start:start + ANONYMOUS_USER_ID_BATCH_SIZE]
+        stored = dict(
+            (anonymous_user_id.user_id, anonymous_user_id.anonymous_user_id)
+            for anonymous_user_id in AnonymousUserId.objects.filter(user_id__in=batch, course_id=course_id)
+        )
+        for user_id in batch:
+            if user_id not in stored:
+                missing.append(user_id)
+            elif stored[user_id] != digests[user_id]:
+                _log_anonymous_id_mismatch(users_by_id[user_id], course_id, stored[user_id], digests[user_id])
+
+    for start in xrange(0, len(missing), ANONYMOUS_USER_ID_BATCH_SIZE):
+        batch = missing[start:start + ANONYMOUS_USER_ID_BATCH_SIZE]
+        try:
+            AnonymousUserId.objects.bulk_create([
+                AnonymousUserId(user_id=user_id, course_id=course_id, anonymous_user_id=digests[user_id])
+                for user_id in batch
+            ])
+        except IntegrityError:
+            # Some of these were created in the meantime, so save them one by one.
+            for user_id in batch:
+                user = users_by_id[user_id]
+                # Make anonymous_id_for_user look the row up rather than use the remembered id.
+                del user._anonymous_id[course_id]  # pylint: disable=protected-access
+                anonymous_id_for_user(user, course_id)
+
+    return digests
+
+
 def user_by_anonymous_id(uid):
     """
     Return user by anonymous_user_id using AnonymousUserId lookup table.
@@ -164,15 +247,38 @@ def user_by_anonymous_id(uid):
     Do not raise `django.ObjectDoesNotExist` exception,
     if there is no user for anonymous_student_id,
     because this function will be used inside xmodule w/o django access.
+
+    Anonymous ids never change, so the id of the user is cached.
     """
 
     if uid is None:
         return None
 
+    cache_key = _anonymous_user_id_cache_key(uid)
+    user_id = cache.get(cache_key)
     try:
-        return User.objects.get(anonymoususerid__anonymous_user_id=uid)
+        if user_id is not None:
+            return User.objects.get(id=user_id)
+        user = User.objects.get(anonymoususerid__anonymous_user_id=uid)
     except ObjectDoesNotExist:
         return None
+    cache.set(cache_key, user.id, ANONYMOUS_USER_ID_CACHE_TIMEOUT)
+    return user
+
+
+def users_by_anonymous_ids(uids):
+    """
+    Return a dict mapping each of the anonymous ids `uids` that belongs to
+    a user to that user, with one query.
+    """
+    uids = set(uid for uid in uids if uid is not None)
+    if not uids:
+        return {}
+
+    return {
+        anonymous_user_id.anonymous_user_id: anonymous_user_id.user
+        for anonymous_user_id in AnonymousUserId.objects.filter(anonymous_user_id__in=uids).select_related('user')
+    }
 
 
 class UserStanding(models.Model):
@@ -905,6 +1011,12 @@ class CourseEnrollment(models.Model):
 
     # cache key format e.g enrollment.<username>.<course_key>.mode = 'honor'
     COURSE_ENROLLMENT_CACHE_KEY = u"enrollment.{}.{}.mode"
+    # cache key format e.g enrollment.<user_id>.<course_key>.state = ('honor', True)
+    COURSE_ENROLLMENT_STATE_CACHE_KEY = u"enrollment.{}.{}.state"
+    # cache key format e.g enrollment.<user_id>.<org/course/>.partial = True
+    COURSE_ENROLLMENT_PARTIAL_CACHE_KEY = u"enrollment.{}.{}.partial"
+    # How many users' enrollments are looked up per query by is_enrolled_many.
+    BULK_LOOKUP_BATCH_SIZE = 1000
 
     class Meta(object):
         unique_together = (('user', 'course_id'),)
@@ -1263,6 +1375,82 @@ class CourseEnrollment(models.Model):
                 course_id
             )
 
+    @classmethod
+    def _cached(cls, cache_key, lookup):
+        """
+        Return the enrollment state cached under `cache_key`, calling
+        `lookup` to get it if it isn't cached.
+
+        The state is remembered for the rest of the current request, and in
+        the shared cache for settings.COURSE_ENROLLMENT_CACHE_TIMEOUT seconds.
+        Saving or deleting an enrollment clears the state it affects; see
+        `invalidate_enrollment_mode_cache`.
+        """
+        request_cache = RequestCache.get_request_cache()
+        if request_cache.request is not None and cache_key in request_cache.data:
+            return request_cache.data[cache_key]
+
+        timeout = getattr(settings, 'COURSE_ENROLLMENT_CACHE_TIMEOUT', 0)
+        value = cache.get(cache_key) if timeout else None
+        if value is None:
+            value = lookup()
+            if timeout:
+                cache.set(cache_key, value, timeout)
+
+        if request_cache.request is not None:
+            request_cache.data[cache_key] = value
+        return value
+
+    @classmethod
+    def _remember(cls, states):
+        """
+        Remember enrollment states that have been looked up, given as a dict
+        of cache keys to states, as `_cached` would.
+        """
+        request_cache = RequestCache.get_request_cache()
+        if request_cache.request is not None:
+            request_cache.data.update(states)
+        timeout = getattr(settings, 'COURSE_ENROLLMENT_CACHE_TIMEOUT', 0)
+        if timeout:
+            cache.set_many(states, timeout)
+
+    @classmethod
+    def clear_cached_states(cls, user_ids, course_key):
+        """
+        Forget the cached enrollment states of the users with ids `user_ids`
+        in the course `course_key`.
+
+        Saving or deleting an enrollment does this by itself, but updating
+        enrollments in bulk doesn't send signals, so callers that do so must
+        call this.
+        """
+        keys = []
+        partial_key = cls._partial_course_key(course_key)
+        for user_id in user_ids:
+            keys.append(cls.state_cache_key_name(user_id, course_key))
+            keys.append(cls.COURSE_ENROLLMENT_PARTIAL_CACHE_KEY.format(user_id, partial_key))
+
+        request_cache = RequestCache.get_request_cache()
+        for key in keys:
+            request_cache.data.pop(key, None)
+        cache.delete_many(keys)
+
+    @classmethod
+    def _enrollment_state(cls, user, course_key):
+        """
+        Returns (mode, is_active) for the user's enrollment in the course,
+        or (None, None) if the user has never enrolled in it.
+        """
+        def lookup():
+            """ Look the state up in the database. """
+            try:
+                record = CourseEnrollment.objects.get(user=user, course_id=course_key)
+                return (record.mode, record.is_active)
+            except cls.DoesNotExist:
+                return (None, None)
+
+        return cls._cached(cls.state_cache_key_name(user.id, course_key), lookup)
+
     @classmethod
     def is_enrolled(cls, user, course_key):
         """
@@ -1278,11 +1466,29 @@ class CourseEnrollment(models.Model):
         if not user.is_authenticated():
             return False
 
-        try:
-            record = CourseEnrollment.objects.get(user=user, course_id=course_key)
-            return record.is_active
-        except cls.DoesNotExist:
-            return False
+        return bool(cls._enrollment_state(user, course_key)[1])
+
+    @classmethod
+    def is_enrolled_many(cls, users, course_key):
+        """
+        Returns a dict mapping the id of each of `users` to whether that user
+        is enrolled in the course, as `is_enrolled` would, looking the
+        enrollments up a batch of users at a time.
+        """
+        users = [user for user in users if user.is_authenticated()]
+        enrolled = {}
+        for start in xrange(0, len(users), cls.BULK_LOOKUP_BATCH_SIZE):
+            user_ids = [user.id for user in users[start:start + cls.BULK_LOOKUP_BATCH_SIZE]]
+            states = dict.fromkeys(user_ids, (None, None))
+            for user_id, mode, is_active in CourseEnrollment.objects.filter(
+                    user_id__in=user_ids, course_id=course_key
+            ).values_list('user_id', 'mode', 'is_active'):
+                states[user_id] = (mode, bool(is_active))
+            cls._remember({
+                cls.state_cache_key_name(user_id, course_key): state for user_id, state in states.iteritems()
+            })
+            enrolled.update((user_id, bool(state[1])) for user_id, state in states.iteritems())
+        return enrolled
 
     @classmethod
     def is_enrolled_by_partial(cls, user, course_id_partial):
@@ -1301,16 +1507,28 @@ class CourseEnrollment(models.Model):
         """
         assert isinstance(course_id_partial, CourseKey)
         assert not course_id_partial.run  # None or empty string
-        course_key = SlashSeparatedCourseKey(course_id_partial.org, course_id_partial.course, '')
-        querystring = unicode(course_key.to_deprecated_string())
-        try:
-            return CourseEnrollment.objects.filter(
-                user=user,
-                course_id__startswith=querystring,
-                is_active=1
-            ).exists()
-        except cls.DoesNotExist:
-            return False
+        querystring = cls._partial_course_key(course_id_partial)
+
+        def lookup():
+            """ Look the enrollment up in the database. """
+            try:
+                return CourseEnrollment.objects.filter(
+                    user=user,
+                    course_id__startswith=querystring,
+                    is_active=1
+                ).exists()
+            except cls.DoesNotExist:
+                return False
+
+        return cls._cached(cls.COURSE_ENROLLMENT_PARTIAL_CACHE_KEY.format(user.id, querystring), lookup)
+
+    @staticmethod
+    def _partial_course_key(course_key):
+        """
+        Returns the prefix that `is_enrolled_by_partial` matches the course
+        ids of the enrollments in the course of `course_key` with.
+        """
+        return unicode(SlashSeparatedCourseKey(course_key.org, course_key.course, '').to_deprecated_string())
 
     @classmethod
     def enrollment_mode_for_user(cls, user, course_id):
@@ -1324,21 +1542,20 @@ class CourseEnrollment(models.Model):
             and is_active is whether the enrollment is active.
         Returns (None, None) if the courseenrollment record does not exist.
         """
-        try:
-            record = CourseEnrollment.objects.get(user=user, course_id=course_id)
-            return (record.mode, record.is_active)
-        except cls.DoesNotExist:
-            return (None, None)
+        return cls._enrollment_state(user, course_id)
 
     @classmethod
     def enrollments_for_user(cls, user):
         return CourseEnrollment.objects.filter(user=user, is_active=1)
 
-    def is_paid_course(self):
+    def is_paid_course(self, modes_dict=None):
         """
         Returns True, if course is paid
+
+        `modes_dict` is passed on to `CourseMode.is_white_label`, to avoid
+        looking the course modes up again.
         """
-        paid_course = CourseMode.is_white_label(self.course_id)
+        paid_course = CourseMode.is_white_label(self.course_id, modes_dict=modes_dict)
         if paid_course or CourseMode.is_professional_slug(self.mode):
             return True
 
@@ -1411,6 +1628,21 @@ class CourseEnrollment(models.Model):
         # Deprecated. Please use the `course_overview` property instead.
         return self.course_overview
 
+    @classmethod
+    def prefetch_course_overviews(cls, enrollments):
+        """
+        Load the course overviews of `enrollments` all at once, so their
+        `course_overview` properties don't each look their own up.
+
+        See `CourseOverview.get_from_ids` for how missing and out of date
+        overviews are handled.
+        """
+        course_overviews = CourseOverview.get_from_ids(enrollment.course_id for enrollment in enrollments)
+        # pylint: disable=protected-access
+        for enrollment in enrollments:
+            if not enrollment._course_overview:
+                enrollment._course_overview = course_overviews.get(enrollment.course_id)
+
     @property
     def course_overview(self):
         """
@@ -1466,6 +1698,18 @@ class CourseEnrollment(models.Model):
         """
         return cls.COURSE_ENROLLMENT_CACHE_KEY.format(user_id, unicode(course_key))
 
+    @classmethod
+    def state_cache_key_name(cls, user_id, course_key):
+        """Return the cache key of the enrollment state of a user in a course.
+        Args:
+            user_id(int): Id of user.
+            course_key(CourseKey): Course key, or its unicode.
+
+        Returns:
+            Unicode cache key
+        """
+        return cls.COURSE_ENROLLMENT_STATE_CACHE_KEY.format(user_id, unicode(course_key))
+
 
 @receiver(models.signals.post_save, sender=CourseEnrollment)
 @receiver(models.signals.post_delete, sender=CourseEnrollment)
@@ -1477,6 +1721,7 @@ def invalidate_enrollment_mode_cache(sender, instance, **kwargs):  # pylint: dis
         unicode(instance.course_id)
     )
     cache.delete(cache_key)
+    CourseEnrollment.clear_cached_states([instance.user_id], instance.course_id)
 
 
 class ManualEnrollmentAudit(models.Model):
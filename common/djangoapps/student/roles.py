@@ -4,6 +4,7 @@ adding users, removing users, and listing members
 """
 
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
 
 from django.contrib.auth.models import User
 import logging
@@ -38,10 +39,22 @@ class RoleCache(object):
     """
     A cache of the CourseAccessRoles held by a particular user
     """
-    def __init__(self, user):
-        self._roles = set(
-            CourseAccessRole.objects.filter(user=user).all()
-        )
+    def __init__(self, user, roles=None):
+        if roles is None:
+            roles = CourseAccessRole.objects.filter(user=user).all()
+        self._roles = set(roles)
+
+    @classmethod
+    def prefetch(cls, users):
+        """
+        Look up the CourseAccessRoles of all of `users` with a single query,
+        and cache them on the users as `RoleBase.has_user` does.
+        """
+        roles = defaultdict(list)
+        for access_role in CourseAccessRole.objects.filter(user__in=users):
+            roles[access_role.user_id].append(access_role)
+        for user in users:
+            user._roles = cls(user, roles[user.id])  # pylint: disable=protected-access
 
     def has_role(self, role, course_id, org):
         """
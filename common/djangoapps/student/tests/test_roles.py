@@ -193,3 +193,15 @@ class RoleCacheTestCase(TestCase):
     def test_empty_cache(self, role, target):
         cache = RoleCache(self.user)
         self.assertFalse(cache.has_role(*target))
+
+    def test_prefetch(self):
+        other_user = UserFactory()
+        CourseStaffRole(self.IN_KEY).add_users(self.user)
+        OrgInstructorRole(self.IN_KEY.org).add_users(other_user)
+
+        with self.assertNumQueries(1):
+            RoleCache.prefetch([self.user, other_user])
+        with self.assertNumQueries(0):
+            self.assertTrue(CourseStaffRole(self.IN_KEY).has_user(self.user))
+            self.assertFalse(CourseStaffRole(self.IN_KEY).has_user(other_user))
+            self.assertTrue(OrgInstructorRole(self.IN_KEY.org).has_user(other_user))
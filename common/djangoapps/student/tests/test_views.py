@@ -8,7 +8,10 @@ from pyquery import PyQuery as pq
 
 from django.core.urlresolvers import reverse
 from django.conf import settings
+from django.db import connection
 
+from certificates.models import CertificateStatuses
+from certificates.tests.factories import GeneratedCertificateFactory
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 from student.models import CourseEnrollment
 from student.helpers import DISABLE_UNENROLL_CERT_STATES
@@ -36,7 +39,7 @@ class TestStudentDashboardUnenrollments(ModuleStoreTestCase):
         self.cert_status = None
         self.client.login(username=self.USERNAME, password=self.PASSWORD)
 
-    def mock_cert(self, _user, _course_overview, _course_mode):  # pylint: disable=unused-argument
+    def mock_cert(self, _user, _course_overview, _course_mode, _cert_status=None):  # pylint: disable=unused-argument
         """ Return a preset certificate status. """
         if self.cert_status is not None:
             return {
@@ -103,3 +106,51 @@ class TestStudentDashboardUnenrollments(ModuleStoreTestCase):
             response = self.client.get(reverse('dashboard'))
 
             self.assertEqual(response.status_code, 200)
+
+
+@unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+class TestStudentDashboardQueries(ModuleStoreTestCase):
+    """
+    Query count regression tests for the student dashboard.
+    """
+    USERNAME = "Bob"
+    EMAIL = "bob@example.com"
+    PASSWORD = "edx"
+
+    def setUp(self):
+        super(TestStudentDashboardQueries, self).setUp()
+        self.user = UserFactory.create(username=self.USERNAME, email=self.EMAIL, password=self.PASSWORD)
+        self.client.login(username=self.USERNAME, password=self.PASSWORD)
+
+    def enroll(self, count):
+        """ Enroll the user in `count` new courses, with a certificate in each. """
+        for __ in range(count):
+            course = CourseFactory.create(emit_signals=True)
+            CourseEnrollmentFactory(course_id=course.id, user=self.user)
+            GeneratedCertificateFactory(
+                user=self.user, course_id=course.id, status=CertificateStatuses.notpassing, grade='0.1'
+            )
+
+    def dashboard_queries(self):
+        """ Return the number of queries made to render the dashboard. """
+        # Let the first request fill the caches.
+        self.client.get(reverse('dashboard'))
+        use_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        try:
+            response = self.client.get(reverse('dashboard'))
+            queries = len(connection.queries)
+        finally:
+            connection.use_debug_cursor = use_debug_cursor
+        self.assertEqual(response.status_code, 200)
+        return queries
+
+    def test_queries_independent_of_enrollments(self):
+        """
+        The dashboard looks up the data for all of the user's courses at once,
+        so more enrollments mustn't mean more queries.
+        """
+        self.enroll(1)
+        queries = self.dashboard_queries()
+        self.enroll(4)
+        self.assertEqual(self.dashboard_queries(), queries)
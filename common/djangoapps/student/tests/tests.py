@@ -15,12 +15,14 @@ from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from django.conf import settings
 from django.contrib.auth.models import User, AnonymousUser
 from django.core.urlresolvers import reverse
+from django.db import IntegrityError
 from django.test import TestCase
 from django.test.client import Client
+from django.test.utils import override_settings
 
 from student.models import (
-    anonymous_id_for_user, user_by_anonymous_id, CourseEnrollment,
-    unique_id_for_user, LinkedInAddToProfileConfiguration
+    anonymous_id_for_user, anonymous_ids_for_users, user_by_anonymous_id, users_by_anonymous_ids,
+    AnonymousUserId, CourseEnrollment, unique_id_for_user, LinkedInAddToProfileConfiguration
 )
 from student.views import (
     process_survey_link,
@@ -634,6 +636,46 @@ class EnrollInCourseTest(EnrollmentEventTestMixin, TestCase):
         self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
         self.assertEquals(enrollment.mode, "audit")
 
+    @override_settings(COURSE_ENROLLMENT_CACHE_TIMEOUT=60)
+    def test_enrollment_state_cached(self):
+        user = UserFactory.create()
+        course_id = SlashSeparatedCourseKey("edX", "Test101", "2013")
+        course_id_partial = SlashSeparatedCourseKey("edX", "Test101", None)
+        CourseEnrollment.enroll(user, course_id, "audit")
+
+        self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
+        self.assertTrue(CourseEnrollment.is_enrolled_by_partial(user, course_id_partial))
+        with self.assertNumQueries(0):
+            self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
+            self.assertTrue(CourseEnrollment.is_enrolled_by_partial(user, course_id_partial))
+            self.assertEqual(CourseEnrollment.enrollment_mode_for_user(user, course_id), ("audit", True))
+
+        # Changing the enrollment clears what was cached.
+        CourseEnrollment.unenroll(user, course_id)
+        self.assertFalse(CourseEnrollment.is_enrolled(user, course_id))
+        self.assertFalse(CourseEnrollment.is_enrolled_by_partial(user, course_id_partial))
+        CourseEnrollment.enroll(user, course_id, "honor")
+        self.assertEqual(CourseEnrollment.enrollment_mode_for_user(user, course_id), ("honor", True))
+
+    @override_settings(COURSE_ENROLLMENT_CACHE_TIMEOUT=60)
+    def test_is_enrolled_many(self):
+        course_id = SlashSeparatedCourseKey("edX", "Test101", "2013")
+        enrolled, unenrolled, never_enrolled = [UserFactory.create() for __ in range(3)]
+        CourseEnrollment.enroll(enrolled, course_id)
+        CourseEnrollment.enroll(unenrolled, course_id)
+        CourseEnrollment.unenroll(unenrolled, course_id)
+        users = [enrolled, unenrolled, never_enrolled, AnonymousUser()]
+
+        with patch.object(CourseEnrollment, 'BULK_LOOKUP_BATCH_SIZE', 2):
+            with self.assertNumQueries(2):
+                result = CourseEnrollment.is_enrolled_many(users, course_id)
+        self.assertEqual(result, {enrolled.id: True, unenrolled.id: False, never_enrolled.id: False})
+
+        # The states looked up are cached for is_enrolled.
+        with self.assertNumQueries(0):
+            for user in users[:3]:
+                self.assertEqual(CourseEnrollment.is_enrolled(user, course_id), result[user.id])
+
     def test_enrollment_non_existent_user(self):
         # Testing enrollment of newly unsaved user (i.e. no database entry)
         user = User(username="rusty", email="rusty@fake.edx.org")
@@ -886,6 +928,41 @@ class AnonymousLookupTable(ModuleStoreTestCase):
         self.assertEqual(self.user, real_user)
         self.assertEqual(anonymous_id, anonymous_id_for_user(self.user, course2.id, save=False))
 
+    def test_bulk_ids(self):
+        users = [self.user, UserFactory(), UserFactory()]
+        # One of them is already saved
+        anonymous_id_for_user(users[0], self.course.id)
+        expected = {
+            user.id: anonymous_id_for_user(User.objects.get(id=user.id), self.course.id, save=False)
+            for user in users
+        }
+
+        # Look up the saved ones, then save the others at once
+        fresh_users = list(User.objects.filter(id__in=expected))
+        with self.assertNumQueries(2):
+            anonymous_ids = anonymous_ids_for_users(fresh_users, self.course.id)
+        self.assertEqual(anonymous_ids, expected)
+        self.assertEqual(
+            set(AnonymousUserId.objects.filter(course_id=self.course.id).values_list('anonymous_user_id', flat=True)),
+            set(expected.values())
+        )
+        self.assertEqual(users_by_anonymous_ids(anonymous_ids.values() + ['bogus']), {
+            anonymous_id: User.objects.get(id=user_id) for user_id, anonymous_id in anonymous_ids.items()
+        })
+
+    def test_bulk_ids_created_meanwhile(self):
+        users = [self.user, UserFactory()]
+        with patch.object(AnonymousUserId.objects, 'bulk_create', side_effect=IntegrityError):
+            anonymous_ids = anonymous_ids_for_users(users, None)
+        self.assertEqual(anonymous_ids, {user.id: unique_id_for_user(user, save=False) for user in users})
+        self.assertEqual(AnonymousUserId.objects.filter(user__in=users).count(), 2)
+
+    def test_user_by_anonymous_id_cached(self):
+        anonymous_id = anonymous_id_for_user(self.user, self.course.id)
+        self.assertEqual(user_by_anonymous_id(anonymous_id), self.user)
+        AnonymousUserId.objects.all().delete()
+        self.assertEqual(user_by_anonymous_id(anonymous_id), self.user)
+
 
 @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
 @ddt.ddt
@@ -56,7 +56,9 @@ from student.models import (
 from student.forms import AccountCreationForm, PasswordResetFormNoActive
 
 from verify_student.models import SoftwareSecurePhotoVerification  # pylint: disable=import-error
-from certificates.models import CertificateStatuses, certificate_status_for_student
+from certificates.models import (
+    CertificateStatuses, GeneratedCertificate, certificate_status, certificate_status_for_student
+)
 from certificates.api import (  # pylint: disable=import-error
     get_certificate_url,
     has_html_certificates_enabled,
@@ -184,7 +186,7 @@ def process_survey_link(survey_link, user):
     return survey_link.format(UNIQUE_ID=unique_id_for_user(user))
 
 
-def cert_info(user, course_overview, course_mode):
+def cert_info(user, course_overview, course_mode, cert_status=None):
     """
     Get the certificate info needed to render the dashboard section for the given
     student and course.
@@ -193,6 +195,8 @@ def cert_info(user, course_overview, course_mode):
         user (User): A user.
         course_overview (CourseOverview): A course.
         course_mode (str): The enrollment mode (honor, verified, audit, etc.)
+        cert_status (dict): The student's certificate status in the course, as
+            returned by `certificate_status_for_student`, if already known.
 
     Returns:
         dict: A dictionary with keys:
@@ -207,12 +211,9 @@ def cert_info(user, course_overview, course_mode):
     """
     if not course_overview.may_certify():
         return {}
-    return _cert_info(
-        user,
-        course_overview,
-        certificate_status_for_student(user, course_overview.id),
-        course_mode
-    )
+    if cert_status is None:
+        cert_status = certificate_status_for_student(user, course_overview.id)
+    return _cert_info(user, course_overview, cert_status, course_mode)
 
 
 def reverification_info(statuses):
@@ -253,7 +254,10 @@ def get_course_enrollments(user, org_to_include, orgs_to_exclude):
         generator[CourseEnrollment]: a sequence of enrollments to be displayed
         on the user's dashboard.
     """
-    for enrollment in CourseEnrollment.enrollments_for_user(user):
+    enrollments = list(CourseEnrollment.enrollments_for_user(user))
+    CourseEnrollment.prefetch_course_overviews(enrollments)
+
+    for enrollment in enrollments:
 
         # If the course is missing or broken, log an error and skip it.
         course_overview = enrollment.course_overview
@@ -551,6 +555,9 @@ def dashboard(request):
         for course_id, modes in unexpired_course_modes.iteritems()
     }
 
+    # Retrieve the certificates for each course
+    certificates = GeneratedCertificate.certificates_for_student(user, enrolled_course_ids)
+
     # Check to see if the student has recently enrolled in a course.
     # If so, display a notification message confirming the enrollment.
     enrollment_message = _create_recent_enrollment_message(
@@ -614,18 +621,22 @@ def dashboard(request):
     # there is no verification messaging to display.
     verify_status_by_course = check_verify_status_by_course(user, course_enrollments)
     cert_statuses = {
-        enrollment.course_id: cert_info(request.user, enrollment.course_overview, enrollment.mode)
+        enrollment.course_id: cert_info(
+            request.user,
+            enrollment.course_overview,
+            enrollment.mode,
+            certificate_status(certificates.get(enrollment.course_id))
+        )
         for enrollment in course_enrollments
     }
 
     # only show email settings for Mongo course and when bulk email is turned on
-    show_email_settings_for = frozenset(
-        enrollment.course_id for enrollment in course_enrollments if (
-            settings.FEATURES['ENABLE_INSTRUCTOR_EMAIL'] and
-            modulestore().get_modulestore_type(enrollment.course_id) != ModuleStoreEnum.Type.xml and
-            CourseAuthorization.instructor_email_enabled(enrollment.course_id)
+    show_email_settings_for = frozenset()
+    if settings.FEATURES['ENABLE_INSTRUCTOR_EMAIL']:
+        show_email_settings_for = frozenset(
+            course_id for course_id in CourseAuthorization.instructor_email_enabled_for_courses(enrolled_course_ids)
+            if modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml
         )
-    )
 
     # Verification Attempts
     # Used to generate the "you must reverify for course x" banner
@@ -635,26 +646,36 @@ def dashboard(request):
     statuses = ["approved", "denied", "pending", "must_reverify"]
     reverifications = reverification_info(statuses)
 
+    # Only enrollments in courses with a verified mode, for which the student
+    # has no certificate yet, can be refunded.
     show_refund_option_for = frozenset(
         enrollment.course_id for enrollment in course_enrollments
-        if enrollment.refundable()
+        if (
+            enrollment.course_id not in certificates and
+            'verified' in course_modes_by_course[enrollment.course_id] and
+            enrollment.refundable()
+        )
     )
 
+    redeemed_registration_codes = defaultdict(list)
+    for registration_code in CourseRegistrationCode.objects.filter(
+            course_id__in=enrolled_course_ids,
+            registrationcoderedemption__redeemed_by=request.user
+    ).select_related('invoice_item'):
+        redeemed_registration_codes[registration_code.course_id].append(registration_code)
+
     block_courses = frozenset(
         enrollment.course_id for enrollment in course_enrollments
         if is_course_blocked(
             request,
-            CourseRegistrationCode.objects.filter(
-                course_id=enrollment.course_id,
-                registrationcoderedemption__redeemed_by=request.user
-            ),
+            redeemed_registration_codes[enrollment.course_id],
             enrollment.course_id
         )
     )
 
     enrolled_courses_either_paid = frozenset(
         enrollment.course_id for enrollment in course_enrollments
-        if enrollment.is_paid_course()
+        if enrollment.is_paid_course(modes_dict=_selectable_modes(course_modes_by_course[enrollment.course_id]))
     )
 
     # If there are *any* denied reverifications that have not been toggled off,
@@ -713,6 +734,18 @@ def dashboard(request):
     return render_to_response('dashboard.html', context)
 
 
+def _selectable_modes(course_modes):
+    """
+    Returns those of the unexpired `course_modes` of a course (a dict keyed by
+    slug) that `CourseMode.modes_for_course_dict` would return.
+    """
+    selectable_modes = {
+        slug: mode for slug, mode in course_modes.iteritems()
+        if slug not in CourseMode.CREDIT_MODES
+    }
+    return selectable_modes or {CourseMode.DEFAULT_MODE_SLUG: CourseMode.DEFAULT_MODE}
+
+
 def _create_recent_enrollment_message(course_enrollments, course_modes):  # pylint: disable=invalid-name
     """
     Builds a recent course enrollment message.
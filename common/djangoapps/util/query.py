@@ -7,3 +7,21 @@ def use_read_replica_if_available(queryset):
     If there is a database called 'read_replica', use that database for the queryset.
     """
     return queryset.using("read_replica") if "read_replica" in settings.DATABASES else queryset
+
+
+def iterate_in_pages(queryset, page_size, key='pk'):
+    """
+    Yield the objects of `queryset` ordered by `key`, which must be a unique
+    field, as lists of at most `page_size` objects.
+
+    Each page is fetched with its own query for the objects after the last
+    one of the previous page, so that only one page is held in memory at a
+    time and later pages cost no more than the first one.
+    """
+    queryset = queryset.order_by(key)
+    page = list(queryset[:page_size])
+    while page:
+        yield page
+        if len(page) < page_size:
+            break
+        page = list(queryset.filter(**{key + '__gt': getattr(page[-1], key)})[:page_size])
@@ -0,0 +1,39 @@
+"""
+Tests for util.query
+"""
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from student.tests.factories import UserFactory
+from util.query import iterate_in_pages
+
+
+class IterateInPagesTest(TestCase):
+    """
+    Tests for iterate_in_pages.
+    """
+    def setUp(self):
+        super(IterateInPagesTest, self).setUp()
+        self.users = [UserFactory.create(username='user{}'.format(index)) for index in range(5)]
+
+    def test_pages(self):
+        pages = list(iterate_in_pages(User.objects.all(), 2))
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), self.users)
+
+    def test_one_query_per_page(self):
+        with self.assertNumQueries(3):
+            list(iterate_in_pages(User.objects.all(), 2))
+        # A last full page needs one more query to find that it was the last.
+        with self.assertNumQueries(4):
+            list(iterate_in_pages(User.objects.exclude(id=self.users[-1].id), 2))
+
+    def test_key(self):
+        pages = list(iterate_in_pages(User.objects.filter(username__in=['user3', 'user1', 'user4']), 2, 'username'))
+        self.assertEqual(
+            [[user.username for user in page] for page in pages],
+            [['user1', 'user3'], ['user4']]
+        )
+
+    def test_empty(self):
+        self.assertEqual(list(iterate_in_pages(User.objects.none(), 2)), [])
@@ -2,6 +2,11 @@
 Parser and evaluator for FormulaResponse and NumericalResponse
 
 Uses pyparsing to parse. Main function as of now is evaluator().
+
+Parsing is by far the slowest part of evaluating an expression, and problems
+evaluate the same few expressions over and over (FormulaResponse evaluates
+both the instructor's and the student's answer once per sample), so parsed
+expressions are cached and compiled into plain Python callables.
 """
 
 import math
@@ -73,6 +78,11 @@ SUFFIXES = {
 }
 
 
+# How many parsed expressions `parse_expression` keeps around.
+PARSE_CACHE_SIZE = 1000
+_PARSE_CACHE = {}
+
+
 class UndefinedVariable(Exception):
     """
     Indicate when a student inputs a variable which was not expected.
@@ -216,6 +226,25 @@ def add_defaults(variables, functions, case_sensitive):
     return (all_variables, all_functions)
 
 
+def parse_expression(math_expr, case_sensitive=False):
+    """
+    Return a parsed `ParseAugmenter` for `math_expr`.
+
+    Parses are cached, so the same expression is only ever parsed once (until
+    the cache fills up and is emptied).  Raises the same exceptions as
+    `ParseAugmenter.parse_algebra`.
+    """
+    key = (math_expr, case_sensitive)
+    math_interpreter = _PARSE_CACHE.get(key)
+    if math_interpreter is None:
+        math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+        math_interpreter.parse_algebra()
+        if len(_PARSE_CACHE) >= PARSE_CACHE_SIZE:
+            _PARSE_CACHE.clear()
+        _PARSE_CACHE[key] = math_interpreter
+    return math_interpreter
+
+
 def evaluator(variables, functions, math_expr, case_sensitive=False):
     """
     Evaluate an expression; that is, take a string of math and return a float.
@@ -229,8 +258,7 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
         return float('nan')
 
     # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    math_interpreter = parse_expression(math_expr, case_sensitive)
 
     # Get our variables together.
     all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
@@ -238,24 +266,48 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     # ...and check them
     math_interpreter.check_variables(all_variables, all_functions)
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
+    return math_interpreter.compile()(all_variables, all_functions)
 
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+def evaluate_samples(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression once for each dictionary in `variables_list`.
+
+    Returns the same list as calling `evaluator` for each of them, but when
+    every sample defines the same variables, evaluates them all in one go over
+    numpy arrays.  If that raises anything (a floating point error, a function
+    that doesn't take arrays), falls back to evaluating sample by sample, so
+    results and exceptions are exactly those of `evaluator`.
+    """
+    if not variables_list:
+        return []
+    if math_expr.strip() == "":
+        return [float('nan')] * len(variables_list)
+
+    names = set(variables_list[0])
+    if all(set(variables) == names for variables in variables_list):
+        math_interpreter = parse_expression(math_expr, case_sensitive)
+        arrays = {
+            name: numpy.array([variables[name] for variables in variables_list])
+            for name in names
+        }
+        all_variables, all_functions = add_defaults(arrays, functions, case_sensitive)
+        math_interpreter.check_variables(all_variables, all_functions)
+        try:
+            with numpy.errstate(all='raise', under='ignore'):
+                result = math_interpreter.compile()(all_variables, all_functions)
+        except Exception:  # pylint: disable=broad-except
+            pass
+        else:
+            if isinstance(result, numpy.ndarray):
+                return result.tolist()
+            # The expression doesn't depend on the samples.
+            return [result] * len(variables_list)
+
+    return [
+        evaluator(variables, functions, math_expr, case_sensitive)
+        for variables in variables_list
+    ]
 
 
 class ParseAugmenter(object):
@@ -275,6 +327,7 @@ class ParseAugmenter(object):
         self.case_sensitive = case_sensitive
         self.math_expr = math_expr
         self.tree = None
+        self.compiled = None
         self.variables_used = set()
         self.functions_used = set()
 
@@ -397,6 +450,104 @@ class ParseAugmenter(object):
         # Find the value of the entire tree.
         return handle_node(self.tree)
 
+    def compile(self):
+        """
+        Turn `self.tree` into a function of (variables, functions).
+
+        The function computes exactly what reducing the tree with the `eval_*`
+        actions would, without walking the parse tree again.  Variables and
+        functions are looked up in the dictionaries it is called with, whose
+        keys must already be lowercased if the parse is case-insensitive (as
+        `add_defaults` does).  Values may be numbers or numpy arrays.
+        """
+        if self.compiled is not None:
+            return self.compiled
+
+        if self.case_sensitive:
+            casify = lambda x: x
+        else:
+            casify = lambda x: x.lower()  # Lowercase for case insens.
+
+        def operands(parse_result):
+            """Return the compiled children, leaving out operator tokens."""
+            return [k for k in parse_result if callable(k)]
+
+        def compile_number(parse_result):
+            """Numbers are constants."""
+            value = eval_number(parse_result)
+            return lambda variables, functions: value
+
+        def compile_variable(parse_result):
+            """Look variables up when called."""
+            name = casify(parse_result[0])
+            return lambda variables, functions: variables[name]
+
+        def compile_function(parse_result):
+            """Look functions up when called, and apply them to their argument."""
+            name, argument = casify(parse_result[0]), parse_result[1]
+            return lambda variables, functions: functions[name](argument(variables, functions))
+
+        def compile_atom(parse_result):
+            """Parentheses disappear."""
+            return operands(parse_result)[0]
+
+        def compile_power(parse_result):
+            """Exponentiate right to left, like `eval_power`."""
+            terms = operands(parse_result)
+            if len(terms) == 1:
+                return terms[0]
+            return lambda variables, functions: reduce(
+                lambda a, b: b ** a, reversed([term(variables, functions) for term in terms])
+            )
+
+        def compile_parallel(parse_result):
+            """Combine like `eval_parallel`."""
+            terms = operands(parse_result)
+            if len(terms) == 1:
+                return terms[0]
+
+            def parallel(variables, functions):
+                """Compute the parallel combination of the terms."""
+                values = [term(variables, functions) for term in terms]
+                if any(isinstance(value, numpy.ndarray) for value in values):
+                    return 1. / sum(1. / value for value in values)
+                return eval_parallel(values)
+            return parallel
+
+        def compile_operations(operators, initial):
+            """Compile a sum or product: apply the operators left to right, starting from `initial`."""
+            def compile_node(parse_result):
+                """Pair each operand with the operator before it."""
+                steps = []
+                current_op = operators[None]
+                for token in parse_result:
+                    if token in operators:
+                        current_op = operators[token]
+                    else:
+                        steps.append((current_op, token))
+
+                def operate(variables, functions):
+                    """Apply the operators in order."""
+                    total = initial
+                    for operation, term in steps:
+                        total = operation(total, term(variables, functions))
+                    return total
+                return operate
+            return compile_node
+
+        compile_actions = {
+            'number': compile_number,
+            'variable': compile_variable,
+            'function': compile_function,
+            'atom': compile_atom,
+            'power': compile_power,
+            'parallel': compile_parallel,
+            'product': compile_operations({None: operator.mul, '*': operator.mul, '/': operator.truediv}, 1.0),
+            'sum': compile_operations({None: operator.add, '+': operator.add, '-': operator.sub}, 0.0),
+        }
+        self.compiled = self.reduce_tree(compile_actions)
+        return self.compiled
+
     def check_variables(self, valid_variables, valid_functions):
         """
         Confirm that all the variables used in the tree are valid/defined.
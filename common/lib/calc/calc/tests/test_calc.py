@@ -559,3 +559,69 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+    def test_parse_cache(self):
+        """
+        The same expression is only parsed once, case sensitivity aside
+        """
+        first = calc.parse_expression('x^2 + 1')
+        self.assertIs(first, calc.parse_expression('x^2 + 1'))
+        self.assertIsNot(first, calc.parse_expression('x^2 + 1', case_sensitive=True))
+        self.assertEqual(5, calc.evaluator({'x': 2}, {}, 'x^2 + 1'))
+        self.assertEqual(10, calc.evaluator({'x': 3}, {}, 'x^2 + 1'))
+
+        with self.assertRaises(ParseException):
+            calc.parse_expression('1 +')
+
+
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Run tests for calc.evaluate_samples, which should always agree with
+    evaluating each sample with calc.evaluator
+    """
+
+    SAMPLES = [{'x': 1.5, 'y': -2.0}, {'x': 0.25, 'y': 3.0}, {'x': 2.0, 'y': 0.5}]
+
+    def assert_same_as_evaluator(self, math_expr, samples=None, functions=None):
+        """
+        Check that evaluate_samples gives what evaluator does for each sample
+        """
+        samples = samples or self.SAMPLES
+        functions = functions or {}
+        expected = [calc.evaluator(sample, functions, math_expr) for sample in samples]
+        actual = calc.evaluate_samples(samples, functions, math_expr)
+        self.assertEqual(len(expected), len(actual))
+        for exp, act in zip(expected, actual):
+            if numpy.isnan(exp):
+                self.assertTrue(numpy.isnan(act))
+            else:
+                self.assertAlmostEqual(exp, act)
+
+    def test_expressions(self):
+        for math_expr in ('x + y', '-x - y + 2', 'x*y/2', 'x^2^0.5', 'x || 2',
+                          'sin(x) + cos(y)*e', '2*pi', '3k*x', '(x+y)^2'):
+            self.assert_same_as_evaluator(math_expr)
+
+    def test_scalar_fallback(self):
+        """
+        Errors and scalar-only functions evaluate sample by sample
+        """
+        # fact() won't take an array; y || 0 is nan only for the middle sample.
+        self.assert_same_as_evaluator('fact(x*0+3)')
+        self.assert_same_as_evaluator('x || (y - 3)')
+        self.assert_same_as_evaluator('f(x)', functions={'f': lambda x: float(x) + 1})
+        with self.assertRaises(ValueError):
+            calc.evaluate_samples(self.SAMPLES, {}, 'fact(x)')
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples(self.SAMPLES, {}, 'x/(y-3)')
+
+    def test_mismatched_samples(self):
+        self.assert_same_as_evaluator('x + 1', samples=[{'x': 1}, {'x': 2, 'y': 3}])
+
+    def test_empty(self):
+        self.assertEqual([], calc.evaluate_samples([], {}, 'x'))
+        self.assertTrue(all(numpy.isnan(value) for value in calc.evaluate_samples(self.SAMPLES, {}, ' ')))
+
+    def test_undefined_vars(self):
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.evaluate_samples(self.SAMPLES, {}, 'x + z')
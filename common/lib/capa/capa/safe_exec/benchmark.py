@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Benchmark sandboxed execution of problem scripts, with and without the pool.
+
+Runs the <script type="loncapa/python"> code of every problem file found under
+the given directories (by default, the test courses in common/test/data), first
+through codejail directly and then through a pool of warm workers, and reports
+per-execution latencies.  CodeJail must be configured for this to measure
+anything, so pass the sandboxed Python with --python-bin:
+
+    python -m capa.safe_exec.benchmark --python-bin /edx/app/edxapp/venvs/edxapp-sandbox/bin/python
+"""
+
+import argparse
+import os
+import time
+
+from codejail import jail_code
+from lxml import etree
+
+from capa.safe_exec import configure_pool, safe_exec
+
+DEFAULT_DATA_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "..", "test", "data"
+)
+
+
+def problem_scripts(data_dirs):
+    """Yield (filename, code) for each problem file with Python script code."""
+    for data_dir in data_dirs:
+        for dirpath, _, filenames in os.walk(data_dir):
+            for filename in sorted(filenames):
+                if not filename.endswith(".xml"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    tree = etree.parse(path)
+                except etree.XMLSyntaxError:
+                    continue
+                code = "".join(
+                    script.text or ""
+                    for script in tree.iter("script")
+                    if "python" in (script.get("type") or "")
+                )
+                if code:
+                    yield path, code
+
+
+def run(scripts, runs):
+    """Execute each script `runs` times, returning the latencies in ms."""
+    latencies = []
+    for _, code in scripts:
+        for seed in xrange(runs):
+            start = time.time()
+            try:
+                safe_exec(code, {'seed': seed}, random_seed=seed)
+            except Exception:  # pylint: disable=broad-except
+                pass
+            latencies.append((time.time() - start) * 1000)
+    return latencies
+
+
+def report(label, latencies):
+    """Print a summary of `latencies`."""
+    latencies = sorted(latencies)
+    count = len(latencies)
+    print "{:<10} n={:<5} mean={:8.1f}ms  p50={:8.1f}ms  p95={:8.1f}ms".format(
+        label, count, sum(latencies) / count,
+        latencies[count // 2], latencies[int(count * 0.95)],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data_dirs", nargs="*", default=[DEFAULT_DATA_DIR])
+    parser.add_argument("--python-bin", required=True, help="Sandboxed Python executable")
+    parser.add_argument("--user", default=None, help="User to run sandboxed code as")
+    parser.add_argument("--runs", type=int, default=5, help="Executions per script")
+    parser.add_argument("--pool-size", type=int, default=1)
+    args = parser.parse_args()
+
+    jail_code.configure("python", args.python_bin, user=args.user)
+    scripts = list(problem_scripts(args.data_dirs))
+    print "{} problem scripts".format(len(scripts))
+
+    report("codejail", run(scripts, args.runs))
+
+    configure_pool(args.pool_size, max_uses=args.runs * len(scripts) + 1)
+    # Start a worker before timing anything.
+    run(scripts[:1], 1)
+    report("pool", run(scripts, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Caches for the results of capa's safe_exec.
+
+Running code in the sandbox means spawning a jailed Python process, which is
+the most expensive thing a problem does.  Results are cached in a remote cache
+(memcached, in production) so that they can be shared between processes; a
+small bounded in-process LRU sits in front of it so that the hottest entries
+don't cost a network round-trip either.
+
+"""
+
+from collections import OrderedDict
+import threading
+
+from dogapi import dog_stats_api
+
+# How many results the in-process cache holds by default.
+LOCAL_CACHE_SIZE = 2000
+
+
+class LRUCache(object):
+    """
+    A bounded, thread-safe, in-process cache with least-recently-used eviction.
+
+    Implements the same `.get(key)` and `.set(key, value)` interface as the
+    caches that `safe_exec` accepts.
+
+    """
+
+    def __init__(self, maxsize=LOCAL_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Return the value for `key`, or None if it isn't cached."""
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return None
+            # Re-insert to mark the entry as most recently used.
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        """Store `value` under `key`, evicting the oldest entries if needed."""
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Remove everything from the cache."""
+        with self._lock:
+            self._data.clear()
+
+
+class TieredCache(object):
+    """
+    A `safe_exec` cache made of an in-process LRU in front of a remote cache.
+
+    Reads try the local tier first, then the remote one, promoting remote
+    hits into the local tier.  Writes go to both.  Hits and misses for each
+    tier are counted in the `capa.safe_exec.cache` metric.
+
+    """
+
+    def __init__(self, remote, local=None):
+        self.remote = remote
+        self.local = local if local is not None else LRUCache()
+
+    def get(self, key):
+        """Return the cached value for `key`, or None."""
+        value = self.local.get(key)
+        if value is not None:
+            dog_stats_api.increment('capa.safe_exec.cache', tags=['tier:local', 'result:hit'])
+            return value
+
+        value = self.remote.get(key) if self.remote is not None else None
+        if value is not None:
+            dog_stats_api.increment('capa.safe_exec.cache', tags=['tier:remote', 'result:hit'])
+            self.local.set(key, value)
+            return value
+
+        dog_stats_api.increment('capa.safe_exec.cache', tags=['result:miss'])
+        return None
+
+    def set(self, key, value):
+        """Store `value` under `key` in both tiers."""
+        self.local.set(key, value)
+        if self.remote is not None:
+            self.remote.set(key, value)
@@ -0,0 +1,244 @@
+"""A pool of warm sandbox workers for capa's safe_exec.
+
+Starting a jailed interpreter and importing numpy, scipy and friends costs
+hundreds of milliseconds, and codejail pays it on every execution.  The pool
+keeps a few long-lived workers (see `pool_worker.py`) running under the same
+sandboxed interpreter and user that codejail is configured with.  Each
+execution still happens in its own freshly forked process with codejail's
+resource limits applied, so isolation between executions is preserved; only
+the interpreter start-up and imports are shared.
+
+Workers are recycled after `max_uses` executions, and after any failed
+execution.  When no worker is free, or one can't be started or sent the code,
+the code is run through codejail directly, without waiting.
+
+"""
+
+import base64
+import json
+import logging
+import os
+import select
+import subprocess
+import time
+import Queue
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException, json_safe
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+from dogapi import dog_stats_api
+
+log = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pool_worker.py")
+if WORKER_SCRIPT.endswith("c"):
+    WORKER_SCRIPT = WORKER_SCRIPT[:-1]
+
+# Extra seconds we give a worker, beyond the code's own time limit, before
+# deciding it is stuck.
+WORKER_SLACK = 5
+
+
+class WorkerError(Exception):
+    """A sandbox worker died or stopped responding."""
+    pass
+
+
+class WorkerUnavailable(WorkerError):
+    """A sandbox worker couldn't be started, or couldn't be sent a job, so the job didn't run."""
+    pass
+
+
+class SandboxWorker(object):
+    """One long-lived sandboxed interpreter, talked to over a pipe."""
+
+    def __init__(self, preload=()):
+        command = jail_code.COMMANDS["python"]
+        cmd = []
+        if command.get("user"):
+            cmd.extend(["sudo", "-u", command["user"]])
+        cmd.extend(command["cmdline_start"])
+        cmd.append(WORKER_SCRIPT)
+        cmd.extend(preload)
+
+        try:
+            with open(os.devnull, "w") as devnull:
+                self.proc = subprocess.Popen(
+                    cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull,
+                    close_fds=True, env={},
+                )
+        except (IOError, OSError) as err:
+            raise WorkerUnavailable("Couldn't start sandbox worker: {}".format(err))
+        self.uses = 0
+        self._buffer = ""
+        try:
+            ready = self._readline(time.time() + 30 + WORKER_SLACK) == "ready"
+        except (WorkerError, IOError, OSError):
+            ready = False
+        if not ready:
+            self.close()
+            raise WorkerUnavailable("Sandbox worker didn't start")
+
+    def _readline(self, deadline):
+        """Read one line from the worker, or raise WorkerError at `deadline`."""
+        fd = self.proc.stdout.fileno()
+        while "\n" not in self._buffer:
+            timeout = deadline - time.time()
+            if timeout <= 0 or not select.select([fd], [], [], timeout)[0]:
+                raise WorkerError("Sandbox worker timed out")
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise WorkerError("Sandbox worker exited")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split("\n", 1)
+        return line
+
+    def run(self, job):
+        """Send `job` to the worker and return its result dict."""
+        self.uses += 1
+        try:
+            self.proc.stdin.write(json.dumps(job) + "\n")
+            self.proc.stdin.flush()
+        except (IOError, OSError) as err:
+            raise WorkerUnavailable("Couldn't send to sandbox worker: {}".format(err))
+        realtime = job["limits"].get("REALTIME") or job["limits"].get("CPU") or 1
+        line = self._readline(time.time() + realtime + WORKER_SLACK)
+        try:
+            return json.loads(line)
+        except ValueError:
+            raise WorkerError("Garbled response from sandbox worker")
+
+    def close(self):
+        """Stop the worker.  It exits when its stdin is closed."""
+        try:
+            self.proc.stdin.close()
+            self.proc.stdout.close()
+        except (IOError, OSError):
+            pass
+        try:
+            self.proc.kill()
+        except OSError:
+            pass
+
+
+class SandboxPool(object):
+    """
+    A bounded pool of `SandboxWorker`s.
+
+    Workers are started lazily.  A pool inherited across a fork (for example
+    from a pre-loading web server master) starts over with its own workers
+    rather than sharing pipes with its parent.
+
+    The idle queue holds either a worker or None for each of the `size`
+    slots; None means the slot has no worker yet, or its worker was retired,
+    and a new one is started for whoever takes it.
+
+    """
+
+    def __init__(self, size, max_uses=100, preload=()):
+        self.size = size
+        self.max_uses = max_uses
+        self.preload = list(preload)
+        self._reset()
+
+    def _reset(self):
+        """Forget all workers, without touching them."""
+        self._pid = os.getpid()
+        self._idle = Queue.LifoQueue()
+        for _ in range(self.size):
+            self._idle.put(None)
+
+    def can_run(self, python_path, extra_files):
+        """
+        Can the pool run code with this `python_path` and `extra_files`?
+
+        Workers only receive the contents of `extra_files`, so python_path
+        entries that refer to directories on the host are left to codejail,
+        which copies them into the sandbox.
+
+        """
+        if not jail_code.is_configured("python"):
+            return False
+        names = set(name for name, _ in extra_files or ())
+        return all(path in names for path in python_path or ())
+
+    def _acquire(self):
+        """
+        Get an idle worker, starting one if its slot has none.
+
+        Doesn't wait:  raises `WorkerUnavailable` if every worker is busy, or
+        if a worker couldn't be started.
+
+        """
+        if self._pid != os.getpid():
+            self._reset()
+        try:
+            worker = self._idle.get_nowait()
+        except Queue.Empty:
+            raise WorkerUnavailable("No free sandbox worker")
+        if worker is not None:
+            return worker
+        try:
+            return SandboxWorker(self.preload)
+        except WorkerUnavailable:
+            self._idle.put(None)
+            raise
+        except Exception as err:
+            self._idle.put(None)
+            raise WorkerUnavailable("Couldn't start sandbox worker: {}".format(err))
+
+    def _release(self, worker, healthy):
+        """Return `worker` to the pool, or retire it and free its slot."""
+        if self._pid != os.getpid():
+            worker.close()
+            return
+        if healthy and worker.uses < self.max_uses:
+            self._idle.put(worker)
+            return
+        worker.close()
+        dog_stats_api.increment('capa.safe_exec.pool.recycled')
+        self._idle.put(None)
+
+    def _run(self, job):
+        """Run `job` on an idle worker and return its result dict."""
+        worker = self._acquire()
+        result = None
+        try:
+            result = worker.run(job)
+        finally:
+            # Any failure retires the worker, to be on the safe side.
+            self._release(worker, healthy=result is not None and "error" not in result)
+        return result
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Execute `code` in a pooled sandbox, like `codejail.safe_exec.safe_exec`.
+
+        Changes the code makes to `globals_dict` are visible when this returns.
+        Raises `SafeExecException` if the code raised or couldn't be run.
+
+        """
+        job = {
+            "code": code,
+            "globals": json_safe(globals_dict),
+            "python_path": python_path or [],
+            "extra_files": [
+                (name, base64.b64encode(contents)) for name, contents in extra_files or ()
+            ],
+            "limits": dict(jail_code.LIMITS),
+        }
+        try:
+            result = self._run(job)
+        except WorkerUnavailable as err:
+            # The code didn't run, so it is safe to run it through codejail instead.
+            log.warning("%s, running %s through codejail", err, slug)
+            dog_stats_api.increment('capa.safe_exec.pool.unavailable')
+            codejail_safe_exec(code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug)
+            return
+        except WorkerError as err:
+            log.warning("Sandbox worker failed running %s: %s", slug, err)
+            raise SafeExecException("Couldn't execute jailed code: {}".format(err))
+
+        if "error" in result:
+            raise SafeExecException("Couldn't execute jailed code: {}".format(result["error"]))
+        globals_dict.update(result["globals"])
@@ -0,0 +1,167 @@
+"""A long-lived sandbox worker for capa's safe_exec pool.
+
+This file is run as a script by the sandboxed Python interpreter, the same
+way codejail runs its own wrapper, so it must not import anything from
+edx-platform.
+
+The worker imports the expensive sandbox packages once, then reads jobs from
+stdin, one JSON document per line.  Each job is run in a freshly forked child
+process, so no state leaks from one execution to the next, and the child sets
+the same resource limits codejail would before running any untrusted code.
+The result is written back to the host as one JSON document per line.
+
+"""
+
+import base64
+import json
+import os
+import resource
+import select
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+
+def set_limits(limits):
+    """Apply codejail's resource limits to the current process."""
+    if limits.get("CPU"):
+        resource.setrlimit(resource.RLIMIT_CPU, (limits["CPU"], limits["CPU"]))
+    if limits.get("VMEM"):
+        resource.setrlimit(resource.RLIMIT_AS, (limits["VMEM"], limits["VMEM"]))
+    # No files, no subprocesses.
+    resource.setrlimit(resource.RLIMIT_FSIZE, (limits.get("FSIZE", 0), limits.get("FSIZE", 0)))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+def jsonable_globals(globals_dict):
+    """Return the entries of `globals_dict` that can be sent back as JSON."""
+    result = {}
+    for name, value in globals_dict.iteritems():
+        if name == "__builtins__":
+            continue
+        try:
+            json.dumps(value)
+        except Exception:  # pylint: disable=broad-except
+            continue
+        result[name] = value
+    return result
+
+
+def close_inherited_fds(result_fd):
+    """
+    Close every file descriptor this (forked) process inherited, except `result_fd`.
+
+    The worker's stdin carries other students' jobs, and its stdout is the pipe
+    back to the host, so untrusted code gets /dev/null for both instead.
+
+    """
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    maxfd = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+    if maxfd == resource.RLIM_INFINITY:
+        maxfd = 4096
+    # 0, 1 and 2 are open, so `result_fd` is above them.
+    os.closerange(3, result_fd)
+    os.closerange(result_fd + 1, maxfd)
+
+
+def run_child(job, result_fd):
+    """Run `job` in this (forked) process, writing the result to `result_fd`."""
+    close_inherited_fds(result_fd)
+    tmpdir = tempfile.mkdtemp(prefix="codejail-")
+    try:
+        os.chdir(tmpdir)
+        for filename, contents in job.get("extra_files") or ():
+            with open(os.path.join(tmpdir, filename), "wb") as extra:
+                extra.write(base64.b64decode(contents))
+        sys.path.extend(job.get("python_path") or ())
+
+        set_limits(job.get("limits") or {})
+
+        globals_dict = job["globals"]
+        try:
+            exec job["code"] in globals_dict  # pylint: disable=exec-used
+        except BaseException:  # pylint: disable=broad-except
+            result = {"error": traceback.format_exc()}
+        else:
+            result = {"globals": jsonable_globals(globals_dict)}
+        data = json.dumps(result)
+        while data:
+            written = os.write(result_fd, data)
+            data = data[written:]
+    finally:
+        os.close(result_fd)
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def run_job(job):
+    """Fork a child to run `job`, and return its result dict."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        status = 1
+        try:
+            run_child(job, write_fd)
+            status = 0
+        finally:
+            os._exit(status)  # pylint: disable=protected-access
+
+    os.close(write_fd)
+    realtime = (job.get("limits") or {}).get("REALTIME") or None
+    deadline = time.time() + realtime if realtime else None
+    chunks = []
+    timed_out = False
+    try:
+        while True:
+            timeout = max(deadline - time.time(), 0) if deadline else None
+            readable, _, _ = select.select([read_fd], [], [], timeout)
+            if not readable:
+                timed_out = True
+                os.kill(pid, signal.SIGKILL)
+                break
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(read_fd)
+        _, status = os.waitpid(pid, 0)
+
+    if timed_out:
+        return {"error": "Jailed code exceeded its time limit"}
+    if chunks and status == 0:
+        return json.loads("".join(chunks))
+    return {"error": "Jailed code exited with status {}".format(status)}
+
+
+def main(preload):
+    """Preload `preload` modules, then serve jobs until stdin closes."""
+    # Keep the real stdout for talking to the host; untrusted code gets /dev/null.
+    to_host = os.fdopen(os.dup(1), "w")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 1)
+
+    for modname in preload:
+        try:
+            __import__(modname)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    to_host.write("ready\n")
+    to_host.flush()
+    for line in iter(sys.stdin.readline, ""):
+        try:
+            result = run_job(json.loads(line))
+        except Exception:  # pylint: disable=broad-except
+            result = {"error": traceback.format_exc()}
+        to_host.write(json.dumps(result) + "\n")
+        to_host.flush()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
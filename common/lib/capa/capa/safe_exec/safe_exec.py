@@ -4,9 +4,11 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .pool import SandboxPool
 from dogapi import dog_stats_api
 
 import hashlib
+import re
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -46,6 +48,22 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# The pool of warm sandbox workers, if `configure_pool` has been called.
+POOL = None
+
+
+def configure_pool(size, max_uses=100):
+    """
+    Run sandboxed code in a pool of `size` pre-started workers.
+
+    Each worker is retired after `max_uses` executions.  The workers import
+    the ASSUMED_IMPORTS modules once, up front.  Code that needs files from
+    the host on its python_path still goes through codejail directly.
+
+    """
+    global POOL  # pylint: disable=global-statement
+    POOL = SandboxPool(size, max_uses, preload=[modname for _, modname in ASSUMED_IMPORTS])
+
 
 def update_hash(hasher, obj):
     """
@@ -70,6 +88,54 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+# If code mentions any of these names, it can get at globals without naming
+# them, so every global has to be part of its cache key.
+INTROSPECTION_NAMES = frozenset([
+    "__dict__", "__globals__", "__import__", "__main__", "_getframe", "compile",
+    "eval", "exc_info", "exec", "execfile", "f_back", "f_globals", "func_globals",
+    "getattr", "gi_frame", "globals", "inspect", "last_traceback", "locals",
+    "modules", "tb_frame", "vars",
+])
+
+# Names with these prefixes are private or frame attributes, which can also
+# reach globals, so code mentioning any of them keys on every global too.
+INTROSPECTION_PREFIXES = ("_", "f_")
+
+
+def _unreferenced_globals(code, globals_dict):
+    """
+    Return the set of names in `globals_dict` that `code` never mentions.
+
+    Code can't read or change a global it never names, so those globals don't
+    affect the result and can be left out of the cache key.  The typical case
+    is `anonymous_student_id`, which would otherwise make every student's
+    result distinct.
+
+    """
+    names = set(re.findall(r"[A-Za-z_][A-Za-z0-9_]*", code))
+    if names & INTROSPECTION_NAMES or any(name.startswith(INTROSPECTION_PREFIXES) for name in names):
+        return set()
+    return set(name for name in globals_dict if name not in names)
+
+
+def cache_key(code, globals_dict, random_seed=None, extra_files=None, unreferenced=frozenset()):
+    """
+    Compute the cache key for running `code`.
+
+    The key is built from the code, the random seed, the contents of the
+    `extra_files` (notably the course's python_lib.zip), and the values of
+    the JSON-safe `globals_dict` entries that aren't in `unreferenced`.
+
+    """
+    md5er = hashlib.md5()
+    md5er.update(repr(code))
+    for filename, contents in extra_files or ():
+        md5er.update(filename)
+        md5er.update(hashlib.md5(contents).hexdigest())
+    update_hash(md5er, {k: v for k, v in globals_dict.iteritems() if k not in unreferenced})
+    return "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -98,8 +164,8 @@ def safe_exec(
     created in the sandbox.
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
-    to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    to cache the execution, taking into account the code, the values of the globals
+    the code refers to, the random seed, and the contents of `extra_files`.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -109,45 +175,52 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+        unreferenced = _unreferenced_globals(code, globals_dict)
+        key = cache_key(code, json_safe(globals_dict), random_seed, extra_files, unreferenced)
         cached = cache.get(key)
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
             emsg, cleaned_results = cached
-            globals_dict.update(cleaned_results)
+            globals_dict.update(
+                (k, v) for k, v in cleaned_results.iteritems() if k not in unreferenced
+            )
+            dog_stats_api.increment('capa.safe_exec.cached', tags=['result:hit'])
             if emsg:
                 raise SafeExecException(emsg)
             return
+        dog_stats_api.increment('capa.safe_exec.cached', tags=['result:miss'])
 
     # Create the complete code we'll run.
     code_prolog = CODE_PROLOG % random_seed
 
     # Decide which code executor to use.
     if unsafely:
-        exec_fn = codejail_not_safe_exec
+        exec_fn, executor = codejail_not_safe_exec, 'unsafe'
+    elif POOL is not None and POOL.can_run(python_path, extra_files):
+        exec_fn, executor = POOL.safe_exec, 'pool'
     else:
-        exec_fn = codejail_safe_exec
+        exec_fn, executor = codejail_safe_exec, 'codejail'
 
     # Run the code!  Results are side effects in globals_dict.
     try:
-        exec_fn(
-            code_prolog + LAZY_IMPORTS + code, globals_dict,
-            python_path=python_path, extra_files=extra_files, slug=slug,
-        )
+        with dog_stats_api.timer('capa.safe_exec.exec_time', tags=['executor:' + executor]):
+            exec_fn(
+                code_prolog + LAZY_IMPORTS + code, globals_dict,
+                python_path=python_path, extra_files=extra_files, slug=slug,
+            )
     except SafeExecException as e:
         emsg = e.message
     else:
         emsg = None
 
     # Put the result back in the cache.  This is complicated by the fact that
-    # the globals dict might not be entirely serializable.
+    # the globals dict might not be entirely serializable.  Globals that
+    # weren't part of the key are left out: they belong to this caller only.
     if cache:
         cleaned_results = json_safe(globals_dict)
+        for name in unreferenced:
+            cleaned_results.pop(name, None)
         cache.set(key, (emsg, cleaned_results))
 
     # If an exception happened, raise it now.
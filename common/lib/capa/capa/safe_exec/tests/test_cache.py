@@ -0,0 +1,51 @@
+"""Test the caches in capa.safe_exec.cache."""
+
+import unittest
+
+from capa.safe_exec.cache import LRUCache, TieredCache
+
+
+class TestLRUCache(unittest.TestCase):
+    """Test the bounded in-process cache."""
+
+    def test_get_missing(self):
+        self.assertIsNone(LRUCache(2).get("nope"))
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        # Touching "a" makes "b" the oldest.
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+
+class TestTieredCache(unittest.TestCase):
+    """Test the local-in-front-of-remote cache."""
+
+    def test_remote_hits_are_promoted(self):
+        remote = LRUCache(10)
+        remote.set("k", "v")
+        cache = TieredCache(remote, LRUCache(10))
+        self.assertEqual(cache.get("k"), "v")
+        self.assertEqual(cache.local.get("k"), "v")
+
+    def test_set_writes_both_tiers(self):
+        remote = LRUCache(10)
+        cache = TieredCache(remote, LRUCache(10))
+        cache.set("k", "v")
+        self.assertEqual(remote.get("k"), "v")
+        self.assertEqual(cache.local.get("k"), "v")
+
+    def test_miss(self):
+        cache = TieredCache(LRUCache(10), LRUCache(10))
+        self.assertIsNone(cache.get("k"))
+
+    def test_no_remote(self):
+        cache = TieredCache(None)
+        cache.set("k", "v")
+        self.assertEqual(cache.get("k"), "v")
@@ -0,0 +1,135 @@
+"""Test the pool of warm sandbox workers."""
+
+import io
+import sys
+import unittest
+import zipfile
+
+from mock import patch
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException
+
+from capa.safe_exec.pool import SandboxPool
+
+
+class TestSandboxPool(unittest.TestCase):
+    """
+    Run the pool's workers with the test's own Python, unconfined.
+
+    That's enough to check the plumbing; sandboxing itself is codejail's
+    configuration, tested in test_safe_exec.
+
+    """
+
+    def setUp(self):
+        super(TestSandboxPool, self).setUp()
+        saved_commands = dict(jail_code.COMMANDS)
+        self.addCleanup(jail_code.COMMANDS.update, saved_commands)
+        self.addCleanup(jail_code.COMMANDS.clear)
+        jail_code.configure("python", sys.executable)
+        self.pool = SandboxPool(size=1, max_uses=3)
+
+    def tearDown(self):
+        while not self.pool._idle.empty():  # pylint: disable=protected-access
+            worker = self.pool._idle.get()  # pylint: disable=protected-access
+            if worker is not None:
+                worker.close()
+        super(TestSandboxPool, self).tearDown()
+
+    def test_set_values(self):
+        g = {'b': 2}
+        self.pool.safe_exec("a = 15 + b", g)
+        self.assertEqual(g, {'a': 17, 'b': 2})
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_executions_dont_share_state(self):
+        self.pool.safe_exec("import sys; sys.leaked = 1", {})
+        g = {}
+        self.pool.safe_exec("import sys; a = hasattr(sys, 'leaked')", g)
+        self.assertFalse(g['a'])
+
+    def test_workers_are_reused_then_recycled(self):
+        # Each execution is a child of its worker, so the parent pid
+        # identifies the worker.
+        worker_pids = []
+        for _ in range(4):
+            g = {}
+            self.pool.safe_exec("import os; pid = os.getppid()", g)
+            worker_pids.append(g['pid'])
+        self.assertEqual(len(set(worker_pids[:3])), 1)
+        self.assertNotEqual(worker_pids[3], worker_pids[0])
+
+    def test_failure_recycles_worker(self):
+        g = {}
+        self.pool.safe_exec("import os; pid = os.getppid()", g)
+        first_pid = g['pid']
+        with self.assertRaises(SafeExecException):
+            self.pool.safe_exec("1/0", g)
+        self.pool.safe_exec("import os; pid = os.getppid()", g)
+        self.assertNotEqual(g['pid'], first_pid)
+
+    def test_python_lib_zip(self):
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w") as zipped:
+            zipped.writestr("constant.py", "THE_CONST = 23\n")
+        g = {}
+        self.pool.safe_exec(
+            "import constant; a = constant.THE_CONST", g,
+            python_path=["python_lib.zip"],
+            extra_files=[("python_lib.zip", zip_buffer.getvalue())],
+        )
+        self.assertEqual(g['a'], 23)
+
+    def test_can_run(self):
+        self.assertTrue(self.pool.can_run(None, None))
+        self.assertTrue(self.pool.can_run(["python_lib.zip"], [("python_lib.zip", "")]))
+        self.assertFalse(self.pool.can_run(["/some/host/dir"], None))
+
+    def test_child_cannot_read_worker_stdin(self):
+        # The worker's stdin carries other jobs, so the child only gets /dev/null.
+        g = {}
+        self.pool.safe_exec("import os; data = os.read(0, 100)", g)
+        self.assertEqual(g['data'], "")
+
+    def test_child_cannot_write_to_host(self):
+        g = {}
+        self.pool.safe_exec("import os; os.write(1, 'garbage\\n'); a = 1", g)
+        self.assertEqual(g['a'], 1)
+
+    def test_retired_worker_frees_its_slot(self):
+        with self.assertRaises(SafeExecException):
+            self.pool.safe_exec("1/0", {})
+        g = {}
+        self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
+
+    def test_busy_pool_falls_back_to_codejail(self):
+        self.pool._idle.get()  # pylint: disable=protected-access
+        with patch('capa.safe_exec.pool.codejail_safe_exec') as mock_safe_exec:
+            self.pool.safe_exec("a = 1", {}, slug="busy")
+        self.assertEqual(mock_safe_exec.call_count, 1)
+
+    def test_worker_start_failure_falls_back_to_codejail(self):
+        with patch('capa.safe_exec.pool.subprocess.Popen', side_effect=OSError("no such file")):
+            with patch('capa.safe_exec.pool.codejail_safe_exec') as mock_safe_exec:
+                self.pool.safe_exec("a = 1", {}, slug="broken")
+        self.assertEqual(mock_safe_exec.call_count, 1)
+        # The slot is free for a worker that starts.
+        g = {}
+        self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
+
+    def test_dead_worker_falls_back_to_codejail(self):
+        self.pool.safe_exec("a = 1", {})
+        worker = self.pool._idle.get()  # pylint: disable=protected-access
+        worker.proc.kill()
+        worker.proc.wait()
+        self.pool._idle.put(worker)  # pylint: disable=protected-access
+        with patch('capa.safe_exec.pool.codejail_safe_exec') as mock_safe_exec:
+            self.pool.safe_exec("a = 1", {}, slug="dead")
+        self.assertEqual(mock_safe_exec.call_count, 1)
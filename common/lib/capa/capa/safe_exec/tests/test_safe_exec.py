@@ -166,6 +166,47 @@ class TestSafeExecCaching(unittest.TestCase):
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_unreferenced_globals_share_cache(self):
+        # Globals the code never mentions don't split the cache.
+        cache = {}
+        g = {'anonymous_student_id': 'student1'}
+        safe_exec("a = 17", g, random_seed=1, cache=DictCache(cache))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.values()[0], (None, {'a': 17}))
+
+        cache[cache.keys()[0]] = (None, {'a': 23})
+        g = {'anonymous_student_id': 'student2'}
+        safe_exec("a = 17", g, random_seed=1, cache=DictCache(cache))
+        self.assertEqual(g, {'a': 23, 'anonymous_student_id': 'student2'})
+
+    def test_referenced_globals_split_cache(self):
+        cache = {}
+        safe_exec("a = len(anonymous_student_id)", {'anonymous_student_id': 'x'}, cache=DictCache(cache))
+        safe_exec("a = len(anonymous_student_id)", {'anonymous_student_id': 'xy'}, cache=DictCache(cache))
+        self.assertEqual(len(cache), 2)
+
+    def test_introspection_keys_all_globals(self):
+        cache = {}
+        code = "a = globals()['anonymous_student_id']"
+        safe_exec(code, {'anonymous_student_id': 'x'}, cache=DictCache(cache))
+        safe_exec(code, {'anonymous_student_id': 'y'}, cache=DictCache(cache))
+        self.assertEqual(len(cache), 2)
+
+    def test_frame_introspection_keys_all_globals(self):
+        cache = {}
+        code = "import sys\na = sys._getframe().f_globals['anonymous_student_id']"
+        safe_exec(code, {'anonymous_student_id': 'x'}, cache=DictCache(cache))
+        g = {'anonymous_student_id': 'y'}
+        safe_exec(code, g, cache=DictCache(cache))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(g['a'], 'y')
+
+    def test_extra_files_split_cache(self):
+        cache = {}
+        safe_exec("a = 1", {}, extra_files=[("python_lib.zip", "one")], cache=DictCache(cache))
+        safe_exec("a = 1", {}, extra_files=[("python_lib.zip", "two")], cache=DictCache(cache))
+        self.assertEqual(len(cache), 2)
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
@@ -3,8 +3,11 @@ Tests around our XML modulestore, including importing
 well-formed and not-well-formed XML.
 """
 import os.path
+import shutil
+import threading
 import unittest
 from glob import glob
+from tempfile import mkdtemp
 from mock import patch, Mock
 
 from xmodule.modulestore.xml import XMLModuleStore
@@ -103,6 +106,68 @@ class TestXMLModuleStore(unittest.TestCase):
             locator_key_fields=SlashSeparatedCourseKey.KEY_FIELDS
         )
 
+    def test_lazy_loading(self):
+        """
+        Lazy stores only load a course when it is asked for
+        """
+        toy_id = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        store = XMLModuleStore(DATA_DIR, source_dirs=['toy', 'simple'], lazy=True)
+        self.assertEqual(store.courses, {})
+
+        course = store.get_course(toy_id)
+        self.assertEqual(course.id, toy_id)
+        self.assertEqual(store.courses.keys(), ['toy'])
+        self.assertTrue(store.has_item(course.location))
+
+        self.assertEqual(len(store.get_courses()), 2)
+        self.assertIsNone(store.get_course(SlashSeparatedCourseKey('edX', 'nonexistent', '2012_Fall')))
+
+    def test_lazy_loading_other_threads_wait(self):
+        """
+        Other threads don't see a course until it is fully loaded
+        """
+        toy_id = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        store = XMLModuleStore(DATA_DIR, source_dirs=['toy'], lazy=True)
+        try_load_course = store.try_load_course
+        readers = []
+        seen = []
+
+        def load_course(*args):
+            """Ask for the course from another thread, then finish loading it."""
+            reader = threading.Thread(target=lambda: seen.append(store.get_course(toy_id)))
+            readers.append(reader)
+            reader.start()
+            reader.join(0.5)
+            # The other thread waits for the course to be loaded.
+            self.assertTrue(reader.is_alive())
+            try_load_course(*args)
+
+        with patch.object(store, 'try_load_course', side_effect=load_course) as mock_load:
+            self.assertEqual(store.get_course(toy_id).id, toy_id)
+            readers[0].join()
+        self.assertEqual(mock_load.call_count, 1)
+        self.assertEqual([course.id for course in seen], [toy_id])
+
+    def test_lazy_loading_index_cache(self):
+        """
+        The course index is saved, and reused until the course root file changes
+        """
+        index_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir)
+        toy_id = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+
+        XMLModuleStore(DATA_DIR, source_dirs=['toy'], lazy=True, index_cache_dir=index_dir)
+        self.assertEqual(len(os.listdir(index_dir)), 1)
+
+        with patch('xmodule.modulestore.xml.etree.parse') as mock_parse:
+            store = XMLModuleStore(DATA_DIR, source_dirs=['toy'], lazy=True, index_cache_dir=index_dir)
+            self.assertFalse(mock_parse.called)
+        self.assertEqual(store.get_course(toy_id).id, toy_id)
+
+        with patch('xmodule.modulestore.xml.os.path.getmtime', return_value=0):
+            store = XMLModuleStore(DATA_DIR, source_dirs=['toy'], lazy=True, index_cache_dir=index_dir)
+        self.assertEqual(store.get_course(toy_id).id, toy_id)
+
     def test_branch_setting(self):
         """
         Test the branch setting context manager
@@ -6,6 +6,7 @@ import os
 import re
 import sys
 import glob
+import threading
 
 from collections import defaultdict
 from cStringIO import StringIO
@@ -26,6 +27,7 @@ from xmodule.x_module import (
 from xmodule.modulestore.xml_exporter import DEFAULT_CONTENT_FIELDS
 from xmodule.modulestore import ModuleStoreEnum, ModuleStoreReadBase, LIBRARY_ROOT, COURSE_ROOT
 from xmodule.tabs import CourseTabList
+from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locations import SlashSeparatedCourseKey, Location
 from opaque_keys.edx.locator import CourseLocator, LibraryLocator, BlockUsageLocator
 
@@ -335,7 +337,8 @@ class XMLModuleStore(ModuleStoreReadBase):
     def __init__(
             self, data_dir, default_class=None, source_dirs=None, course_ids=None,
             load_error_modules=True, i18n_service=None, fs_service=None, user_service=None,
-            signal_handler=None, target_course_id=None, **kwargs   # pylint: disable=unused-argument
+            signal_handler=None, target_course_id=None, lazy=False, index_cache_dir=None,
+            **kwargs   # pylint: disable=unused-argument
     ):
         """
         Initialize an XMLModuleStore from data_dir
@@ -348,6 +351,12 @@ class XMLModuleStore(ModuleStoreReadBase):
 
             source_dirs or course_ids (list of str): If specified, the list of source_dirs or course_ids to load.
                 Otherwise, load all courses. Note, providing both
+
+            lazy (bool): If True, only read each course's root file at startup, and load
+                the rest of a course the first time it is asked for.
+
+            index_cache_dir (str): In lazy mode, a directory in which to keep the course
+                index between runs, so that unchanged courses aren't read at all at startup.
         """
         super(XMLModuleStore, self).__init__(**kwargs)
 
@@ -384,8 +393,110 @@ class XMLModuleStore(ModuleStoreReadBase):
         if source_dirs is None:
             source_dirs = sorted([d for d in os.listdir(self.data_dir) if
                                   os.path.exists(self.data_dir / d / self.parent_xml)])
+
+        # course_id -> course_dir, for courses that are indexed but not fully loaded yet
+        self._unloaded_courses = {}
+        # ids of the courses being loaded, by the thread holding _load_lock
+        self._loading_courses = set()
+        self._target_course_id = target_course_id
+        self._load_lock = threading.RLock()
+        if lazy:
+            self._index_courses(source_dirs, course_ids, index_cache_dir)
+        else:
+            for course_dir in source_dirs:
+                self.try_load_course(course_dir, course_ids, target_course_id)
+
+    def _index_courses(self, source_dirs, course_ids, index_cache_dir):
+        """
+        Find the id of the course in each of `source_dirs`, without loading the courses.
+
+        Only the root element of each course's `parent_xml` is needed for that.  If
+        `index_cache_dir` is set, ids are remembered there along with the modification
+        time of the file they were read from, and the file isn't read again until it
+        changes.
+        """
+        index_path = None
+        index = {}
+        if index_cache_dir:
+            index_path = path(index_cache_dir) / '{}.{}.json'.format(
+                self.__class__.__name__, hashlib.sha1(self.data_dir.abspath()).hexdigest()[:12]
+            )
+            try:
+                with open(index_path) as index_file:
+                    index = json.load(index_file)
+            except (IOError, ValueError):
+                index = {}
+
+        new_index = {}
         for course_dir in source_dirs:
-            self.try_load_course(course_dir, course_ids, target_course_id)
+            root_path = self.data_dir / course_dir / self.parent_xml
+            try:
+                mtime = os.path.getmtime(root_path)
+                entry = index.get(course_dir)
+                if entry is None or entry['mtime'] != mtime:
+                    with open(root_path) as course_file:
+                        course_data = etree.parse(
+                            StringIO(clean_out_mako_templating(course_file.read())), parser=edx_xml_parser
+                        ).getroot()
+                    url_name = course_data.get('url_name', course_data.get('slug'))
+                    if not url_name and course_data.get('name'):
+                        url_name = Location.clean(course_data.get('name'))
+                    entry = {
+                        'mtime': mtime,
+                        'org': course_data.get('org') or 'edx',
+                        'course': course_data.get(self.parent_xml.split('.')[0]) or course_dir,
+                        'url_name': url_name,
+                    }
+                course_id = self.get_id(entry['org'], entry['course'], entry['url_name'])
+            except Exception:  # pylint: disable=broad-except
+                # Let a full load record what's wrong with it.
+                self.try_load_course(course_dir, course_ids, self._target_course_id)
+                continue
+
+            new_index[course_dir] = entry
+            if course_ids is None or course_id in course_ids:
+                self._unloaded_courses[course_id] = course_dir
+
+        if index_path and new_index != index:
+            try:
+                if not os.path.isdir(index_cache_dir):
+                    os.makedirs(index_cache_dir)
+                tmp_path = '{}.{}'.format(index_path, os.getpid())
+                with open(tmp_path, 'w') as index_file:
+                    json.dump(new_index, index_file)
+                os.rename(tmp_path, index_path)
+            except (IOError, OSError) as err:
+                log.warning("Couldn't save XML course index to %s: %s", index_path, err)
+
+        log.info("Indexed %d courselikes in %s", len(self._unloaded_courses), self.data_dir)
+
+    def _ensure_loaded(self, course_key=None):
+        """
+        Load the course with id `course_key` if it was only indexed so far, or all
+        such courses if `course_key` is None.
+
+        A course stays in `_unloaded_courses` until it is fully loaded, so that other
+        threads wait on the lock rather than see it half-built.
+        """
+        if not self._unloaded_courses:
+            return
+        with self._load_lock:
+            if course_key is None:
+                course_keys = sorted(self._unloaded_courses, key=self._unloaded_courses.get)
+            else:
+                course_keys = [course_key]
+            for key in course_keys:
+                course_dir = self._unloaded_courses.get(key)
+                # Loading a course looks its own blocks up again, in this thread.
+                if course_dir is None or key in self._loading_courses:
+                    continue
+                self._loading_courses.add(key)
+                try:
+                    with dog_stats_api.timer('xmodule.modulestore.xml.lazy_load'):
+                        self.try_load_course(course_dir, [key], self._target_course_id)
+                finally:
+                    self._loading_courses.discard(key)
+                    del self._unloaded_courses[key]
 
     def try_load_course(self, course_dir, course_ids=None, target_course_id=None):
         '''
@@ -743,6 +854,7 @@ class XMLModuleStore(ModuleStoreReadBase):
         """
         Returns True if location exists in this ModuleStore.
         """
+        self._ensure_loaded(usage_key.course_key)
         return usage_key in self.modules[usage_key.course_key]
 
     def get_item(self, usage_key, depth=0, **kwargs):
@@ -757,6 +869,7 @@ class XMLModuleStore(ModuleStoreReadBase):
 
         usage_key: a UsageKey that matches the module we are looking for.
         """
+        self._ensure_loaded(usage_key.course_key)
         try:
             return self.modules[usage_key.course_key][usage_key]
         except KeyError:
@@ -790,6 +903,7 @@ class XMLModuleStore(ModuleStoreReadBase):
         if revision == ModuleStoreEnum.RevisionOption.draft_only:
             return []
 
+        self._ensure_loaded(course_id)
         items = []
 
         qualifiers = qualifiers.copy() if qualifiers else {}  # copy the qualifiers (destructively manipulated here)
@@ -833,13 +947,43 @@ class XMLModuleStore(ModuleStoreReadBase):
         Returns a list of course descriptors.  If there were errors on loading,
         some of these may be ErrorDescriptors instead.
         """
+        self._ensure_loaded()
         return self.courses.values()
 
+    def get_course(self, course_id, depth=0, **kwargs):
+        """
+        Get the course with the given id, loading only that course if it
+        hasn't been loaded yet.
+        """
+        assert isinstance(course_id, CourseKey)
+        self._ensure_loaded(course_id)
+        for course in self.courses.values():
+            if course.id == course_id:
+                return course
+        return None
+
+    def has_course(self, course_id, ignore_case=False, **kwargs):
+        """
+        See ModuleStoreReadBase.has_course; loads only the course asked for, if possible.
+        """
+        if not ignore_case:
+            self._ensure_loaded(course_id)
+            return course_id if any(course.id == course_id for course in self.courses.values()) else None
+        return super(XMLModuleStore, self).has_course(course_id, ignore_case, **kwargs)
+
+    def get_course_errors(self, course_key):
+        """
+        Return the errors logged while loading the course, loading it first if needed.
+        """
+        self._ensure_loaded(course_key)
+        return super(XMLModuleStore, self).get_course_errors(course_key)
+
     def get_errored_courses(self):
         """
         Return a dictionary of course_dir -> [(msg, exception_str)], for each
         course_dir where course loading failed.
         """
+        self._ensure_loaded()
         return dict((k, self.errored_courses[k].errors) for k in self.errored_courses)
 
     def get_orphans(self, course_key, **kwargs):
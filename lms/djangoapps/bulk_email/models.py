@@ -259,6 +259,19 @@ class CourseAuthorization(models.Model):
         except cls.DoesNotExist:
             return False
 
+    @classmethod
+    def instructor_email_enabled_for_courses(cls, course_ids):
+        """
+        Returns the set of those of `course_ids` that email is enabled for,
+        as `instructor_email_enabled` would, with at most one query.
+        """
+        if not settings.FEATURES['REQUIRE_COURSE_EMAIL_AUTH']:
+            return set(course_ids)
+
+        return set(
+            record.course_id for record in cls.objects.filter(course_id__in=course_ids, email_enabled=True)
+        )
+
     def __unicode__(self):
         not_en = "Not "
         if self.email_enabled:
@@ -42,6 +42,7 @@ from bulk_email.models import (
 from courseware.courses import get_course, course_image_url
 from student.roles import CourseStaffRole, CourseInstructorRole
 from instructor_task.models import InstructorTask
+from instructor_task.profiling import profile_subtask
 from instructor_task.subtasks import (
     SubtaskStatus,
     queue_subtasks_for_query,
@@ -330,13 +331,14 @@ def send_course_email(entry_id, email_id, to_list, global_email_context, subtask
     try:
         course_title = global_email_context['course_title']
         with dog_stats_api.timer('course_email.single_task.time.overall', tags=[_statsd_tag(course_title)]):
-            new_subtask_status, send_exception = _send_course_email(
-                entry_id,
-                email_id,
-                to_list,
-                global_email_context,
-                subtask_status,
-            )
+            with profile_subtask(entry_id):
+                new_subtask_status, send_exception = _send_course_email(
+                    entry_id,
+                    email_id,
+                    to_list,
+                    global_email_context,
+                    subtask_status,
+                )
     except Exception:
         # Unexpected exception. Try to write out the failure to the entry before failing.
         log.exception("Send-email task %s for email %s: failed unexpectedly!", current_task_id, email_id)
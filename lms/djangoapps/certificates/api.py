@@ -7,6 +7,8 @@ rather than importing Django models directly.
 import logging
 
 from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 
 from eventtracking import tracker
@@ -25,6 +27,8 @@ from certificates.models import (
     ExampleCertificateSet,
     GeneratedCertificate,
     CertificateTemplate,
+    CERTIFICATES_FOR_USER_CACHE_KEY,
+    certificate_templates_version,
 )
 from certificates.queue import XQueueCertInterface
 
@@ -56,6 +60,26 @@ def get_certificates_for_user(username):
         }
     ]
 
+    Results are cached, by the user's id, for settings.CERTIFICATES_CACHE_TIMEOUT
+    seconds; saving or deleting one of the user's certificates clears them.
+    """
+    user_id = User.objects.filter(username=username).values_list('id', flat=True)[:1]
+    if not user_id:
+        return []
+    cache_key = CERTIFICATES_FOR_USER_CACHE_KEY.format(user_id[0])
+    timeout = getattr(settings, 'CERTIFICATES_CACHE_TIMEOUT', 0)
+    certificates = cache.get(cache_key) if timeout else None
+    if certificates is None:
+        certificates = _get_certificates_for_user(username, user_id[0])
+        if timeout:
+            cache.set(cache_key, certificates, timeout)
+    return certificates
+
+
+def _get_certificates_for_user(username, user_id):
+    """
+    Retrieve certificate information for the user with id `user_id`, as
+    described by `get_certificates_for_user`.
     """
     return [
         {
@@ -71,12 +95,12 @@ def get_certificates_for_user(username):
             # In the future, we can update this to construct a URL to the webview certificate
             # for courses that have this feature enabled.
             "download_url": (
-                cert.download_url or get_certificate_url(cert.user.id, cert.course_id)
+                cert.download_url or get_certificate_url(cert.user_id, cert.course_id)
                 if cert.status == CertificateStatuses.downloadable
                 else None
             ),
         }
-        for cert in GeneratedCertificate.objects.filter(user__username=username).order_by("course_id")
+        for cert in GeneratedCertificate.objects.filter(user_id=user_id).order_by("course_id")
     ]
 
 
@@ -122,6 +146,53 @@ def generate_user_certificates(student, course_key, course=None, insecure=False,
     return status
 
 
+def generate_certificates_for_students(students, course_key, course=None, insecure=False, generation_mode='batch',
+                                       forced_grade=None):
+    """
+    Add add-cert requests for many students in a course into the xqueue, as
+    `generate_user_certificates` does for one.
+
+    The students' records are looked up for all of them at once, and the
+    requests are sent over one connection to the queue once all of the
+    students have been graded, so callers generating certificates for a
+    whole course should pass the students a few hundred at a time.
+
+    Args:
+        students (list of User)
+        course_key (CourseKey)
+
+    Keyword Arguments:
+        course (Course): Optionally provide the course object; if not provided
+            it will be loaded.
+        insecure - (Boolean)
+        generation_mode - who has requested certificate generation.
+        forced_grade - a string indicating to replace grade parameter. if present grading
+                       will be skipped.
+
+    Returns:
+        dict mapping the id of each student to the status of their certificate.
+    """
+    if course is None:
+        course = modulestore().get_course(course_key, depth=0)
+    xqueue = XQueueCertInterface()
+    if insecure:
+        xqueue.use_https = False
+    generate_pdf = not has_html_certificates_enabled(course_key, course)
+    statuses = {}
+    for student, status, cert in xqueue.add_certs(students, course_key, course=course, generate_pdf=generate_pdf,
+                                                  forced_grade=forced_grade):
+        if status in [CertificateStatuses.generating, CertificateStatuses.downloadable]:
+            emit_certificate_event('created', student, course_key, course, {
+                'user_id': student.id,
+                'course_id': unicode(course_key),
+                'certificate_id': cert.verify_uuid,
+                'enrollment_mode': cert.mode,
+                'generation_mode': generation_mode
+            })
+        statuses[student.id] = status
+    return statuses
+
+
 def regenerate_user_certificates(student, course_key, course=None,
                                  forced_grade=None, template_file=None, insecure=False):
     """
@@ -379,6 +450,26 @@ def get_active_web_certificate(course, is_preview_mode=None):
 def get_certificate_template(course_key, mode):
     """
     Retrieves the custom certificate template based on course_key and mode.
+
+    The template found for each course and mode is cached until any template
+    changes, for at most settings.CERTIFICATES_CACHE_TIMEOUT seconds.
+    """
+    timeout = getattr(settings, 'CERTIFICATES_CACHE_TIMEOUT', 0)
+    if not timeout:
+        return _get_certificate_template(course_key, mode)
+
+    cache_key = u'certificates.template.{}.{}.{}'.format(certificate_templates_version(), course_key, mode)
+    template = cache.get(cache_key)
+    if template is None:
+        # An empty string remembers that there is no template.
+        template = _get_certificate_template(course_key, mode) or u''
+        cache.set(cache_key, template, timeout)
+    return template or None
+
+
+def _get_certificate_template(course_key, mode):
+    """
+    Looks up the custom certificate template based on course_key and mode.
     """
     org_id, template = None, None
     # fetch organization of the course
@@ -427,9 +518,12 @@ def emit_certificate_event(event_name, user, course_id, course=None, event_data=
     """
     event_name = '.'.join(['edx', 'certificate', event_name])
     if course is None:
-        course = modulestore().get_course(course_id, depth=0)
+        # The org of a course is part of its key, so there's no need to load the course.
+        org = CourseKey.from_string(unicode(course_id)).org
+    else:
+        org = course.org
     context = {
-        'org_id': course.org,
+        'org_id': org,
         'course_id': unicode(course_id)
     }
     data = {
@@ -52,9 +52,10 @@ import uuid
 import os
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
@@ -152,6 +153,17 @@ class GeneratedCertificate(models.Model):
 
         return None
 
+    @classmethod
+    def certificates_for_student(cls, student, course_ids):
+        """
+        This returns a dict mapping those of `course_ids` that the student
+        has a certificate for to the certificates, with one query.
+        """
+        return {
+            certificate.course_id: certificate
+            for certificate in cls.objects.filter(user=student, course_id__in=course_ids)
+        }
+
 
 @receiver(post_save, sender=GeneratedCertificate)
 def handle_post_cert_generated(sender, instance, **kwargs):  # pylint: disable=no-self-argument, unused-argument
@@ -165,6 +177,20 @@ def handle_post_cert_generated(sender, instance, **kwargs):  # pylint: disable=n
         fulfill_course_milestone(instance.course_id, instance.user)
 
 
+# cache key format e.g certificates.for_user.<user_id> = [{...}, ...]
+CERTIFICATES_FOR_USER_CACHE_KEY = u'certificates.for_user.{}'
+
+
+@receiver(post_save, sender=GeneratedCertificate)
+@receiver(post_delete, sender=GeneratedCertificate)
+def invalidate_certificates_for_user_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forget the cached certificates of the student whose certificate changed;
+    see `certificates.api.get_certificates_for_user`.
+    """
+    cache.delete(CERTIFICATES_FOR_USER_CACHE_KEY.format(instance.user_id))
+
+
 def certificate_status_for_student(student, course_id):
     '''
     This returns a dictionary with a key for status, and other information.
@@ -194,22 +220,28 @@ def certificate_status_for_student(student, course_id):
     grade for the course with the key "grade".
     '''
 
-    try:
-        generated_certificate = GeneratedCertificate.objects.get(
-            user=student, course_id=course_id)
-        cert_status = {
-            'status': generated_certificate.status,
-            'mode': generated_certificate.mode
-        }
-        if generated_certificate.grade:
-            cert_status['grade'] = generated_certificate.grade
-        if generated_certificate.status == CertificateStatuses.downloadable:
-            cert_status['download_url'] = generated_certificate.download_url
+    return certificate_status(GeneratedCertificate.certificate_for_student(student, course_id))
+
 
-        return cert_status
-    except GeneratedCertificate.DoesNotExist:
-        pass
-    return {'status': CertificateStatuses.unavailable, 'mode': GeneratedCertificate.MODES.honor}
+def certificate_status(generated_certificate):
+    """
+    This returns the dictionary described by `certificate_status_for_student`
+    for `generated_certificate`, which is None if the student has no
+    certificate.
+    """
+    if generated_certificate is None:
+        return {'status': CertificateStatuses.unavailable, 'mode': GeneratedCertificate.MODES.honor}
+
+    cert_status = {
+        'status': generated_certificate.status,
+        'mode': generated_certificate.mode
+    }
+    if generated_certificate.grade:
+        cert_status['grade'] = generated_certificate.grade
+    if generated_certificate.status == CertificateStatuses.downloadable:
+        cert_status['download_url'] = generated_certificate.download_url
+
+    return cert_status
 
 
 def certificate_info_for_user(user, course_id, grade, user_is_whitelisted=None):
@@ -738,6 +770,32 @@ class CertificateTemplate(TimeStampedModel):
         unique_together = (('organization_id', 'course_key', 'mode'),)
 
 
+CERTIFICATE_TEMPLATES_VERSION_KEY = u'certificates.templates.version'
+# memcached treats longer timeouts as timestamps.
+CERTIFICATE_TEMPLATES_VERSION_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def certificate_templates_version():
+    """
+    Returns a value that changes whenever a certificate template is saved or
+    deleted, for use in the keys of cached template lookups.
+    """
+    version = cache.get(CERTIFICATE_TEMPLATES_VERSION_KEY)
+    if version is None:
+        cache.add(CERTIFICATE_TEMPLATES_VERSION_KEY, uuid.uuid4().hex, CERTIFICATE_TEMPLATES_VERSION_TIMEOUT)
+        version = cache.get(CERTIFICATE_TEMPLATES_VERSION_KEY)
+    return version
+
+
+@receiver(post_save, sender=CertificateTemplate)
+@receiver(post_delete, sender=CertificateTemplate)
+def invalidate_certificate_templates(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Make the cached certificate template lookups stale.
+    """
+    cache.set(CERTIFICATE_TEMPLATES_VERSION_KEY, uuid.uuid4().hex, CERTIFICATE_TEMPLATES_VERSION_TIMEOUT)
+
+
 def template_assets_path(instance, filename):
     """
     Delete the file if it already exist and returns the certificate template asset file path.
@@ -21,7 +21,7 @@ from verify_student.models import SoftwareSecurePhotoVerification
 
 from certificates.models import (
     GeneratedCertificate,
-    certificate_status_for_student,
+    certificate_status,
     CertificateStatuses as status,
     CertificateWhitelist,
     ExampleCertificate
@@ -49,6 +49,38 @@ class XQueueAddToQueueError(Exception):
         )
 
 
+class _CertificateRecords(object):
+    """
+    The records that generating certificates looks up for each student,
+    loaded for a set of students in a course at once.
+    """
+
+    def __init__(self, students, course_id):
+        user_ids = [student.id for student in students]
+        self.certificates = {
+            cert.user_id: cert
+            for cert in GeneratedCertificate.objects.filter(user_id__in=user_ids, course_id=course_id)
+        }
+        self.profiles = {profile.user_id: profile for profile in UserProfile.objects.filter(user_id__in=user_ids)}
+        self.whitelisted = set(CertificateWhitelist.objects.filter(
+            user_id__in=user_ids, course_id=course_id, whitelist=True
+        ).values_list('user_id', flat=True))
+        self.enrollment_modes = dict(
+            CourseEnrollment.objects.filter(user_id__in=user_ids, course_id=course_id).values_list('user_id', 'mode')
+        )
+        self.verified = SoftwareSecurePhotoVerification.verified_user_ids(user_ids)
+
+    def profile(self, student):
+        """
+        Return the profile of `student`, raising UserProfile.DoesNotExist if
+        there isn't one.
+        """
+        try:
+            return self.profiles[student.id]
+        except KeyError:
+            raise UserProfile.DoesNotExist()
+
+
 class XQueueCertInterface(object):
     """
     XQueueCertificateInterface provides an
@@ -102,8 +134,6 @@ class XQueueCertInterface(object):
             settings.XQUEUE_INTERFACE['django_auth'],
             requests_auth,
         )
-        self.whitelist = CertificateWhitelist.objects.all()
-        self.restricted = UserProfile.objects.filter(allow_certificate=False)
         self.use_https = True
 
     def regen_cert(self, student, course_id, course=None, forced_grade=None, template_file=None, generate_pdf=True):
@@ -182,7 +212,6 @@ class XQueueCertInterface(object):
 
         raise NotImplementedError
 
-    # pylint: disable=too-many-statements
     def add_cert(self, student, course_id, course=None, forced_grade=None, template_file=None,
                  title='None', generate_pdf=True):
         """
@@ -213,6 +242,68 @@ class XQueueCertInterface(object):
 
         Returns the student's status and newly created certificate instance
         """
+        records = _CertificateRecords([student], course_id)
+        return self._add_cert(
+            student, course_id, records,
+            course=course, forced_grade=forced_grade, template_file=template_file, generate_pdf=generate_pdf
+        )
+
+    def add_certs(self, students, course_id, course=None, forced_grade=None, template_file=None,
+                  generate_pdf=True):
+        """
+        Request new certificates for many students in a course, as `add_cert`
+        does for one.
+
+        The records `add_cert` looks up for each student are loaded for all
+        the students at once, the students are graded one after another
+        against the same course, and the certificate requests are only sent
+        to the queue once all the students have been graded.  If grading a
+        student raises, the requests for the students before them are still
+        sent before the exception is passed on, so that no certificate is
+        left 'generating' without a request.
+
+        Returns a list of (student, status, certificate) tuples.
+        """
+        if course is None:
+            course = modulestore().get_course(course_id, depth=0)
+        records = _CertificateRecords(students, course_id)
+        submissions = []
+        results = []
+        failed = set()
+        try:
+            with modulestore().bulk_operations(course_id):
+                for student in students:
+                    new_status, cert = self._add_cert(
+                        student, course_id, records,
+                        course=course, forced_grade=forced_grade, template_file=template_file,
+                        generate_pdf=generate_pdf, submissions=submissions
+                    )
+                    results.append((student, new_status, cert))
+        finally:
+            for submitted_cert, contents, key in submissions:
+                if not self._submit_cert(submitted_cert, contents, key):
+                    failed.add(submitted_cert.id)
+        return [
+            (
+                result_student,
+                ExampleCertificate.STATUS_ERROR
+                if result_cert is not None and result_cert.id in failed else result_status,
+                result_cert,
+            )
+            for result_student, result_status, result_cert in results
+        ]
+
+    # pylint: disable=too-many-statements
+    def _add_cert(self, student, course_id, records, course=None, forced_grade=None, template_file=None,
+                  generate_pdf=True, submissions=None):
+        """
+        Request a new certificate for a student, as described by `add_cert`,
+        looking the student's records up in `records`.
+
+        If `submissions` is a list, the certificate request is appended to it
+        as a (certificate, contents, key) tuple rather than being sent to the
+        queue.
+        """
 
         valid_statuses = [
             status.generating,
@@ -223,7 +314,7 @@ class XQueueCertInterface(object):
             status.downloadable
         ]
 
-        cert_status = certificate_status_for_student(student, course_id)['status']
+        cert_status = certificate_status(records.certificates.get(student.id))['status']
         new_status = cert_status
         cert = None
 
@@ -246,7 +337,7 @@ class XQueueCertInterface(object):
             # for every student
             if course is None:
                 course = modulestore().get_course(course_id, depth=0)
-            profile = UserProfile.objects.get(user=student)
+            profile = records.profile(student)
             profile_name = profile.name
 
             # Needed
@@ -254,11 +345,11 @@ class XQueueCertInterface(object):
             self.request.session = {}
 
             course_name = course.display_name or unicode(course_id)
-            is_whitelisted = self.whitelist.filter(user=student, course_id=course_id, whitelist=True).exists()
+            is_whitelisted = student.id in records.whitelisted
             grade = grades.grade(student, self.request, course)
-            enrollment_mode, __ = CourseEnrollment.enrollment_mode_for_user(student, course_id)
+            enrollment_mode = records.enrollment_modes.get(student.id)
             mode_is_verified = enrollment_mode in GeneratedCertificate.VERIFIED_CERTS_MODES
-            user_is_verified = SoftwareSecurePhotoVerification.user_is_verified(student)
+            user_is_verified = student.id in records.verified
             cert_mode = enrollment_mode
 
             # For credit mode generate verified certificate
@@ -276,7 +367,9 @@ class XQueueCertInterface(object):
             if forced_grade:
                 grade['grade'] = forced_grade
 
-            cert, __ = GeneratedCertificate.objects.get_or_create(user=student, course_id=course_id)
+            cert = records.certificates.get(student.id)
+            if cert is None:
+                cert, __ = GeneratedCertificate.objects.get_or_create(user=student, course_id=course_id)
 
             cert.mode = cert_mode
             cert.user = student
@@ -320,7 +413,7 @@ class XQueueCertInterface(object):
                 # otherwise, put a new certificate request
                 # on the queue
 
-                if self.restricted.filter(user=student).exists():
+                if not profile.allow_certificate:
                     new_status = status.restricted
                     cert.status = new_status
                     cert.save()
@@ -360,31 +453,10 @@ class XQueueCertInterface(object):
                     cert.save()
 
                     if generate_pdf:
-                        try:
-                            self._send_to_xqueue(contents, key)
-                        except XQueueAddToQueueError as exc:
+                        if submissions is not None:
+                            submissions.append((cert, contents, key))
+                        elif not self._submit_cert(cert, contents, key):
                             new_status = ExampleCertificate.STATUS_ERROR
-                            cert.status = new_status
-                            cert.error_reason = unicode(exc)
-                            cert.save()
-                            LOGGER.critical(
-                                (
-                                    u"Could not add certificate task to XQueue.  "
-                                    u"The course was '%s' and the student was '%s'."
-                                    u"The certificate task status has been marked as 'error' "
-                                    u"and can be re-submitted with a management command."
-                                ), course_id, student.id
-                            )
-                        else:
-                            LOGGER.info(
-                                (
-                                    u"The certificate status has been set to '%s'.  "
-                                    u"Sent a certificate grading task to the XQueue "
-                                    u"with the key '%s'. "
-                                ),
-                                new_status,
-                                key
-                            )
             else:
                 new_status = status.notpassing
                 cert.status = new_status
@@ -403,6 +475,39 @@ class XQueueCertInterface(object):
 
         return new_status, cert
 
+    def _submit_cert(self, cert, contents, key):
+        """
+        Send the request for the certificate `cert` to the queue.
+
+        Returns whether it was sent; if it wasn't, the certificate's status
+        is set to 'error'.
+        """
+        try:
+            self._send_to_xqueue(contents, key)
+        except XQueueAddToQueueError as exc:
+            cert.status = ExampleCertificate.STATUS_ERROR
+            cert.error_reason = unicode(exc)
+            cert.save()
+            LOGGER.critical(
+                (
+                    u"Could not add certificate task to XQueue.  "
+                    u"The course was '%s' and the student was '%s'."
+                    u"The certificate task status has been marked as 'error' "
+                    u"and can be re-submitted with a management command."
+                ), cert.course_id, cert.user_id
+            )
+            return False
+        LOGGER.info(
+            (
+                u"The certificate status has been set to '%s'.  "
+                u"Sent a certificate grading task to the XQueue "
+                u"with the key '%s'. "
+            ),
+            cert.status,
+            key
+        )
+        return True
+
     def add_example_cert(self, example_cert):
         """Add a task to create an example certificate.
 
@@ -22,7 +22,8 @@ from certificates.models import (
     CertificateStatuses,
     CertificateGenerationConfiguration,
     ExampleCertificate,
-    GeneratedCertificate
+    GeneratedCertificate,
+    CERTIFICATES_FOR_USER_CACHE_KEY,
 )
 from certificates.queue import XQueueCertInterface, XQueueAddToQueueError
 from certificates.tests.factories import GeneratedCertificateFactory
@@ -111,6 +112,42 @@ class CertificateDownloadableStatusTests(ModuleStoreTestCase):
         )
 
 
+@attr('shard_1')
+@override_settings(CERTIFICATES_CACHE_TIMEOUT=60)
+class GetCertificatesForUserTest(ModuleStoreTestCase):
+    """Tests for the cached `get_certificates_for_user` function. """
+
+    def setUp(self):
+        super(GetCertificatesForUserTest, self).setUp()
+        self.student = UserFactory()
+        self.course = CourseFactory.create()
+        cache.delete(CERTIFICATES_FOR_USER_CACHE_KEY.format(self.student.id))
+
+    def test_unknown_user(self):
+        self.assertEqual(certs_api.get_certificates_for_user('unknown'), [])
+
+    def test_cached_until_certificate_changes(self):
+        certificate = GeneratedCertificateFactory.create(
+            user=self.student,
+            course_id=self.course.id,
+            status=CertificateStatuses.generating,
+            mode='verified'
+        )
+        certificates = certs_api.get_certificates_for_user(self.student.username)
+        self.assertEqual(certificates[0]['status'], CertificateStatuses.generating)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(certs_api.get_certificates_for_user(self.student.username), certificates)
+
+        certificate.status = CertificateStatuses.downloadable
+        certificate.save()
+        certificates = certs_api.get_certificates_for_user(self.student.username)
+        self.assertEqual(certificates[0]['status'], CertificateStatuses.downloadable)
+
+        certificate.delete()
+        self.assertEqual(certs_api.get_certificates_for_user(self.student.username), [])
+
+
 @attr('shard_1')
 @override_settings(CERT_QUEUE='certificates')
 class GenerateUserCertificatesTest(EventTestMixin, ModuleStoreTestCase):
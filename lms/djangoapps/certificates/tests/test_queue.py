@@ -6,6 +6,7 @@ import json
 from mock import patch, Mock
 from nose.plugins.attrib import attr
 
+from django.db import connection
 from django.test import TestCase
 from django.test.utils import override_settings
 
@@ -97,6 +98,63 @@ class XQueueCertInterfaceAddCertificateTest(ModuleStoreTestCase):
 
         self.assert_queue_response(mode, 'verified', template_name)
 
+    def test_add_certs(self):
+        """Test that certificates are generated for many students at once."""
+        CourseEnrollmentFactory(user=self.user_2, course_id=self.course.id, is_active=True, mode='verified')
+        with patch('courseware.grades.grade', Mock(return_value={'grade': 'Pass', 'percent': 0.75})):
+            with patch.object(XQueueInterface, 'send_to_queue') as mock_send:
+                mock_send.side_effect = [(0, None), (1, 'Kaboom!')]
+                results = self.xqueue.add_certs([self.user, self.user_2], self.course.id)
+
+        self.assertEqual(
+            [(student, new_status) for student, new_status, __ in results],
+            [(self.user, CertificateStatuses.generating), (self.user_2, CertificateStatuses.error)]
+        )
+        self.assertEqual(mock_send.call_count, 2)
+        self.assertIn('verified', json.loads(mock_send.call_args_list[1][1]['body'])['template_pdf'])
+        self.assertEqual(
+            GeneratedCertificate.objects.get(user=self.user_2, course_id=self.course.id).status,
+            CertificateStatuses.error
+        )
+
+    def test_add_certs_error(self):
+        """Test that the certificates queued before a student whose grading fails are still sent."""
+        CourseEnrollmentFactory(user=self.user_2, course_id=self.course.id, is_active=True, mode='honor')
+        grade = Mock(side_effect=[{'grade': 'Pass', 'percent': 0.75}, ValueError("Kaboom!")])
+        with patch('courseware.grades.grade', grade):
+            with patch.object(XQueueInterface, 'send_to_queue', Mock(return_value=(0, None))) as mock_send:
+                with self.assertRaises(ValueError):
+                    self.xqueue.add_certs([self.user, self.user_2], self.course.id)
+
+        self.assertEqual(mock_send.call_count, 1)
+        self.assertEqual(json.loads(mock_send.call_args[1]['body'])['username'], self.user.username)
+        self.assertEqual(
+            GeneratedCertificate.objects.get(user=self.user, course_id=self.course.id).status,
+            CertificateStatuses.generating
+        )
+        self.assertFalse(GeneratedCertificate.objects.filter(user=self.user_2, course_id=self.course.id).exists())
+
+    def test_add_certs_lookups(self):
+        """Test that each student's records aren't looked up one student at a time."""
+        students = [self.user, self.user_2] + [UserFactory.create() for __ in range(3)]
+        for student in students[1:]:
+            CourseEnrollmentFactory(user=student, course_id=self.course.id, is_active=True, mode='honor')
+
+        use_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        try:
+            queries_before = len(connection.queries)
+            with patch('courseware.grades.grade', Mock(return_value={'grade': 'Pass', 'percent': 0.75})):
+                with patch.object(XQueueInterface, 'send_to_queue', Mock(return_value=(0, None))):
+                    self.xqueue.add_certs(students, self.course.id, generate_pdf=False)
+            queries = [query['sql'] for query in connection.queries[queries_before:]]
+        finally:
+            connection.use_debug_cursor = use_debug_cursor
+
+        for table in ('auth_userprofile', 'certificates_certificatewhitelist', 'student_courseenrollment',
+                      'verify_student_softwaresecurephotoverification'):
+            self.assertEqual(len([sql for sql in queries if table in sql]), 1, table)
+
     def assert_queue_response(self, mode, expected_mode, expected_template_name):
         """Dry method for course enrollment and adding request to queue."""
         CourseEnrollmentFactory(
@@ -14,6 +14,7 @@ from openedx.core.lib.tests.assertions.events import assert_event_matches
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 from student.roles import CourseStaffRole
 from track.tests import EventTrackingTestCase
+from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
@@ -615,3 +616,61 @@ class CertificatesViewsTests(ModuleStoreTestCase, EventTrackingTestCase):
             response = self.client.get(test_url)
             self.assertEqual(response.status_code, 200)
             self.assertContains(response, 'mode: {}'.format(mode))
+
+    @override_settings(FEATURES=FEATURES_WITH_CERTS_ENABLED, CERTIFICATES_CACHE_TIMEOUT=60)
+    def test_render_html_view_cached(self):
+        test_url = get_certificate_url(
+            user_id=self.user.id,
+            course_id=unicode(self.course.id)
+        )
+        self._add_course_certificates(count=1, signatory_count=2)
+        self.client.get(test_url)
+
+        # The course isn't loaded again until the certificate changes.
+        with patch('certificates.views.webview.modulestore') as mock_modulestore:
+            response = self.client.get(test_url)
+            self.assertFalse(mock_modulestore.called)
+        self.assertIn(str(self.cert.verify_uuid), response.content)
+
+        self.cert.mode = 'verified'
+        self.cert.save()
+        with patch('certificates.views.webview.modulestore', wraps=modulestore) as mock_modulestore:
+            response = self.client.get(test_url)
+            self.assertTrue(mock_modulestore.called)
+        self.assertIn(str(self.cert.verify_uuid), response.content)
+
+    @override_settings(FEATURES=FEATURES_WITH_CERTS_ENABLED, CERTIFICATES_CACHE_TIMEOUT=60)
+    def test_render_html_view_cache_name_change(self):
+        test_url = get_certificate_url(
+            user_id=self.user.id,
+            course_id=unicode(self.course.id)
+        )
+        self._add_course_certificates(count=1, signatory_count=2)
+        response = self.client.get(test_url)
+
+        # The learner's new name is shown, rather than a cached or not-modified page.
+        self.user.profile.name = u'Renamed Learner'
+        self.user.profile.save()
+        response = self.client.get(test_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Renamed Learner', response.content)
+
+    @override_settings(FEATURES=FEATURES_WITH_CERTS_ENABLED, CERTIFICATE_WEB_VIEW_MAX_AGE=300)
+    def test_render_html_view_cache_headers(self):
+        test_url = get_certificate_url(
+            user_id=self.user.id,
+            course_id=unicode(self.course.id)
+        )
+        self._add_course_certificates(count=1, signatory_count=2)
+        response = self.client.get(test_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('max-age=300', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+
+        response = self.client.get(test_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        self.client.logout()
+        response = self.client.get(test_url)
+        self.assertIn('public', response['Cache-Control'])
@@ -3,17 +3,20 @@ Certificate HTML webview.
 """
 from datetime import datetime
 from uuid import uuid4
+import hashlib
 import logging
 import urllib
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.http import HttpResponse
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
 from django.template import RequestContext
+from django.utils import translation
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.utils.translation import ugettext as _
 from django.core.urlresolvers import reverse
 
-from courseware.courses import course_image_url
 from courseware.access import has_access
 from edxmako.shortcuts import render_to_response
 from edxmako.template import Template
@@ -21,6 +24,7 @@ from eventtracking import tracker
 from microsite_configuration import microsite
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from student.models import LinkedInAddToProfileConfiguration
 from util import organizations_helpers as organization_api
 from util.views import handle_500
@@ -37,19 +41,13 @@ from certificates.models import (
     GeneratedCertificate,
     CertificateHtmlViewConfiguration,
     CertificateSocialNetworks,
-    BadgeAssertion
+    BadgeAssertion,
+    certificate_templates_version,
 )
 
 log = logging.getLogger(__name__)
 
 
-class CourseDoesNotExist(Exception):
-    """
-    This exception is raised in the case where None is returned from the modulestore
-    """
-    pass
-
-
 def get_certificate_description(mode, certificate_type, platform_name):
     """
     :return certificate_type_description on the basis of current mode
@@ -333,10 +331,7 @@ def render_html_view(request, user_id, course_id):
     try:
         course_key = CourseKey.from_string(course_id)
         user = User.objects.get(id=user_id)
-        course = modulestore().get_course(course_key)
-
-        if not course:
-            raise CourseDoesNotExist
+        course_overview = CourseOverview.get_from_id(course_key)
 
         # Attempt to load the user's generated certificate data
         if preview_mode:
@@ -354,7 +349,8 @@ def render_html_view(request, user_id, course_id):
     # If there's no generated certificate data for this user, we need to see if we're in 'preview' mode...
     # If we are, we'll need to create a mock version of the user_certificate container for previewing
     except GeneratedCertificate.DoesNotExist:
-        if preview_mode and (
+        course = modulestore().get_course(course_key) if preview_mode else None
+        if course and (
             has_access(request.user, 'instructor', course)
             or has_access(request.user, 'staff', course)
         ):
@@ -367,7 +363,7 @@ def render_html_view(request, user_id, course_id):
             return render_to_response(invalid_template_path, context)
 
     # For any other expected exceptions, kick the user back to the "Invalid" screen
-    except (InvalidKeyError, CourseDoesNotExist, User.DoesNotExist):
+    except (InvalidKeyError, CourseOverview.DoesNotExist, IOError, User.DoesNotExist):
         return render_to_response(invalid_template_path, context)
 
     # Badge Request Event Tracking Logic
@@ -393,86 +389,170 @@ def render_html_view(request, user_id, course_id):
                 course_key,
             )
 
-    # Okay, now we have all of the pieces, time to put everything together
+    # track certificate evidence_visited event for analytics when certificate_user and accessing_user are different
+    if request.user and request.user.id != user.id:
+        emit_certificate_event('evidence_visited', user, course_id, event_data={
+            'certificate_id': user_certificate.verify_uuid,
+            'enrollment_mode': user_certificate.mode,
+            'social_network': CertificateSocialNetworks.linkedin
+        })
 
-    # Get the active certificate configuration for this course
-    # If we do not have an active certificate, we'll need to send the user to the "Invalid" screen
-    # Passing in the 'preview' parameter, if specified, will return a configuration, if defined
-    active_configuration = get_active_web_certificate(course, preview_mode)
-    if active_configuration is None:
-        return render_to_response(invalid_template_path, context)
+    # Previews show unsaved changes, so they are never cached.
+    cache_key = None if preview_mode else _certificate_context_cache_key(user, user_certificate, course_overview)
+    if cache_key and request.META.get('HTTP_IF_NONE_MATCH') == _etag(cache_key):
+        response = HttpResponseNotModified()
+        _add_cache_headers(request, response, cache_key)
+        return response
+    cache_timeout = settings.CERTIFICATES_CACHE_TIMEOUT
+    cached_context = cache.get(cache_key) if cache_key and cache_timeout else None
+    if cached_context is not None:
+        context = cached_context
     else:
-        context['certificate_data'] = active_configuration
+        course = modulestore().get_course(course_key)
+        if not course:
+            return render_to_response(invalid_template_path, context)
 
-    # Append/Override the existing view context values with any mode-specific ConfigurationModel values
-    context.update(configuration.get(user_certificate.mode, {}))
+        # Okay, now we have all of the pieces, time to put everything together
 
-    # Append/Override the existing view context values with request-time values
-    _update_certificate_context(context, course, user, user_certificate)
+        # Get the active certificate configuration for this course
+        # If we do not have an active certificate, we'll need to send the user to the "Invalid" screen
+        # Passing in the 'preview' parameter, if specified, will return a configuration, if defined
+        active_configuration = get_active_web_certificate(course, preview_mode)
+        if active_configuration is None:
+            return render_to_response(invalid_template_path, context)
+        else:
+            context['certificate_data'] = active_configuration
+
+        # Append/Override the existing view context values with any mode-specific ConfigurationModel values
+        context.update(configuration.get(user_certificate.mode, {}))
+
+        # Append/Override the existing view context values with request-time values
+        _update_certificate_context(context, course, user, user_certificate)
+
+        # Microsites will need to be able to override any hard coded
+        # content that was put into the context in the
+        # _update_certificate_context() call above. For example the
+        # 'company_about_description' talks about edX, which we most likely
+        # do not want to keep in a microsite
+        #
+        # So we need to re-apply any configuration/content that
+        # we are sourceing from the database. This is somewhat duplicative of
+        # the code at the beginning of this method, but we
+        # need the configuration at the top as some error code paths
+        # require that to be set up early on in the pipeline
+        #
+        microsite_config_key = microsite.get_value('microsite_config_key')
+        if microsite_config_key:
+            context.update(configuration.get(microsite_config_key, {}))
+
+        # Append/Override the existing view context values with any course-specific static values from Advanced Settings
+        context.update(course.cert_html_view_overrides)
+
+        if settings.FEATURES.get('CUSTOM_CERTIFICATE_TEMPLATES_ENABLED', False):
+            context['custom_template'] = get_certificate_template(course_key, user_certificate.mode)
+
+        if cache_key and cache_timeout:
+            cache.set(cache_key, context, cache_timeout)
+
+    # The values that depend on the request are added last, unless the
+    # configuration or the course overrides them.
     share_url = request.build_absolute_uri(
         reverse(
             'certificates:html_view',
             kwargs=dict(user_id=str(user_id), course_id=unicode(course_id))
         )
     )
-    context['share_url'] = share_url
+    context.setdefault('share_url', share_url)
     twitter_url = 'https://twitter.com/intent/tweet?text={twitter_share_text}&url={share_url}'.format(
         twitter_share_text=context['twitter_share_text'],
         share_url=urllib.quote_plus(share_url)
     )
-    context['twitter_url'] = twitter_url
-    context['full_course_image_url'] = request.build_absolute_uri(course_image_url(course))
+    context.setdefault('twitter_url', twitter_url)
+    context.setdefault('full_course_image_url', request.build_absolute_uri(course_overview.course_image_url))
 
     # If enabled, show the LinkedIn "add to profile" button
     # Clicking this button sends the user to LinkedIn where they
     # can add the certificate information to their profile.
     linkedin_config = LinkedInAddToProfileConfiguration.current()
     if linkedin_config.enabled:
-        context['linked_in_url'] = linkedin_config.add_to_profile_url(
-            course.id,
-            course.display_name,
+        context.setdefault('linked_in_url', linkedin_config.add_to_profile_url(
+            course_key,
+            course_overview.display_name,
             user_certificate.mode,
             request.build_absolute_uri(get_certificate_url(
                 user_id=user.id,
-                course_id=unicode(course.id)
+                course_id=unicode(course_key)
             ))
-        )
+        ))
     else:
-        context['linked_in_url'] = None
-
-    # Microsites will need to be able to override any hard coded
-    # content that was put into the context in the
-    # _update_certificate_context() call above. For example the
-    # 'company_about_description' talks about edX, which we most likely
-    # do not want to keep in a microsite
-    #
-    # So we need to re-apply any configuration/content that
-    # we are sourceing from the database. This is somewhat duplicative of
-    # the code at the beginning of this method, but we
-    # need the configuration at the top as some error code paths
-    # require that to be set up early on in the pipeline
-    #
-    microsite_config_key = microsite.get_value('microsite_config_key')
-    if microsite_config_key:
-        context.update(configuration.get(microsite_config_key, {}))
+        context.setdefault('linked_in_url', None)
 
-    # track certificate evidence_visited event for analytics when certificate_user and accessing_user are different
-    if request.user and request.user.id != user.id:
-        emit_certificate_event('evidence_visited', user, course_id, course, {
-            'certificate_id': user_certificate.verify_uuid,
-            'enrollment_mode': user_certificate.mode,
-            'social_network': CertificateSocialNetworks.linkedin
-        })
+    # FINALLY, generate and send the output the client
+    custom_template = context.pop('custom_template', None)
+    if custom_template:
+        template = Template(custom_template)
+        context = RequestContext(request, context)
+        response = HttpResponse(template.render(context))
+    else:
+        response = render_to_response("certificates/valid.html", context)
 
-    # Append/Override the existing view context values with any course-specific static values from Advanced Settings
-    context.update(course.cert_html_view_overrides)
+    if cache_key:
+        _add_cache_headers(request, response, cache_key)
+    return response
 
-    # FINALLY, generate and send the output the client
-    if settings.FEATURES.get('CUSTOM_CERTIFICATE_TEMPLATES_ENABLED', False):
-        custom_template = get_certificate_template(course_key, user_certificate.mode)
-        if custom_template:
-            template = Template(custom_template)
-            context = RequestContext(request, context)
-            return HttpResponse(template.render(context))
-
-    return render_to_response("certificates/valid.html", context)
+
+def _certificate_context_cache_key(user, user_certificate, course_overview):
+    """
+    Returns the key that the view context of a certificate is cached under.
+
+    The key changes whenever the certificate, the learner's name, the course
+    (whose overview is regenerated when it is published), its organizations
+    or any custom certificate template changes, and differs between
+    languages and microsites.
+    """
+    organizations = [
+        (organization.get('name'), organization.get('short_name'), organization.get('logo'))
+        for organization in organization_api.get_course_organizations(course_id=course_overview.id)
+    ]
+    parts = [
+        user_certificate.verify_uuid,
+        user_certificate.modified_date,
+        user.username,
+        user.profile.name,
+        organizations,
+        course_overview.modified,
+        certificate_templates_version(),
+        translation.get_language(),
+        microsite.get_value('microsite_config_key', 'default'),
+        CertificateHtmlViewConfiguration.current().change_date,
+    ]
+    return u'certificates.webview.context.{}'.format(
+        hashlib.md5(u'|'.join(unicode(part) for part in parts).encode('utf-8')).hexdigest()
+    )
+
+
+def _etag(cache_key):
+    """
+    Returns the ETag of the certificate page whose context is cached under
+    `cache_key`.
+    """
+    return '"{}"'.format(cache_key.rsplit('.', 1)[-1])
+
+
+def _add_cache_headers(request, response, cache_key):
+    """
+    Let browsers and proxies cache a certificate page, and revalidate it
+    with an ETag that changes with the certificate's view context.
+
+    Pages seen by logged-in users may show who they are, so only the user's
+    own browser may keep those.
+    """
+    if response.status_code not in (200, 304):
+        return
+    response['ETag'] = _etag(cache_key)
+    patch_vary_headers(response, ('Cookie', 'Accept-Language'))
+    max_age = settings.CERTIFICATE_WEB_VIEW_MAX_AGE
+    if request.user.is_authenticated():
+        patch_cache_control(response, private=True, max_age=max_age)
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
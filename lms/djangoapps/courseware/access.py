@@ -10,7 +10,7 @@ Note: The access control logic in this file does NOT check for enrollment in
   If enrollment is to be checked, use get_course_with_access in courseware.courses.
   It is a wrapper around has_access that additionally checks for enrollment.
 """
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 import pytz
 
@@ -34,7 +34,9 @@ from xmodule.partitions.partitions import NoSuchUserPartitionError, NoSuchUserPa
 
 from external_auth.models import ExternalAuthMap
 from courseware.masquerade import get_masquerade_role, is_masquerading_as_student
+from lms.djangoapps.lms_xblock.mixin import merge_group_access
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from request_cache.middleware import RequestCache
 from student import auth
 from student.models import CourseEnrollmentAllowed
 from student.roles import (
@@ -59,9 +61,17 @@ import dogstats_wrapper as dog_stats_api
 from courseware.access_response import (
     MilestoneError,
     MobileAvailabilityError,
+    StartDateError,
     VisibilityError,
 )
-from courseware.access_utils import adjust_start_date, check_start_date, debug, ACCESS_GRANTED, ACCESS_DENIED
+from courseware.access_utils import (
+    adjust_start_date,
+    check_start_date,
+    debug,
+    in_preview_mode,
+    ACCESS_GRANTED,
+    ACCESS_DENIED,
+)
 from ccx.models import CustomCourseForEdX  # Added by labster.
 
 
@@ -141,6 +151,122 @@ def has_access(user, action, obj, course_key=None):
                     .format(type(obj)))
 
 
+def has_access_many(user, action, descriptors, course_key=None):
+    """
+    Check whether a user has the access to do action on each of descriptors.
+
+    This gives the same answers as calling has_access on each descriptor in
+    turn, but the facts about the user that don't depend on the block (staff
+    and beta tester roles, masquerading, start date settings and partition
+    groups) are looked up once for all of them, rather than once per block.
+    Pass parents before their children, so the children can reuse their
+    parents' merged group access rules.
+
+    Only 'load' and 'staff' on plain descriptors are evaluated in bulk; any
+    other action or object is handed over to has_access.
+
+    Returns a dict mapping the location of each descriptor to an
+    AccessResponse.
+    """
+    if not user:
+        user = AnonymousUser()
+
+    if isinstance(course_key, CCXLocator):
+        course_key = course_key.to_course_locator()
+
+    checkers = {}
+    results = {}
+    for obj in descriptors:
+        descriptor = obj.descriptor if isinstance(obj, XModule) else obj
+        if (
+                action not in ('load', 'staff') or
+                not isinstance(descriptor, XBlock) or
+                isinstance(descriptor, (CourseDescriptor, ErrorDescriptor))
+        ):
+            results[obj.location] = has_access(user, action, obj, course_key)
+            continue
+
+        block_course_key = course_key or descriptor.location.course_key
+        if block_course_key not in checkers:
+            checkers[block_course_key] = _BulkDescriptorAccess(user, block_course_key)
+        checker = checkers[block_course_key]
+        results[obj.location] = checker.can_load(descriptor) if action == 'load' else checker.staff_access
+    return results
+
+
+class _BulkDescriptorAccess(object):
+    """
+    Evaluates _has_access_descriptor for many descriptors of one course, with
+    the facts about the user looked up once.
+    """
+    def __init__(self, user, course_key):
+        self.user = user
+        self.course_key = course_key
+        self.staff_access = _has_access_to_course(user, 'staff', course_key)
+        self.now = datetime.now(UTC())
+        self._ignore_start_dates = None
+        self._is_beta_tester = None
+        self._groups = {}
+        self._merged_group_access = {}
+
+    def ignore_start_dates(self):
+        """
+        Return whether start dates are disabled for the user, as in check_start_date.
+        """
+        if self._ignore_start_dates is None:
+            self._ignore_start_dates = bool(
+                (
+                    settings.FEATURES['DISABLE_START_DATES'] and
+                    not is_masquerading_as_student(self.user, self.course_key)
+                ) or in_preview_mode()
+            )
+        return self._ignore_start_dates
+
+    def is_beta_tester(self):
+        """
+        Return whether the user is a beta tester of the course.
+        """
+        if self._is_beta_tester is None:
+            self._is_beta_tester = CourseBetaTesterRole(self.course_key).has_user(self.user)
+        return self._is_beta_tester
+
+    def get_group(self, partition):
+        """
+        Return the group of `partition` that the user is in.
+        """
+        if partition.id not in self._groups:
+            self._groups[partition.id] = _get_group_for_user(self.course_key, self.user, partition)
+        return self._groups[partition.id]
+
+    def check_start_date(self, descriptor):
+        """
+        Check the start date of `descriptor`, as check_start_date does.
+        """
+        start = descriptor.start
+        if start is None or self.ignore_start_dates():
+            return ACCESS_GRANTED
+        effective_start = start
+        if descriptor.days_early_for_beta is not None and self.is_beta_tester():
+            effective_start = start - timedelta(descriptor.days_early_for_beta)
+        return ACCESS_GRANTED if self.now > effective_start else StartDateError(start)
+
+    def can_load(self, descriptor):
+        """
+        Return whether the user can load `descriptor`, as the 'load' checker
+        of _has_access_descriptor does.
+        """
+        if self.staff_access:
+            return ACCESS_GRANTED
+        return (
+            _visible_to_nonstaff_users(descriptor)
+            and _has_group_access(
+                descriptor, self.user, self.course_key,
+                get_group=self.get_group, merged_cache=self._merged_group_access,
+            )
+            and (_has_detached_class_tag(descriptor) or self.check_start_date(descriptor))
+        )
+
+
 # ================ Implementation helpers ================================
 def _can_access_descriptor_with_start_date(user, descriptor, course_key):  # pylint: disable=invalid-name
     """
@@ -440,10 +566,57 @@ def _has_access_error_desc(user, action, descriptor, course_key):
     return _dispatch(checkers, action, user, descriptor)
 
 
-def _has_group_access(descriptor, user, course_key):
+def _get_group_for_user(course_key, user, partition):
+    """
+    Return the group of `partition` that `user` is in.
+
+    Within a request, the group is looked up once per user, course and
+    partition, rather than once for every block checked.  Outside of a
+    request (e.g. in tasks and tests that call has_access directly), it is
+    looked up every time, since group assignments may change in between.
+    """
+    request_cache = RequestCache.get_request_cache()
+    if request_cache.request is None:
+        return partition.scheme.get_group_for_user(course_key, user, partition)
+
+    cache_key = u"access.get_group_for_user.{}.{}.{}".format(user.id, course_key, partition.id)
+    if cache_key not in request_cache.data:
+        request_cache.data[cache_key] = partition.scheme.get_group_for_user(course_key, user, partition)
+    return request_cache.data[cache_key]
+
+
+def _get_merged_group_access(descriptor, merged_cache=None):
+    """
+    Return the `merged_group_access` of `descriptor`.
+
+    Within a request, merged rules are remembered by location, so a block
+    whose parent has already been checked merges its own rules into its
+    parent's instead of loading and merging each of its ancestors again.
+    Pass `merged_cache` to remember them in that dict instead.
+    """
+    if merged_cache is None:
+        request_cache = RequestCache.get_request_cache()
+        if request_cache.request is None:
+            return descriptor.merged_group_access
+        merged_cache = request_cache.data.setdefault(u"access.merged_group_access", {})
+
+    location = descriptor.location
+    if location not in merged_cache:
+        parent_location = getattr(descriptor, 'parent', None)
+        if parent_location is not None and parent_location in merged_cache:
+            merged_cache[location] = merge_group_access(merged_cache[parent_location], descriptor.group_access)
+        else:
+            merged_cache[location] = descriptor.merged_group_access
+    return merged_cache[location]
+
+
+def _has_group_access(descriptor, user, course_key, get_group=None, merged_cache=None):
     """
     This function returns a boolean indicating whether or not `user` has
     sufficient group memberships to "load" a block (the `descriptor`)
+
+    `get_group` and `merged_cache` let callers that check many blocks at once
+    share group lookups and merged rules between them; see `has_access_many`.
     """
     if len(descriptor.user_partitions) == len(get_split_user_partitions(descriptor.user_partitions)):
         # Short-circuit the process, since there are no defined user partitions that are not
@@ -453,7 +626,7 @@ def _has_group_access(descriptor, user, course_key):
 
     # use merged_group_access which takes group access on the block's
     # parents / ancestors into account
-    merged_access = descriptor.merged_group_access
+    merged_access = _get_merged_group_access(descriptor, merged_cache)
     # check for False in merged_access, which indicates that at least one
     # partition's group list excludes all students.
     if False in merged_access.values():
@@ -498,11 +671,10 @@ def _has_group_access(descriptor, user, course_key):
     # look up the user's group for each partition
     user_groups = {}
     for partition, groups in partition_groups:
-        user_groups[partition.id] = partition.scheme.get_group_for_user(
-            course_key,
-            user,
-            partition,
-        )
+        if get_group is None:
+            user_groups[partition.id] = _get_group_for_user(course_key, user, partition)
+        else:
+            user_groups[partition.id] = get_group(partition)
 
     # finally: check that the user has a satisfactory group assignment
     # for each partition.
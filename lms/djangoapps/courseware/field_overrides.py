@@ -71,11 +71,6 @@ class OverrideFieldData(FieldData):
         any performance impact of this feature if no override providers are
         configured.
         """
-        if cls.provider_classes is None:
-            cls.provider_classes = tuple(
-                (resolve_dotted(name) for name in
-                 settings.FIELD_OVERRIDE_PROVIDERS))
-
         enabled_providers = cls._providers_for_course(course)
         if enabled_providers:
             # TODO: we might not actually want to return here.  Might be better
@@ -86,6 +81,14 @@ class OverrideFieldData(FieldData):
 
         return wrapped
 
+    @classmethod
+    def overrides_enabled_for(cls, course):
+        """
+        Returns whether any override providers are enabled for `course`, in
+        which case field values may differ from one user to another.
+        """
+        return bool(cls._providers_for_course(course))
+
     @classmethod
     def _providers_for_course(cls, course):
         """
@@ -96,6 +99,11 @@ class OverrideFieldData(FieldData):
         Arguments:
             course: The course XBlock
         """
+        if cls.provider_classes is None:
+            cls.provider_classes = tuple(
+                (resolve_dotted(name) for name in
+                 settings.FIELD_OVERRIDE_PROVIDERS))
+
         request_cache = RequestCache.get_request_cache()
         if course is None:
             cache_key = ENABLED_OVERRIDE_PROVIDERS_KEY.format(course_id='None')
@@ -0,0 +1,97 @@
+"""
+Compare checking a user's access to every block of a course one block at a
+time with `has_access` against checking them all at once with
+`has_access_many`, and report the time taken and the queries made by each.
+
+    ./manage.py lms benchmark_access <course_id> --username <username> --settings=devstack
+"""
+import time
+from optparse import make_option
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from courseware.access import has_access, has_access_many
+from xmodule.modulestore.django import modulestore
+
+
+def measure(func, runs):
+    """
+    Call `func` `runs` times, and return the mean time in ms and the number
+    of queries made per call.
+    """
+    use_debug_cursor = connection.use_debug_cursor
+    connection.use_debug_cursor = True
+    try:
+        latencies = []
+        queries = 0
+        for __ in xrange(runs):
+            queries_before = len(connection.queries)
+            start = time.time()
+            func()
+            latencies.append((time.time() - start) * 1000)
+            queries += len(connection.queries) - queries_before
+    finally:
+        connection.use_debug_cursor = use_debug_cursor
+    return sum(latencies) / runs, queries / runs
+
+
+class Command(BaseCommand):
+    """
+    Benchmark has_access against has_access_many on the blocks of a course.
+    """
+    args = "<course_id>"
+    help = __doc__
+    option_list = BaseCommand.option_list + (
+        make_option('--username',
+                    action='store',
+                    dest='username',
+                    help='User whose access is checked.'),
+        make_option('--action',
+                    action='store',
+                    dest='action',
+                    default='load',
+                    help='Action to check access for (default: load).'),
+        make_option('--runs',
+                    action='store',
+                    dest='runs',
+                    type='int',
+                    default=5,
+                    help='Number of times each check is run (default: 5).'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("benchmark_access requires one argument: <course_id>")
+        if not options['username']:
+            raise CommandError("--username is required")
+
+        try:
+            course_key = CourseKey.from_string(args[0])
+        except InvalidKeyError:
+            raise CommandError("Invalid course_id: {}".format(args[0]))
+
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError("Unknown user: {}".format(options['username']))
+
+        action = options['action']
+        runs = options['runs']
+        with modulestore().bulk_operations(course_key):
+            blocks = [
+                block for block in modulestore().get_items(course_key)
+                if block.location.block_type != 'course'
+            ]
+            if not blocks:
+                raise CommandError("No blocks found in {}".format(course_key))
+
+            one_by_one = measure(lambda: [has_access(user, action, block, course_key) for block in blocks], runs)
+            all_at_once = measure(lambda: has_access_many(user, action, blocks, course_key), runs)
+
+        self.stdout.write("{} blocks, {} runs\n".format(len(blocks), runs))
+        for label, (latency, queries) in (('has_access', one_by_one), ('has_access_many', all_at_once)):
+            self.stdout.write("{:<16} mean={:8.1f}ms  queries={}\n".format(label, latency, queries))
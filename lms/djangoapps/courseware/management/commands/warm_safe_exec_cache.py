@@ -0,0 +1,85 @@
+"""
+Pre-compute the sandboxed code results of a course's per-student randomized problems.
+
+Problems with `rerandomize="per_student"` only ever use a small number of seeds
+(see `capa_base.NUM_RANDOMIZATION_BINS`), so running each of them once ahead
+of time means students find their problem's script results in the cache
+instead of paying for a codejail process spawn.
+
+Problems whose code refers to the student's anonymous id can't be shared
+between students and won't benefit.
+"""
+import logging
+from optparse import make_option
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from xblock.runtime import KvsFieldData
+
+from courseware.model_data import DjangoKeyValueStore, FieldDataCache
+from courseware.module_render import get_module_for_descriptor_internal
+from xmodule.capa_base import NUM_RANDOMIZATION_BINS
+from xmodule.capa_base_constants import RANDOMIZATION
+from xmodule.modulestore.django import modulestore
+
+LOG = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Run the script code of every per-student randomized problem in a course
+    once for each seed, filling the safe_exec cache.
+    """
+    args = "<course_id>"
+    help = __doc__
+    option_list = BaseCommand.option_list + (
+        make_option('--username',
+                    action='store',
+                    dest='username',
+                    help='Staff user to bind the problems as.'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("warm_safe_exec_cache requires one argument: <course_id>")
+        if not options['username']:
+            raise CommandError("--username is required")
+
+        try:
+            course_key = CourseKey.from_string(args[0])
+        except InvalidKeyError:
+            raise CommandError("Invalid course_id: {}".format(args[0]))
+
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError("Unknown user: {}".format(options['username']))
+
+        problems = [
+            descriptor
+            for descriptor in modulestore().get_items(course_key, qualifiers={'category': 'problem'})
+            if descriptor.rerandomize == RANDOMIZATION.PER_STUDENT
+        ]
+        LOG.info(u"Warming safe_exec cache for %d problems in %s", len(problems), course_key)
+
+        for descriptor in problems:
+            field_data_cache = FieldDataCache([], course_key, user)
+            module = get_module_for_descriptor_internal(
+                user=user,
+                descriptor=descriptor,
+                student_data=KvsFieldData(DjangoKeyValueStore(field_data_cache)),
+                course_id=course_key,
+                track_function=lambda event_type, event: None,
+                xqueue_callback_url_prefix='',
+                request_token=None,
+            )
+            if module is None:
+                continue
+            for seed in xrange(NUM_RANDOMIZATION_BINS):
+                try:
+                    module.new_lcp({'seed': seed})
+                except Exception:  # pylint: disable=broad-except
+                    LOG.exception(u"Failed to warm %s with seed %d", descriptor.location, seed)
+                    break
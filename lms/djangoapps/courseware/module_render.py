@@ -25,14 +25,17 @@ from django.views.decorators.csrf import csrf_exempt
 
 import newrelic.agent
 
+from capa.safe_exec.cache import LRUCache, TieredCache
 from capa.xqueue_interface import XQueueInterface
 from courseware.access import has_access, get_user_role
 from courseware.masquerade import (
     MasqueradingKeyValueStore,
     filter_displayed_blocks,
+    get_course_masquerade,
     is_masquerading_as_specific_student,
     setup_masquerade,
 )
+from courseware import toc_cache
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache, set_score
 from courseware.models import SCORE_CHANGED
 from courseware.entrance_exams import (
@@ -98,6 +101,10 @@ XQUEUE_INTERFACE = XQueueInterface(
     REQUESTS_AUTH,
 )
 
+# Results of sandboxed problem code: an in-process LRU in front of the shared
+# Django cache, used by every module this process renders.
+SAFE_EXEC_CACHE = TieredCache(cache, LRUCache(settings.SAFE_EXEC_LOCAL_CACHE_SIZE))
+
 # TODO: course_id and course_key are used interchangeably in this file, which is wrong.
 # Some brave person should make the variable names consistently someday, but the code's
 # coupled enough that it's kind of tricky--you've been warned!
@@ -147,14 +154,11 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
     '''
 
     with modulestore().bulk_operations(course.id):
-        course_module = get_module_for_descriptor(
-            user, request, course, field_data_cache, course.id, course=course
-        )
-        if course_module is None:
+        chapters = toc_snapshot(user, request, course, field_data_cache)
+        if chapters is None:
             return None
 
         toc_chapters = list()
-        chapters = course_module.get_display_items()
 
         # See if the course is gated by one or more content milestones
         required_content = milestones_helpers.get_required_content(course, user)
@@ -165,97 +169,151 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
 
         for chapter in chapters:
             # Only show required content, if there is required content
-            # chapter.hide_from_toc is read-only (boo)
-            display_id = slugify(chapter.display_name_with_default)
-            local_hide_from_toc = False
-            if required_content:
-                if unicode(chapter.location) not in required_content:
-                    local_hide_from_toc = True
-
-            # Skip the current chapter if a hide flag is tripped
-            if chapter.hide_from_toc or local_hide_from_toc:
+            if required_content and chapter['location'] not in required_content:
                 continue
 
             sections = list()
-            for section in chapter.get_display_items():
-
-                active = (chapter.url_name == active_chapter and
-                          section.url_name == active_section)
-
-                if not section.hide_from_toc:
-                    section_context = {
-                        'display_name': section.display_name_with_default,
-                        'url_name': section.url_name,
-                        'format': section.format if section.format is not None else '',
-                        'due': section.due,
-                        'active': active,
-                        'graded': section.graded,
-                    }
+            for section in chapter['sections']:
+
+                active = (chapter['url_name'] == active_chapter and
+                          section['url_name'] == active_section)
+
+                section_context = {
+                    'display_name': section['display_name'],
+                    'url_name': section['url_name'],
+                    'format': section['format'],
+                    'due': section['due'],
+                    'active': active,
+                    'graded': section['graded'],
+                }
+
+                #
+                # Add in rendering context if exam is a timed exam (which includes proctored)
+                #
+
+                section_is_time_limited = (
+                    section['is_time_limited'] and
+                    settings.FEATURES.get('ENABLE_SPECIAL_EXAMS', False)
+                )
+                if section_is_time_limited:
+                    # We need to import this here otherwise Lettuce test
+                    # harness fails. When running in 'harvest' mode, the
+                    # test service appears to get into trouble with
+                    # circular references (not sure which as edx_proctoring.api
+                    # doesn't import anything from edx-platform). Odd thing
+                    # is that running: manage.py lms runserver --settings=acceptance
+                    # works just fine, it's really a combination of Lettuce and the
+                    # 'harvest' management command
+                    #
+                    # One idea is that there is some coupling between
+                    # lettuce and the 'terrain' Djangoapps projects in /common
+                    # This would need more investigation
+                    from edx_proctoring.api import get_attempt_status_summary
 
                     #
-                    # Add in rendering context if exam is a timed exam (which includes proctored)
+                    # call into edx_proctoring subsystem
+                    # to get relevant proctoring information regarding this
+                    # level of the courseware
                     #
-
-                    section_is_time_limited = (
-                        getattr(section, 'is_time_limited', False) and
-                        settings.FEATURES.get('ENABLE_SPECIAL_EXAMS', False)
-                    )
-                    if section_is_time_limited:
-                        # We need to import this here otherwise Lettuce test
-                        # harness fails. When running in 'harvest' mode, the
-                        # test service appears to get into trouble with
-                        # circular references (not sure which as edx_proctoring.api
-                        # doesn't import anything from edx-platform). Odd thing
-                        # is that running: manage.py lms runserver --settings=acceptance
-                        # works just fine, it's really a combination of Lettuce and the
-                        # 'harvest' management command
-                        #
-                        # One idea is that there is some coupling between
-                        # lettuce and the 'terrain' Djangoapps projects in /common
-                        # This would need more investigation
-                        from edx_proctoring.api import get_attempt_status_summary
-
-                        #
-                        # call into edx_proctoring subsystem
-                        # to get relevant proctoring information regarding this
-                        # level of the courseware
-                        #
-                        # This will return None, if (user, course_id, content_id)
-                        # is not applicable
-                        #
-                        timed_exam_attempt_context = None
-                        try:
-                            timed_exam_attempt_context = get_attempt_status_summary(
-                                user.id,
-                                unicode(course.id),
-                                unicode(section.location)
-                            )
-                        except Exception, ex:  # pylint: disable=broad-except
-                            # safety net in case something blows up in edx_proctoring
-                            # as this is just informational descriptions, it is better
-                            # to log and continue (which is safe) than to have it be an
-                            # unhandled exception
-                            log.exception(ex)
-
-                        if timed_exam_attempt_context:
-                            # yes, user has proctoring context about
-                            # this level of the courseware
-                            # so add to the accordion data context
-                            section_context.update({
-                                'proctoring': timed_exam_attempt_context,
-                            })
-
-                    sections.append(section_context)
+                    # This will return None, if (user, course_id, content_id)
+                    # is not applicable
+                    #
+                    timed_exam_attempt_context = None
+                    try:
+                        timed_exam_attempt_context = get_attempt_status_summary(
+                            user.id,
+                            unicode(course.id),
+                            section['location']
+                        )
+                    except Exception, ex:  # pylint: disable=broad-except
+                        # safety net in case something blows up in edx_proctoring
+                        # as this is just informational descriptions, it is better
+                        # to log and continue (which is safe) than to have it be an
+                        # unhandled exception
+                        log.exception(ex)
+
+                    if timed_exam_attempt_context:
+                        # yes, user has proctoring context about
+                        # this level of the courseware
+                        # so add to the accordion data context
+                        section_context.update({
+                            'proctoring': timed_exam_attempt_context,
+                        })
+
+                sections.append(section_context)
             toc_chapters.append({
-                'display_name': chapter.display_name_with_default,
-                'display_id': display_id,
-                'url_name': chapter.url_name,
+                'display_name': chapter['display_name'],
+                'display_id': chapter['display_id'],
+                'url_name': chapter['url_name'],
                 'sections': sections,
-                'active': chapter.url_name == active_chapter
+                'active': chapter['url_name'] == active_chapter
             })
         return toc_chapters
 
 
+def toc_snapshot(user, request, course, field_data_cache):
+    """
+    Return the chapters and sections of `course` that `user` can see, as
+    plain data that can be cached, or None if the user can't load the course.
+
+    Chapters and sections hidden from the TOC are left out.  Each chapter is a
+    dict with 'display_name', 'display_id', 'url_name', 'location' and
+    'sections'; each section a dict with 'display_name', 'url_name',
+    'format', 'due', 'graded', 'location' and 'is_time_limited'.
+
+    With FEATURES['ENABLE_COURSEWARE_TOC_CACHE'], non-staff users' snapshots
+    are cached (see courseware.toc_cache).  Snapshots aren't cached while the
+    user is masquerading, nor in courses with field overrides (CCX, individual
+    due dates), since nothing invalidates them when those change.
+    """
+    use_cache = (
+        settings.FEATURES.get('ENABLE_COURSEWARE_TOC_CACHE', False) and
+        user.is_authenticated() and
+        get_course_masquerade(user, course.id) is None and
+        not OverrideFieldData.overrides_enabled_for(course) and
+        not has_access(user, 'staff', course, course.id)
+    )
+    if use_cache:
+        chapters = toc_cache.get_toc_snapshot(user, course)
+        if chapters is not None:
+            return chapters
+
+    course_module = get_module_for_descriptor(
+        user, request, course, field_data_cache, course.id, course=course
+    )
+    if course_module is None:
+        return None
+
+    chapters = []
+    for chapter in course_module.get_display_items():
+        # chapter.hide_from_toc is read-only (boo)
+        if chapter.hide_from_toc:
+            continue
+        chapters.append({
+            'display_name': chapter.display_name_with_default,
+            'display_id': slugify(chapter.display_name_with_default),
+            'url_name': chapter.url_name,
+            'location': unicode(chapter.location),
+            'sections': [
+                {
+                    'display_name': section.display_name_with_default,
+                    'url_name': section.url_name,
+                    'format': section.format if section.format is not None else '',
+                    'due': section.due,
+                    'graded': section.graded,
+                    'location': unicode(section.location),
+                    'is_time_limited': getattr(section, 'is_time_limited', False),
+                }
+                for section in chapter.get_display_items()
+                if not section.hide_from_toc
+            ],
+        })
+
+    if use_cache:
+        toc_cache.set_toc_snapshot(user, course, chapters)
+    return chapters
+
+
 def get_module(user, request, usage_key, field_data_cache,
                position=None, log_if_not_found=True, wrap_xmodule_display=True,
                grade_bucket_type=None, depth=0,
@@ -728,7 +786,7 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
         course_id=course_id,
         open_ended_grading_interface=open_ended_grading_interface,
         s3_interface=s3_interface,
-        cache=cache,
+        cache=SAFE_EXEC_CACHE,
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
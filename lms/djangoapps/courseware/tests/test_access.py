@@ -35,7 +35,7 @@ from xmodule.course_module import (
     CATALOG_VISIBILITY_ABOUT,
     CATALOG_VISIBILITY_NONE,
 )
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 from util.milestones_helpers import (
@@ -482,6 +482,69 @@ class UserRoleTestCase(TestCase):
         )
 
 
+@attr('shard_1')
+@ddt.ddt
+@patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+class HasAccessManyTestCase(ModuleStoreTestCase):
+    """
+    Tests that has_access_many agrees with has_access.
+    """
+    TOMORROW = datetime.datetime.now(pytz.utc) + datetime.timedelta(days=1)
+    YESTERDAY = datetime.datetime.now(pytz.utc) - datetime.timedelta(days=1)
+
+    def setUp(self):
+        super(HasAccessManyTestCase, self).setUp()
+        self.course = CourseFactory.create(start=self.YESTERDAY)
+        chapter = ItemFactory.create(parent=self.course, category='chapter', start=self.YESTERDAY)
+        hidden = ItemFactory.create(parent=chapter, category='sequential', visible_to_staff_only=True)
+        unstarted = ItemFactory.create(parent=chapter, category='sequential', start=self.TOMORROW)
+        beta = ItemFactory.create(parent=chapter, category='sequential', start=self.TOMORROW, days_early_for_beta=2)
+        self.blocks = [
+            chapter,
+            hidden,
+            ItemFactory.create(parent=hidden, category='vertical'),
+            unstarted,
+            beta,
+            ItemFactory.create(parent=beta, category='vertical', start=self.TOMORROW, days_early_for_beta=2),
+        ]
+        self.users = {
+            'anonymous': AnonymousUserFactory(),
+            'student': UserFactory(),
+            'beta': BetaTesterFactory(course_key=self.course.id),
+            'staff': StaffFactory(course_key=self.course.id),
+            'global_staff': GlobalStaffFactory(),
+        }
+
+    @ddt.data(*itertools.product(['anonymous', 'student', 'beta', 'staff', 'global_staff'], ['load', 'staff']))
+    @ddt.unpack
+    def test_agrees_with_has_access(self, user_name, action):
+        user = self.users[user_name]
+        results = access.has_access_many(user, action, self.blocks, self.course.id)
+        self.assertEqual(set(results), set(block.location for block in self.blocks))
+        for block in self.blocks:
+            expected = access.has_access(user, action, block, self.course.id)
+            self.assertEqual(bool(results[block.location]), bool(expected))
+            self.assertEqual(type(results[block.location]), type(expected))
+
+    def test_user_looked_up_once(self):
+        user = self.users['beta']
+        with patch('courseware.access._has_access_to_course', wraps=access._has_access_to_course) as mock_course:
+            with patch('courseware.access.CourseBetaTesterRole', wraps=access.CourseBetaTesterRole) as mock_beta:
+                access.has_access_many(user, 'load', self.blocks, self.course.id)
+        self.assertEqual(mock_course.call_count, 1)
+        self.assertEqual(mock_beta.call_count, 1)
+
+    def test_other_objects(self):
+        user = self.users['student']
+        results = access.has_access_many(user, 'load', [self.course] + self.blocks, self.course.id)
+        self.assertEqual(
+            bool(results[self.course.location]),
+            bool(access.has_access(user, 'load', self.course, self.course.id))
+        )
+        with self.assertRaises(ValueError):
+            access.has_access_many(user, 'not_an_action', self.blocks, self.course.id)
+
+
 @ddt.ddt
 class CourseOverviewAccessTestCase(ModuleStoreTestCase):
     """
@@ -4,6 +4,7 @@ access control rules.
 """
 
 import ddt
+from mock import Mock, patch
 from nose.plugins.attrib import attr
 from stevedore.extension import Extension, ExtensionManager
 
@@ -13,6 +14,7 @@ from xmodule.partitions.partitions import Group, UserPartition, USER_PARTITION_S
 from xmodule.modulestore.django import modulestore
 
 import courseware.access as access
+from request_cache.middleware import RequestCache
 from courseware.tests.factories import StaffFactory, UserFactory
 
 
@@ -434,3 +436,28 @@ class GroupAccessTestCase(ModuleStoreTestCase):
         # Finally, add back in a cohort user_partition
         self.set_user_partitions(self.vertical_location, [split_test_partition, self.animal_partition])
         self.check_access(self.red_cat, self.vertical_location, False)
+
+    def test_group_lookups_memoized_within_request(self):
+        """
+        Within a request, the user's group in each partition is looked up
+        once, however many blocks are checked.
+        """
+        self.set_group_access(
+            self.chapter_location,
+            {self.animal_partition.id: [self.cat_group.id]},
+        )
+        blocks = [self.chapter_location, self.section_location, self.vertical_location, self.component_location]
+        scheme = self.animal_partition.scheme
+
+        with patch.object(scheme, 'get_group_for_user', wraps=scheme.get_group_for_user) as mock_get_group:
+            for block in blocks:
+                self.check_access(self.red_cat, block, True)
+            self.assertEqual(mock_get_group.call_count, len(blocks))
+
+        RequestCache.get_request_cache().request = Mock()
+        self.addCleanup(RequestCache.clear_request_cache)
+        with patch.object(scheme, 'get_group_for_user', wraps=scheme.get_group_for_user) as mock_get_group:
+            for block in blocks:
+                self.check_access(self.red_cat, block, True)
+                self.check_access(self.blue_dog, block, False)
+            self.assertEqual(mock_get_group.call_count, 2)
@@ -30,6 +30,7 @@ from capa.tests.response_xml_factory import OptionResponseXMLFactory
 from courseware import module_render as render
 from courseware.courses import get_course_with_access, course_image_url, get_course_info_section
 from courseware.field_overrides import OverrideFieldData
+from courseware.masquerade import CourseMasquerade
 from courseware.model_data import FieldDataCache
 from courseware.module_render import hash_resource, get_module_for_descriptor
 from courseware.models import StudentModule
@@ -38,7 +39,9 @@ from courseware.tests.tests import LoginEnrollmentTestCase
 from courseware.tests.test_submitting_problems import TestSubmittingProblems
 from lms.djangoapps.lms_xblock.runtime import quote_slashes
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
-from student.models import anonymous_id_for_user
+from openedx.core.djangoapps.user_api.course_tag.api import set_course_tag
+from student.models import anonymous_id_for_user, CourseEnrollment
+from verify_student.models import SkippedReverification, VerificationCheckpoint, VerificationStatus
 from xmodule.modulestore.tests.django_utils import (
     TEST_DATA_MIXED_TOY_MODULESTORE,
     TEST_DATA_XML_MODULESTORE,
@@ -699,6 +702,78 @@ class TestTOC(ModuleStoreTestCase):
             for toc_section in expected:
                 self.assertIn(toc_section, actual)
 
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_COURSEWARE_TOC_CACHE': True})
+    def test_toc_snapshot_cache(self):
+        """
+        Test that a student's TOC is cached, and rebuilt when their enrollment changes.
+        """
+        with self.store.default_store(ModuleStoreEnum.Type.mongo):
+            self.setup_request_and_course(3, 0)
+        user = self.request.user
+        expected = render.toc_for_course(
+            user, self.request, self.toy_course, self.chapter, None, self.field_data_cache
+        )
+
+        # The second time round, no module is bound
+        with patch('courseware.module_render.get_module_for_descriptor') as mock_get_module:
+            actual = render.toc_for_course(
+                user, self.request, self.toy_course, self.chapter, None, self.field_data_cache
+            )
+            self.assertFalse(mock_get_module.called)
+        self.assertEqual(expected, actual)
+
+        # ...until the user's enrollment changes
+        CourseEnrollment.enroll(user, self.course_key)
+        with patch('courseware.module_render.get_module_for_descriptor', return_value=None):
+            self.assertIsNone(render.toc_for_course(
+                user, self.request, self.toy_course, self.chapter, None, self.field_data_cache
+            ))
+
+    @ddt.data('course_tag', 'skipped_reverification', 'verification_status')
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_COURSEWARE_TOC_CACHE': True})
+    def test_toc_snapshot_partition_groups_changed(self, change):
+        """
+        Test that a student's cached TOC is rebuilt when their partition groups may have changed.
+        """
+        with self.store.default_store(ModuleStoreEnum.Type.mongo):
+            self.setup_request_and_course(3, 0)
+        user = self.request.user
+        render.toc_for_course(user, self.request, self.toy_course, self.chapter, None, self.field_data_cache)
+
+        if change == 'course_tag':
+            set_course_tag(user, self.course_key, 'xblock.partition_service.partition_0', '1')
+        else:
+            checkpoint = VerificationCheckpoint.objects.create(
+                course_id=self.course_key, checkpoint_location='i4x://edX/toy/edx-reverification-block/checkpoint'
+            )
+            if change == 'skipped_reverification':
+                SkippedReverification.add_skipped_reverification_attempt(checkpoint, user.id, self.course_key)
+            else:
+                VerificationStatus.add_verification_status(checkpoint, user, 'submitted')
+
+        with patch('courseware.module_render.get_module_for_descriptor', return_value=None):
+            self.assertIsNone(render.toc_for_course(
+                user, self.request, self.toy_course, self.chapter, None, self.field_data_cache
+            ))
+
+    @ddt.data('masquerade', 'overrides')
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_COURSEWARE_TOC_CACHE': True})
+    def test_toc_snapshot_not_cached(self, reason):
+        """
+        Test that the TOC isn't cached while masquerading, or in courses with field overrides.
+        """
+        with self.store.default_store(ModuleStoreEnum.Type.mongo):
+            self.setup_request_and_course(3, 0)
+        user = self.request.user
+        if reason == 'masquerade':
+            user.masquerade_settings = {self.course_key: CourseMasquerade(self.course_key, role='student')}
+        with patch.object(OverrideFieldData, 'overrides_enabled_for', return_value=reason == 'overrides'):
+            render.toc_for_course(user, self.request, self.toy_course, self.chapter, None, self.field_data_cache)
+            with patch('courseware.module_render.get_module_for_descriptor', return_value=None):
+                self.assertIsNone(render.toc_for_course(
+                    user, self.request, self.toy_course, self.chapter, None, self.field_data_cache
+                ))
+
 
 @attr('shard_1')
 @ddt.ddt
@@ -0,0 +1,168 @@
+"""
+Cached per-user snapshots of the course outline shown in the courseware
+accordion.
+
+Building the table of contents binds an XModule for the course and every
+chapter, and checks access block by block.  The result only changes when the
+course is published, when the user's enrollment, cohort or other partition
+groups change, or when a chapter or section is released, so `toc_for_course`
+can keep a snapshot of it per (user, course) and rebuild it only then:
+
+* Snapshots record the version of the course they were built from, and are
+  ignored once the course has been published again.
+* Enrollment and cohort membership changes delete the user's snapshot, and so
+  do changes to the course tags that hold random partition groups and to the
+  reverification records that decide verification partition groups.
+* Snapshots expire when the next chapter or section is released.
+
+Snapshots aren't used for masquerading staff, nor in courses with field
+override providers enabled, whose per-user overrides they wouldn't follow.
+
+Anything that varies from request to request (active chapter and section,
+milestones, proctoring status) is applied on top of the snapshot.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from pytz import UTC
+
+import dogstats_wrapper as dog_stats_api
+
+from openedx.core.djangoapps.course_groups.models import CourseUserGroup
+from openedx.core.djangoapps.user_api.models import UserCourseTag
+from student.models import CourseEnrollment
+from verify_student.models import SkippedReverification, VerificationStatus
+
+
+def toc_cache_key(user_id, course_key):
+    """
+    Return the cache key of the TOC snapshot for a user in a course.
+    """
+    return u"courseware.toc.{}.{}".format(user_id, course_key)
+
+
+def course_version(course):
+    """
+    Return a value that changes each time `course` is published.
+    """
+    if course.subtree_edited_on is None:
+        # XML courses don't have this attribute, and are never published.
+        return None
+    return course.subtree_edited_on.isoformat()
+
+
+def get_toc_snapshot(user, course):
+    """
+    Return the cached TOC snapshot for `user` in `course`, or None.
+    """
+    cached = cache.get(toc_cache_key(user.id, course.id))
+    hit = cached is not None and cached['version'] == course_version(course)
+    dog_stats_api.increment(
+        'courseware.toc.cache',
+        tags=[u'result:{}'.format('hit' if hit else 'miss')]
+    )
+    return cached['chapters'] if hit else None
+
+
+def set_toc_snapshot(user, course, chapters):
+    """
+    Cache the TOC snapshot `chapters` for `user` in `course`.
+
+    The snapshot expires after `settings.COURSEWARE_TOC_CACHE_TIMEOUT`
+    seconds, or when the next chapter or section of the course is released,
+    whichever comes first.
+    """
+    timeout = settings.COURSEWARE_TOC_CACHE_TIMEOUT
+    release = next_release(course)
+    if release is not None:
+        timeout = min(timeout, int((release - datetime.now(UTC)).total_seconds()) + 1)
+    cache.set(
+        toc_cache_key(user.id, course.id),
+        {'version': course_version(course), 'chapters': chapters},
+        timeout
+    )
+
+
+def next_release(course):
+    """
+    Return the earliest future start date of the chapters and sections of
+    `course`, counting beta testers' early access, or None.
+    """
+    now = datetime.now(UTC)
+    releases = []
+    for chapter in course.get_children():
+        for block in [chapter] + chapter.get_children():
+            if block.start is None:
+                continue
+            releases.append(block.start)
+            if block.days_early_for_beta is not None:
+                releases.append(block.start - timedelta(days=block.days_early_for_beta))
+    future = [release for release in releases if release > now]
+    return min(future) if future else None
+
+
+def invalidate_toc_snapshots(user_ids, course_keys):
+    """
+    Delete the TOC snapshots of each of `user_ids` in each of `course_keys`.
+    """
+    keys = [toc_cache_key(user_id, course_key) for user_id in user_ids for course_key in course_keys]
+    if keys:
+        cache.delete_many(keys)
+
+
+@receiver(post_save, sender=CourseEnrollment)
+def _enrollment_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forget the user's TOC when their enrollment changes.
+    """
+    invalidate_toc_snapshots([instance.user_id], [instance.course_id])
+
+
+@receiver(m2m_changed, sender=CourseUserGroup.users.through)
+def _course_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forget users' TOCs when they are added to or removed from cohorts and
+    other course groups, which can change the content they see.
+    """
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        user_ids = [instance.id]
+        if action == "pre_clear":
+            groups = instance.course_groups.all()
+        else:
+            groups = CourseUserGroup.objects.filter(pk__in=pk_set)
+        course_keys = set(group.course_id for group in groups)
+    else:
+        course_keys = [instance.course_id]
+        if action == "pre_clear":
+            user_ids = list(instance.users.values_list('id', flat=True))
+        else:
+            user_ids = pk_set
+    invalidate_toc_snapshots(user_ids, course_keys)
+
+
+@receiver(post_save, sender=UserCourseTag)
+@receiver(post_delete, sender=UserCourseTag)
+@receiver(post_save, sender=SkippedReverification)
+@receiver(post_delete, sender=SkippedReverification)
+def _partition_group_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forget the user's TOC when a course tag changes, which may be their group in a
+    random partition, or when they skip a reverification checkpoint, which changes
+    their groups in verification partitions.
+    """
+    invalidate_toc_snapshots([instance.user_id], [instance.course_id])
+
+
+@receiver(post_save, sender=VerificationStatus)
+@receiver(post_delete, sender=VerificationStatus)
+def _verification_status_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forget the user's TOC when they submit to a reverification checkpoint, which
+    changes their group in its verification partition.
+    """
+    invalidate_toc_snapshots([instance.user_id], [instance.checkpoint.course_id])
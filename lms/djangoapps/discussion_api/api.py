@@ -44,9 +44,10 @@ from django_comment_common.signals import (
 )
 from django_comment_client.utils import get_accessible_discussion_modules, is_commentable_cohorted
 from lms.lib.comment_client.comment import Comment
+from lms.lib.comment_client.models import retrieve_many
 from lms.lib.comment_client.thread import Thread
+from lms.lib.comment_client.user import User
 from lms.lib.comment_client.utils import CommentClientRequestError
-from openedx.core.djangoapps.course_groups.cohorts import get_cohort_id
 
 
 def _get_course_or_404(course_key, user):
@@ -73,16 +74,17 @@ def _get_thread_and_context(request, thread_id, retrieve_kwargs=None):
     try:
         if "mark_as_read" not in retrieve_kwargs:
             retrieve_kwargs["mark_as_read"] = False
-        cc_thread = Thread(id=thread_id).retrieve(**retrieve_kwargs)
+        cc_requester = User.from_django_user(request.user)
+        cc_thread, __ = retrieve_many((Thread(id=thread_id), retrieve_kwargs), cc_requester)
         course_key = CourseKey.from_string(cc_thread["course_id"])
         course = _get_course_or_404(course_key, request.user)
-        context = get_context(course, request, cc_thread)
+        context = get_context(course, request, cc_thread, cc_requester)
         if (
                 not context["is_requester_privileged"] and
                 cc_thread["group_id"] and
                 is_commentable_cohorted(course.id, cc_thread["commentable_id"])
         ):
-            requester_cohort = get_cohort_id(request.user, course.id)
+            requester_cohort = context["requester_group_id"]
             if requester_cohort is not None and cc_thread["group_id"] != requester_cohort:
                 raise Http404
         return cc_thread, context
@@ -310,7 +312,7 @@ def get_thread_list(
         "user_id": unicode(request.user.id),
         "group_id": (
             None if context["is_requester_privileged"] else
-            get_cohort_id(request.user, course.id)
+            context["requester_group_id"]
         ),
         "page": page,
         "per_page": page_size,
@@ -555,7 +557,7 @@ def create_thread(request, thread_data):
             is_commentable_cohorted(course_key, thread_data.get("topic_id"))
     ):
         thread_data = thread_data.copy()
-        thread_data["group_id"] = get_cohort_id(user, course_key)
+        thread_data["group_id"] = context["requester_group_id"]
     serializer = ThreadSerializer(data=thread_data, context=context)
     actions_form = ThreadActionsForm(thread_data)
     if not (serializer.is_valid() and actions_form.is_valid()):
@@ -27,13 +27,16 @@ from lms.lib.comment_client.comment import Comment
 from lms.lib.comment_client.thread import Thread
 from lms.lib.comment_client.user import User as CommentClientUser
 from lms.lib.comment_client.utils import CommentClientRequestError
-from openedx.core.djangoapps.course_groups.cohorts import get_cohort_names
+from openedx.core.djangoapps.course_groups.cohorts import get_cohort_names, get_cohorts
 
 
-def get_context(course, request, thread=None):
+def get_context(course, request, thread=None, cc_requester=None):
     """
     Returns a context appropriate for use with ThreadSerializer or
     (if thread is provided) CommentSerializer.
+
+    cc_requester, if given, is the requesting user's comments service user,
+    already retrieved along with the thread.
     """
     # TODO: cache staff_user_ids and ta_user_ids if we need to improve perf
     staff_user_ids = {
@@ -50,14 +53,17 @@ def get_context(course, request, thread=None):
         for user in role.users.all()
     }
     requester = request.user
-    cc_requester = CommentClientUser.from_django_user(requester).retrieve()
+    cc_requester = (cc_requester or CommentClientUser.from_django_user(requester)).retrieve()
     cc_requester["course_id"] = course.id
+    # Looked up through the bulk helper so that it's cached for the request.
+    requester_cohort = get_cohorts([requester], course.id)[requester.id]
     return {
         "course": course,
         "request": request,
         "thread": thread,
         # For now, the only groups are cohorts
         "group_ids_to_names": get_cohort_names(course),
+        "requester_group_id": requester_cohort.id if requester_cohort else None,
         "is_requester_privileged": requester.id in staff_user_ids or requester.id in ta_user_ids,
         "staff_user_ids": staff_user_ids,
         "ta_user_ids": ta_user_ids,
@@ -29,6 +29,7 @@ from student.tests.factories import UserFactory
 from util.testing import UrlResetMixin
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
+from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 
 
@@ -244,6 +245,16 @@ class ThreadSerializerSerializationTest(SerializerTestMixin, SharedModuleStoreTe
         self.assertEqual(serialized["group_id"], cohort.id)
         self.assertEqual(serialized["group_name"], cohort.name)
 
+    def test_requester_group_id(self):
+        self.assertIsNone(get_context(self.course, self.request)["requester_group_id"])
+
+        cohort_course = CourseFactory.create(cohort_config={"cohorted": True})
+        cohort = CohortFactory.create(course_id=cohort_course.id, users=[self.user])
+        self.assertEqual(get_context(cohort_course, self.request)["requester_group_id"], cohort.id)
+        # The requester's cohort is cached for the rest of the request.
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cohort(self.user, cohort_course.id, use_cached=True), cohort)
+
     def test_following(self):
         thread_id = "test_thread"
         self.register_get_user_response(self.user, subscribed_thread_ids=[thread_id])
@@ -304,23 +304,26 @@ def single_thread(request, course_key, discussion_id, thread_id):
     course = get_course_with_access(request.user, 'load', course_key, check_if_enrolled=True)
     course_settings = make_course_settings(course, request.user)
     cc_user = cc.User.from_django_user(request.user)
-    user_info = cc_user.to_dict()
     is_moderator = has_permission(request.user, "see_all_cohorts", course_key)
 
     # Currently, the front end always loads responses via AJAX, even for this
     # page; it would be a nice optimization to avoid that extra round trip to
     # the comments service.
     try:
-        thread = cc.Thread.find(thread_id).retrieve(
-            recursive=request.is_ajax(),
-            user_id=request.user.id,
-            response_skip=request.GET.get("resp_skip"),
-            response_limit=request.GET.get("resp_limit")
+        __, thread = cc.retrieve_many(
+            cc_user,
+            (cc.Thread.find(thread_id), {
+                'recursive': request.is_ajax(),
+                'user_id': request.user.id,
+                'response_skip': request.GET.get("resp_skip"),
+                'response_limit': request.GET.get("resp_limit"),
+            }),
         )
     except cc.utils.CommentClientRequestError as e:
         if e.status_code == 404:
             raise Http404
         raise
+    user_info = cc_user.to_dict()
 
     # Verify that the student has access to this thread if belongs to a course discussion module
     thread_context = getattr(thread, "context", "course")
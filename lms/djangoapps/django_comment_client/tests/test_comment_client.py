@@ -0,0 +1,185 @@
+"""
+Tests for the comments service client's request handling.
+"""
+import json
+
+import mock
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from nose.plugins.attrib import attr
+
+import lms.lib.comment_client as cc
+from lms.lib.comment_client import utils
+
+
+def make_response(data):
+    """
+    Return a fake comments service response containing `data`.
+    """
+    response = mock.Mock(status_code=200, text=json.dumps(data))
+    response.json.return_value = data
+    return response
+
+
+@attr('shard_1')
+@mock.patch('lms.lib.comment_client.utils.requests.request', autospec=True)
+class PerformRequestTestCase(TestCase):
+    """
+    Tests for `perform_request` and `perform_requests`.
+    """
+    def setUp(self):
+        super(PerformRequestTestCase, self).setUp()
+        cache.clear()
+
+    def test_perform_requests(self, mock_request):
+        mock_request.side_effect = lambda method, url, **kwargs: make_response({'url': url})
+        results = utils.perform_requests([
+            {'method': 'get', 'url': 'http://cs/{}'.format(index)} for index in range(3)
+        ])
+        self.assertEqual(results, [{'url': 'http://cs/{}'.format(index)} for index in range(3)])
+
+    @override_settings(COMMENTS_SERVICE_POOL_SIZE=3)
+    def test_perform_requests_concurrently(self, mock_request):
+        with mock.patch('lms.lib.comment_client.utils.requests.Session.request', autospec=True) as mock_session_request:
+            mock_session_request.side_effect = lambda session, method, url, **kwargs: make_response({'url': url})
+            results = utils.perform_requests([
+                {'method': 'get', 'url': 'http://cs/{}'.format(index)} for index in range(3)
+            ])
+        self.assertEqual(results, [{'url': 'http://cs/{}'.format(index)} for index in range(3)])
+        self.assertEqual(mock_session_request.call_count, 3)
+        self.assertFalse(mock_request.called)
+
+    def test_retrieve_many(self, mock_request):
+        mock_request.side_effect = [
+            make_response({'id': '1', 'username': 'user'}),
+            make_response({'id': 'thread', 'title': 'title'}),
+        ]
+        user, thread = cc.retrieve_many(cc.User(id='1'), (cc.Thread(id='thread'), {'user_id': '1'}))
+        self.assertEqual(user.username, 'user')
+        self.assertEqual(thread.title, 'title')
+        self.assertEqual(mock_request.call_args_list[1][1]['params']['user_id'], '1')
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_retrieve_many_recovers_missing_user(self, mock_request):
+        missing = make_response({})
+        missing.status_code = 404
+        mock_request.side_effect = [
+            make_response({'id': 'thread', 'title': 'title'}),
+            missing,
+            # Retrieved again one by one: the thread, then the user, who is
+            # saved to the comments service and retrieved again.
+            make_response({'id': 'thread', 'title': 'title'}),
+            missing,
+            make_response({'id': '1'}),
+            make_response({'id': '1', 'username': 'user'}),
+        ]
+        thread, user = cc.retrieve_many(cc.Thread(id='thread'), cc.User(id='1'))
+        self.assertEqual(thread.title, 'title')
+        self.assertEqual(user.username, 'user')
+        self.assertEqual(mock_request.call_count, 6)
+
+    @override_settings(COMMENTS_SERVICE_POOL_SIZE=2)
+    def test_pooled_request(self, mock_request):
+        with mock.patch('lms.lib.comment_client.utils.requests.Session.request', autospec=True) as mock_session_request:
+            mock_session_request.return_value = make_response({'id': '1'})
+            for __ in range(2):
+                self.assertEqual(utils.perform_request('get', 'http://cs/users/1', {}), {'id': '1'})
+        self.assertEqual(mock_session_request.call_count, 2)
+        sessions = set(call[0][0] for call in mock_session_request.call_args_list)
+        self.assertEqual(sessions, {utils.get_session()})
+        self.assertFalse(mock_request.called)
+
+    def test_cached_get(self, mock_request):
+        mock_request.return_value = make_response({'id': '1'})
+        for __ in range(2):
+            self.assertEqual(
+                utils.perform_request('get', 'http://cs/users/1', {}, cache_timeout=60),
+                {'id': '1'}
+            )
+        self.assertEqual(mock_request.call_count, 1)
+
+        utils.perform_request('get', 'http://cs/users/1', {}, cache_timeout=60, cache_version='new')
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_uncached_get(self, mock_request):
+        mock_request.return_value = make_response({'id': '1'})
+        for __ in range(2):
+            utils.perform_request('get', 'http://cs/users/1', {})
+        self.assertEqual(mock_request.call_count, 2)
+
+    @override_settings(COMMENTS_SERVICE_USER_CACHE_TIMEOUT=60)
+    def test_user_cache_invalidated_by_follow(self, mock_request):
+        mock_request.return_value = make_response({'id': '1', 'upvoted_ids': []})
+        user = cc.User(id='1', course_id='course/id/1')
+        user.retrieve()
+        cc.User(id='1', course_id='course/id/1').retrieve()
+        self.assertEqual(mock_request.call_count, 1)
+
+        user.follow(cc.Thread(id='thread'))
+        cc.User(id='1', course_id='course/id/1').retrieve()
+        # The follow and the retrieve after it.
+        self.assertEqual(mock_request.call_count, 3)
+
+    @override_settings(COMMENTS_SERVICE_USER_CACHE_TIMEOUT=60)
+    def test_user_cache_invalidated_by_posting(self, mock_request):
+        mock_request.return_value = make_response({'id': '1', 'user_id': '1', 'threads_count': 0})
+        cc.User(id='1', course_id='course/id/1').retrieve()
+
+        cc.Thread(user_id='1', course_id='course/id/1', commentable_id='topic', title='t', body='b').save()
+        cc.User(id='1', course_id='course/id/1').retrieve()
+        cc.Comment(user_id='1', thread_id='thread', body='b').save()
+        cc.User(id='1', course_id='course/id/1').retrieve()
+        # Each save, and each retrieve.
+        self.assertEqual(mock_request.call_count, 5)
+
+    @override_settings(COMMENTS_SERVICE_USER_CACHE_TIMEOUT=60)
+    def test_user_cache_version_lost(self, mock_request):
+        mock_request.return_value = make_response({'id': '1', 'upvoted_ids': []})
+        user = cc.User(id='1', course_id='course/id/1')
+        user.retrieve()
+        # A lost version doesn't bring back responses cached under an earlier one.
+        cache.delete(user._cache_version_key())  # pylint: disable=protected-access
+        cc.User(id='1', course_id='course/id/1').retrieve()
+        self.assertEqual(mock_request.call_count, 2)
+
+    @override_settings(COMMENTS_SERVICE_COMMENTABLE_CACHE_TIMEOUT=60)
+    def test_commentable_threads_cached(self, mock_request):
+        mock_request.return_value = make_response({'collection': [], 'page': 1, 'num_pages': 1})
+        query_params = {'course_id': 'course/id/1', 'commentable_id': 'topic', 'user_id': '1'}
+        for __ in range(2):
+            cc.Thread.search(query_params)
+        self.assertEqual(mock_request.call_count, 1)
+
+        # Other commentables, and text searches, aren't served from it.
+        cc.Thread.search(dict(query_params, commentable_id='other'))
+        cc.Thread.search(dict(query_params, text='text'))
+        self.assertEqual(mock_request.call_count, 3)
+
+        mock_request.return_value = make_response({'id': 'thread', 'user_id': '2', 'commentable_id': 'topic'})
+        cc.Thread(user_id='2', course_id='course/id/1', commentable_id='topic', title='t', body='b').save()
+        cc.Thread.search(query_params)
+        # The save, and the search after it.
+        self.assertEqual(mock_request.call_count, 5)
+
+        cc.Thread(id='thread').delete()
+        cc.Thread.search(query_params)
+        self.assertEqual(mock_request.call_count, 7)
+
+
+@attr('shard_1')
+class SessionTestCase(TestCase):
+    """
+    Tests for `get_session`.
+    """
+    @override_settings(COMMENTS_SERVICE_POOL_SIZE=0)
+    def test_no_pool(self):
+        self.assertIsNone(utils.get_session())
+
+    @override_settings(COMMENTS_SERVICE_POOL_SIZE=5)
+    def test_session_reused(self):
+        session = utils.get_session()
+        self.assertIsNotNone(session)
+        self.assertIs(utils.get_session(), session)
+        with mock.patch('lms.lib.comment_client.utils.os.getpid', return_value=-1):
+            self.assertIsNot(utils.get_session(), session)
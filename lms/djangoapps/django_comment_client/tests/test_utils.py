@@ -230,6 +230,30 @@ class CachedDiscussionIdMapTestCase(ModuleStoreTestCase):
         with self.assertRaises(utils.DiscussionIdMapIsNotCached):
             utils.get_cached_discussion_key(self.course, 'test_discussion_id')
 
+    def test_cached_mapping_reused_until_structure_changes(self):
+        utils.get_cached_discussion_id_mapping(self.course.id)
+        # Only the structure's modified time is read
+        with self.assertNumQueries(1):
+            mapping = utils.get_cached_discussion_id_mapping(self.course.id)
+        self.assertEqual(mapping['test_discussion_id'], self.discussion.location)
+
+        structure = CourseStructure.objects.get(course_id=self.course.id)
+        structure.discussion_id_map_json = json.dumps({'new_discussion_id': unicode(self.discussion.location)})
+        structure.save()
+        self.assertEqual(utils.get_cached_discussion_id_mapping(self.course.id).keys(), ['new_discussion_id'])
+
+    def test_get_discussion_id_map_from_cache_for_many_ids(self):
+        discussion_ids = ['test_discussion_id', 'test_discussion_id_2', 'bogus_id'] * 50
+        # Access to the distinct discussion modules is checked all at once
+        for user in (UserFactory.create(), self.user):
+            with mock.patch(
+                'django_comment_client.utils.has_access_many', wraps=utils.has_access_many
+            ) as mock_has_access_many:
+                metadata = utils.get_cached_discussion_id_map(self.course, discussion_ids, user)
+            self.assertEqual(set(metadata), {'test_discussion_id', 'test_discussion_id_2'})
+            self.assertEqual(mock_has_access_many.call_count, 1)
+            self.assertEqual(len(mock_has_access_many.call_args[0][2]), 2)
+
     def test_module_does_not_have_required_keys(self):
         self.assertTrue(utils.has_required_keys(self.discussion))
         self.assertFalse(utils.has_required_keys(self.bad_discussion))
@@ -22,7 +22,7 @@ from django_comment_client.settings import MAX_COMMENT_DEPTH
 from edxmako import lookup_template
 
 from courseware import courses
-from courseware.access import has_access
+from courseware.access import has_access, has_access_many
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from openedx.core.djangoapps.course_groups.cohorts import (
     get_course_cohort_settings, get_cohort_by_id, get_cohort_id, is_course_cohorted
@@ -130,11 +130,19 @@ def get_accessible_discussion_modules(course, user, include_all=False):  # pylin
     are accessible to the given user.
     """
     all_modules = modulestore().get_items(course.id, qualifiers={'category': 'discussion'})
+    if include_all:
+        return [module for module in all_modules if has_required_keys(module)]
+    return filter_accessible_discussion_modules(course, user, all_modules)
 
-    return [
-        module for module in all_modules
-        if has_required_keys(module) and (include_all or has_access(user, 'load', module, course.id))
-    ]
+
+def filter_accessible_discussion_modules(course, user, modules):  # pylint: disable=invalid-name
+    """
+    Return those of `modules` that are valid discussion modules accessible to
+    the given user.
+    """
+    modules = [module for module in modules if has_required_keys(module)]
+    access = has_access_many(user, 'load', modules, course.id)
+    return [module for module in modules if access[module.location]]
 
 
 def get_discussion_id_map_entry(module):
@@ -155,19 +163,48 @@ class DiscussionIdMapIsNotCached(Exception):
     pass
 
 
+# How many courses' discussion id maps are kept in memory.
+DISCUSSION_ID_MAP_CACHE_SIZE = 100
+
+# course_id -> (CourseStructure modified time, discussion id map)
+_DISCUSSION_ID_MAP_CACHE = {}
+
+
+def get_cached_discussion_id_mapping(course_key):
+    """
+    Returns the mapping of discussion ids to usage keys of discussion modules cached in the course's
+    CourseStructure. If it isn't cached, raises a DiscussionIdMapIsNotCached exception.
+
+    The parsed mapping is kept in memory until the CourseStructure changes, so only the structure's
+    modified time is read from the database when it is up to date.
+    """
+    modified = CourseStructure.objects.filter(course_id=course_key).values_list('modified', flat=True)[:1]
+    if not modified:
+        raise DiscussionIdMapIsNotCached()
+    modified = modified[0]
+
+    cached = _DISCUSSION_ID_MAP_CACHE.get(course_key)
+    if cached is None or cached[0] != modified:
+        try:
+            structure = CourseStructure.objects.get(course_id=course_key)
+        except CourseStructure.DoesNotExist:
+            raise DiscussionIdMapIsNotCached()
+        if len(_DISCUSSION_ID_MAP_CACHE) >= DISCUSSION_ID_MAP_CACHE_SIZE:
+            _DISCUSSION_ID_MAP_CACHE.clear()
+        cached = _DISCUSSION_ID_MAP_CACHE[course_key] = (structure.modified, structure.discussion_id_map)
+
+    if not cached[1]:
+        raise DiscussionIdMapIsNotCached()
+    return cached[1]
+
+
 def get_cached_discussion_key(course, discussion_id):
     """
     Returns the usage key of the discussion module associated with discussion_id if it is cached. If the discussion id
     map is cached but does not contain discussion_id, returns None. If the discussion id map is not cached for course,
     raises a DiscussionIdMapIsNotCached exception.
     """
-    try:
-        cached_mapping = CourseStructure.objects.get(course_id=course.id).discussion_id_map
-        if not cached_mapping:
-            raise DiscussionIdMapIsNotCached()
-        return cached_mapping.get(discussion_id)
-    except CourseStructure.DoesNotExist:
-        raise DiscussionIdMapIsNotCached()
+    return get_cached_discussion_id_mapping(course.id).get(discussion_id)
 
 
 def get_cached_discussion_id_map(course, discussion_ids, user):
@@ -176,19 +213,15 @@ def get_cached_discussion_id_map(course, discussion_ids, user):
     user. If not, returns the result of get_discussion_id_map
     """
     try:
-        entries = []
-        for discussion_id in discussion_ids:
-            key = get_cached_discussion_key(course, discussion_id)
-            if not key:
-                continue
-            module = modulestore().get_item(key)
-            if not (has_required_keys(module) and has_access(user, 'load', module, course.id)):
-                continue
-            entries.append(get_discussion_id_map_entry(module))
-        return dict(entries)
+        mapping = get_cached_discussion_id_mapping(course.id)
     except DiscussionIdMapIsNotCached:
         return get_discussion_id_map(course, user)
 
+    keys = set(mapping[discussion_id] for discussion_id in set(discussion_ids) if discussion_id in mapping)
+    with modulestore().bulk_operations(course.id):
+        modules = [modulestore().get_item(key) for key in keys]
+        return dict(map(get_discussion_id_map_entry, filter_accessible_discussion_modules(course, user, modules)))
+
 
 def get_discussion_id_map(course, user):
     """
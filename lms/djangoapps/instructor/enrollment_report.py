@@ -44,11 +44,23 @@ class BaseAbstractEnrollmentReportProvider(AbstractEnrollmentReportProvider):
 
     # don't allow instantiation of this class, it must be subclassed
     """
+    def __init__(self):
+        self._users = {}
+
+    def prefetch(self, users, course_id):  # pylint: disable=unused-argument
+        """
+        Load what the report needs about `users`, which should have their
+        profiles selected, in bulk before their rows are built.  Reports are
+        built a page of users at a time, and each call replaces the data of
+        the previous page.
+        """
+        self._users = {user.id: user for user in users}
+
     def get_user_profile(self, user_id):
         """
         Returns the UserProfile information.
         """
-        user_info = User.objects.select_related('profile').get(id=user_id)
+        user_info = self._users.get(user_id) or User.objects.select_related('profile').get(id=user_id)
         # extended user profile fields are stored in the user_profile meta column
         meta = {}
         if user_info.profile.meta:
@@ -12,18 +12,103 @@ from microsite_configuration import microsite
 from shoppingcart.models import RegistrationCodeRedemption, PaidCourseRegistration, CouponRedemption, OrderItem, \
     InvoiceTransaction
 from student.models import CourseEnrollment, ManualEnrollmentAudit
+from student.roles import RoleCache
 
 
 class PaidCourseEnrollmentReportProvider(BaseAbstractEnrollmentReportProvider):
     """
     The concrete class for all CyberSource Enrollment Reports.
     """
+    def __init__(self):
+        super(PaidCourseEnrollmentReportProvider, self).__init__()
+        self._courses = {}
+        self._enrollments = None
+        self._registration_code_redemptions = None
+        self._paid_course_registrations = None
+        self._manual_enrollments = None
+
+    def prefetch(self, users, course_id):
+        """
+        Look the enrollments, roles, registration code redemptions, purchases
+        and manual enrollments of `users` up with a query each.
+        """
+        super(PaidCourseEnrollmentReportProvider, self).prefetch(users, course_id)
+        RoleCache.prefetch(users)
+
+        self._enrollments = {
+            enrollment.user_id: enrollment
+            for enrollment in CourseEnrollment.objects.filter(course_id=course_id, user__in=users)
+        }
+        enrollment_ids = [enrollment.id for enrollment in self._enrollments.itervalues()]
+
+        # Keep the latest of each, as the lookups in shoppingcart do.
+        self._registration_code_redemptions = {}
+        for redemption in RegistrationCodeRedemption.objects.filter(
+                course_enrollment__in=enrollment_ids
+        ).select_related('registration_code').order_by('redeemed_at'):
+            self._registration_code_redemptions[redemption.course_enrollment_id] = redemption
+
+        self._paid_course_registrations = {}
+        for item in PaidCourseRegistration.objects.filter(
+                course_id=course_id, user__in=users, status='purchased'
+        ).order_by('id'):
+            self._paid_course_registrations[(item.user_id, item.course_enrollment_id)] = item
+
+        self._manual_enrollments = {}
+        for manual_enrollment in ManualEnrollmentAudit.objects.filter(
+                enrollment__in=enrollment_ids
+        ).select_related('enrolled_by').order_by('time_stamp'):
+            self._manual_enrollments[manual_enrollment.enrollment_id] = manual_enrollment
+
+    def _get_course(self, course_id):
+        """
+        Returns the course, which is only loaded once per report.
+        """
+        if course_id not in self._courses:
+            self._courses[course_id] = get_course_by_id(course_id, depth=0)
+        return self._courses[course_id]
+
+    def _get_enrollment(self, user, course_id):
+        """
+        Returns the enrollment of the user in the course, or None.
+        """
+        if self._enrollments is not None and user.id in self._users:
+            return self._enrollments.get(user.id)
+        return CourseEnrollment.get_enrollment(user=user, course_key=course_id)
+
+    def _get_registration_code_redemption(self, user, course_enrollment):
+        """
+        Returns the redemption of the registration code used for the enrollment, or None.
+        """
+        if self._registration_code_redemptions is not None and user.id in self._users:
+            return self._registration_code_redemptions.get(getattr(course_enrollment, 'id', None))
+        return RegistrationCodeRedemption.registration_code_used_for_enrollment(course_enrollment)
+
+    def _get_paid_course_registration(self, user, course_id, course_enrollment):
+        """
+        Returns the purchase of the enrollment, or None.
+        """
+        if self._paid_course_registrations is not None and user.id in self._users:
+            return self._paid_course_registrations.get((user.id, getattr(course_enrollment, 'id', None)))
+        return PaidCourseRegistration.get_course_item_for_user_enrollment(
+            user=user,
+            course_id=course_id,
+            course_enrollment=course_enrollment
+        )
+
+    def _get_manual_enrollment(self, user, course_enrollment):
+        """
+        Returns the latest manual enrollment audit entry of the enrollment, or None.
+        """
+        if self._manual_enrollments is not None and user.id in self._users:
+            return self._manual_enrollments.get(getattr(course_enrollment, 'id', None))
+        return ManualEnrollmentAudit.get_manual_enrollment(course_enrollment)
 
     def get_enrollment_info(self, user, course_id):
         """
         Returns the User Enrollment information.
         """
-        course = get_course_by_id(course_id, depth=0)
+        course = self._get_course(course_id)
         is_course_staff = bool(has_access(user, 'staff', course))
 
         # check the user enrollment role
@@ -35,20 +120,15 @@ class PaidCourseEnrollmentReportProvider(BaseAbstractEnrollmentReportProvider):
         else:
             enrollment_role = _('Student')
 
-        course_enrollment = CourseEnrollment.get_enrollment(user=user, course_key=course_id)
+        course_enrollment = self._get_enrollment(user, course_id)
 
         if is_course_staff:
             enrollment_source = _('Staff')
         else:
             # get the registration_code_redemption object if exists
-            registration_code_redemption = RegistrationCodeRedemption.registration_code_used_for_enrollment(
-                course_enrollment)
+            registration_code_redemption = self._get_registration_code_redemption(user, course_enrollment)
             # get the paid_course registration item if exists
-            paid_course_reg_item = PaidCourseRegistration.get_course_item_for_user_enrollment(
-                user=user,
-                course_id=course_id,
-                course_enrollment=course_enrollment
-            )
+            paid_course_reg_item = self._get_paid_course_registration(user, course_id, course_enrollment)
 
             # from where the user get here
             if registration_code_redemption is not None:
@@ -56,7 +136,7 @@ class PaidCourseEnrollmentReportProvider(BaseAbstractEnrollmentReportProvider):
             elif paid_course_reg_item is not None:
                 enrollment_source = _('Credit Card - Individual')
             else:
-                manual_enrollment = ManualEnrollmentAudit.get_manual_enrollment(course_enrollment)
+                manual_enrollment = self._get_manual_enrollment(user, course_enrollment)
                 if manual_enrollment is not None:
                     enrollment_source = _(
                         'manually enrolled by {username} - reason: {reason}'
@@ -78,12 +158,8 @@ class PaidCourseEnrollmentReportProvider(BaseAbstractEnrollmentReportProvider):
         """
         Returns the User Payment information.
         """
-        course_enrollment = CourseEnrollment.get_enrollment(user=user, course_key=course_id)
-        paid_course_reg_item = PaidCourseRegistration.get_course_item_for_user_enrollment(
-            user=user,
-            course_id=course_id,
-            course_enrollment=course_enrollment
-        )
+        course_enrollment = self._get_enrollment(user, course_id)
+        paid_course_reg_item = self._get_paid_course_registration(user, course_id, course_enrollment)
         payment_data = collections.OrderedDict()
         # check if the user made a single self purchase scenario
         # for enrollment in the course.
@@ -102,8 +178,7 @@ class PaidCourseEnrollmentReportProvider(BaseAbstractEnrollmentReportProvider):
 
         else:
             # check if the user used a registration code for the enrollment.
-            registration_code_redemption = RegistrationCodeRedemption.registration_code_used_for_enrollment(
-                course_enrollment)
+            registration_code_redemption = self._get_registration_code_redemption(user, course_enrollment)
             if registration_code_redemption is not None:
                 registration_code = registration_code_redemption.registration_code
                 registration_code_used = registration_code.code
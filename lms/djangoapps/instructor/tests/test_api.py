@@ -3396,6 +3396,29 @@ class TestInstructorAPITaskLists(SharedModuleStoreTestCase, LoginEnrollmentTestC
         self.tasks = [self.FakeTask(mock_factory.mock_get_task_completion_info) for _ in xrange(7)]
         self.tasks[-1].make_invalid_output()
 
+    @patch.object(instructor_task.api, 'get_running_instructor_tasks')
+    def test_list_instructor_tasks_profile(self, act):
+        """ Test that the profile of a profiled task is summarized. """
+        stats = {
+            'wall_ms': 2500, 'cpu_ms': 1500, 'sql': 12, 'mongo': 3,
+            'cache_hits': 4, 'cache_misses': 1, 'peak_growth_kb': 204800,
+        }
+        task = self.tasks[0]
+        task.task_output = json.dumps({'duration_ms': 2500, 'profile': {'total': stats, 'phases': [['upload', stats]]}})
+        act.return_value = [task]
+        url = reverse('list_instructor_tasks', kwargs={'course_id': self.course.id.to_deprecated_string()})
+        mock_factory = MockCompletionInfo()
+        with patch('instructor.views.instructor_task_helpers.get_task_completion_info') as mock_completion_info:
+            mock_completion_info.side_effect = mock_factory.mock_get_task_completion_info
+            response = self.client.get(url, {})
+        self.assertEqual(response.status_code, 200)
+
+        actual_task, = json.loads(response.content)['tasks']
+        summary = (
+            u"2.5s (1.5s CPU), 12 SQL and 3 Mongo queries, 4 of 5 cache lookups hit, peak memory grew by 200 MB"
+        )
+        self.assertEqual(actual_task['profile'], u"total: {0}; upload: {0}".format(summary))
+
     @patch.object(instructor_task.api, 'get_running_instructor_tasks')
     def test_list_instructor_tasks_running(self, act):
         """ Test list of all running tasks. """
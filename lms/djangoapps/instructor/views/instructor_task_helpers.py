@@ -95,6 +95,33 @@ def extract_email_features(email_task):
     return email_feature_dict
 
 
+def format_task_profile(profile):
+    """
+    Returns a one-line summary of the profile recorded for a task when instructor task
+    profiling is enabled:  the numbers for the whole task, followed by those of each phase.
+    For a task split into subtasks, these add up the work of all of them, so the time is
+    the time spent by all the workers, and the memory how much all their peaks grew.
+    """
+    summaries = []
+    for phase, stats in [[_('total'), profile['total']]] + profile['phases']:
+        # Translators: A summary of the resources used by a background task, or by one phase of it.
+        summary = _(
+            u"{phase}: {wall_sec:.1f}s ({cpu_sec:.1f}s CPU), {sql} SQL and {mongo} Mongo queries, "
+            u"{cache_hits} of {cache_lookups} cache lookups hit, peak memory grew by {peak_growth_mb} MB"
+        ).format(
+            phase=phase,
+            wall_sec=stats['wall_ms'] / 1000.0,
+            cpu_sec=stats['cpu_ms'] / 1000.0,
+            sql=stats['sql'],
+            mongo=stats['mongo'],
+            cache_hits=stats['cache_hits'],
+            cache_lookups=stats['cache_hits'] + stats['cache_misses'],
+            peak_growth_mb=stats['peak_growth_kb'] // 1024,
+        )
+        summaries.append(summary)
+    return u"; ".join(summaries)
+
+
 def extract_task_features(task):
     """
     Convert task to dict for json rendering.
@@ -123,6 +150,8 @@ def extract_task_features(task):
         else:
             if 'duration_ms' in task_output:
                 duration_sec = int(task_output['duration_ms'] / 1000.0)
+            if 'profile' in task_output:
+                task_feature_dict['profile'] = format_task_profile(task_output['profile'])
     task_feature_dict['duration_sec'] = duration_sec
 
     # Get progress status message & success information
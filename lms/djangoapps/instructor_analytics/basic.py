@@ -18,11 +18,13 @@ from opaque_keys.edx.keys import UsageKey
 import xmodule.graders as xmgraders
 from microsite_configuration import microsite
 from student.models import CourseEnrollmentAllowed
+from util.query import iterate_in_pages
 from edx_proctoring.api import get_all_exam_attempts
 from courseware.models import StudentModule
 from certificates.models import GeneratedCertificate
 from django.db.models import Count
 from certificates.models import CertificateStatuses
+from openedx.core.djangoapps.course_groups.cohorts import get_cohorts_for_users
 
 
 STUDENT_FEATURES = ('id', 'username', 'first_name', 'last_name', 'is_staff', 'email')
@@ -46,6 +48,9 @@ CERTIFICATE_FEATURES = ('course_id', 'mode', 'status', 'grade', 'created_date',
 
 UNAVAILABLE = "[unavailable]"
 
+# How many students the iterate_* functions look up per query.
+STUDENTS_PAGE_SIZE = 1000
+
 
 def sale_order_record_features(course_id, features):
     """
@@ -204,16 +209,22 @@ def enrolled_students_features(course_key, features):
         {'username': 'username3', 'first_name': 'firstname3'}
     ]
     """
+    return list(iterate_enrolled_students_features(course_key, features))
+
+
+def iterate_enrolled_students_features(course_key, features, page_size=STUDENTS_PAGE_SIZE):
+    """
+    Yield the same dictionaries as `enrolled_students_features`, looking
+    the students up `page_size` at a time, so that reports on large courses
+    only hold one page of students in memory.
+    """
     include_cohort_column = 'cohort' in features
     include_team_column = 'team' in features
 
     students = User.objects.filter(
         courseenrollment__course_id=course_key,
         courseenrollment__is_active=1,
-    ).order_by('username').select_related('profile')
-
-    if include_cohort_column:
-        students = students.prefetch_related('course_groups')
+    ).select_related('profile')
 
     if include_team_column:
         students = students.prefetch_related('teams')
@@ -246,13 +257,8 @@ def enrolled_students_features(course_key, features):
                 student_dict[meta_feature] = meta_dict.get(meta_key)
 
         if include_cohort_column:
-            # Note that we use student.course_groups.all() here instead of
-            # student.course_groups.filter(). The latter creates a fresh query,
-            # therefore negating the performance gain from prefetch_related().
-            student_dict['cohort'] = next(
-                (cohort.name for cohort in student.course_groups.all() if cohort.course_id == course_key),
-                "[unassigned]"
-            )
+            cohort = cohorts_by_user.get(student.id)
+            student_dict['cohort'] = cohort.name if cohort else "[unassigned]"
 
         if include_team_column:
             student_dict['team'] = next(
@@ -261,7 +267,12 @@ def enrolled_students_features(course_key, features):
             )
         return student_dict
 
-    return [extract_student(student, features) for student in students]
+    for page in iterate_in_pages(students, page_size, 'username'):
+        cohorts_by_user = {}
+        if include_cohort_column:
+            cohorts_by_user = get_cohorts_for_users(course_key, [student.id for student in page])
+        for student in page:
+            yield extract_student(student, features)
 
 
 def list_may_enroll(course_key, features):
@@ -278,6 +289,14 @@ def list_may_enroll(course_key, features):
     Note that result does not include students who may enroll and have
     already done so.
     """
+    return list(iterate_may_enroll(course_key, features))
+
+
+def iterate_may_enroll(course_key, features, page_size=STUDENTS_PAGE_SIZE):
+    """
+    Yield the same dictionaries as `list_may_enroll`, looking the students
+    up `page_size` at a time.
+    """
     may_enroll_and_unenrolled = CourseEnrollmentAllowed.may_enroll_and_unenrolled(course_key)
 
     def extract_student(student, features):
@@ -286,7 +305,9 @@ def list_may_enroll(course_key, features):
         """
         return dict((feature, getattr(student, feature)) for feature in features)
 
-    return [extract_student(student, features) for student in may_enroll_and_unenrolled]
+    for page in iterate_in_pages(may_enroll_and_unenrolled, page_size):
+        for student in page:
+            yield extract_student(student, features)
 
 
 def get_proctored_exam_results(course_key, features):
@@ -76,6 +76,20 @@ def format_dictlist(dictlist, features):
     return header, datarows
 
 
+def iterate_dictlist(dictlist, features):
+    """
+    Convert an iterable of dictionaries to csv rows one at a time, as
+    `format_dictlist` would, so that they don't all need to be in memory.
+
+    `dictlist` is an iterable of dictionaries, e.g. a generator
+    `features` is a list of features
+
+    Yields one list per dictionary, holding its values for `features`.
+    """
+    for dct in dictlist:
+        yield [dct[feature] for feature in features if feature in dct]
+
+
 def format_instances(instances, features):
     """
     Convert a list of instances into a header list and datarows list.
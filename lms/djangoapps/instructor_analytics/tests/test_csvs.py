@@ -3,7 +3,7 @@
 from django.test import TestCase
 from nose.tools import raises
 
-from instructor_analytics.csvs import create_csv_response, format_dictlist, format_instances
+from instructor_analytics.csvs import create_csv_response, format_dictlist, format_instances, iterate_dictlist
 
 
 class TestAnalyticsCSVS(TestCase):
@@ -71,6 +71,14 @@ class TestAnalyticsFormatDictlist(TestCase):
         self.assertEqual(header, [])
         self.assertEqual(datarows, [])
 
+    def test_iterate_dictlist(self):
+        dictlist = (
+            {'label1': 'value-{},1'.format(index), 'label2': 'value-{},2'.format(index), 'label3': 'ignored'}
+            for index in range(1, 3)
+        )
+        datarows = iterate_dictlist(dictlist, ['label2', 'label1'])
+        self.assertEqual(list(datarows), [['value-1,2', 'value-1,1'], ['value-2,2', 'value-2,1']])
+
     def test_create_csv_response(self):
         header = ['Name', 'Email']
         datarows = [['Jim', 'jim@edy.org'], ['Jake', 'jake@edy.org'], ['Jeeves', 'jeeves@edy.org']]
@@ -12,13 +12,14 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
-from cStringIO import StringIO
+from contextlib import contextmanager
 from gzip import GzipFile
 from uuid import uuid4
 import csv
 import json
 import hashlib
 import os.path
+import tempfile
 import urllib
 
 from boto.s3.connection import S3Connection
@@ -193,9 +194,9 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. `store_rows` writes the rows it is given one at a time, so
+    reports can pass a generator rather than building the whole dataset in
+    memory.
     """
     @classmethod
     def from_config(cls, config_name):
@@ -286,6 +287,25 @@ class S3ReportStore(ReportStore):
         transparent via the browser). Filenames should end in whatever
         suffix makes sense for the original file, so `.txt` instead of `.gz`
         """
+        data = buff.getvalue()
+        key, headers = self._key_and_headers(course_id, filename, len(data), config)
+        key.set_contents_from_string(data, headers=headers)
+
+    def store_file(self, course_id, filename, file_obj, config=None):
+        """
+        Like `store`, but upload the contents of the file `file_obj` without
+        reading them all into memory first.
+        """
+        file_obj.seek(0, os.SEEK_END)
+        key, headers = self._key_and_headers(course_id, filename, file_obj.tell(), config)
+        file_obj.seek(0)
+        key.set_contents_from_file(file_obj, headers=headers)
+
+    def _key_and_headers(self, course_id, filename, size, config):
+        """
+        Return the key to store `size` bytes of data under, and the headers
+        to upload them with.
+        """
         key = self.key_for(course_id, filename)
 
         _config = config if config else {}
@@ -293,39 +313,38 @@ class S3ReportStore(ReportStore):
         content_type = _config.get('content_type', 'text/csv')
         content_encoding = _config.get('content_encoding', 'gzip')
 
-        data = buff.getvalue()
-        key.size = len(data)
+        key.size = size
         key.content_encoding = content_encoding
         key.content_type = content_type
 
         # Just setting the content encoding and type above should work
         # according to the docs, but when experimenting, this was necessary for
         # it to actually take.
-        key.set_contents_from_string(
-            data,
-            headers={
-                "Content-Encoding": content_encoding,
-                "Content-Length": len(data),
-                "Content-Type": content_type,
-            }
-        )
+        headers = {
+            "Content-Encoding": content_encoding,
+            "Content-Length": size,
+            "Content-Type": content_type,
+        }
+        return key, headers
 
     def store_rows(self, course_id, filename, rows):
         """
         Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        strings), write a gzip'd csv file, and then `store_file()` it.
+
+        The rows are compressed into a temporary file as they are written, so
+        `rows` can be a generator of any number of rows.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
         """
-        output_buffer = StringIO()
-        gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
-        csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
+        with tempfile.TemporaryFile() as output_file:
+            gzip_file = GzipFile(filename='', fileobj=output_file, mode="wb")
+            csvwriter = csv.writer(gzip_file)
+            csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            gzip_file.close()
 
-        self.store(course_id, filename, output_buffer)
+            self.store_file(course_id, filename, output_file)
 
     def links_for(self, course_id):
         """
@@ -349,6 +368,9 @@ class LocalFSReportStore(ReportStore):
     This lets us do the cheap thing locally for debugging without having to open
     up a separate URL that would only be used to send files in dev.
     """
+    # Reports being written are kept under names starting with this until they are complete.
+    TEMP_PREFIX = '.tmp'
+
     def __init__(self, root_path):
         """
         Initialize with root_path where we're going to store our files. We
@@ -383,24 +405,38 @@ class LocalFSReportStore(ReportStore):
         assumed to be a StringIO objecd (or anything that can flush its contents
         to string using `.getvalue()`).
         """
-        full_path = self.path_to(course_id, filename)
-        directory = os.path.dirname(full_path)
-        if not os.path.exists(directory):
-            os.mkdir(directory)
-
-        with open(full_path, "wb") as f:
+        with self._open(course_id, filename) as f:
             f.write(buff.getvalue())
 
     def store_rows(self, course_id, filename, rows):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
-        write this data out.
+        write this data out, a row at a time.
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+        with self._open(course_id, filename) as f:
+            csvwriter = csv.writer(f)
+            csvwriter.writerows(self._get_utf8_encoded_rows(rows))
 
-        self.store(course_id, filename, output_buffer)
+    @contextmanager
+    def _open(self, course_id, filename):
+        """
+        Context manager that opens a temporary file in the course's directory
+        for writing, creating the directory if needed, and renames it to
+        `filename` once the block is done. If the block fails, the temporary
+        file is removed, so a partly written report is never listed.
+        """
+        full_path = self.path_to(course_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+        temp_file = tempfile.NamedTemporaryFile(dir=directory, prefix=self.TEMP_PREFIX, delete=False)
+        try:
+            with temp_file:
+                yield temp_file
+            os.rename(temp_file.name, full_path)
+        finally:
+            if os.path.exists(temp_file.name):
+                os.remove(temp_file.name)
 
     def links_for(self, course_id):
         """
@@ -413,7 +449,11 @@ class LocalFSReportStore(ReportStore):
         course_dir = self.path_to(course_id, '')
         if not os.path.exists(course_dir):
             return []
-        files = [(filename, os.path.join(course_dir, filename)) for filename in os.listdir(course_dir)]
+        files = [
+            (filename, os.path.join(course_dir, filename))
+            for filename in os.listdir(course_dir)
+            if not filename.startswith(self.TEMP_PREFIX)
+        ]
         files.sort(key=lambda (filename, full_path): os.path.getmtime(full_path), reverse=True)
 
         return [
@@ -0,0 +1,372 @@
+"""
+Opt-in profiling of instructor tasks.
+
+When FEATURES['ENABLE_INSTRUCTOR_TASK_PROFILING'] is set, `run_main_task` profiles
+the task it runs, stores the numbers under 'profile' in the task's output, where the
+instructor dashboard shows them, and sends them to statsd.
+
+The subtasks of a task that is split up profile themselves with `profile_subtask`,
+which adds their numbers to those in the parent task's output.  The profile of such
+a task is the work of all the workers added up, so its wall time is the time spent
+by all of them, not how long the task took.
+
+Tasks mark the phases they go through with `task_phase` or `iterate_in_phase`, which
+do nothing when the task isn't being profiled:
+
+    with task_phase('upload'):
+        ...
+
+For the whole task and for each phase, the profile records the wall and CPU time,
+the number of SQL and Mongo queries, the hits and misses of the default cache, and
+how much the peak memory of the process grew.
+
+The counts are kept for the thread running the task, so that tasks run at the same
+time by a threaded or eventlet pool don't count each other's work:  SQL queries are
+counted in the queries logged by the thread's own database connections, and Mongo
+queries and cache lookups by hooks that count them in the profiler of the task the
+calling thread is running.  The hooks are added the first time a task is profiled,
+and are left in place.  The CPU time and memory are those of the whole process.
+"""
+import json
+import logging
+import resource
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from time import time
+
+import dogstats_wrapper as dog_stats_api
+import pymongo.message
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections, transaction
+
+from instructor_task.models import InstructorTask
+
+TASK_LOG = logging.getLogger('edx.celery.task')
+
+# The pymongo functions that build the messages for finding documents, as
+# counted by check_mongo_calls in the modulestore tests.
+MONGO_QUERY_FUNCTIONS = ['query', 'get_more']
+
+_PROFILERS = threading.local()
+
+_HOOKS_LOCK = threading.Lock()
+_HOOKS = {'installed': False}
+
+
+class TaskProfiler(object):
+    """
+    Records the time, queries, cache lookups and memory used by a task, and by
+    each phase of it.  The numbers of a phase that is entered several times are
+    added up.
+
+    The SQL queries are counted in the queries logged by the database connections
+    of the thread that starts the profiler, which log them until it is stopped.
+    The queries that the connections would not have logged otherwise are dropped
+    then, so that they don't hold on to the memory.
+    """
+    def __init__(self, action_name):
+        self.action_name = action_name
+        self.counts = {'mongo': 0, 'cache_hits': 0, 'cache_misses': 0}
+        self.phases = OrderedDict()
+        self.total = None
+        self._start = None
+        self._use_debug_cursors = []
+
+    def start(self):
+        """Starts counting."""
+        _install_hooks()
+        for connection in connections.all():
+            self._use_debug_cursors.append((connection, connection.use_debug_cursor, len(connection.queries)))
+            connection.use_debug_cursor = True
+        self._start = self._snapshot()
+
+    def stop(self):
+        """Stops counting, and records the numbers for the whole task."""
+        self.total = self._stats(self._start)
+        while self._use_debug_cursors:
+            connection, use_debug_cursor, num_queries = self._use_debug_cursors.pop()
+            connection.use_debug_cursor = use_debug_cursor
+            if not (use_debug_cursor or (use_debug_cursor is None and settings.DEBUG)):
+                del connection.queries[num_queries:]
+
+    @contextmanager
+    def phase(self, name):
+        """Context manager that counts the work done in the block as part of the phase `name`."""
+        start = self._snapshot()
+        try:
+            yield
+        finally:
+            self._add_phase(name, self._stats(start))
+
+    def iterate_in_phase(self, name, iterable):
+        """Yields the items of `iterable`, counting the work done to produce them as part of the phase `name`."""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def summary(self):
+        """
+        Returns a JSON-serializable dict of the numbers for the whole task under 'total',
+        and those of each phase, in the order they were first entered, under 'phases'.
+        """
+        return {
+            'total': self.total,
+            'phases': [[name, stats] for name, stats in self.phases.iteritems()],
+        }
+
+    def report(self):
+        """Logs the numbers and sends them to statsd."""
+        TASK_LOG.info(u"Task profile for %s: %s", self.action_name, self.summary())
+        tags = [u'action:{name}'.format(name=self.action_name)]
+        for phase, stats in [('total', self.total)] + self.phases.items():
+            for name, value in stats.iteritems():
+                dog_stats_api.histogram(
+                    u'instructor_tasks.profile.{name}'.format(name=name),
+                    value,
+                    tags=tags + [u'phase:{phase}'.format(phase=phase)],
+                )
+
+    def _snapshot(self):
+        """Returns the current wall time, CPU time, peak memory and counts."""
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        counts = dict(self.counts, sql=_count_queries())
+        return time(), usage.ru_utime + usage.ru_stime, usage.ru_maxrss, counts
+
+    def _stats(self, start):
+        """Returns the numbers since the snapshot `start`."""
+        start_time, start_cpu_time, start_maxrss, start_counts = start
+        end_time, end_cpu_time, end_maxrss, end_counts = self._snapshot()
+        stats = {
+            'wall_ms': int((end_time - start_time) * 1000),
+            'cpu_ms': int((end_cpu_time - start_cpu_time) * 1000),
+            # ru_maxrss is in kilobytes on Linux.
+            'peak_growth_kb': end_maxrss - start_maxrss,
+        }
+        for name, count in end_counts.iteritems():
+            stats[name] = count - start_counts[name]
+        return stats
+
+    def _add_phase(self, name, stats):
+        """Adds the numbers of one pass through the phase `name` to those of earlier passes."""
+        if name not in self.phases:
+            self.phases[name] = stats
+        else:
+            _add_stats(self.phases[name], stats)
+
+
+def _count_queries():
+    """Returns the number of queries logged by the database connections of the current thread."""
+    return sum(len(connection.queries) for connection in connections.all())
+
+
+def _count(counter, number=1):
+    """Adds `number` to `counter` in the profiler of the task the current thread is running, if any."""
+    profiler = _current_profiler()
+    if profiler is not None:
+        profiler.counts[counter] += number
+
+
+def _install_hooks():
+    """
+    Wraps the pymongo functions in MONGO_QUERY_FUNCTIONS, and the lookups of the default
+    cache, so that they count their calls with _count(), unless that has been done already.
+    """
+    with _HOOKS_LOCK:
+        if _HOOKS['installed']:
+            return
+        _HOOKS['installed'] = True
+
+        for name in MONGO_QUERY_FUNCTIONS:
+            setattr(pymongo.message, name, _counted(getattr(pymongo.message, name), 'mongo'))
+
+        cache_get = cache.get
+        cache_get_many = cache.get_many
+        missing = object()
+
+        def get(key, default=None, version=None):
+            """Counts a hit or a miss, and gets a value from the cache."""
+            value = cache_get(key, missing, version=version)
+            if value is missing:
+                _count('cache_misses')
+                return default
+            _count('cache_hits')
+            return value
+
+        def get_many(keys, version=None):
+            """Counts the hits and misses, and gets values from the cache."""
+            profiler = _current_profiler()
+            if profiler is None:
+                return cache_get_many(keys, version=version)
+            keys = list(keys)
+            hits, misses = profiler.counts['cache_hits'], profiler.counts['cache_misses']
+            values = cache_get_many(keys, version=version)
+            # Backends without a get_many() of their own call get() for each key,
+            # which mustn't be counted again.
+            profiler.counts['cache_hits'] = hits + len(values)
+            profiler.counts['cache_misses'] = misses + len(keys) - len(values)
+            return values
+
+        cache.get = get
+        cache.get_many = get_many
+
+
+def _counted(func, counter):
+    """Returns a version of `func` that counts its calls in `counter`."""
+    def counted_func(*args, **kwargs):
+        """Counts a call, and makes it."""
+        _count(counter)
+        return func(*args, **kwargs)
+    return counted_func
+
+
+def _add_stats(totals, stats):
+    """Adds the numbers in `stats` to those in `totals`."""
+    for key, value in stats.iteritems():
+        totals[key] += value
+
+
+def merge_profiles(profile, other):
+    """
+    Returns a profile, as returned by TaskProfiler.summary(), with the numbers of the profiles
+    `profile` and `other` added up, for the whole task and for each phase.
+    """
+    total = dict(profile['total'])
+    _add_stats(total, other['total'])
+    phases = OrderedDict((name, dict(stats)) for name, stats in profile['phases'])
+    for name, stats in other['phases']:
+        if name not in phases:
+            phases[name] = dict(stats)
+        else:
+            _add_stats(phases[name], stats)
+    return {
+        'total': total,
+        'phases': [[name, stats] for name, stats in phases.iteritems()],
+    }
+
+
+def _current_profiler():
+    """Returns the TaskProfiler of the task being run, or None if it isn't being profiled."""
+    return getattr(_PROFILERS, 'current', None)
+
+
+@contextmanager
+def profile_task(action_name):
+    """
+    Context manager that profiles the block, if FEATURES['ENABLE_INSTRUCTOR_TASK_PROFILING']
+    is set.  Yields the TaskProfiler, or None if profiling isn't enabled.
+
+    The profile is logged and sent to statsd once the block is done, even if it fails.
+    """
+    if not settings.FEATURES.get('ENABLE_INSTRUCTOR_TASK_PROFILING'):
+        yield None
+        return
+
+    profiler = TaskProfiler(action_name)
+    _PROFILERS.current = profiler
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _PROFILERS.current = None
+        profiler.report()
+
+
+@contextmanager
+def profile_subtask(entry_id):
+    """
+    Context manager that profiles the block, run by a subtask of the InstructorTask `entry_id`,
+    as profile_task() does, and adds its profile to the one in the task's output once the block
+    is done, even if it fails.
+
+    A subtask that Celery runs inside its parent task, as it does when tasks are run eagerly,
+    is already counted in the parent's profile, so it isn't profiled again.
+    """
+    if not settings.FEATURES.get('ENABLE_INSTRUCTOR_TASK_PROFILING') or _current_profiler() is not None:
+        yield None
+        return
+
+    action_name = json.loads(InstructorTask.objects.get(pk=entry_id).task_output)['action_name']
+    profiler = None
+    try:
+        with profile_task(action_name) as profiler:
+            yield profiler
+    finally:
+        if profiler is not None:
+            add_profile_to_task(entry_id, profiler.summary())
+
+
+@contextmanager
+def task_phase(name):
+    """Context manager that counts the work done in the block as part of the phase `name` of the current task."""
+    profiler = _current_profiler()
+    if profiler is None:
+        yield
+    else:
+        with profiler.phase(name):
+            yield
+
+
+def iterate_in_phase(name, iterable):
+    """
+    Returns an iterator over `iterable` that counts the work done to produce its items as part
+    of the phase `name` of the current task.
+    """
+    profiler = _current_profiler()
+    if profiler is None:
+        return iter(iterable)
+    return profiler.iterate_in_phase(name, iterable)
+
+
+def add_profile_to_progress(task_progress, profiler):
+    """
+    Adds the profile of `profiler` to the `task_progress` dict under 'profile'.
+
+    The task output has to fit in its column, so if it would be too long, only the
+    numbers for the whole task are kept.
+    """
+    _set_profile(task_progress, profiler.summary())
+
+
+def _set_profile(task_progress, profile):
+    """Sets 'profile' in the `task_progress` dict, dropping its phases if the output would be too long."""
+    task_progress['profile'] = profile
+    try:
+        InstructorTask.create_output_for_success(task_progress)
+    except ValueError:
+        task_progress['profile'] = {'total': profile['total'], 'phases': []}
+
+
+@transaction.commit_manually
+def add_profile_to_task(entry_id, profile):
+    """
+    Adds the numbers of `profile`, as returned by TaskProfiler.summary(), to the profile in the
+    output of the InstructorTask `entry_id`, for a task whose output is kept by its subtasks.
+
+    Uses select_for_update to lock the InstructorTask while it is being updated, as
+    update_subtask_status() does.  This is best-effort:  if the InstructorTask is locked by
+    one of its subtasks for too long, the profile is only logged and sent to statsd.
+    """
+    try:
+        entry = InstructorTask.objects.select_for_update().get(pk=entry_id)
+        task_progress = json.loads(entry.task_output)
+        if 'profile' in task_progress:
+            profile = merge_profiles(task_progress['profile'], profile)
+        _set_profile(task_progress, profile)
+        entry.task_output = InstructorTask.create_output_for_success(task_progress)
+        entry.save()
+    except DatabaseError:
+        TASK_LOG.warning(u"Unable to add profile to instructor task %d", entry_id, exc_info=True)
+        transaction.rollback()
+    except Exception:
+        transaction.rollback()
+        raise
+    else:
+        transaction.commit()
@@ -0,0 +1,368 @@
+"""
+Bulk rescoring of a capa problem for all the students who answered it.
+
+The generic `perform_module_state_update` path binds a full XModule for every
+StudentModule it visits: it loads the course, builds a FieldDataCache and a
+module runtime, and only then re-grades the stored answers.  For a single
+problem, almost all of that is the same for every student.
+
+`BulkRescorer` instead reads the problem definition once, and re-grades each
+student's stored answers with a bare `LoncapaProblem`.  Grading needs nothing
+but the problem definition and the student's state, so it can be spread over a
+pool of worker processes.  Results are written back a chunk at a time, one
+transaction per chunk.  Anything the bulk path can't handle on its own (a
+problem reading files from the course, an unexpected error) is rescored with
+the generic path instead, so behavior for those students is unchanged.
+"""
+import json
+import logging
+import multiprocessing
+from itertools import islice
+from time import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+import dogstats_wrapper as dog_stats_api
+
+from capa.capa_problem import LoncapaProblem, LoncapaSystem
+from capa.responsetypes import StudentInputError, ResponseError, LoncapaProblemError
+from courseware.models import StudentModule, SCORE_CHANGED
+from courseware.module_render import SAFE_EXEC_CACHE, get_score_bucket
+from edxmako.shortcuts import render_to_string
+from opaque_keys.edx.keys import UsageKey
+from instructor_task.tasks_helper import (
+    TaskProgress,
+    UpdateProblemModuleStateError,
+    UPDATE_STATUS_FAILED,
+    UPDATE_STATUS_SKIPPED,
+    UPDATE_STATUS_SUCCEEDED,
+    _get_track_function_for_task,
+    get_student_for_task,
+    perform_module_state_update,
+    rescore_problem_module_state,
+)
+from student.models import anonymous_id_for_user
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import modulestore, ModuleI18nService
+
+TASK_LOG = logging.getLogger('edx.celery.task')
+
+
+class _TrackingRuntime(object):
+    """
+    The part of a module runtime that responsetypes use while grading.
+
+    Events are collected so they can be sent from the task's process.
+    """
+    def __init__(self):
+        self.events = []
+
+    def track_function(self, event_type, event):
+        """Remember an event to send later."""
+        self.events.append((event_type, event))
+
+
+class _ProblemModule(object):
+    """Stands in for the CapaModule that a LoncapaProblem reports to."""
+    def __init__(self, location):
+        self.location = location
+        self.runtime = _TrackingRuntime()
+
+
+def _make_capa_system(spec, anonymous_student_id):
+    """Build the LoncapaSystem for rescoring one student's answers."""
+    return LoncapaSystem(
+        ajax_url=None,
+        anonymous_student_id=anonymous_student_id,
+        cache=SAFE_EXEC_CACHE,
+        can_execute_unsafe_code=lambda: spec['can_execute_unsafe_code'],
+        get_python_lib_zip=lambda: spec['python_lib_zip'],
+        DEBUG=False,
+        filestore=None,
+        i18n=ModuleI18nService(),
+        node_path=settings.NODE_PATH,
+        render_template=render_to_string,
+        seed=None,
+        STATIC_URL=settings.STATIC_URL,
+        xqueue=None,
+        matlab_api_key=spec['matlab_api_key'],
+    )
+
+
+def rescore_state(spec, state, anonymous_student_id):
+    """
+    Re-grades one student's stored answers against the problem in `spec`.
+
+    Runs in pool workers, so it uses nothing but its arguments.  Returns a
+    dict with a 'status' key:
+
+        'rescored': also has the new lcp 'state', 'score', 'total' and 'success',
+        'failed': the answers couldn't be graded; 'success' has the message,
+        'fallback': the bulk path can't handle this; use the generic one.
+
+    Tracking events raised while grading are returned under 'events'.
+    """
+    module = _ProblemModule(UsageKey.from_string(spec['location']))
+    try:
+        lcp = LoncapaProblem(
+            problem_text=spec['problem_text'],
+            id=spec['problem_id'],
+            capa_system=_make_capa_system(spec, anonymous_student_id),
+            capa_module=module,
+            state=state,
+            seed=state.get('seed'),
+        )
+    except Exception:  # pylint: disable=broad-except
+        return {'status': 'fallback'}
+
+    event_info = {'state': lcp.get_state(), 'problem_id': module.location.to_deprecated_string()}
+    if not lcp.supports_rescoring():
+        # The generic path reports this the usual way.
+        return {'status': 'fallback'}
+
+    orig_score = lcp.get_score()
+    event_info['orig_score'] = orig_score['score']
+    event_info['orig_total'] = orig_score['total']
+    try:
+        correct_map = lcp.rescore_existing_answers()
+    except (StudentInputError, ResponseError, LoncapaProblemError) as inst:
+        event_info['failure'] = 'input_error'
+        module.runtime.track_function('problem_rescore_fail', event_info)
+        return {
+            'status': 'failed',
+            'success': u"Error: {0}".format(inst.message),
+            'events': module.runtime.events,
+        }
+    except Exception:  # pylint: disable=broad-except
+        return {'status': 'fallback'}
+
+    new_score = lcp.get_score()
+    success = 'correct'
+    for answer_id in correct_map:
+        if not correct_map.is_correct(answer_id):
+            success = 'incorrect'
+
+    event_info['new_score'] = new_score['score']
+    event_info['new_total'] = new_score['total']
+    event_info['correct_map'] = correct_map.get_dict()
+    event_info['success'] = success
+    event_info['attempts'] = state.get('attempts', 0)
+    module.runtime.track_function('problem_rescore', event_info)
+
+    return {
+        'status': 'rescored',
+        'state': lcp.get_state(),
+        'score': new_score['score'],
+        'total': new_score['total'],
+        'success': success,
+        'events': module.runtime.events,
+    }
+
+
+def _rescore_state_args(args):
+    """Unpacks `args` for `rescore_state`, for use with `Pool.map`."""
+    return rescore_state(*args)
+
+
+def _init_worker():
+    """Drop connections inherited from the task's process."""
+    cache.close()
+
+
+class BulkRescorer(object):
+    """
+    Rescores many students' answers to one problem.
+
+    `processes` is the number of worker processes to grade with; with fewer
+    than two, grading happens in this process.
+    """
+    def __init__(self, course_id, descriptor, xmodule_instance_args=None, processes=0):
+        self.course_id = course_id
+        self.descriptor = descriptor
+        self.xmodule_instance_args = xmodule_instance_args
+        self.processes = processes
+        self.spec = {
+            'problem_text': descriptor.data,
+            'problem_id': descriptor.location.html_id(),
+            'location': unicode(descriptor.location),
+            'can_execute_unsafe_code': can_execute_unsafe_code(course_id),
+            'python_lib_zip': get_python_lib_zip(contentstore, course_id),
+            'matlab_api_key': getattr(descriptor, 'matlab_api_key', None),
+        }
+        self._pool = None
+
+    @classmethod
+    def can_rescore(cls, descriptor):
+        """
+        Can the bulk path rescore `descriptor`?
+
+        Entrance exam problems and psychometrics need the module runtime's
+        grade handling, so they go through the generic path.
+        """
+        return (
+            descriptor.location.category == 'problem' and
+            hasattr(descriptor, 'data') and
+            not getattr(descriptor, 'in_entrance_exam', False) and
+            not settings.FEATURES.get('ENABLE_PSYCHOMETRICS')
+        )
+
+    def _grade(self, arg_list):
+        """Runs `rescore_state` over `arg_list`, in the pool if there is one."""
+        if self.processes < 2:
+            return [rescore_state(*args) for args in arg_list]
+        if self._pool is None:
+            # Don't share this process's database connection with the workers.
+            connection.close()
+            self._pool = multiprocessing.Pool(self.processes, initializer=_init_worker)
+        return self._pool.map(_rescore_state_args, arg_list)
+
+    def close(self):
+        """Stops the worker processes, if any."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def rescore(self, student_modules):
+        """
+        Rescores `student_modules`, which must have their `student` loaded.
+
+        Returns a list of (student_module, update_status) pairs.
+        """
+        arg_list = [
+            (
+                self.spec,
+                json.loads(student_module.state or '{}'),
+                # Capa modules are rendered with the course-independent id (see
+                # get_module_system_for_user), so grade with the same one.
+                anonymous_id_for_user(student_module.student, None),
+            )
+            for student_module in student_modules
+        ]
+        results = zip(student_modules, self._grade(arg_list))
+
+        statuses = {}
+        with transaction.commit_on_success():
+            for student_module, result in results:
+                if result['status'] == 'rescored':
+                    self._save(student_module, result)
+                    statuses[student_module.id] = UPDATE_STATUS_SUCCEEDED
+                elif result['status'] == 'failed':
+                    TASK_LOG.warning(
+                        u"error processing rescore call for course %(course)s, problem %(loc)s "
+                        u"and student %(student)s: %(msg)s",
+                        dict(
+                            msg=result['success'],
+                            course=self.course_id,
+                            loc=student_module.module_state_key,
+                            student=student_module.student
+                        )
+                    )
+                    statuses[student_module.id] = UPDATE_STATUS_FAILED
+
+        for student_module, result in results:
+            if result['status'] == 'fallback':
+                statuses[student_module.id] = rescore_problem_module_state(
+                    self.xmodule_instance_args, self.descriptor, student_module
+                )
+                continue
+            self._publish(student_module, result)
+
+        return [(student_module, statuses[student_module.id]) for student_module in student_modules]
+
+    def _save(self, student_module, result):
+        """Writes a rescored state and grade back to `student_module`."""
+        state = json.loads(student_module.state or '{}')
+        state.update(result['state'])
+        student_module.state = json.dumps(state)
+        student_module.grade = result['score']
+        student_module.max_grade = result['total']
+        student_module.save()
+
+    def _publish(self, student_module, result):
+        """Sends the events and signals that rescoring a module would have."""
+        track_function = _get_track_function_for_task(student_module.student, self.xmodule_instance_args)
+        for event_type, event in result.get('events', []):
+            track_function(event_type, event)
+
+        if result['status'] != 'rescored':
+            return
+        tags = [
+            u"org:{}".format(self.course_id.org),
+            u"course:{}".format(self.course_id),
+            u"score_bucket:{0}".format(get_score_bucket(result['score'], result['total'])),
+            u"type:rescore",
+        ]
+        dog_stats_api.increment("lms.courseware.question_answered", tags=tags)
+        SCORE_CHANGED.send(
+            sender=None,
+            points_possible=result['total'],
+            points_earned=result['score'],
+            user_id=student_module.student_id,
+            course_id=unicode(self.course_id),
+            usage_id=unicode(student_module.module_state_key),
+        )
+
+
+def perform_bulk_rescore(xmodule_instance_args, filter_fcn, _entry_id, course_id, task_input, action_name):
+    """
+    Rescores a problem with `BulkRescorer`, a chunk of StudentModules at a time.
+
+    Takes the same task arguments as `perform_module_state_update`, and returns
+    the same progress dict.  Tasks the bulk path can't handle (entrance exams,
+    non-capa problems) are handed to `perform_module_state_update` unchanged.
+    """
+    problem_url = task_input.get('problem_url')
+    descriptor = None
+    if problem_url and not task_input.get('entrance_exam_url'):
+        usage_key = course_id.make_usage_key_from_deprecated_string(problem_url)
+        descriptor = modulestore().get_item(usage_key)
+
+    if descriptor is None or not BulkRescorer.can_rescore(descriptor):
+        update_fcn = lambda module_descriptor, student_module: rescore_problem_module_state(
+            xmodule_instance_args, module_descriptor, student_module
+        )
+        return perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name)
+
+    start_time = time()
+    modules_to_update = StudentModule.objects.filter(
+        course_id=course_id, module_state_key=descriptor.location
+    ).select_related('student')
+    student = get_student_for_task(task_input.get('student'))
+    if student is not None:
+        modules_to_update = modules_to_update.filter(student_id=student.id)
+    if filter_fcn is not None:
+        modules_to_update = filter_fcn(modules_to_update)
+
+    task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
+    task_progress.update_task_state()
+
+    bulk_settings = settings.BULK_RESCORE
+    rescorer = BulkRescorer(course_id, descriptor, xmodule_instance_args, processes=bulk_settings['PROCESSES'])
+    modules_iter = modules_to_update.iterator()
+    try:
+        while True:
+            chunk = list(islice(modules_iter, bulk_settings['CHUNK_SIZE']))
+            if not chunk:
+                break
+            chunk_tags = [u'action:{name}'.format(name=action_name)]
+            with dog_stats_api.timer('instructor_tasks.module.time.chunk', tags=chunk_tags):
+                for _student_module, update_status in rescorer.rescore(chunk):
+                    task_progress.attempted += 1
+                    if update_status == UPDATE_STATUS_SUCCEEDED:
+                        task_progress.succeeded += 1
+                    elif update_status == UPDATE_STATUS_FAILED:
+                        task_progress.failed += 1
+                    elif update_status == UPDATE_STATUS_SKIPPED:
+                        task_progress.skipped += 1
+                    else:
+                        raise UpdateProblemModuleStateError(
+                            "Unexpected update_status returned: {}".format(update_status)
+                        )
+            task_progress.update_task_state()
+    finally:
+        rescorer.close()
+
+    return task_progress.update_task_state()
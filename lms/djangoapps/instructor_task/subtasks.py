@@ -18,7 +18,8 @@ from instructor_task.models import InstructorTask, PROGRESS, QUEUING
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
-# Lock expiration should be long enough to allow a subtask to complete.
+# Lock expiration should be long enough to allow a subtask to complete, or, for a
+# subtask that checkpoints its progress, to get from one checkpoint to the next.
 SUBTASK_LOCK_EXPIRE = 60 * 10  # Lock expires in 10 minutes
 # Number of times to retry if a subtask update encounters a lock on the InstructorTask.
 # (These are recursive retries, so don't make this number too large.)
@@ -30,6 +31,11 @@ class DuplicateTaskException(Exception):
     pass
 
 
+class SubtaskLockedException(DuplicateTaskException):
+    """Exception indicating that a subtask is locked, because it is being run, or its worker went away."""
+    pass
+
+
 def _get_number_of_subtasks(total_num_items, items_per_task):
     """
     Determines number of subtasks that would be generated by _generate_items_for_subtask.
@@ -370,6 +376,17 @@ def _acquire_subtask_lock(task_id):
     return succeeded
 
 
+def _extend_subtask_lock(task_id):
+    """
+    Keep the lock on the specified task_id for another SUBTASK_LOCK_EXPIRE seconds.
+
+    A long-running subtask calls this as it makes progress, so that its lock only
+    expires if its worker has gone away.
+    """
+    key = "subtask-{}".format(task_id)
+    cache.set(key, 'true', SUBTASK_LOCK_EXPIRE)
+
+
 def _release_subtask_lock(task_id):
     """
     Unmark the specified task_id as being no longer in progress.
@@ -400,7 +417,9 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
     so that we can detect if another worker has started work but has not yet completed that work.
     The other worker is allowed to finish, and this raises an exception.
 
-    Raises a DuplicateTaskException exception if it's not a task that should be run.
+    Raises a DuplicateTaskException exception if it's not a task that should be run, or a
+    SubtaskLockedException if another worker holds the lock on it.  The lock expires after
+    SUBTASK_LOCK_EXPIRE seconds, so a subtask whose worker went away can be run again then.
 
     If this succeeds, it requires that update_subtask_status() is called to release the lock on the
     task.
@@ -457,7 +476,37 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
         msg = format_str.format(current_task_id, entry)
         TASK_LOG.warning(msg)
         dog_stats_api.increment('instructor_task.subtask.duplicate.locked', tags=[entry.course_id])
-        raise DuplicateTaskException(msg)
+        raise SubtaskLockedException(msg)
+
+
+def get_subtask_status(entry_id, current_task_id):
+    """
+    Return the SubtaskStatus last recorded in the InstructorTask for the subtask `current_task_id`.
+
+    A subtask that is run again after its worker went away can use this to carry on from
+    its last checkpoint, rather than from the status it was queued with.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_status_info = json.loads(entry.subtasks)['status']
+    return SubtaskStatus.from_dict(subtask_status_info[current_task_id])
+
+
+def checkpoint_subtask_status(entry_id, current_task_id, new_subtask_status):
+    """
+    Record the progress a running subtask has made so far in the parent InstructorTask.
+
+    Unlike update_subtask_status(), this keeps the lock on the subtask, and extends it, and is
+    called while the subtask is still in progress, so its counts are not yet added to the parent
+    task's.  Checkpoints are best-effort:  if the InstructorTask is locked by another subtask, the
+    checkpoint is skipped, and the subtask carries on.
+    """
+    _extend_subtask_lock(current_task_id)
+    try:
+        _update_subtask_status(entry_id, current_task_id, new_subtask_status)
+    except DatabaseError:
+        TASK_LOG.info("Skipped checkpoint for subtask %s of instructor task %d with status %s",
+                      current_task_id, entry_id, new_subtask_status)
+        dog_stats_api.increment('instructor_task.subtask.skipped_checkpoint')
 
 
 def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0):
@@ -471,9 +520,11 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
 
     The subtask lock acquired in the call to check_subtask_is_valid() is released here, only when
     the attempting of retries has concluded.
+
+    Returns True if this was the last of the InstructorTask's subtasks to finish.
     """
     try:
-        _update_subtask_status(entry_id, current_task_id, new_subtask_status)
+        return _update_subtask_status(entry_id, current_task_id, new_subtask_status)
     except DatabaseError:
         # If we fail, try again recursively.
         retry_count += 1
@@ -481,7 +532,7 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
             TASK_LOG.info("Retrying to update status for subtask %s of instructor task %d with status %s:  retry %d",
                           current_task_id, entry_id, new_subtask_status, retry_count)
             dog_stats_api.increment('instructor_task.subtask.retry_after_failed_update')
-            update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count)
+            return update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count)
         else:
             TASK_LOG.info("Failed to update status after %d retries for subtask %s of instructor task %d with status %s",
                           retry_count, current_task_id, entry_id, new_subtask_status)
@@ -521,6 +572,8 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
     information for each subtask.  At the moment, the value for each subtask (keyed by its task_id)
     is the value of the SubtaskStatus.to_dict(), but could be expanded in future to store information
     about failure messages, progress made, etc.
+
+    Returns True if the subtask is done, and was the last of the InstructorTask's subtasks to finish.
     """
     TASK_LOG.info("Preparing to update status for subtask %s for instructor task %d with status %s",
                   current_task_id, entry_id, new_subtask_status)
@@ -588,3 +641,4 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
     else:
         TASK_LOG.debug("about to commit....")
         transaction.commit()
+        return new_state in READY_STATES and num_remaining <= 0
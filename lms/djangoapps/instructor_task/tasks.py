@@ -27,10 +27,14 @@ from django.utils.translation import ugettext_noop
 
 from celery import task
 from bulk_email.tasks import perform_delegate_email_batches
+from instructor_task.profiling import profile_subtask
+from instructor_task.rescore import perform_bulk_rescore
 from instructor_task.tasks_helper import (
     run_main_task,
     BaseInstructorTask,
     perform_module_state_update,
+    run_module_state_update_subtask,
+    run_report_subtask,
     rescore_problem_module_state,
     reset_attempts_module_state,
     delete_problem_module_state,
@@ -51,6 +55,32 @@ from instructor_task.tasks_helper import (
 TASK_LOG = logging.getLogger('edx.celery.task')
 
 
+def _create_module_state_subtask(entry_id, xmodule_instance_args, item_list, initial_subtask_status):
+    """Creates a subtask to update the StudentModules in `item_list`."""
+    return update_module_state_subtask.subtask(
+        (
+            entry_id,
+            xmodule_instance_args,
+            sorted(item['pk'] for item in item_list),
+            initial_subtask_status.to_dict(),
+        ),
+        task_id=initial_subtask_status.task_id,
+    )
+
+
+def _create_report_subtask(entry_id, xmodule_instance_args, item_list, initial_subtask_status):
+    """Creates a subtask to build the part of a report on the students in `item_list`."""
+    return report_subtask.subtask(
+        (
+            entry_id,
+            xmodule_instance_args,
+            sorted(item['pk'] for item in item_list),
+            initial_subtask_status.to_dict(),
+        ),
+        task_id=initial_subtask_status.task_id,
+    )
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def rescore_problem(entry_id, xmodule_instance_args):
     """Rescores a problem in a course, for all students or one specific student.
@@ -78,7 +108,13 @@ def rescore_problem(entry_id, xmodule_instance_args):
         """Filter that matches problems which are marked as being done"""
         return modules_to_update.filter(state__contains='"done": true')
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn)
+    if settings.FEATURES.get('ENABLE_BULK_RESCORE'):
+        visit_fcn = partial(perform_bulk_rescore, xmodule_instance_args, filter_fcn)
+    else:
+        visit_fcn = partial(
+            perform_module_state_update, update_fcn, filter_fcn,
+            create_subtask_fcn=partial(_create_module_state_subtask, entry_id, xmodule_instance_args),
+        )
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
@@ -100,7 +136,10 @@ def reset_problem_attempts(entry_id, xmodule_instance_args):
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('reset')
     update_fcn = partial(reset_attempts_module_state, xmodule_instance_args)
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    visit_fcn = partial(
+        perform_module_state_update, update_fcn, None,
+        create_subtask_fcn=partial(_create_module_state_subtask, entry_id, xmodule_instance_args),
+    )
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
@@ -122,10 +161,35 @@ def delete_problem_state(entry_id, xmodule_instance_args):
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('deleted')
     update_fcn = partial(delete_problem_module_state, xmodule_instance_args)
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    visit_fcn = partial(
+        perform_module_state_update, update_fcn, None,
+        create_subtask_fcn=partial(_create_module_state_subtask, entry_id, xmodule_instance_args),
+    )
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task(  # pylint: disable=not-callable
+    default_retry_delay=settings.INSTRUCTOR_TASK_SUBTASK_RETRY_DELAY,
+    max_retries=settings.INSTRUCTOR_TASK_SUBTASK_MAX_RETRIES,
+    # Acknowledge the message only once the subtask is done, so that the broker delivers
+    # it again if the worker goes away partway through the chunk.
+    acks_late=True,
+)
+def update_module_state_subtask(entry_id, xmodule_instance_args, module_ids, subtask_status_dict):
+    """Updates one chunk of the StudentModules visited by a rescore, reset or delete task.
+
+    `entry_id` is the id value of the InstructorTask entry of the parent task, whose
+    `task_type` determines the update to perform.  `module_ids` are the ids of the
+    StudentModules to update, and `subtask_status_dict` is the SubtaskStatus this subtask
+    was queued (or retried) with.
+
+    `xmodule_instance_args` provides information needed by _get_module_instance_for_task()
+    to instantiate an xmodule instance.
+    """
+    with profile_subtask(entry_id):
+        return run_module_state_update_subtask(entry_id, xmodule_instance_args, module_ids, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def send_bulk_course_email(entry_id, _xmodule_instance_args):
     """Sends emails to recipients enrolled in a course.
@@ -171,7 +235,10 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    task_fn = partial(
+        upload_grades_csv, xmodule_instance_args,
+        create_subtask_fcn=partial(_create_report_subtask, entry_id, xmodule_instance_args),
+    )
     return run_main_task(entry_id, task_fn, action_name)
 
 
@@ -212,10 +279,33 @@ def enrollment_report_features_csv(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('generating_enrollment_report')
-    task_fn = partial(upload_enrollment_report, xmodule_instance_args)
+    task_fn = partial(
+        upload_enrollment_report, xmodule_instance_args,
+        create_subtask_fcn=partial(_create_report_subtask, entry_id, xmodule_instance_args),
+    )
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(  # pylint: disable=not-callable
+    routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+    default_retry_delay=settings.INSTRUCTOR_TASK_SUBTASK_RETRY_DELAY,
+    max_retries=settings.INSTRUCTOR_TASK_SUBTASK_MAX_RETRIES,
+    # Acknowledge the message only once the subtask is done, so that the broker delivers
+    # it again if the worker goes away partway through the chunk.
+    acks_late=True,
+)
+def report_subtask(entry_id, xmodule_instance_args, user_ids, subtask_status_dict):
+    """Builds the part of a grade or detailed enrollment report on one chunk of the students.
+
+    `entry_id` is the id value of the InstructorTask entry of the parent task, whose
+    `task_type` determines the report to build.  `user_ids` are the ids of the students
+    of the chunk, and `subtask_status_dict` is the SubtaskStatus this subtask was queued
+    (or retried) with.
+    """
+    with profile_subtask(entry_id):
+        return run_report_subtask(entry_id, xmodule_instance_args, user_ids, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def exec_summary_report_csv(entry_id, xmodule_instance_args):
     """
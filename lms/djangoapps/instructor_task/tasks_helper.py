@@ -9,14 +9,16 @@ from collections import OrderedDict
 from datetime import datetime
 from django.conf import settings
 from eventtracking import tracker
+from functools import partial
 from itertools import chain
 from time import time
 import unicodecsv
 import logging
 
 from celery import Task, current_task
-from celery.states import SUCCESS, FAILURE
+from celery.states import SUCCESS, FAILURE, RETRY
 from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 from django.db.models import Q
@@ -33,6 +35,7 @@ from survey.models import SurveyAnswer
 
 from track.views import task_track
 from util.file import course_filename_prefix_generator, UniversalNewlineIterator
+from util.query import iterate_in_pages
 from xblock.runtime import KvsFieldData
 from xmodule.modulestore.django import modulestore
 from xmodule.split_test_module import get_split_user_partitions
@@ -42,29 +45,46 @@ from certificates.models import (
     certificate_info_for_user,
     CertificateStatuses
 )
-from certificates.api import generate_user_certificates
+from certificates.api import generate_certificates_for_students
 from courseware.courses import get_course_by_id, get_problems_in_section
 from courseware.grades import iterate_grades_for
 from courseware.models import StudentModule
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
 from instructor_analytics.basic import (
-    enrolled_students_features,
     get_proctored_exam_results,
-    list_may_enroll,
+    iterate_enrolled_students_features,
+    iterate_may_enroll,
     list_problem_responses
 )
-from instructor_analytics.csvs import format_dictlist
+from instructor_analytics.csvs import format_dictlist, iterate_dictlist
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.profiling import (
+    add_profile_to_progress,
+    add_profile_to_task,
+    iterate_in_phase,
+    profile_task,
+    task_phase,
+)
+from instructor_task.subtasks import (
+    SUBTASK_LOCK_EXPIRE,
+    SubtaskLockedException,
+    SubtaskStatus,
+    check_subtask_is_valid,
+    checkpoint_subtask_status,
+    get_subtask_status,
+    queue_subtasks_for_query,
+    update_subtask_status,
+)
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
-from openedx.core.djangoapps.course_groups.cohorts import get_cohort
+from openedx.core.djangoapps.course_groups.cohorts import get_cohorts_for_users
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from opaque_keys.edx.keys import UsageKey
 from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort, is_course_cohorted
 from student.models import CourseEnrollment, CourseAccessRole
 from teams.models import CourseTeamMembership
-from verify_student.models import SoftwareSecurePhotoVerification
+from verify_student.models import SoftwareSecurePhotoVerification, VerificationStatus
 
 # define different loggers for use within tasks and on client side
 TASK_LOG = logging.getLogger('edx.celery.task')
@@ -77,6 +97,15 @@ UPDATE_STATUS_SUCCEEDED = 'succeeded'
 UPDATE_STATUS_FAILED = 'failed'
 UPDATE_STATUS_SKIPPED = 'skipped'
 
+# How many StudentModules a subtask of a module state update visits between checkpoints.
+SUBTASK_CHECKPOINT_INTERVAL = 100
+
+# How many students' certificates are generated together.
+CERTIFICATE_GENERATION_BATCH_SIZE = 200
+
+# How many students the streamed reports look up per query.
+REPORT_PAGE_SIZE = 1000
+
 # The setting name used for events when "settings" (account settings, preferences, profile information) change.
 REPORT_REQUESTED_EVENT_NAME = u'edx.instructor.report.requested'
 
@@ -284,7 +313,13 @@ def run_main_task(entry_id, task_fcn, action_name):
 
     # Now do the work
     with dog_stats_api.timer('instructor_tasks.time.overall', tags=[u'action:{name}'.format(name=action_name)]):
-        task_progress = task_fcn(entry_id, course_id, task_input, action_name)
+        with profile_task(action_name) as profiler:
+            task_progress = task_fcn(entry_id, course_id, task_input, action_name)
+    if profiler is not None:
+        add_profile_to_progress(task_progress, profiler)
+        if len(InstructorTask.objects.get(pk=entry_id).subtasks) > 0:
+            # The output of a task with subtasks is kept by them, and not replaced by task_progress.
+            add_profile_to_task(entry_id, profiler.summary())
 
     # Release any queries that the connection has been hanging onto
     reset_queries()
@@ -294,7 +329,63 @@ def run_main_task(entry_id, task_fcn, action_name):
     return task_progress
 
 
-def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+def get_student_for_task(student_identifier):
+    """
+    Returns the User identified by `student_identifier` (an email or a username), or None if it is None.
+
+    Raises User.DoesNotExist if an identifier is supplied but no such user exists.
+    """
+    if student_identifier is None:
+        return None
+    if "@" in student_identifier:
+        return User.objects.get(email=student_identifier)
+    return User.objects.get(username=student_identifier)
+
+
+def _get_problems_for_task(course_id, task_input):
+    """
+    Returns the usage keys of the problems named by `task_input`, either by its 'problem_url' or
+    by its 'entrance_exam_url', and a dict mapping the string version of each key to the
+    problem's descriptor.
+    """
+    usage_keys = []
+    problems = {}
+    problem_url = task_input.get('problem_url')
+    entrance_exam_url = task_input.get('entrance_exam_url')
+
+    # if problem_url is present make a usage key from it
+    if problem_url:
+        usage_key = course_id.make_usage_key_from_deprecated_string(problem_url)
+        usage_keys.append(usage_key)
+
+        # find the problem descriptor:
+        problem_descriptor = modulestore().get_item(usage_key)
+        problems[unicode(usage_key)] = problem_descriptor
+
+    # if entrance_exam is present grab all problems in it
+    if entrance_exam_url:
+        problems = get_problems_in_section(entrance_exam_url)
+        usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
+
+    return usage_keys, problems
+
+
+def _update_module_state(update_fcn, module_descriptor, module_to_update, action_name):
+    """
+    Calls `update_fcn` on one StudentModule, and returns the update status it reports.
+
+    Raises UpdateProblemModuleStateError if `update_fcn` returns an unexpected status.
+    """
+    with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
+        with task_phase('update'):
+            update_status = update_fcn(module_descriptor, module_to_update)
+    if update_status not in (UPDATE_STATUS_SUCCEEDED, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED):
+        raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+    return update_status
+
+
+def perform_module_state_update(update_fcn, filter_fcn, entry_id, course_id, task_input, action_name,
+                                create_subtask_fcn=None):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -312,6 +403,13 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     the update is successful; False indicates the update on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    If a `create_subtask_fcn` is given, and there are more than settings.INSTRUCTOR_TASK_ITEMS_PER_SUBTASK
+    StudentModules to visit, they are instead split into chunks of that size, and a subtask is queued for
+    each chunk (see run_module_state_update_subtask).  `create_subtask_fcn` is passed the list of items of
+    a chunk and the chunk's initial SubtaskStatus, as for queue_subtasks_for_query().  The subtasks can
+    run on different workers, and each records its progress in the InstructorTask, where their counts are
+    added up.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -329,47 +427,30 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
 
     """
     start_time = time()
-    usage_keys = []
-    problem_url = task_input.get('problem_url')
-    entrance_exam_url = task_input.get('entrance_exam_url')
     student_identifier = task_input.get('student')
-    problems = {}
 
-    # if problem_url is present make a usage key from it
-    if problem_url:
-        usage_key = course_id.make_usage_key_from_deprecated_string(problem_url)
-        usage_keys.append(usage_key)
-
-        # find the problem descriptor:
-        problem_descriptor = modulestore().get_item(usage_key)
-        problems[unicode(usage_key)] = problem_descriptor
-
-    # if entrance_exam is present grab all problems in it
-    if entrance_exam_url:
-        problems = get_problems_in_section(entrance_exam_url)
-        usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
+    usage_keys, problems = _get_problems_for_task(course_id, task_input)
 
     # find the modules in question
     modules_to_update = StudentModule.objects.filter(course_id=course_id, module_state_key__in=usage_keys)
 
     # give the option of updating an individual student. If not specified,
     # then updates all students who have responded to a problem so far
-    student = None
-    if student_identifier is not None:
-        # if an identifier is supplied, then look for the student,
-        # and let it throw an exception if none is found.
-        if "@" in student_identifier:
-            student = User.objects.get(email=student_identifier)
-        elif student_identifier is not None:
-            student = User.objects.get(username=student_identifier)
-
+    student = get_student_for_task(student_identifier)
     if student is not None:
         modules_to_update = modules_to_update.filter(student_id=student.id)
 
     if filter_fcn is not None:
         modules_to_update = filter_fcn(modules_to_update)
 
-    task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
+    total_num_modules = modules_to_update.count()
+    subtask_progress = _queue_subtasks_if_needed(
+        entry_id, action_name, create_subtask_fcn, modules_to_update, total_num_modules
+    )
+    if subtask_progress is not None:
+        return subtask_progress
+
+    task_progress = TaskProgress(action_name, total_num_modules, start_time)
     task_progress.update_task_state()
 
     for module_to_update in modules_to_update:
@@ -377,22 +458,79 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
         module_descriptor = problems[unicode(module_to_update.module_state_key)]
         # There is no try here:  if there's an error, we let it throw, and the task will
         # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update)
-            if update_status == UPDATE_STATUS_SUCCEEDED:
-                # If the update_fcn returns true, then it performed some kind of work.
-                # Logging of failures is left to the update_fcn itself.
-                task_progress.succeeded += 1
-            elif update_status == UPDATE_STATUS_FAILED:
-                task_progress.failed += 1
-            elif update_status == UPDATE_STATUS_SKIPPED:
-                task_progress.skipped += 1
-            else:
-                raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+        update_status = _update_module_state(update_fcn, module_descriptor, module_to_update, action_name)
+        if update_status == UPDATE_STATUS_SUCCEEDED:
+            # If the update_fcn returns true, then it performed some kind of work.
+            # Logging of failures is left to the update_fcn itself.
+            task_progress.succeeded += 1
+        elif update_status == UPDATE_STATUS_FAILED:
+            task_progress.failed += 1
+        elif update_status == UPDATE_STATUS_SKIPPED:
+            task_progress.skipped += 1
 
     return task_progress.update_task_state()
 
 
+def _queue_subtasks_if_needed(entry_id, action_name, create_subtask_fcn, items, total_num_items):
+    """
+    Splits the work of the InstructorTask `entry_id` on the `items` of a queryset into subtasks, if
+    a `create_subtask_fcn` is given, and there are more than settings.INSTRUCTOR_TASK_ITEMS_PER_SUBTASK
+    of them.  The items are split, in the order of their ids, into chunks of that size, and a subtask
+    is queued for each chunk by queue_subtasks_for_query(), which passes `create_subtask_fcn` the list
+    of items of a chunk and the chunk's initial SubtaskStatus.
+
+    Returns the task progress, as stored in the InstructorTask, if the work was split up, or None if
+    the task is to do the work itself.
+    """
+    if create_subtask_fcn is None:
+        return None
+
+    # If this task has already queued its subtasks, and is now being run again (which
+    # may happen when Celery loses its connection to the broker), let the subtasks
+    # that were already queued carry on, rather than queuing another set.
+    entry = InstructorTask.objects.get(pk=entry_id)
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued its subtasks!  InstructorTask = %s", entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    items_per_task = getattr(settings, 'INSTRUCTOR_TASK_ITEMS_PER_SUBTASK', 0)
+    if not items_per_task or total_num_items <= items_per_task:
+        return None
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        create_subtask_fcn,
+        [items.order_by('id')],
+        [],
+        items_per_task,
+        total_num_items,
+    )
+
+
+def _check_subtask_is_valid_or_retry(entry_id, subtask_status, retry_args):
+    """
+    Checks that the subtask with `subtask_status` of the InstructorTask `entry_id` is to be run, as
+    check_subtask_is_valid() does, which raises DuplicateTaskException if the subtask is not known
+    or already done.
+
+    If another worker is running the subtask, or went away while running it, the subtask is retried
+    with `retry_args` once the lock has expired:  by then, the subtask has either been completed, and
+    the retry is rejected, or it can be carried on.
+    """
+    try:
+        check_subtask_is_valid(entry_id, subtask_status.task_id, subtask_status)
+    except SubtaskLockedException as exc:
+        current_task = _get_current_task()
+        raise current_task.retry(
+            args=retry_args,
+            exc=exc,
+            countdown=SUBTASK_LOCK_EXPIRE,
+            # Waiting for the lock does not count against the subtask's retries.
+            max_retries=current_task.request.retries + 1,
+        )
+
+
 def _get_task_id_from_xmodule_args(xmodule_instance_args):
     """Gets task_id from `xmodule_instance_args` dict, or returns default value if missing."""
     return xmodule_instance_args.get('task_id', UNKNOWN_TASK_ID) if xmodule_instance_args is not None else UNKNOWN_TASK_ID
@@ -596,6 +734,94 @@ def delete_problem_module_state(xmodule_instance_args, _module_descriptor, stude
     return UPDATE_STATUS_SUCCEEDED
 
 
+# The update function used by the subtasks of each type of module state update.
+MODULE_STATE_UPDATE_FCNS = {
+    'rescore_problem': rescore_problem_module_state,
+    'reset_problem_attempts': reset_attempts_module_state,
+    'delete_problem_state': delete_problem_module_state,
+}
+
+
+def run_module_state_update_subtask(entry_id, xmodule_instance_args, module_ids, subtask_status_dict):
+    """
+    Visits the StudentModules with ids `module_ids`, as one subtask of a module state update that
+    perform_module_state_update() has split up.  The update function is the one that
+    MODULE_STATE_UPDATE_FCNS gives for the InstructorTask's task_type.
+
+    Progress is checkpointed in the InstructorTask every SUBTASK_CHECKPOINT_INTERVAL modules.  If the
+    subtask is run again, either because it is retried after an unexpected error, or because its
+    worker went away and Celery delivers it again, it carries on after the last module it recorded,
+    rather than starting the chunk over.  A subtask that is delivered again while the lock of the
+    worker that went away is still held is retried once the lock has expired.  An
+    UpdateProblemModuleStateError is fatal, as it is for perform_module_state_update(), and fails the
+    subtask without retrying it.
+
+    The arguments are those of the Celery task that runs this, so that it can be retried with
+    its current status.  Returns the subtask's status, as a dict.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    _check_subtask_is_valid_or_retry(
+        entry_id, subtask_status, [entry_id, xmodule_instance_args, module_ids, subtask_status_dict]
+    )
+
+    # Carry on from the last checkpoint, if it got further than the status we were queued with.
+    checkpoint = get_subtask_status(entry_id, current_task_id)
+    if checkpoint.attempted > subtask_status.attempted:
+        TASK_LOG.info(u"Subtask %s of instructor task %d: resuming after %d modules",
+                      current_task_id, entry_id, checkpoint.attempted)
+        subtask_status = checkpoint
+    subtask_status.increment(state=PROGRESS)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    action_name = json.loads(entry.task_output)['action_name']
+    update_fcn = partial(MODULE_STATE_UPDATE_FCNS[entry.task_type], xmodule_instance_args)
+
+    try:
+        __, problems = _get_problems_for_task(entry.course_id, json.loads(entry.task_input))
+        remaining_ids = module_ids[subtask_status.attempted:]
+        modules = StudentModule.objects.in_bulk(remaining_ids)
+        for module_id in remaining_ids:
+            module_to_update = modules.get(module_id)
+            if module_to_update is None:
+                # The module has been deleted since the subtask was queued.
+                update_status = UPDATE_STATUS_SKIPPED
+            else:
+                module_descriptor = problems[unicode(module_to_update.module_state_key)]
+                update_status = _update_module_state(update_fcn, module_descriptor, module_to_update, action_name)
+            subtask_status.increment(**{update_status: 1})
+            if update_status == UPDATE_STATUS_SKIPPED:
+                # Module state updates count skipped modules as attempted, too.
+                subtask_status.attempted += 1
+            if subtask_status.attempted % SUBTASK_CHECKPOINT_INTERVAL == 0:
+                checkpoint_subtask_status(entry_id, current_task_id, subtask_status)
+    except Exception as exc:  # pylint: disable=broad-except
+        current_task = _get_current_task()
+        out_of_retries = subtask_status.retried_withmax >= current_task.max_retries
+        if isinstance(exc, UpdateProblemModuleStateError) or out_of_retries:
+            TASK_LOG.exception(u"Subtask %s of instructor task %d failed after %d modules",
+                               current_task_id, entry_id, subtask_status.attempted)
+            # The modules that were not visited are counted as failed.
+            subtask_status.increment(failed=len(module_ids) - subtask_status.attempted, state=FAILURE)
+            update_subtask_status(entry_id, current_task_id, subtask_status)
+            raise
+        TASK_LOG.warning(u"Subtask %s of instructor task %d failed after %d modules, retrying",
+                         current_task_id, entry_id, subtask_status.attempted, exc_info=True)
+        # Record the retry *before* making it, so that the retried subtask isn't taken for a duplicate.
+        subtask_status.increment(retried_withmax=1, state=RETRY)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise current_task.retry(
+            args=[entry_id, xmodule_instance_args, module_ids, subtask_status.to_dict()],
+            exc=exc,
+            # The subtask counts its own retries in retried_withmax, which is checked above.
+            max_retries=current_task.request.retries + 1,
+        )
+
+    subtask_status.increment(state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
 def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
     """
     Upload data as a CSV using ReportStore.
@@ -611,15 +837,16 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
         course_id: ID of the course
     """
     report_store = ReportStore.from_config(config_name)
-    report_store.store_rows(
-        course_id,
-        u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-            course_prefix=course_filename_prefix_generator(course_id),
-            csv_name=csv_name,
-            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-        ),
-        rows
-    )
+    with task_phase('upload'):
+        report_store.store_rows(
+            course_id,
+            u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+                course_prefix=course_filename_prefix_generator(course_id),
+                csv_name=csv_name,
+                timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
+            ),
+            rows
+        )
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": csv_name, })
 
 
@@ -653,7 +880,7 @@ def upload_exec_summary_to_store(data_dict, report_name, course_id, generated_at
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": report_name})
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+def upload_grades_csv(_xmodule_instance_args, entry_id, course_id, _task_input, action_name, create_subtask_fcn=None):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -662,25 +889,66 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in ReportStore will be complete ones.
 
+    If a `create_subtask_fcn` is given, and more students are enrolled than
+    settings.INSTRUCTOR_TASK_ITEMS_PER_SUBTASK, they are graded in subtasks
+    instead (see run_report_subtask), and the report is put together from
+    their parts once the last of them is done.
+
     As we start to add more CSV downloads, it will probably be worthwhile to
     make a more general CSVDoc class instead of building out the rows like we
     do here.
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+    total_enrolled_students = enrolled_students.count()
+
+    subtask_progress = _queue_subtasks_if_needed(
+        entry_id, action_name, create_subtask_fcn, enrolled_students, total_enrolled_students
+    )
+    if subtask_progress is not None:
+        return subtask_progress
+
+    task_progress = TaskProgress(action_name, total_enrolled_students, start_time)
 
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
         task_id=_xmodule_instance_args.get('task_id') if _xmodule_instance_args is not None else None,
-        entry_id=_entry_id,
+        entry_id=entry_id,
         course_id=course_id,
         task_input=_task_input
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
+    rows, err_rows = _grade_report_rows(course_id, enrolled_students, task_progress, task_info_string, action_name)
+
+    # By this point, we've got the rows we're going to stuff into our CSV files.
+    current_step = {'step': 'Uploading CSVs'}
+    task_progress.update_task_state(extra_meta=current_step)
+    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+
+    # Perform the actual upload
+    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+
+    # If there are any error rows (don't count the header), write them out as well
+    if len(err_rows) > 1:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+
+    # One last update before we close out...
+    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+def _grade_report_rows(course_id, students, task_progress, task_info_string, action_name):
+    # pylint: disable=too-many-statements
+    """
+    Grade `students`, a queryset of the students enrolled in the course, and
+    return the rows of the grade report on them, starting with its header, and
+    the rows of the report on the students who could not be graded, also
+    starting with its header.  If no student could be graded, the grade report
+    has no header either.
+    """
+    status_interval = 100
     course = get_course_by_id(course_id)
     course_is_cohorted = is_course_cohorted(course.id)
     teams_enabled = course.teams_enabled
@@ -694,13 +962,33 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
     whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
 
+    # Look up all the students' cohorts at once, rather than one by one.
+    student_ids = students.order_by().values_list('id', flat=True)
+    cohorts_by_user = {}
+    if course_is_cohorted:
+        cohorts_by_user = get_cohorts_for_users(course_id, student_ids)
+
+    # Likewise for their enrollment modes and verification statuses.
+    enrollment_modes = dict(
+        CourseEnrollment.objects.filter(
+            course_id=course_id, is_active=True, user_id__in=student_ids
+        ).values_list('user_id', 'mode')
+    )
+    verification_statuses = SoftwareSecurePhotoVerification.verification_statuses_for_users(enrollment_modes)
+
+    # Grading checks in-course reverification checkpoints through the
+    # verification partition scheme, which reads each student's checkpoint
+    # statuses from the cache; fill it for all of them at once.
+    if any(partition.scheme.name == "verification" for partition in course.user_partitions):
+        VerificationStatus.get_all_checkpoints_many(enrollment_modes.keys(), course_id)
+
     # Loop over all our students and build our CSV lists in memory
     header = None
     rows = []
     err_rows = [["id", "username", "error_msg"]]
     current_step = {'step': 'Calculating Grades'}
 
-    total_enrolled_students = enrolled_students.count()
+    total_enrolled_students = task_progress.total
     student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
@@ -710,7 +998,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
 
         total_enrolled_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
+    for student, gradeset, err_msg in iterate_in_phase('grading', iterate_grades_for(course_id, students)):
         # Periodically update task status (this is a cache write)
         if task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
@@ -747,7 +1035,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
 
             cohorts_group_name = []
             if course_is_cohorted:
-                group = get_cohort(student, course_id, assign=False)
+                group = cohorts_by_user.get(student.id)
                 cohorts_group_name.append(group.name if group else '')
 
             group_configs_group_names = []
@@ -763,12 +1051,17 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
                 except CourseTeamMembership.DoesNotExist:
                     team_name.append('')
 
-            enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
-            verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
-                student,
-                course_id,
-                enrollment_mode
-            )
+            # Students who enrolled after the modes were loaded are looked up one by one.
+            enrollment_mode = enrollment_modes.get(student.id)
+            if enrollment_mode is None:
+                enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
+            verification_status = verification_statuses.get(student.id)
+            if verification_status is None:
+                verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
+                    student,
+                    course_id,
+                    enrollment_mode
+                )
             certificate_info = certificate_info_for_user(
                 student,
                 course_id,
@@ -802,21 +1095,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         total_enrolled_students
     )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
-
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
-
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
-
-    # One last update before we close out...
-    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
-    return task_progress.update_task_state(extra_meta=current_step)
+    return rows, err_rows
 
 
 def _order_problems(blocks):
@@ -933,7 +1212,8 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
     error_rows = [list(header_row.values()) + ['error_msg']]
     current_step = {'step': 'Calculating Grades'}
 
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students, keep_raw_scores=True):
+    grades = iterate_grades_for(course_id, enrolled_students, keep_raw_scores=True)
+    for student, gradeset, err_msg in iterate_in_phase('grading', grades):
         student_fields = [getattr(student, field_name) for field_name in header_row]
         task_progress.attempted += 1
 
@@ -991,53 +1271,68 @@ def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input
     current_step = {'step': 'Calculating Profile Info'}
     task_progress.update_task_state(extra_meta=current_step)
 
-    # compute the student features table and format it
+    # compute the student features table and format it, one page of
+    # students at a time, as the CSV is written
     query_features = task_input.get('features')
-    student_data = enrolled_students_features(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
+    student_data = iterate_enrolled_students_features(course_id, query_features, REPORT_PAGE_SIZE)
+    rows = _counted_rows(iterate_dictlist(student_data, query_features), task_progress)
 
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
-
-    rows.insert(0, header)
+    # Perform the upload
+    upload_csv_to_report_store(chain([query_features], rows), 'student_profile_info', course_id, start_date)
 
+    task_progress.skipped = task_progress.total - task_progress.attempted
     current_step = {'step': 'Uploading CSV'}
-    task_progress.update_task_state(extra_meta=current_step)
+    return task_progress.update_task_state(extra_meta=current_step)
 
-    # Perform the upload
-    upload_csv_to_report_store(rows, 'student_profile_info', course_id, start_date)
 
-    return task_progress.update_task_state(extra_meta=current_step)
+def _counted_rows(rows, task_progress):
+    """
+    Yield `rows`, counting each of them as a succeeded attempt of the task.
+    """
+    for row in rows:
+        task_progress.attempted += 1
+        task_progress.succeeded += 1
+        yield row
 
 
-def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+def upload_enrollment_report(_xmodule_instance_args, entry_id, course_id, _task_input, action_name,
+                             create_subtask_fcn=None):
     """
     For a given `course_id`, generate a CSV file containing profile
     information for all students that are enrolled, and store using a
     `ReportStore`.
+
+    The students are looked up a page at a time, with what the report needs
+    about them loaded in bulk for each page, and their rows are written as
+    they are built, so memory use doesn't grow with the size of the course.
+
+    If a `create_subtask_fcn` is given, and there are more students than
+    settings.INSTRUCTOR_TASK_ITEMS_PER_SUBTASK, their rows are built in
+    subtasks instead, as for upload_grades_csv().
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     students_in_course = CourseEnrollment.objects.enrolled_and_dropped_out_users(course_id)
-    task_progress = TaskProgress(action_name, students_in_course.count(), start_time)
+    total_students = students_in_course.count()
+
+    subtask_progress = _queue_subtasks_if_needed(
+        entry_id, action_name, create_subtask_fcn, students_in_course, total_students
+    )
+    if subtask_progress is not None:
+        return subtask_progress
+
+    task_progress = TaskProgress(action_name, total_students, start_time)
 
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
         task_id=_xmodule_instance_args.get('task_id') if _xmodule_instance_args is not None else None,
-        entry_id=_entry_id,
+        entry_id=entry_id,
         course_id=course_id,
         task_input=_task_input
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    # Loop over all our students and build our CSV lists in memory
-    rows = []
-    header = None
     current_step = {'step': 'Gathering Profile Information'}
-    enrollment_report_provider = PaidCourseEnrollmentReportProvider()
-    total_students = students_in_course.count()
-    student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, generating detailed enrollment report for total students: %s',
         task_info_string,
@@ -1046,90 +1341,274 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
         total_students
     )
 
-    for student in students_in_course:
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
-
-        # Now add a log entry after certain intervals to get a hint that task is in progress
-        student_counter += 1
-        if student_counter % 100 == 0:
-            TASK_LOG.info(
-                u'%s, Task type: %s, Current step: %s, gathering enrollment profile for students in progress: %s/%s',
-                task_info_string,
-                action_name,
-                current_step,
-                student_counter,
-                total_students
-            )
-
-        user_data = enrollment_report_provider.get_user_profile(student.id)
-        course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
-        payment_data = enrollment_report_provider.get_payment_info(student, course_id)
-
-        # display name map for the column headers
-        enrollment_report_headers = {
-            'User ID': _('User ID'),
-            'Username': _('Username'),
-            'Full Name': _('Full Name'),
-            'First Name': _('First Name'),
-            'Last Name': _('Last Name'),
-            'Company Name': _('Company Name'),
-            'Title': _('Title'),
-            'Language': _('Language'),
-            'Year of Birth': _('Year of Birth'),
-            'Gender': _('Gender'),
-            'Level of Education': _('Level of Education'),
-            'Mailing Address': _('Mailing Address'),
-            'Goals': _('Goals'),
-            'City': _('City'),
-            'Country': _('Country'),
-            'Enrollment Date': _('Enrollment Date'),
-            'Currently Enrolled': _('Currently Enrolled'),
-            'Enrollment Source': _('Enrollment Source'),
-            'Enrollment Role': _('Enrollment Role'),
-            'List Price': _('List Price'),
-            'Payment Amount': _('Payment Amount'),
-            'Coupon Codes Used': _('Coupon Codes Used'),
-            'Registration Code Used': _('Registration Code Used'),
-            'Payment Status': _('Payment Status'),
-            'Transaction Reference Number': _('Transaction Reference Number')
-        }
-
-        if not header:
-            header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
-            display_headers = []
-            for header_element in header:
-                # translate header into a localizable display string
-                display_headers.append(enrollment_report_headers.get(header_element, header_element))
-            rows.append(display_headers)
-
-        rows.append(user_data.values() + course_enrollment_data.values() + payment_data.values())
-        task_progress.succeeded += 1
+    # Build and write the CSV rows as the students are looked up
+    rows = _enrollment_report_rows(
+        students_in_course.select_related('profile'), course_id, task_progress, task_info_string, action_name
+    )
+    upload_csv_to_report_store(rows, 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS')
 
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
         task_info_string,
         action_name,
         current_step,
-        student_counter,
+        task_progress.attempted,
         total_students
     )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
-
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS')
-
     # One last update before we close out...
+    current_step = {'step': 'Uploading CSVs'}
     TASK_LOG.info(u'%s, Task type: %s, Finalizing detailed enrollment task', task_info_string, action_name)
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+def _enrollment_report_rows(students, course_id, task_progress, task_info_string, action_name):
+    """
+    Yield the header and the rows of the detailed enrollment report on
+    `students`, a page of students at a time.
+    """
+    status_interval = 100
+    current_step = {'step': 'Gathering Profile Information'}
+    enrollment_report_provider = PaidCourseEnrollmentReportProvider()
+
+    # display name map for the column headers
+    enrollment_report_headers = {
+        'User ID': _('User ID'),
+        'Username': _('Username'),
+        'Full Name': _('Full Name'),
+        'First Name': _('First Name'),
+        'Last Name': _('Last Name'),
+        'Company Name': _('Company Name'),
+        'Title': _('Title'),
+        'Language': _('Language'),
+        'Year of Birth': _('Year of Birth'),
+        'Gender': _('Gender'),
+        'Level of Education': _('Level of Education'),
+        'Mailing Address': _('Mailing Address'),
+        'Goals': _('Goals'),
+        'City': _('City'),
+        'Country': _('Country'),
+        'Enrollment Date': _('Enrollment Date'),
+        'Currently Enrolled': _('Currently Enrolled'),
+        'Enrollment Source': _('Enrollment Source'),
+        'Enrollment Role': _('Enrollment Role'),
+        'List Price': _('List Price'),
+        'Payment Amount': _('Payment Amount'),
+        'Coupon Codes Used': _('Coupon Codes Used'),
+        'Registration Code Used': _('Registration Code Used'),
+        'Payment Status': _('Payment Status'),
+        'Transaction Reference Number': _('Transaction Reference Number')
+    }
+
+    header = None
+    for page in iterate_in_pages(students, REPORT_PAGE_SIZE):
+        enrollment_report_provider.prefetch(page, course_id)
+        for student in page:
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
+
+            # Now add a log entry after certain intervals to get a hint that task is in progress
+            if task_progress.attempted % 100 == 0:
+                TASK_LOG.info(
+                    u'%s, Task type: %s, Current step: %s, '
+                    u'gathering enrollment profile for students in progress: %s/%s',
+                    task_info_string,
+                    action_name,
+                    current_step,
+                    task_progress.attempted,
+                    task_progress.total
+                )
+
+            user_data = enrollment_report_provider.get_user_profile(student.id)
+            course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
+            payment_data = enrollment_report_provider.get_payment_info(student, course_id)
+
+            if not header:
+                header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
+                # translate header into a localizable display string
+                yield [enrollment_report_headers.get(header_element, header_element) for header_element in header]
+
+            yield user_data.values() + course_enrollment_data.values() + payment_data.values()
+            task_progress.succeeded += 1
+
+
+def _grade_report_parts(course_id, students, task_progress, task_info_string, action_name):
+    """
+    Returns the rows of a subtask's part of the grade report, and of the
+    report on the students who could not be graded, if there are any, by
+    the name of the report.
+    """
+    rows, err_rows = _grade_report_rows(course_id, students, task_progress, task_info_string, action_name)
+    parts = {'grade_report': rows}
+    if len(err_rows) > 1:
+        parts['grade_report_err'] = err_rows
+    return parts
+
+
+def _enrollment_report_parts(course_id, students, task_progress, task_info_string, action_name):
+    """
+    Returns the rows of a subtask's part of the detailed enrollment report,
+    by the name of the report.
+    """
+    rows = _enrollment_report_rows(
+        students.select_related('profile'), course_id, task_progress, task_info_string, action_name
+    )
+    return {'enrollment_report': rows}
+
+
+# How a subtask of each type of report that is split into subtasks builds its part of the report,
+# and the configuration of the ReportStore that the report is uploaded to.
+REPORT_PART_FCNS = {
+    'grade_course': (_grade_report_parts, 'GRADES_DOWNLOAD'),
+    'detailed_enrollment_report': (_enrollment_report_parts, 'FINANCIAL_REPORTS'),
+}
+
+# Where, in the default storage, the subtasks of a report keep their parts of it until they are put together.
+REPORT_PARTS_PATH = u'instructor_task/report_parts/{entry_id}/'
+
+
+def run_report_subtask(entry_id, xmodule_instance_args, user_ids, subtask_status_dict):
+    """
+    Builds the part of a report on the students with ids `user_ids`, as one subtask of a report
+    that upload_grades_csv() or upload_enrollment_report() has split up.  The part is built as
+    REPORT_PART_FCNS gives for the InstructorTask's task_type, and kept in the default storage.  The
+    subtask that finishes last puts the parts of all the subtasks together, in the order of the
+    students' ids, and uploads the report.
+
+    A subtask that is retried after an unexpected error, or that Celery delivers again because its
+    worker went away, builds its part over.  A subtask that is delivered again while the lock of the
+    worker that went away is still held is retried once the lock has expired.
+
+    The arguments are those of the Celery task that runs this, so that it can be retried with
+    its current status.  Returns the subtask's status, as a dict.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    _check_subtask_is_valid_or_retry(
+        entry_id, subtask_status, [entry_id, xmodule_instance_args, user_ids, subtask_status_dict]
+    )
+    subtask_status.increment(state=PROGRESS)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    action_name = json.loads(entry.task_output)['action_name']
+    build_parts_fcn, __ = REPORT_PART_FCNS[entry.task_type]
+    task_progress = TaskProgress(action_name, len(user_ids), time())
+
+    fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
+    task_info_string = fmt.format(
+        task_id=current_task_id,
+        entry_id=entry_id,
+        course_id=entry.course_id,
+        task_input=entry.task_input
+    )
+
+    try:
+        students = User.objects.filter(id__in=user_ids).order_by('id')
+        parts = build_parts_fcn(entry.course_id, students, task_progress, task_info_string, action_name)
+        for csv_name, rows in parts.iteritems():
+            _store_report_part(entry_id, csv_name, user_ids[0], rows)
+    except Exception as exc:  # pylint: disable=broad-except
+        current_task = _get_current_task()
+        if subtask_status.retried_withmax >= current_task.max_retries:
+            TASK_LOG.exception(u"Subtask %s of instructor task %d failed", current_task_id, entry_id)
+            # None of the students of the chunk make it into the report.
+            subtask_status.increment(failed=len(user_ids), state=FAILURE)
+            _finish_report_subtask(entry_id, current_task_id, subtask_status)
+            raise
+        TASK_LOG.warning(u"Subtask %s of instructor task %d failed, retrying",
+                         current_task_id, entry_id, exc_info=True)
+        # Record the retry *before* making it, so that the retried subtask isn't taken for a duplicate.
+        subtask_status.increment(retried_withmax=1, state=RETRY)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise current_task.retry(
+            args=[entry_id, xmodule_instance_args, user_ids, subtask_status.to_dict()],
+            exc=exc,
+            # The subtask counts its own retries in retried_withmax, which is checked above.
+            max_retries=current_task.request.retries + 1,
+        )
+
+    # Students who have been deleted since the subtask was queued are skipped.
+    subtask_status.increment(
+        succeeded=task_progress.succeeded,
+        failed=task_progress.failed,
+        skipped=len(user_ids) - task_progress.attempted,
+        state=SUCCESS,
+    )
+    _finish_report_subtask(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
+def _store_report_part(entry_id, csv_name, first_user_id, rows):
+    """
+    Keeps `rows`, the part of the report `csv_name` that starts with the student
+    `first_user_id`, in the default storage, replacing any part kept before.
+    """
+    storage = DefaultStorage()
+    part_path = u'{}{}/{:010d}.csv'.format(REPORT_PARTS_PATH.format(entry_id=entry_id), csv_name, first_user_id)
+    output_buffer = StringIO()
+    unicodecsv.writer(output_buffer, encoding='utf-8').writerows(
+        [unicode(item) for item in row] for row in rows
+    )
+    if storage.exists(part_path):
+        storage.delete(part_path)
+    storage.save(part_path, ContentFile(output_buffer.getvalue()))
+
+
+def _finish_report_subtask(entry_id, current_task_id, subtask_status):
+    """
+    Records the final `subtask_status` of a report subtask, and puts the report
+    together if this was the last subtask to finish.
+    """
+    if update_subtask_status(entry_id, current_task_id, subtask_status):
+        _merge_report_parts(entry_id)
+
+
+def _merge_report_parts(entry_id):
+    """
+    Uploads each report of the InstructorTask `entry_id` that its subtasks have
+    built parts of, with the parts put together in the order of the students'
+    ids, and removes the parts.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    if json.loads(entry.subtasks)['succeeded'] == 0:
+        TASK_LOG.warning(u"No subtask of instructor task %d built its part of the report", entry_id)
+        return
+
+    __, config_name = REPORT_PART_FCNS[entry.task_type]
+    storage = DefaultStorage()
+    parts_path = REPORT_PARTS_PATH.format(entry_id=entry_id)
+    csv_names, __ = storage.listdir(parts_path)
+    for csv_name in sorted(csv_names):
+        __, part_names = storage.listdir(parts_path + csv_name)
+        part_paths = [u'{}{}/{}'.format(parts_path, csv_name, part_name) for part_name in sorted(part_names)]
+        rows = _report_part_rows(storage, part_paths)
+        upload_csv_to_report_store(rows, csv_name, entry.course_id, entry.created, config_name=config_name)
+        for part_path in part_paths:
+            storage.delete(part_path)
+
+
+def _report_part_rows(storage, part_paths):
+    """
+    Yield the rows of the report parts at `part_paths`, in order, with the
+    header that each of them starts with only once.
+    """
+    header = None
+    for part_path in part_paths:
+        with storage.open(part_path) as part_file:
+            rows = unicodecsv.reader(StringIO(part_file.read()), encoding='utf-8')
+            part_header = next(rows, None)
+            if part_header is None:
+                # None of the students of this part had a row.
+                continue
+            if header is None:
+                header = part_header
+                yield header
+            for row in rows:
+                yield row
+
+
 def upload_may_enroll_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing
@@ -1143,22 +1622,17 @@ def upload_may_enroll_csv(_xmodule_instance_args, _entry_id, course_id, task_inp
     current_step = {'step': 'Calculating info about students who may enroll'}
     task_progress.update_task_state(extra_meta=current_step)
 
-    # Compute result table and format it
+    # Compute result table and format it, one page of students at a time,
+    # as the CSV is written
     query_features = task_input.get('features')
-    student_data = list_may_enroll(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
-
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
-
-    rows.insert(0, header)
-
-    current_step = {'step': 'Uploading CSV'}
-    task_progress.update_task_state(extra_meta=current_step)
+    student_data = iterate_may_enroll(course_id, query_features, REPORT_PAGE_SIZE)
+    rows = _counted_rows(iterate_dictlist(student_data, query_features), task_progress)
 
     # Perform the upload
-    upload_csv_to_report_store(rows, 'may_enroll_info', course_id, start_date)
+    upload_csv_to_report_store(chain([query_features], rows), 'may_enroll_info', course_id, start_date)
 
+    task_progress.skipped = task_progress.total - task_progress.attempted
+    current_step = {'step': 'Uploading CSV'}
     return task_progress.update_task_state(extra_meta=current_step)
 
 
@@ -1196,10 +1670,10 @@ def get_executive_report(course_id):
 
     bulk_purchased_codes = CourseRegistrationCode.order_generated_registration_codes(course_id)
 
-    unused_registration_codes = 0
-    for registration_code in bulk_purchased_codes:
-        if not RegistrationCodeRedemption.is_registration_code_redeemed(registration_code.code):
-            unused_registration_codes += 1
+    # Count the codes that haven't been redeemed with one query rather than checking each of them.
+    unused_registration_codes = bulk_purchased_codes.exclude(
+        code__in=RegistrationCodeRedemption.objects.values_list('registration_code__code', flat=True)
+    ).count()
 
     self_purchased_seat_count = PaidCourseRegistration.get_self_purchased_seat_count(course_id)
     bulk_purchased_seat_count = CourseRegCodeItem.get_bulk_purchased_seat_count(course_id)
@@ -1254,13 +1728,12 @@ def upload_exec_summary_report(_xmodule_instance_args, _entry_id, course_id, _ta
     report_generation_date = datetime.now(UTC)
     status_interval = 100
 
-    enrolled_users = CourseEnrollment.objects.users_enrolled_in(course_id)
-    true_enrollment_count = 0
-    for user in enrolled_users:
-        if not user.is_staff and not CourseAccessRole.objects.filter(
-                user=user, course_id=course_id, role__in=FILTERED_OUT_ROLES
-        ).exists():
-            true_enrollment_count += 1
+    # Count the enrolled users who aren't staff with one query rather than checking each of them.
+    true_enrollment_count = CourseEnrollment.objects.users_enrolled_in(course_id).filter(is_staff=False).exclude(
+        id__in=CourseAccessRole.objects.filter(
+            course_id=course_id, role__in=FILTERED_OUT_ROLES
+        ).values_list('user_id', flat=True)
+    ).count()
 
     task_progress = TaskProgress(action_name, true_enrollment_count, start_time)
 
@@ -1416,19 +1889,20 @@ def generate_students_certificates(
     task_progress.update_task_state(extra_meta=current_step)
 
     course = modulestore().get_course(course_id, depth=0)
-    # Generate certificate for each student
-    for student in students_require_certs:
-        task_progress.attempted += 1
-        status = generate_user_certificates(
-            student,
+    # Generate certificates a batch of students at a time
+    for start in xrange(0, len(students_require_certs), CERTIFICATE_GENERATION_BATCH_SIZE):
+        statuses = generate_certificates_for_students(
+            students_require_certs[start:start + CERTIFICATE_GENERATION_BATCH_SIZE],
             course_id,
             course=course
         )
-
-        if status in [CertificateStatuses.generating, CertificateStatuses.downloadable]:
-            task_progress.succeeded += 1
-        else:
-            task_progress.failed += 1
+        for status in statuses.itervalues():
+            task_progress.attempted += 1
+            if status in [CertificateStatuses.generating, CertificateStatuses.downloadable]:
+                task_progress.succeeded += 1
+            else:
+                task_progress.failed += 1
+        task_progress.update_task_state(extra_meta=current_step)
 
     return task_progress.update_task_state(extra_meta=current_step)
 
@@ -11,6 +11,7 @@ from mock import patch
 import textwrap
 
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
 
@@ -21,6 +22,7 @@ from xmodule.modulestore.tests.factories import ItemFactory
 from xmodule.modulestore import ModuleStoreEnum
 
 from courseware.model_data import StudentModule
+from student.models import anonymous_id_for_user
 
 from instructor_task.api import (submit_rescore_problem_for_all_students,
                                  submit_rescore_problem_for_student,
@@ -337,6 +339,48 @@ class TestRescoringTask(TestIntegrationTask):
             self.check_state(username, descriptor, 0, 1, 2)
 
 
+@patch.dict(settings.FEATURES, {'ENABLE_BULK_RESCORE': True})
+class TestBulkRescoringTask(TestRescoringTask):
+    """
+    Runs the rescoring scenarios through the bulk rescoring path.
+    """
+    def test_rescoring_with_module_anonymous_id(self):
+        """Answers are regraded with the same anonymous id as when they were submitted."""
+        problem_url_name = 'H1P1'
+        self.define_option_problem(problem_url_name)
+        self.submit_student_answer('u1', problem_url_name, [OPTION_1, OPTION_1])
+
+        with patch('instructor_task.rescore.anonymous_id_for_user', wraps=anonymous_id_for_user) as mock_id:
+            self.submit_rescore_all_student_answers('instructor', problem_url_name)
+        mock_id.assert_called_once_with(User.objects.get(username='u1'), None)
+
+    def test_rescoring_falls_back_to_module(self):
+        """Answers the bulk path can't grade are rescored through the module instead."""
+        problem_url_name = 'H1P1'
+        self.define_option_problem(problem_url_name)
+        location = InstructorTaskModuleTestCase.problem_location(problem_url_name)
+        descriptor = self.module_store.get_item(location)
+        self.submit_student_answer('u1', problem_url_name, [OPTION_1, OPTION_1])
+        self.submit_student_answer('u2', problem_url_name, [OPTION_2, OPTION_2])
+        self.redefine_option_problem(problem_url_name)
+
+        with patch('instructor_task.rescore.LoncapaProblem', side_effect=Exception("can't build problem")):
+            instructor_task = self.submit_rescore_all_student_answers('instructor', problem_url_name)
+        instructor_task = InstructorTask.objects.get(id=instructor_task.id)
+        self.assertEqual(instructor_task.task_state, SUCCESS)
+        self.check_state('u1', descriptor, 0, 2, 1)
+        self.check_state('u2', descriptor, 2, 2, 1)
+
+
+@patch.dict(settings.BULK_RESCORE, {'PROCESSES': 2})
+class TestPooledBulkRescoringTask(TestBulkRescoringTask):
+    """
+    Runs the rescoring scenarios through the bulk rescoring path, grading in
+    a pool of worker processes.
+    """
+    pass
+
+
 class TestResetAttemptsTask(TestIntegrationTask):
     """
     Integration-style tests for resetting problem attempts in a background task.
@@ -3,7 +3,9 @@ Tests for instructor_task/models.py.
 """
 
 from cStringIO import StringIO
+from gzip import GzipFile
 import mock
+import os
 import time
 from datetime import datetime
 from unittest import TestCase
@@ -25,6 +27,11 @@ class MockKey(object):
         """ Expected method on a Key object. """
         self.bucket.store_key(self)
 
+    def set_contents_from_file(self, contents, headers):  # pylint: disable=unused-argument
+        """ Expected method on a Key object. """
+        self.contents = contents.read()
+        self.bucket.store_key(self)
+
     def generate_url(self, expires_in):  # pylint: disable=unused-argument
         """ Expected method on a Key object. """
         return "http://fake-edx-s3.edx.org/"
@@ -84,6 +91,20 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_store_rows_from_generator(self):
+        """
+        Test that ReportStore.store_rows() stores rows given by a generator.
+        """
+        report_store = self.create_report_store()
+        rows = ([u'row{}'.format(index), u'\xe9'] for index in range(3))
+        report_store.store_rows(self.course_id, 'report.csv', rows)
+
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+        self.assertEqual(
+            self.stored_contents(report_store, 'report.csv'),
+            'row0,\xc3\xa9\r\nrow1,\xc3\xa9\r\nrow2,\xc3\xa9\r\n'
+        )
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     """
@@ -93,6 +114,27 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config(config_name='GRADES_DOWNLOAD')
 
+    def stored_contents(self, report_store, filename):
+        """ Return the contents of a stored file. """
+        with open(report_store.path_to(self.course_id, filename)) as stored_file:
+            return stored_file.read()
+
+    def test_store_rows_failure(self):
+        """
+        Test that a report whose rows fail partway through is not stored.
+        """
+        def rows():
+            """ Yield a row, then fail. """
+            yield [u'row0']
+            raise ValueError
+
+        report_store = self.create_report_store()
+        with self.assertRaises(ValueError):
+            report_store.store_rows(self.course_id, 'report.csv', rows())
+
+        self.assertEqual(report_store.links_for(self.course_id), [])
+        self.assertEqual(os.listdir(report_store.path_to(self.course_id, '')), [])
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +147,8 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+
+    def stored_contents(self, report_store, filename):  # pylint: disable=unused-argument
+        """ Return the uncompressed contents of the stored file. """
+        key, = report_store.bucket.keys
+        return GzipFile(fileobj=StringIO(key.contents)).read()
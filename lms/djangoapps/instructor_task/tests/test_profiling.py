@@ -0,0 +1,171 @@
+"""
+Unit tests for the profiling of instructor tasks.
+"""
+import json
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from mock import patch
+import pymongo.message
+
+from instructor_task.models import InstructorTask
+from instructor_task.profiling import (
+    TaskProfiler,
+    add_profile_to_progress,
+    iterate_in_phase,
+    merge_profiles,
+    profile_subtask,
+    profile_task,
+    task_phase,
+)
+from instructor_task.tests.factories import InstructorTaskFactory
+
+
+@patch.dict(settings.FEATURES, {'ENABLE_INSTRUCTOR_TASK_PROFILING': True})
+class TestTaskProfiling(TestCase):
+    """Tests for profile_task and the phases recorded in it."""
+
+    def setUp(self):
+        super(TestTaskProfiling, self).setUp()
+        cache.clear()
+
+    def _query_mongo(self):
+        """Builds the message for a Mongo query, as pymongo does for each query it makes."""
+        pymongo.message.query(0, 'profiled.collection', 0, 1, {})
+
+    def test_counts(self):
+        cache.set('profiled_key', 'value')
+        with profile_task('profiled') as profiler:
+            with task_phase('one'):
+                User.objects.count()
+                User.objects.exists()
+                self._query_mongo()
+                cache.get('profiled_key')
+                cache.get('missing_key')
+                cache.get_many(['profiled_key', 'missing_key'])
+
+        total = profiler.summary()['total']
+        (phase, stats), = profiler.summary()['phases']
+        self.assertEqual(phase, 'one')
+        for counts in (total, stats):
+            self.assertEqual(counts['sql'], 2)
+            self.assertEqual(counts['mongo'], 1)
+            self.assertEqual(counts['cache_hits'], 2)
+            self.assertEqual(counts['cache_misses'], 2)
+        self.assertGreaterEqual(total['wall_ms'], stats['wall_ms'])
+        self.assertGreaterEqual(total['peak_growth_kb'], 0)
+
+    def test_debug_cursor_restored(self):
+        use_debug_cursor = connection.use_debug_cursor
+        num_queries = len(connection.queries)
+        with profile_task('profiled'):
+            self.assertTrue(connection.use_debug_cursor)
+            User.objects.count()
+        self.assertEqual(connection.use_debug_cursor, use_debug_cursor)
+        # The queries logged only to count them are dropped.
+        self.assertEqual(len(connection.queries), num_queries)
+
+    def test_other_threads_not_counted(self):
+        def other_task():
+            """Work done by another task, run at the same time by a threaded pool."""
+            self._query_mongo()
+            cache.get('missing_key')
+            cache.get_many(['missing_key'])
+
+        with profile_task('profiled') as profiler:
+            thread = threading.Thread(target=other_task)
+            thread.start()
+            thread.join()
+            cache.get('missing_key')
+
+        self.assertEqual(profiler.total['mongo'], 0)
+        self.assertEqual(profiler.total['cache_misses'], 1)
+
+    def test_phases_add_up(self):
+        with profile_task('profiled') as profiler:
+            for __ in iterate_in_phase('counting', (User.objects.count() for __ in range(3))):
+                with task_phase('upload'):
+                    User.objects.exists()
+
+        phases = profiler.summary()['phases']
+        self.assertEqual([phase for phase, __ in phases], ['counting', 'upload'])
+        self.assertEqual([stats['sql'] for __, stats in phases], [3, 3])
+
+    @patch.dict(settings.FEATURES, {'ENABLE_INSTRUCTOR_TASK_PROFILING': False})
+    def test_disabled(self):
+        with profile_task('profiled') as profiler:
+            with task_phase('one'):
+                self.assertEqual(list(iterate_in_phase('two', [1, 2])), [1, 2])
+        self.assertIsNone(profiler)
+
+    def test_too_long_for_output(self):
+        with profile_task('profiled') as profiler:
+            for index in range(10):
+                with task_phase('phase{}'.format(index)):
+                    pass
+
+        task_progress = {'action_name': 'profiled'}
+        add_profile_to_progress(task_progress, profiler)
+        self.assertEqual(task_progress['profile'], {'total': profiler.total, 'phases': []})
+        InstructorTask.create_output_for_success(task_progress)
+
+    def test_report(self):
+        profiler = TaskProfiler('profiled')
+        profiler.start()
+        with profiler.phase('one'):
+            pass
+        profiler.stop()
+
+        with patch('instructor_task.profiling.dog_stats_api') as mock_stats:
+            profiler.report()
+        metrics = set(
+            (args[0], tuple(kwargs['tags'])) for args, kwargs in mock_stats.histogram.call_args_list
+        )
+        self.assertIn(('instructor_tasks.profile.sql', ('action:profiled', 'phase:total')), metrics)
+        self.assertIn(('instructor_tasks.profile.wall_ms', ('action:profiled', 'phase:one')), metrics)
+        self.assertEqual(json.loads(json.dumps(profiler.summary()))['phases'][0][0], 'one')
+
+    def test_merge_profiles(self):
+        stats = {
+            'wall_ms': 10, 'cpu_ms': 5, 'peak_growth_kb': 100, 'sql': 2, 'mongo': 1, 'cache_hits': 0, 'cache_misses': 1,
+        }
+        larger = dict(stats, peak_growth_kb=300)
+        profile = {'total': stats, 'phases': [['one', stats]]}
+        other = {'total': larger, 'phases': [['two', larger], ['one', larger]]}
+
+        merged = merge_profiles(profile, other)
+        self.assertEqual(
+            merged['total'], dict(stats, wall_ms=20, cpu_ms=10, peak_growth_kb=400, sql=4, mongo=2, cache_misses=2)
+        )
+        self.assertEqual([phase for phase, __ in merged['phases']], ['one', 'two'])
+        self.assertEqual(merged['phases'][0][1]['sql'], 4)
+        self.assertEqual(merged['phases'][1][1], larger)
+        # The profiles that are merged are left as they were.
+        self.assertEqual(profile['total']['sql'], 2)
+
+    def test_subtask_profiles_added_up(self):
+        entry = InstructorTaskFactory.create(task_output=json.dumps({'action_name': 'profiled'}))
+        for __ in range(2):
+            with profile_subtask(entry.id) as profiler:
+                with task_phase('one'):
+                    User.objects.count()
+            self.assertEqual(profiler.action_name, 'profiled')
+
+        profile = json.loads(InstructorTask.objects.get(id=entry.id).task_output)['profile']
+        (phase, stats), = profile['phases']
+        self.assertEqual(phase, 'one')
+        self.assertEqual(stats['sql'], 2)
+        self.assertGreaterEqual(profile['total']['sql'], 2)
+
+    def test_subtask_run_in_parent(self):
+        entry = InstructorTaskFactory.create(task_output=json.dumps({'action_name': 'profiled'}))
+        with profile_task('profiled') as parent_profiler:
+            with profile_subtask(entry.id) as profiler:
+                User.objects.count()
+        self.assertIsNone(profiler)
+        self.assertEqual(parent_profiler.total['sql'], 1)
+        self.assertNotIn('profile', json.loads(InstructorTask.objects.get(id=entry.id).task_output))
@@ -6,11 +6,18 @@ paths actually work.
 
 """
 import json
+import shutil
 from uuid import uuid4
 
+import unicodecsv
+
+from django.conf import settings
+from django.core.files.storage import DefaultStorage
+
 from mock import Mock, MagicMock, patch
 
-from celery.states import SUCCESS, FAILURE
+from celery.states import SUCCESS, FAILURE, RETRY
+from django.test.utils import override_settings
 
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from opaque_keys.edx.locations import i4xEncoder
@@ -19,16 +26,31 @@ from courseware.models import StudentModule
 from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 
-from instructor_task.models import InstructorTask
-from instructor_task.tests.test_base import InstructorTaskModuleTestCase
+from instructor_task.models import InstructorTask, ReportStore, PROGRESS
+from instructor_task.tests.test_base import InstructorTaskModuleTestCase, TestReportMixin
 from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tasks import (
     rescore_problem,
     reset_problem_attempts,
     delete_problem_state,
     generate_certificates,
+    update_module_state_subtask,
+    calculate_grades_csv,
+    enrollment_report_features_csv,
+)
+from instructor_task.subtasks import (
+    SUBTASK_LOCK_EXPIRE,
+    SubtaskStatus,
+    _release_subtask_lock,
+    checkpoint_subtask_status,
+    initialize_subtask_info,
+)
+from instructor_task.tasks_helper import (
+    REPORT_PARTS_PATH,
+    UpdateProblemModuleStateError,
+    run_module_state_update_subtask,
+    run_report_subtask,
 )
-from instructor_task.tasks_helper import UpdateProblemModuleStateError
 
 PROBLEM_URL_NAME = "test_urlname"
 
@@ -357,6 +379,21 @@ class TestResetAttemptsInstructorTask(TestInstructorTasks):
         # check that entries were reset
         self._assert_num_attempts(students, 0)
 
+    @patch.dict(settings.FEATURES, {'ENABLE_INSTRUCTOR_TASK_PROFILING': True})
+    def test_reset_with_profiling(self):
+        input_state = json.dumps({'attempts': 3})
+        num_students = 3
+        self._create_students_with_state(num_students, input_state)
+        task_entry = self._create_input_entry()
+
+        self._run_task_with_mock_celery(reset_problem_attempts, task_entry.id, task_entry.task_id)
+
+        profile = json.loads(InstructorTask.objects.get(id=task_entry.id).task_output)['profile']
+        (phase, stats), = profile['phases']
+        self.assertEquals(phase, 'update')
+        self.assertGreaterEqual(stats['sql'], num_students)
+        self.assertGreater(profile['total']['sql'], stats['sql'])
+
     def _test_reset_with_student(self, use_email):
         """Run a reset task for one student, with several StudentModules for the problem defined."""
         num_students = 10
@@ -450,6 +487,255 @@ class TestDeleteStateInstructorTask(TestInstructorTasks):
                                           module_state_key=self.location)
 
 
+class TestModuleStateSubtasks(TestInstructorTasks):
+    """Tests module state updates that are split into subtasks."""
+
+    def setUp(self):
+        super(TestModuleStateSubtasks, self).setUp()
+        self.students = self._create_students_with_state(5, json.dumps({'attempts': 3}))
+        self.module_ids = sorted(
+            StudentModule.objects.filter(course_id=self.course.id).values_list('id', flat=True)
+        )
+
+    def _create_reset_entry(self):
+        """Creates an InstructorTask entry for resetting attempts."""
+        task_entry = self._create_input_entry()
+        task_entry.task_type = 'reset_problem_attempts'
+        task_entry.save()
+        return task_entry
+
+    def _start_subtask(self, task_entry):
+        """Defines a single subtask for `task_entry`, and returns its id."""
+        subtask_id = str(uuid4())
+        initialize_subtask_info(task_entry, 'reset', len(self.module_ids), [subtask_id])
+        return subtask_id
+
+    @override_settings(INSTRUCTOR_TASK_ITEMS_PER_SUBTASK=2)
+    def test_reset_in_subtasks(self):
+        task_entry = self._create_reset_entry()
+        self._run_task_with_mock_celery(reset_problem_attempts, task_entry.id, task_entry.task_id)
+
+        self._assert_num_attempts(self.students, 0)
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEquals(entry.task_state, SUCCESS)
+        subtasks = json.loads(entry.subtasks)
+        self.assertEquals((subtasks['total'], subtasks['succeeded'], subtasks['failed']), (3, 3, 0))
+        output = json.loads(entry.task_output)
+        self.assertEquals((output['attempted'], output['succeeded'], output['total']), (5, 5, 5))
+
+    @override_settings(INSTRUCTOR_TASK_ITEMS_PER_SUBTASK=2)
+    @patch.dict(settings.FEATURES, {'ENABLE_INSTRUCTOR_TASK_PROFILING': True})
+    def test_reset_in_subtasks_with_profiling(self):
+        task_entry = self._create_reset_entry()
+        self._run_task_with_mock_celery(reset_problem_attempts, task_entry.id, task_entry.task_id)
+
+        # The profile of the work done in the subtasks is kept in the task's output.
+        profile = json.loads(InstructorTask.objects.get(id=task_entry.id).task_output)['profile']
+        (phase, stats), = profile['phases']
+        self.assertEquals(phase, 'update')
+        self.assertGreaterEqual(stats['sql'], len(self.students))
+
+    def test_resume_from_checkpoint(self):
+        task_entry = self._create_reset_entry()
+        subtask_id = self._start_subtask(task_entry)
+        # The subtask got through two modules before its worker went away, and its lock expired.
+        checkpoint_subtask_status(
+            task_entry.id, subtask_id, SubtaskStatus.create(subtask_id, succeeded=2, state=PROGRESS)
+        )
+        _release_subtask_lock(subtask_id)
+
+        status = run_module_state_update_subtask(
+            task_entry.id,
+            self._get_xmodule_instance_args(),
+            self.module_ids,
+            SubtaskStatus.create(subtask_id).to_dict(),
+        )
+
+        self.assertEquals((status['attempted'], status['succeeded'], status['state']), (5, 5, SUCCESS))
+        attempts = [
+            json.loads(StudentModule.objects.get(id=module_id).state)['attempts'] for module_id in self.module_ids
+        ]
+        self.assertEquals(attempts, [3, 3, 0, 0, 0])
+        self.assertEquals(InstructorTask.objects.get(id=task_entry.id).task_state, SUCCESS)
+
+    def test_lost_chunk_redelivered(self):
+        self.assertTrue(update_module_state_subtask.acks_late)
+        task_entry = self._create_reset_entry()
+        subtask_id = self._start_subtask(task_entry)
+        # The subtask got through two modules before its worker went away, still holding its lock.
+        checkpoint_subtask_status(
+            task_entry.id, subtask_id, SubtaskStatus.create(subtask_id, succeeded=2, state=PROGRESS)
+        )
+        current_task = Mock(max_retries=3, request=Mock(retries=0))
+        current_task.retry.return_value = TestTaskFailure("retrying")
+        args = [
+            task_entry.id,
+            self._get_xmodule_instance_args(),
+            self.module_ids,
+            SubtaskStatus.create(subtask_id).to_dict(),
+        ]
+
+        # The broker delivers the subtask again, and it waits for the lock to expire.
+        with patch('instructor_task.tasks_helper._get_current_task', return_value=current_task):
+            with self.assertRaises(TestTaskFailure):
+                run_module_state_update_subtask(*args)
+        self.assertEquals(current_task.retry.call_args[1]['args'], args)
+        self.assertEquals(current_task.retry.call_args[1]['countdown'], SUBTASK_LOCK_EXPIRE)
+        self._assert_num_attempts(self.students, 3)
+
+        # Once the lock has expired, the retry carries on from the checkpoint.
+        _release_subtask_lock(subtask_id)
+        status = run_module_state_update_subtask(*current_task.retry.call_args[1]['args'])
+        self.assertEquals((status['attempted'], status['succeeded'], status['state']), (5, 5, SUCCESS))
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEquals(json.loads(entry.subtasks)['succeeded'], 1)
+
+    def test_retry_from_failure(self):
+        task_entry = self._create_reset_entry()
+        subtask_id = self._start_subtask(task_entry)
+        current_task = Mock(max_retries=3, request=Mock(retries=0))
+        current_task.retry.return_value = TestTaskFailure("retrying")
+        update_fcn = Mock(side_effect=['succeeded', 'succeeded', Exception("worker trouble")])
+
+        update_fcns = {'reset_problem_attempts': update_fcn}
+        with patch.dict('instructor_task.tasks_helper.MODULE_STATE_UPDATE_FCNS', update_fcns):
+            with patch('instructor_task.tasks_helper._get_current_task', return_value=current_task):
+                with self.assertRaises(TestTaskFailure):
+                    run_module_state_update_subtask(
+                        task_entry.id, {}, self.module_ids, SubtaskStatus.create(subtask_id).to_dict()
+                    )
+
+        # The retry carries on from the third module.
+        retry_status = current_task.retry.call_args[1]['args'][-1]
+        self.assertEquals((retry_status['attempted'], retry_status['retried_withmax']), (2, 1))
+        self.assertEquals(retry_status['state'], RETRY)
+        stored_status = json.loads(InstructorTask.objects.get(id=task_entry.id).subtasks)['status'][subtask_id]
+        self.assertEquals(stored_status, retry_status)
+
+    def test_fatal_error_not_retried(self):
+        task_entry = self._create_reset_entry()
+        subtask_id = self._start_subtask(task_entry)
+        current_task = Mock(max_retries=3)
+        update_fcn = Mock(side_effect=UpdateProblemModuleStateError("fatal"))
+
+        update_fcns = {'reset_problem_attempts': update_fcn}
+        with patch.dict('instructor_task.tasks_helper.MODULE_STATE_UPDATE_FCNS', update_fcns):
+            with patch('instructor_task.tasks_helper._get_current_task', return_value=current_task):
+                with self.assertRaises(UpdateProblemModuleStateError):
+                    run_module_state_update_subtask(
+                        task_entry.id, {}, self.module_ids, SubtaskStatus.create(subtask_id).to_dict()
+                    )
+
+        self.assertFalse(current_task.retry.called)
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEquals(json.loads(entry.subtasks)['failed'], 1)
+        self.assertEquals(json.loads(entry.task_output)['failed'], 5)
+
+
+class TestReportSubtasks(TestReportMixin, TestInstructorTasks):
+    """Tests reports that are built in subtasks."""
+
+    def setUp(self):
+        super(TestReportSubtasks, self).setUp()
+        self.students = [self.instructor] + [
+            self.create_student('student{}'.format(index)) for index in xrange(4)
+        ]
+
+    def _create_report_entry(self, task_type):
+        """Creates an InstructorTask entry for building a report."""
+        task_entry = self._create_input_entry(use_problem_url=False)
+        task_entry.task_type = task_type
+        task_entry.save()
+        return task_entry
+
+    def _assert_parts_removed(self, task_entry, csv_name):
+        """Checks that the parts of the report `csv_name` were removed once they were put together."""
+        parts_path = REPORT_PARTS_PATH.format(entry_id=task_entry.id) + csv_name
+        self.assertEquals(DefaultStorage().listdir(parts_path), ([], []))
+
+    @override_settings(INSTRUCTOR_TASK_ITEMS_PER_SUBTASK=2)
+    def test_grade_report_in_subtasks(self):
+        task_entry = self._create_report_entry('grade_course')
+        self._run_task_with_mock_celery(calculate_grades_csv, task_entry.id, task_entry.task_id)
+
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEquals(entry.task_state, SUCCESS)
+        subtasks = json.loads(entry.subtasks)
+        self.assertEquals((subtasks['total'], subtasks['succeeded'], subtasks['failed']), (3, 3, 0))
+        output = json.loads(entry.task_output)
+        self.assertEquals((output['attempted'], output['succeeded'], output['total']), (5, 5, 5))
+        # The parts are put together in the order of the students' ids, with a single header.
+        self.verify_rows_in_csv(
+            [{'username': student.username} for student in self.students], ignore_other_columns=True
+        )
+        self._assert_parts_removed(task_entry, 'grade_report')
+
+    @override_settings(INSTRUCTOR_TASK_ITEMS_PER_SUBTASK=2)
+    def test_enrollment_report_in_subtasks(self):
+        self.addCleanup(shutil.rmtree, settings.FINANCIAL_REPORTS['ROOT_PATH'], ignore_errors=True)
+        task_entry = self._create_report_entry('detailed_enrollment_report')
+        self._run_task_with_mock_celery(enrollment_report_features_csv, task_entry.id, task_entry.task_id)
+
+        output = json.loads(InstructorTask.objects.get(id=task_entry.id).task_output)
+        self.assertEquals((output['attempted'], output['succeeded'], output['total']), (5, 5, 5))
+        report_store = ReportStore.from_config(config_name='FINANCIAL_REPORTS')
+        report_csv_filename = report_store.links_for(self.course.id)[0][0]
+        with open(report_store.path_to(self.course.id, report_csv_filename)) as csv_file:
+            usernames = [row['Username'] for row in unicodecsv.DictReader(csv_file)]
+        self.assertEquals(usernames, [student.username for student in self.students])
+        self._assert_parts_removed(task_entry, 'enrollment_report')
+
+    def test_retry_from_failure(self):
+        task_entry = self._create_report_entry('grade_course')
+        subtask_id = str(uuid4())
+        initialize_subtask_info(task_entry, 'graded', len(self.students), [subtask_id])
+        current_task = Mock(max_retries=3, request=Mock(retries=0))
+        current_task.retry.return_value = TestTaskFailure("retrying")
+        build_parts_fcn = Mock(side_effect=Exception("worker trouble"))
+        user_ids = [student.id for student in self.students]
+
+        report_part_fcns = {'grade_course': (build_parts_fcn, 'GRADES_DOWNLOAD')}
+        with patch.dict('instructor_task.tasks_helper.REPORT_PART_FCNS', report_part_fcns):
+            with patch('instructor_task.tasks_helper._get_current_task', return_value=current_task):
+                with self.assertRaises(TestTaskFailure):
+                    run_report_subtask(task_entry.id, {}, user_ids, SubtaskStatus.create(subtask_id).to_dict())
+
+        retry_status = current_task.retry.call_args[1]['args'][-1]
+        self.assertEquals((retry_status['attempted'], retry_status['retried_withmax']), (0, 1))
+        self.assertEquals(retry_status['state'], RETRY)
+
+        # The retry builds the part over, and puts the report together.
+        with patch('instructor_task.tasks_helper._get_current_task', return_value=current_task):
+            status = run_report_subtask(*current_task.retry.call_args[1]['args'])
+        self.assertEquals((status['attempted'], status['succeeded'], status['state']), (5, 5, SUCCESS))
+        self.verify_rows_in_csv(
+            [{'username': student.username} for student in self.students], ignore_other_columns=True
+        )
+
+    def test_out_of_retries(self):
+        task_entry = self._create_report_entry('grade_course')
+        subtask_id = str(uuid4())
+        initialize_subtask_info(task_entry, 'graded', len(self.students), [subtask_id])
+        current_task = Mock(max_retries=3)
+        build_parts_fcn = Mock(side_effect=Exception("worker trouble"))
+        user_ids = [student.id for student in self.students]
+
+        report_part_fcns = {'grade_course': (build_parts_fcn, 'GRADES_DOWNLOAD')}
+        with patch.dict('instructor_task.tasks_helper.REPORT_PART_FCNS', report_part_fcns):
+            with patch('instructor_task.tasks_helper._get_current_task', return_value=current_task):
+                with self.assertRaises(Exception):
+                    run_report_subtask(
+                        task_entry.id, {}, user_ids, SubtaskStatus.create(subtask_id, retried_withmax=3).to_dict()
+                    )
+
+        self.assertFalse(current_task.retry.called)
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEquals(entry.task_state, SUCCESS)
+        self.assertEquals(json.loads(entry.task_output)['failed'], 5)
+        # No part of the report was built, so there is no report.
+        self.assertEquals(ReportStore.from_config(config_name='GRADES_DOWNLOAD').links_for(self.course.id), [])
+
+
 class TestCertificateGenerationnstructorTask(TestInstructorTasks):
     """Tests instructor task that generates student certificates."""
 
@@ -0,0 +1,62 @@
+"""
+Models for the Labster Vouchers.
+"""
+from django.db import models, transaction
+from django.utils import timezone
+
+
+class VoucherActivation(models.Model):
+    """
+    A voucher activation to be sent to the Labster API.
+
+    Activations are queued when students redeem vouchers, and sent in batches
+    by `tasks.activate_pending_vouchers`.
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    )
+
+    voucher = models.CharField(max_length=255)
+    # Anonymous id of the student in the course
+    user_id = models.CharField(max_length=255)
+    email = models.CharField(max_length=255)
+    context_id = models.CharField(max_length=255)
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    # When a pending activation may next be sent, or when a worker's claim on
+    # an activation that is being sent runs out.
+    next_attempt = models.DateTimeField(default=timezone.now, db_index=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    @transaction.autocommit
+    def save_now(self):
+        """
+        Writes the activation immediately, ensuring the transaction is committed,
+        so that the batch task scheduled after it can see it.
+
+        When called from a view wrapped by TransactionMiddleware, this commits
+        the pending transaction too, as InstructorTask.save_now does.
+        """
+        self.save()
+
+    def as_data(self):
+        """
+        Return the data to post to the Labster API.
+        """
+        return {
+            'user_id': self.user_id,
+            'email': self.email,
+            'context_id': self.context_id,
+            'voucher': self.voucher,
+        }
+
+    def __unicode__(self):
+        return u"{} for {} in {} ({})".format(self.voucher, self.user_id, self.context_id, self.status)
@@ -1,42 +1,242 @@
 """
 Labster Voucher tasks.
+
+Voucher activations are queued as `VoucherActivation` rows, and sent to the
+Labster API in batches rather than with one task per voucher, so that a whole
+class redeeming vouchers at once doesn't flood the workers or the API:
+
+* `queue_voucher_activation` saves an activation and schedules a batch a few
+  seconds later, unless one is already scheduled.
+* `activate_pending_vouchers` sends the due activations a batch at a time,
+  a few concurrently over pooled connections, no faster than the configured
+  rate.  Activations that fail for reasons that may be temporary are retried
+  later with exponential backoff.
+
+See `settings.LABSTER_VOUCHER_ACTIVATION` for the knobs.
 """
 import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from multiprocessing.pool import ThreadPool
 
+import dogstats_wrapper as dog_stats_api
 import requests
 from requests.exceptions import RequestException
 from lms import CELERY_APP
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from labster_vouchers.models import VoucherActivation
 
 
 log = logging.getLogger(__name__)
 
+DEFAULT_ACTIVATION_SETTINGS = {
+    # Seconds to wait for more activations before sending a batch.
+    'BATCH_DELAY': 5,
+    # Most activations sent per batch.
+    'BATCH_SIZE': 50,
+    # Most activations sent at the same time.
+    'CONCURRENCY': 5,
+    # Most activations sent per second.
+    'RATE': 20,
+    # Seconds to wait for the Labster API to respond.
+    'TIMEOUT': 10,
+    # Times an activation is tried before giving up on it.
+    'MAX_ATTEMPTS': 5,
+    # Seconds to wait before the first retry; each retry waits twice as long.
+    'BACKOFF': 30,
+}
 
-@CELERY_APP.task
-def activate_voucher(voucher, user_id, email, context_id):
+BATCH_SCHEDULED_KEY = 'labster_vouchers.activation_batch_scheduled'
+RETRY_SCHEDULED_KEY = 'labster_vouchers.activation_retry_scheduled'
+
+_SESSION = None
+_SESSION_PID = None
+_SESSION_LOCK = threading.Lock()
+
+
+def activation_settings():
     """
-    Task that activates the voucher.
+    Return the voucher activation settings.
     """
-    url = settings.LABSTER_ENDPOINTS.get('voucher_activate')
-    headers = {
-        "authorization": 'Token {}'.format(settings.LABSTER_API_AUTH_TOKEN),
-    }
+    return dict(DEFAULT_ACTIVATION_SETTINGS, **getattr(settings, 'LABSTER_VOUCHER_ACTIVATION', {}))
 
-    data = {
-        'user_id': user_id,
-        'email': email,
-        'context_id': context_id,
-        'voucher': voucher,
-    }
 
+def get_session():
+    """
+    Return the `requests.Session` used to talk to the Labster API, which keeps
+    connections alive between activations.  Each process gets its own.
+    """
+    global _SESSION, _SESSION_PID  # pylint: disable=global-statement
+    with _SESSION_LOCK:
+        if _SESSION is None or _SESSION_PID != os.getpid():
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=activation_settings()['CONCURRENCY']
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers["authorization"] = 'Token {}'.format(settings.LABSTER_API_AUTH_TOKEN)
+            _SESSION, _SESSION_PID = session, os.getpid()
+        return _SESSION
+
+
+def post_activation(data):
+    """
+    Post a voucher activation to the Labster API.
+
+    Returns "succeeded", "retry" if it failed but may succeed later, or
+    "error" if it can't succeed.
+    """
     try:
-        response = requests.post(url, headers=headers, data=data)
+        response = get_session().post(
+            settings.LABSTER_ENDPOINTS.get('voucher_activate'),
+            data=data,
+            timeout=activation_settings()['TIMEOUT'],
+        )
         response.raise_for_status()
     except RequestException as ex:
+        status_code = getattr(ex.response, 'status_code', None)
         msg = (
             "Issues with voucher activation: user_id='%s', email='%s', "
             "context_id='%s', voucher='%s',\nerror:\n%r"
         )
-        log.exception(msg, user_id, email, context_id, voucher, ex)
-        return "error"
+        log.warning(msg, data['user_id'], data['email'], data['context_id'], data['voucher'], ex)
+        # Client errors won't go away by themselves, except for rate limiting.
+        if status_code is not None and 400 <= status_code < 500 and status_code != 429:
+            return "error"
+        return "retry"
     return "succeeded"
+
+
+def queue_voucher_activation(voucher, user_id, email, context_id):
+    """
+    Queue a voucher activation to be sent with the next batch.
+
+    The activation is committed before the batch is scheduled, since the batch
+    may run before the request's transaction would otherwise be committed.
+    """
+    VoucherActivation(voucher=voucher, user_id=user_id, email=email, context_id=context_id).save_now()
+    schedule_activation_batch(activation_settings()['BATCH_DELAY'])
+
+
+def schedule_activation_batch(countdown):
+    """
+    Schedule `activate_pending_vouchers` in `countdown` seconds, unless a
+    batch is already scheduled to run by then.
+    """
+    if cache.add(BATCH_SCHEDULED_KEY, True, countdown + 1):
+        activate_pending_vouchers.apply_async(countdown=countdown)
+
+
+def _claim_due_activations(batch_size, claim_seconds):
+    """
+    Claim up to `batch_size` activations that are due to be sent, including
+    ones another worker claimed but didn't finish sending, and return them.
+    """
+    now = timezone.now()
+    candidates = VoucherActivation.objects.filter(
+        status__in=[VoucherActivation.PENDING, VoucherActivation.SENDING],
+        next_attempt__lte=now,
+    ).order_by('next_attempt')[:batch_size]
+
+    claimed = []
+    for activation in candidates:
+        # Only one worker may change the row from the state we read.
+        updated = VoucherActivation.objects.filter(
+            pk=activation.pk, status=activation.status, next_attempt=activation.next_attempt
+        ).update(
+            status=VoucherActivation.SENDING,
+            next_attempt=now + timedelta(seconds=claim_seconds),
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            activation.attempts += 1
+            claimed.append(activation)
+    return claimed
+
+
+def _record_result(activation, result, config):
+    """
+    Save the outcome of sending `activation`, and return it for metrics.
+    """
+    if result == "retry" and activation.attempts >= config['MAX_ATTEMPTS']:
+        result = "error"
+
+    if result == "succeeded":
+        activation.status = VoucherActivation.SUCCEEDED
+    elif result == "error":
+        activation.status = VoucherActivation.FAILED
+        log.error("Giving up on voucher activation %s after %s attempts", activation, activation.attempts)
+    else:
+        activation.status = VoucherActivation.PENDING
+        backoff = config['BACKOFF'] * 2 ** (activation.attempts - 1)
+        activation.next_attempt = timezone.now() + timedelta(seconds=backoff)
+    activation.save()
+    return result
+
+
+@CELERY_APP.task
+def activate_pending_vouchers():
+    """
+    Task that sends the voucher activations that are due, a batch at a time.
+    """
+    # New activations from now on need another batch to be scheduled.
+    cache.delete(BATCH_SCHEDULED_KEY)
+    config = activation_settings()
+    claim_seconds = config['TIMEOUT'] * config['BATCH_SIZE'] + 60
+
+    pool = ThreadPool(config['CONCURRENCY']) if config['CONCURRENCY'] > 1 else None
+    try:
+        while True:
+            activations = _claim_due_activations(config['BATCH_SIZE'], claim_seconds)
+            if not activations:
+                break
+
+            start = time.time()
+            data = [activation.as_data() for activation in activations]
+            results = pool.map(post_activation, data) if pool else [post_activation(item) for item in data]
+            for activation, result in zip(activations, results):
+                result = _record_result(activation, result, config)
+                dog_stats_api.increment('labster_vouchers.activation', tags=[u'result:{}'.format(result)])
+
+            elapsed = time.time() - start
+            dog_stats_api.histogram('labster_vouchers.activation.batch_size', len(activations))
+            dog_stats_api.histogram('labster_vouchers.activation.batch_time', elapsed)
+            # Don't send more than config['RATE'] activations per second.
+            time.sleep(max(0, float(len(activations)) / config['RATE'] - elapsed))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    # Come back for the activations that are waiting to be retried.
+    waiting = VoucherActivation.objects.filter(
+        status__in=[VoucherActivation.PENDING, VoucherActivation.SENDING]
+    ).order_by('next_attempt')[:1]
+    if waiting:
+        countdown = max(int((waiting[0].next_attempt - timezone.now()).total_seconds()), 0) + 1
+        if cache.add(RETRY_SCHEDULED_KEY, True, countdown):
+            activate_pending_vouchers.apply_async(countdown=countdown)
+
+
+@CELERY_APP.task
+def activate_voucher(voucher, user_id, email, context_id):
+    """
+    Task that activates the voucher.
+
+    Kept for tasks queued before activations were batched; new activations
+    go through `queue_voucher_activation`.
+    """
+    result = post_activation({
+        'user_id': user_id,
+        'email': email,
+        'context_id': context_id,
+        'voucher': voucher,
+    })
+    return "succeeded" if result == "succeeded" else "error"
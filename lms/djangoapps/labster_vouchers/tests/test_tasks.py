@@ -0,0 +1,156 @@
+"""
+Tests labster voucher activation tasks.
+./manage.py lms test --verbosity=1 lms/djangoapps/labster_vouchers   --traceback --settings=labster_test
+"""
+import httpretty
+import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from rest_framework import status
+
+from labster_vouchers import tasks
+from labster_vouchers.models import VoucherActivation
+
+
+@httpretty.activate
+class TestActivatePendingVouchers(TestCase):
+    """
+    Tests for the batched voucher activation.
+    """
+
+    def setUp(self):
+        super(TestActivatePendingVouchers, self).setUp()
+        cache.delete(tasks.BATCH_SCHEDULED_KEY)
+        cache.delete(tasks.RETRY_SCHEDULED_KEY)
+        self.url = settings.LABSTER_ENDPOINTS.get('voucher_activate')
+
+    def register_responses(self, *statuses):
+        """
+        Make the stub API answer activations with `statuses`, in turn.
+        """
+        httpretty.register_uri(
+            httpretty.POST,
+            self.url,
+            responses=[httpretty.Response(body='', status=code) for code in statuses],
+        )
+
+    def create_activations(self, count):
+        """
+        Queue `count` activations without sending them.
+        """
+        return [
+            VoucherActivation.objects.create(
+                voucher='VOUCHER{}'.format(index),
+                user_id='user{}'.format(index),
+                email='user{}@example.com'.format(index),
+                context_id='course-v1:org+course+run',
+            )
+            for index in range(count)
+        ]
+
+    def test_queue_voucher_activation(self):
+        self.register_responses(status.HTTP_200_OK)
+        tasks.queue_voucher_activation('VOUCHER', 'user', 'user@example.com', 'course-v1:org+course+run')
+
+        activation = VoucherActivation.objects.get()
+        self.assertEqual(activation.status, VoucherActivation.SUCCEEDED)
+        self.assertEqual(activation.attempts, 1)
+        self.assertEqual(
+            httpretty.last_request().parsed_body,
+            {
+                'voucher': ['VOUCHER'],
+                'user_id': ['user'],
+                'email': ['user@example.com'],
+                'context_id': ['course-v1:org+course+run'],
+            }
+        )
+
+    def test_activation_committed_before_batch(self):
+        calls = mock.Mock()
+        with mock.patch.object(VoucherActivation, 'save_now', calls.save_now):
+            with mock.patch('labster_vouchers.tasks.schedule_activation_batch', calls.schedule_activation_batch):
+                tasks.queue_voucher_activation('VOUCHER', 'user', 'user@example.com', 'course-v1:org+course+run')
+        self.assertEqual(
+            [name for name, __, __ in calls.mock_calls],
+            ['save_now', 'schedule_activation_batch']
+        )
+
+    @override_settings(LABSTER_VOUCHER_ACTIVATION={'BATCH_SIZE': 2, 'CONCURRENCY': 3, 'RATE': 1000})
+    @mock.patch('labster_vouchers.tasks.dog_stats_api')
+    def test_batches(self, mock_stats):
+        self.register_responses(status.HTTP_200_OK)
+        self.create_activations(5)
+
+        tasks.activate_pending_vouchers()
+
+        self.assertEqual(
+            VoucherActivation.objects.filter(status=VoucherActivation.SUCCEEDED).count(), 5
+        )
+        batch_sizes = [
+            args[1] for args, __ in mock_stats.histogram.call_args_list
+            if args[0] == 'labster_vouchers.activation.batch_size'
+        ]
+        self.assertEqual(batch_sizes, [2, 2, 1])
+        mock_stats.increment.assert_called_with('labster_vouchers.activation', tags=[u'result:succeeded'])
+
+    @override_settings(LABSTER_VOUCHER_ACTIVATION={'CONCURRENCY': 1, 'BACKOFF': 0, 'MAX_ATTEMPTS': 3})
+    def test_retry(self):
+        self.register_responses(
+            status.HTTP_503_SERVICE_UNAVAILABLE, status.HTTP_429_TOO_MANY_REQUESTS, status.HTTP_200_OK
+        )
+        activation, = self.create_activations(1)
+
+        tasks.activate_pending_vouchers()
+
+        activation = VoucherActivation.objects.get(pk=activation.pk)
+        self.assertEqual(activation.status, VoucherActivation.SUCCEEDED)
+        self.assertEqual(activation.attempts, 3)
+
+    @override_settings(LABSTER_VOUCHER_ACTIVATION={'CONCURRENCY': 1, 'BACKOFF': 0, 'MAX_ATTEMPTS': 2})
+    def test_give_up(self):
+        self.register_responses(status.HTTP_503_SERVICE_UNAVAILABLE)
+        activation, = self.create_activations(1)
+
+        tasks.activate_pending_vouchers()
+
+        activation = VoucherActivation.objects.get(pk=activation.pk)
+        self.assertEqual(activation.status, VoucherActivation.FAILED)
+        self.assertEqual(activation.attempts, 2)
+
+    def test_client_error_not_retried(self):
+        self.register_responses(status.HTTP_400_BAD_REQUEST, status.HTTP_200_OK)
+        activation, = self.create_activations(1)
+
+        tasks.activate_pending_vouchers()
+
+        activation = VoucherActivation.objects.get(pk=activation.pk)
+        self.assertEqual(activation.status, VoucherActivation.FAILED)
+        self.assertEqual(activation.attempts, 1)
+
+    @override_settings(LABSTER_VOUCHER_ACTIVATION={'BACKOFF': 60})
+    @mock.patch('labster_vouchers.tasks.activate_pending_vouchers.apply_async')
+    def test_retry_scheduled(self, mock_apply_async):
+        self.register_responses(status.HTTP_503_SERVICE_UNAVAILABLE)
+        activation, = self.create_activations(1)
+
+        tasks.activate_pending_vouchers()
+
+        activation = VoucherActivation.objects.get(pk=activation.pk)
+        self.assertEqual(activation.status, VoucherActivation.PENDING)
+        self.assertEqual(activation.attempts, 1)
+        countdown = mock_apply_async.call_args[1]['countdown']
+        self.assertTrue(55 <= countdown <= 61)
+
+    def test_claimed_activations_skipped(self):
+        self.register_responses(status.HTTP_200_OK)
+        activation, = self.create_activations(1)
+        # Another worker is sending this one.
+        self.assertEqual(tasks._claim_due_activations(10, 60), [activation])  # pylint: disable=protected-access
+
+        with mock.patch('labster_vouchers.tasks.post_activation') as mock_post:
+            tasks.activate_pending_vouchers()
+
+        self.assertFalse(mock_post.called)
+        self.assertEqual(VoucherActivation.objects.get(pk=activation.pk).status, VoucherActivation.SENDING)
@@ -132,7 +132,7 @@ def activate_voucher(request):
 
     anon_uid = anonymous_id_for_user(request.user, course_id)
     context_id = course_id.to_deprecated_string()
-    tasks.activate_voucher.delay(code, anon_uid, request.user.email, context_id)
+    tasks.queue_voucher_activation(code, anon_uid, request.user.email, context_id)
 
     return redirect(reverse('info', args=[unicode(course_id)]))
 
@@ -5,7 +5,7 @@ from rest_framework.reverse import reverse
 
 from xmodule.modulestore.mongo.base import BLOCK_TYPES_WITH_CHILDREN
 from xmodule.modulestore.django import modulestore
-from courseware.access import has_access
+from courseware.access import has_access_many
 from courseware.courses import get_course_by_id
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor
@@ -56,8 +56,21 @@ class BlockOutline(object):
                 self.request.user, self.request, descriptor, field_data_cache, self.course_id, course=course
             )
 
+        def check_access(blocks):
+            """
+            Check the user's access to those of `blocks` that are summarized, all at once.
+            """
+            access.update(has_access_many(
+                self.request.user,
+                'load',
+                [block for block in blocks if block.location.block_type in self.block_types],
+                course_key=self.course_id
+            ))
+
         with modulestore().bulk_operations(self.course_id):
             child_to_parent = {}
+            access = {}
+            check_access([self.start_block])
             stack = [self.start_block]
             while stack:
                 curr_block = stack.pop()
@@ -72,7 +85,7 @@ class BlockOutline(object):
                     continue
 
                 if curr_block.location.block_type in self.block_types:
-                    if not has_access(self.request.user, 'load', curr_block, course_key=self.course_id):
+                    if not access[curr_block.location]:
                         continue
 
                     summary_fn = self.block_types[curr_block.category]
@@ -94,6 +107,7 @@ class BlockOutline(object):
                         create_module,
                         usage_key_filter=parent_or_requested_block_type
                     )
+                    check_access(children)
                     for block in reversed(children):
                         stack.append(block)
                         child_to_parent[block] = curr_block
@@ -192,6 +192,9 @@ class PhotoVerification(StatusModel):
         abstract = True
         ordering = ['-created_at']
 
+    # How many users' verifications the bulk lookups fetch per query.
+    BULK_LOOKUP_BATCH_SIZE = 500
+
     ##### Methods listed in the order you'd typically call them
     @classmethod
     def _earliest_allowed_date(cls):
@@ -218,6 +221,19 @@ class PhotoVerification(StatusModel):
                              or cls._earliest_allowed_date())
         ).exists()
 
+    @classmethod
+    def verified_user_ids(cls, user_ids, earliest_allowed_date=None):
+        """
+        Return the set of those of `user_ids` whose users have satisfactorily
+        proved their identity, as `user_is_verified` would for each of them.
+        """
+        return set(cls.objects.filter(
+            user_id__in=user_ids,
+            status="approved",
+            created_at__gte=(earliest_allowed_date
+                             or cls._earliest_allowed_date())
+        ).values_list('user_id', flat=True))
+
     @classmethod
     def verification_valid_or_pending(cls, user, earliest_allowed_date=None, queryset=None):
         """
@@ -291,45 +307,68 @@ class PhotoVerification(StatusModel):
         If the verification process is still ongoing, returns 'pending'
         If the verification has been denied and the user must resubmit photos, returns 'must_reverify'
 
-        This checks initial verifications
+        This checks initial verifications.  Statuses are cached for
+        settings.VERIFICATION_STATUS_CACHE_TIMEOUT seconds; saving or deleting
+        an attempt clears its user's status.
         """
-        status = 'none'
-        error_msg = ''
-
-        if cls.user_is_verified(user):
-            status = 'approved'
-
-        elif cls.user_has_valid_or_pending(user):
-            # user_has_valid_or_pending does include 'approved', but if we are
-            # here, we know that the attempt is still pending
-            status = 'pending'
-
-        else:
-            # we need to check the most recent attempt to see if we need to ask them to do
-            # a retry
-            try:
-                attempts = cls.objects.filter(user=user).order_by('-updated_at')
-                attempt = attempts[0]
-            except IndexError:
-                # we return 'none'
+        timeout = getattr(settings, 'VERIFICATION_STATUS_CACHE_TIMEOUT', 0)
+        cache_key = cls.status_cache_key_name(user.id)
+        summary = cache.get(cache_key) if timeout else None
+        if summary is None:
+            attempts = cls.objects.filter(user=user).values_list('status', 'created_at', 'updated_at', 'error_msg')
+            summary = cls._status_summary(list(attempts), cls._earliest_allowed_date())
+            if timeout:
+                cache.set(cache_key, summary, timeout)
+        return cls._status_from_summary(*summary)
 
-                return ('none', error_msg)
-
-            if attempt.created_at < cls._earliest_allowed_date():
-                return (
-                    'expired',
-                    _("Your {platform_name} verification has expired.").format(platform_name=settings.PLATFORM_NAME)
-                )
-
-            # If someone is denied their original verification attempt, they can try to reverify.
-            if attempt.status == 'denied':
-                status = 'must_reverify'
-
-            if attempt.error_msg:
-                error_msg = attempt.parsed_error_msg()
+    @classmethod
+    def _status_summary(cls, attempts, earliest_allowed_date):
+        """
+        Returns the status of a user and the raw error message of their
+        latest attempt, given their attempts as (status, created_at,
+        updated_at, error_msg) tuples.
+        """
+        recent_statuses = set(
+            status for status, created_at, __, __ in attempts if created_at >= earliest_allowed_date
+        )
+        if 'approved' in recent_statuses:
+            return ('approved', '')
+        if recent_statuses & {'submitted', 'must_retry'}:
+            return ('pending', '')
+        if not attempts:
+            return ('none', '')
+
+        # we need to check the most recent attempt to see if we need to ask them to do
+        # a retry
+        status, created_at, __, error_msg = max(attempts, key=lambda attempt: attempt[2])
+        if created_at < earliest_allowed_date:
+            return ('expired', '')
+        # If someone is denied their original verification attempt, they can try to reverify.
+        return ('must_reverify' if status == 'denied' else 'none', error_msg or '')
 
+    @classmethod
+    def _status_from_summary(cls, status, error_msg):
+        """
+        Returns the (status, error message) pair that `user_status` returns
+        for a status summary made by `_status_summary`.
+        """
+        if status == 'expired':
+            return (
+                'expired',
+                _("Your {platform_name} verification has expired.").format(platform_name=settings.PLATFORM_NAME)
+            )
+        if error_msg:
+            error_msg = cls(error_msg=error_msg).parsed_error_msg()
         return (status, error_msg)
 
+    @classmethod
+    def status_cache_key_name(cls, user_id):
+        """
+        Returns the key that the verification status of a user is cached
+        under.
+        """
+        return u"verify_student.user_status.{}".format(user_id)
+
     @classmethod
     def verification_for_datetime(cls, deadline, candidates):
         """Find a verification in a set that applied during a particular datetime.
@@ -921,6 +960,40 @@ class SoftwareSecurePhotoVerification(PhotoVerification):
         else:
             return 'ID Verified'
 
+    @classmethod
+    def verification_statuses_for_users(cls, enrollment_modes):
+        """
+        Returns the verification statuses for use in grade reports of many
+        users at once, given a dict mapping their ids to their enrollment
+        modes, as a dict mapping their ids to the statuses that
+        `verification_status_for_user` returns.
+        """
+        verified_mode_user_ids = [
+            user_id for user_id, mode in enrollment_modes.iteritems() if mode in CourseMode.VERIFIED_MODES
+        ]
+        verified_user_ids = set()
+        for start in xrange(0, len(verified_mode_user_ids), cls.BULK_LOOKUP_BATCH_SIZE):
+            verified_user_ids.update(
+                cls.verified_user_ids(verified_mode_user_ids[start:start + cls.BULK_LOOKUP_BATCH_SIZE])
+            )
+
+        statuses = {}
+        for user_id, mode in enrollment_modes.iteritems():
+            if mode not in CourseMode.VERIFIED_MODES:
+                statuses[user_id] = 'N/A'
+            elif user_id in verified_user_ids:
+                statuses[user_id] = 'ID Verified'
+            else:
+                statuses[user_id] = 'Not ID Verified'
+        return statuses
+
+
+@receiver(models.signals.post_save, sender=SoftwareSecurePhotoVerification)
+@receiver(models.signals.post_delete, sender=SoftwareSecurePhotoVerification)
+def invalidate_user_status_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate the cached verification status of the attempt's user. """
+    cache.delete(SoftwareSecurePhotoVerification.status_cache_key_name(instance.user_id))
+
 
 class VerificationDeadline(TimeStampedModel):
     """
@@ -1263,10 +1336,48 @@ class VerificationStatus(models.Model):
         """
         all_checks_points = cls.objects.filter(
             user_id=user_id, checkpoint__course_id=course_key
-        )
+        ).order_by('id').values_list('checkpoint__checkpoint_location', 'status')
         check_points = {}
-        for check in all_checks_points:
-            check_points[check.checkpoint.checkpoint_location] = check.status
+        for location, status in all_checks_points:
+            check_points[location] = status
+
+        return check_points
+
+    @classmethod
+    def get_all_checkpoints_many(cls, user_ids, course_key):
+        """Return the checkpoints of many users in a course with their status,
+        as `get_all_checkpoints` would for each of them, looking up the
+        statuses of a batch of users at a time.
+
+        Statuses found in the cache that the verification partition scheme
+        keeps them under are used, and the ones looked up are added to it,
+        so that the scheme finds them there.  Saving or deleting a status
+        clears its user's entry.
+
+        Args:
+            user_ids(list): Ids of users.
+            course_key(CourseKey): The course.
+
+        Returns:
+            dict: {user_id: {checkpoint: status}}
+        """
+        user_ids = list(user_ids)
+        cache_keys = {user_id: cls.cache_key_name(user_id, unicode(course_key)) for user_id in user_ids}
+        cached = cache.get_many(cache_keys.values())
+        check_points = {
+            user_id: cached[cache_key] for user_id, cache_key in cache_keys.iteritems() if cache_key in cached
+        }
+
+        missing = [user_id for user_id in user_ids if user_id not in check_points]
+        for start in xrange(0, len(missing), PhotoVerification.BULK_LOOKUP_BATCH_SIZE):
+            batch = missing[start:start + PhotoVerification.BULK_LOOKUP_BATCH_SIZE]
+            looked_up = {user_id: {} for user_id in batch}
+            for user_id, location, status in cls.objects.filter(
+                    user_id__in=batch, checkpoint__course_id=course_key
+            ).order_by('id').values_list('user_id', 'checkpoint__checkpoint_location', 'status'):
+                looked_up[user_id][location] = status
+            cache.set_many({cache_keys[user_id]: value for user_id, value in looked_up.iteritems()})
+            check_points.update(looked_up)
 
         return check_points
 
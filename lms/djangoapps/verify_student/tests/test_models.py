@@ -7,8 +7,10 @@ import requests.exceptions
 import pytz
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db.utils import IntegrityError
 from django.test import TestCase
+from django.test.utils import override_settings
 from mock import patch
 from nose.tools import assert_is_none, assert_equals, assert_raises, assert_true, assert_false  # pylint: disable=no-name-in-module
 
@@ -368,6 +370,35 @@ class TestPhotoVerification(ModuleStoreTestCase):
         status = SoftwareSecurePhotoVerification.user_status(user)
         self.assertEquals(status, ('must_reverify', "No photo ID was provided."))
 
+    def test_user_status_one_query(self):
+        users = [UserFactory.create() for __ in range(5)]
+        SoftwareSecurePhotoVerification.objects.create(user=users[1], status='approved')
+        SoftwareSecurePhotoVerification.objects.create(user=users[2], status='submitted')
+        SoftwareSecurePhotoVerification.objects.create(
+            user=users[3], status='denied', error_msg='[{"photoIdReasons": ["Not provided"]}]'
+        )
+        expired = SoftwareSecurePhotoVerification.objects.create(user=users[4], status='approved')
+        expired.created_at = datetime.now(pytz.UTC) - timedelta(days=settings.VERIFY_STUDENT["DAYS_GOOD_FOR"] + 1)
+        expired.save()
+
+        statuses = []
+        for user in users:
+            with self.assertNumQueries(1):
+                statuses.append(SoftwareSecurePhotoVerification.user_status(user)[0])
+        self.assertEqual(statuses, ['none', 'approved', 'pending', 'must_reverify', 'expired'])
+
+    @override_settings(VERIFICATION_STATUS_CACHE_TIMEOUT=60)
+    def test_user_status_cached(self):
+        user = UserFactory.create()
+        cache.delete(SoftwareSecurePhotoVerification.status_cache_key_name(user.id))
+        self.assertEqual(SoftwareSecurePhotoVerification.user_status(user), ('none', ''))
+        with self.assertNumQueries(0):
+            self.assertEqual(SoftwareSecurePhotoVerification.user_status(user), ('none', ''))
+
+        # Saving an attempt clears the cached status.
+        SoftwareSecurePhotoVerification.objects.create(user=user, status='approved')
+        self.assertEqual(SoftwareSecurePhotoVerification.user_status(user), ('approved', ''))
+
     def test_parse_error_msg_success(self):
         user = UserFactory.create()
         attempt = SoftwareSecurePhotoVerification(user=user)
@@ -489,6 +520,23 @@ class TestPhotoVerification(ModuleStoreTestCase):
             status = SoftwareSecurePhotoVerification.verification_status_for_user(user, course.id, enrollment_mode)
             self.assertEqual(status, output)
 
+    def test_verification_statuses_for_users(self):
+        honor_user, verified_user, unverified_user = [UserFactory.create() for __ in range(3)]
+        SoftwareSecurePhotoVerification.objects.create(user=verified_user, status='approved')
+        SoftwareSecurePhotoVerification.objects.create(user=unverified_user, status='submitted')
+
+        with self.assertNumQueries(1):
+            statuses = SoftwareSecurePhotoVerification.verification_statuses_for_users({
+                honor_user.id: 'honor',
+                verified_user.id: 'verified',
+                unverified_user.id: 'verified',
+            })
+        self.assertEqual(statuses, {
+            honor_user.id: 'N/A',
+            verified_user.id: 'ID Verified',
+            unverified_user.id: 'Not ID Verified',
+        })
+
     def test_initial_verification_for_user(self):
         """Test that method 'get_initial_verification' of model
         'SoftwareSecurePhotoVerification' always returns the initial
@@ -744,6 +792,43 @@ class VerificationStatusTest(ModuleStoreTestCase):
         )
         self.assertEqual(actual_attempts, 1)
 
+    def test_get_all_checkpoints_many(self):
+        """
+        Getting the checkpoint statuses of many users at once.
+        """
+        cache.clear()
+        other_user, user_without_status = UserFactory.create(), UserFactory.create()
+        VerificationStatus.add_status_from_checkpoints(
+            checkpoints=[self.first_checkpoint, self.second_checkpoint], user=self.user, status='submitted'
+        )
+        VerificationStatus.add_verification_status(
+            checkpoint=self.first_checkpoint, user=self.user, status='approved'
+        )
+        VerificationStatus.add_verification_status(
+            checkpoint=self.second_checkpoint, user=other_user, status='denied'
+        )
+
+        user_ids = [self.user.id, other_user.id, user_without_status.id]
+        with self.assertNumQueries(1):
+            statuses = VerificationStatus.get_all_checkpoints_many(user_ids, self.course.id)
+        self.assertEqual(statuses, {
+            self.user.id: {self.first_checkpoint_location: 'approved', self.second_checkpoint_location: 'submitted'},
+            other_user.id: {self.second_checkpoint_location: 'denied'},
+            user_without_status.id: {},
+        })
+        for user_id in user_ids:
+            self.assertEqual(statuses[user_id], VerificationStatus.get_all_checkpoints(user_id, self.course.id))
+
+        # The statuses are cached until they change.
+        with self.assertNumQueries(0):
+            self.assertEqual(VerificationStatus.get_all_checkpoints_many(user_ids, self.course.id), statuses)
+        VerificationStatus.add_verification_status(
+            checkpoint=self.first_checkpoint, user=other_user, status='submitted'
+        )
+        with self.assertNumQueries(1):
+            statuses = VerificationStatus.get_all_checkpoints_many(user_ids, self.course.id)
+        self.assertEqual(statuses[other_user.id][self.first_checkpoint_location], 'submitted')
+
 
 class SkippedReverificationTest(ModuleStoreTestCase):
     """
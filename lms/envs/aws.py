@@ -191,6 +191,15 @@ if 'loc_cache' not in CACHES:
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     }
+CONFIG_MODEL_PROCESS_CACHE_TIMEOUT = ENV_TOKENS.get(
+    'CONFIG_MODEL_PROCESS_CACHE_TIMEOUT', CONFIG_MODEL_PROCESS_CACHE_TIMEOUT
+)
+COURSE_ENROLLMENT_CACHE_TIMEOUT = ENV_TOKENS.get('COURSE_ENROLLMENT_CACHE_TIMEOUT', COURSE_ENROLLMENT_CACHE_TIMEOUT)
+CERTIFICATES_CACHE_TIMEOUT = ENV_TOKENS.get('CERTIFICATES_CACHE_TIMEOUT', CERTIFICATES_CACHE_TIMEOUT)
+CERTIFICATE_WEB_VIEW_MAX_AGE = ENV_TOKENS.get('CERTIFICATE_WEB_VIEW_MAX_AGE', CERTIFICATE_WEB_VIEW_MAX_AGE)
+VERIFICATION_STATUS_CACHE_TIMEOUT = ENV_TOKENS.get(
+    'VERIFICATION_STATUS_CACHE_TIMEOUT', VERIFICATION_STATUS_CACHE_TIMEOUT
+)
 
 # Email overrides
 DEFAULT_FROM_EMAIL = ENV_TOKENS.get('DEFAULT_FROM_EMAIL', DEFAULT_FROM_EMAIL)
@@ -229,6 +238,17 @@ BULK_EMAIL_ROUTING_KEY = HIGH_PRIORITY_QUEUE
 # we have to reset the value here.
 BULK_EMAIL_ROUTING_KEY_SMALL_JOBS = LOW_PRIORITY_QUEUE
 
+# Instructor task overrides
+INSTRUCTOR_TASK_ITEMS_PER_SUBTASK = ENV_TOKENS.get(
+    'INSTRUCTOR_TASK_ITEMS_PER_SUBTASK', INSTRUCTOR_TASK_ITEMS_PER_SUBTASK
+)
+INSTRUCTOR_TASK_SUBTASK_RETRY_DELAY = ENV_TOKENS.get(
+    'INSTRUCTOR_TASK_SUBTASK_RETRY_DELAY', INSTRUCTOR_TASK_SUBTASK_RETRY_DELAY
+)
+INSTRUCTOR_TASK_SUBTASK_MAX_RETRIES = ENV_TOKENS.get(
+    'INSTRUCTOR_TASK_SUBTASK_MAX_RETRIES', INSTRUCTOR_TASK_SUBTASK_MAX_RETRIES
+)
+
 # Theme overrides
 THEME_NAME = ENV_TOKENS.get('THEME_NAME', None)
 COMP_THEME_DIR = path(ENV_TOKENS.get('COMP_THEME_DIR', COMP_THEME_DIR))
@@ -272,6 +292,13 @@ VIRTUAL_UNIVERSITIES = ENV_TOKENS.get('VIRTUAL_UNIVERSITIES', [])
 META_UNIVERSITIES = ENV_TOKENS.get('META_UNIVERSITIES', {})
 COMMENTS_SERVICE_URL = ENV_TOKENS.get("COMMENTS_SERVICE_URL", '')
 COMMENTS_SERVICE_KEY = ENV_TOKENS.get("COMMENTS_SERVICE_KEY", '')
+COMMENTS_SERVICE_POOL_SIZE = ENV_TOKENS.get("COMMENTS_SERVICE_POOL_SIZE", COMMENTS_SERVICE_POOL_SIZE)
+COMMENTS_SERVICE_USER_CACHE_TIMEOUT = ENV_TOKENS.get(
+    "COMMENTS_SERVICE_USER_CACHE_TIMEOUT", COMMENTS_SERVICE_USER_CACHE_TIMEOUT
+)
+COMMENTS_SERVICE_COMMENTABLE_CACHE_TIMEOUT = ENV_TOKENS.get(
+    "COMMENTS_SERVICE_COMMENTABLE_CACHE_TIMEOUT", COMMENTS_SERVICE_COMMENTABLE_CACHE_TIMEOUT
+)
 CERT_QUEUE = ENV_TOKENS.get("CERT_QUEUE", 'test-pull')
 ZENDESK_URL = ENV_TOKENS.get("ZENDESK_URL")
 FEEDBACK_SUBMISSION_EMAIL = ENV_TOKENS.get("FEEDBACK_SUBMISSION_EMAIL")
@@ -295,6 +322,7 @@ for name, value in ENV_TOKENS.get("CODE_JAIL", {}).items():
         CODE_JAIL[name] = value
 
 COURSES_WITH_UNSAFE_CODE = ENV_TOKENS.get("COURSES_WITH_UNSAFE_CODE", [])
+SAFE_EXEC_LOCAL_CACHE_SIZE = ENV_TOKENS.get("SAFE_EXEC_LOCAL_CACHE_SIZE", SAFE_EXEC_LOCAL_CACHE_SIZE)
 
 ASSET_IGNORE_REGEX = ENV_TOKENS.get('ASSET_IGNORE_REGEX', ASSET_IGNORE_REGEX)
 
@@ -436,6 +464,15 @@ XQUEUE_INTERFACE = AUTH_TOKENS['XQUEUE_INTERFACE']
 # Get the MODULESTORE from auth.json, but if it doesn't exist,
 # use the one from common.py
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
+XML_MODULESTORE_LAZY = ENV_TOKENS.get('XML_MODULESTORE_LAZY', XML_MODULESTORE_LAZY)
+XML_MODULESTORE_INDEX_CACHE_DIR = ENV_TOKENS.get('XML_MODULESTORE_INDEX_CACHE_DIR', XML_MODULESTORE_INDEX_CACHE_DIR)
+update_module_store_settings(
+    MODULESTORE,
+    xml_store_options={
+        'lazy': XML_MODULESTORE_LAZY,
+        'index_cache_dir': XML_MODULESTORE_INDEX_CACHE_DIR,
+    },
+)
 CONTENTSTORE = AUTH_TOKENS.get('CONTENTSTORE', CONTENTSTORE)
 DOC_STORE_CONFIG = AUTH_TOKENS.get('DOC_STORE_CONFIG', DOC_STORE_CONFIG)
 MONGODB_LOG = AUTH_TOKENS.get('MONGODB_LOG', {})
@@ -519,6 +556,12 @@ GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
 # financial reports
 FINANCIAL_REPORTS = ENV_TOKENS.get("FINANCIAL_REPORTS", FINANCIAL_REPORTS)
 
+# Bulk rescoring
+BULK_RESCORE = ENV_TOKENS.get("BULK_RESCORE", BULK_RESCORE)
+
+# Courseware TOC cache
+COURSEWARE_TOC_CACHE_TIMEOUT = ENV_TOKENS.get("COURSEWARE_TOC_CACHE_TIMEOUT", COURSEWARE_TOC_CACHE_TIMEOUT)
+
 ##### ORA2 ######
 # Prefix for uploads of example-based assessment AI classifiers
 # This can be used to separate uploads for different environments
@@ -61,6 +61,21 @@ DISCUSSION_SETTINGS = {
     'MAX_COMMENT_DEPTH': 2,
 }
 
+# How many keep-alive connections to the comments service each process keeps
+# per host.  0 opens a new connection for every request.
+COMMENTS_SERVICE_POOL_SIZE = 10
+
+# How long, in seconds, users' comments service profiles are cached.  Changes
+# made through the user's own posts, follows and votes are seen right away;
+# others (e.g. deleted posts) may lag by this long.  0 disables the cache.
+COMMENTS_SERVICE_USER_CACHE_TIMEOUT = 0
+
+# How long, in seconds, the thread lists of commentables (e.g. inline
+# discussions) are cached.  Threads posted, edited or deleted in a commentable
+# are seen right away; others (e.g. comment counts and read state) may lag by
+# this long.  0 disables the cache.
+COMMENTS_SERVICE_COMMENTABLE_CACHE_TIMEOUT = 0
+
 
 # Features
 FEATURES = {
@@ -199,6 +214,18 @@ FEATURES = {
     # Enable instructor dash to submit background tasks
     'ENABLE_INSTRUCTOR_BACKGROUND_TASKS': True,
 
+    # Rescore problems by re-grading stored answers in bulk (see BULK_RESCORE)
+    # rather than binding a module for each student.
+    'ENABLE_BULK_RESCORE': False,
+
+    # Record the time, queries, cache lookups and memory used by instructor
+    # tasks, and show them on the instructor dashboard.
+    'ENABLE_INSTRUCTOR_TASK_PROFILING': False,
+
+    # Cache each student's courseware table of contents between requests
+    # (see COURSEWARE_TOC_CACHE_TIMEOUT).
+    'ENABLE_COURSEWARE_TOC_CACHE': False,
+
     # Enable instructor to assign individual due dates
     # Note: In order for this feature to work, you must also add
     # 'courseware.student_field_overrides.IndividualStudentOverrideProvider' to
@@ -719,6 +746,12 @@ DOC_STORE_CONFIG = {
     # as the collection name for asset metadata.
     # Otherwise, a default collection name will be used.
 }
+# Have the XML modulestore read only the root file of each course at startup, and
+# load the rest of a course the first time it is used.
+XML_MODULESTORE_LAZY = True
+# A directory in which the XML modulestore keeps its index of courses between restarts,
+# so that unchanged courses aren't read at all at startup.  None keeps no index.
+XML_MODULESTORE_INDEX_CACHE_DIR = None
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -751,6 +784,8 @@ MODULESTORE = {
                     'OPTIONS': {
                         'data_dir': DATA_DIR,
                         'default_class': 'xmodule.hidden_module.HiddenDescriptor',
+                        'lazy': XML_MODULESTORE_LAZY,
+                        'index_cache_dir': XML_MODULESTORE_INDEX_CACHE_DIR,
                     }
                 }
             ]
@@ -771,6 +806,12 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # How many warm sandbox workers to keep per process.  0 means run every
+    # execution in a fresh codejail process.
+    'pool_size': 0,
+    # How many executions a sandbox worker runs before it is replaced.
+    'pool_max_uses': 100,
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -783,6 +824,10 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# How many sandboxed execution results each process keeps in memory, in front
+# of the shared cache.
+SAFE_EXEC_LOCAL_CACHE_SIZE = 2000
+
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -2202,6 +2247,20 @@ BADGR_API_TOKEN = None
 BADGR_BASE_URL = "http://localhost:8005"
 BADGR_ISSUER_SLUG = "example-issuer"
 
+############################ Instructor Tasks #################################
+
+# Rescoring, resetting attempts for, or deleting the state of a problem for
+# more student modules than this, or building a grade or detailed enrollment
+# report on more students than this, splits the work into subtasks of this
+# size, which run in parallel on the workers and record their progress
+# separately.  Set to 0 to always do the work in a single task.
+INSTRUCTOR_TASK_ITEMS_PER_SUBTASK = 1000
+
+# Delay in seconds before a subtask that failed unexpectedly is retried from
+# where it stopped, and the number of times it is retried.
+INSTRUCTOR_TASK_SUBTASK_RETRY_DELAY = 30
+INSTRUCTOR_TASK_SUBTASK_MAX_RETRIES = 3
+
 ###################### Grade Downloads ######################
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
@@ -2217,6 +2276,46 @@ FINANCIAL_REPORTS = {
     'ROOT_PATH': '/tmp/edx-s3/financial_reports',
 }
 
+###################### Bulk Rescoring ######################
+# Used when FEATURES['ENABLE_BULK_RESCORE'] is set.
+BULK_RESCORE = {
+    # How many student modules are rescored and saved per transaction.
+    'CHUNK_SIZE': 100,
+    # How many worker processes grade answers in parallel.  With fewer than
+    # two, answers are graded in the task's own process.
+    'PROCESSES': 0,
+}
+
+###################### Courseware TOC cache ######################
+# Longest time, in seconds, a student's cached table of contents is kept.
+# Used when FEATURES['ENABLE_COURSEWARE_TOC_CACHE'] is set.
+COURSEWARE_TOC_CACHE_TIMEOUT = 60 * 60
+
+###################### Configuration models ######################
+# Seconds for which each process reuses the configuration models it has read
+# before checking whether they have been changed.  0 reads them from the
+# 'configuration' cache every time (once per request, within a request).
+CONFIG_MODEL_PROCESS_CACHE_TIMEOUT = 0
+
+###################### Enrollment state cache ######################
+# Seconds for which whether a student is enrolled in a course is kept in the
+# shared cache.  Saving an enrollment clears it; updating enrollments in bulk
+# doesn't, so keep this short.  0 only caches it for the current request.
+COURSE_ENROLLMENT_CACHE_TIMEOUT = 60
+
+###################### Certificates cache ######################
+# Seconds for which a student's certificates, the certificate template of each
+# course and mode, and the context of rendered web certificates are cached.
+# Changes to certificates and templates clear them.  0 disables caching.
+CERTIFICATES_CACHE_TIMEOUT = 60 * 60
+# Seconds for which browsers may reuse a rendered web certificate.
+CERTIFICATE_WEB_VIEW_MAX_AGE = 5 * 60
+
+###################### Verification status cache ######################
+# Seconds for which students' identity verification statuses are cached.
+# Saving a verification attempt clears them.  0 disables caching.
+VERIFICATION_STATUS_CACHE_TIMEOUT = 60
+
 
 #### PASSWORD POLICY SETTINGS #####
 PASSWORD_MIN_LENGTH = 8
@@ -39,6 +39,9 @@ for endpoint, value in ENV_LABSTER_ENDPOINTS.items():
 
 LABSTER_DEFAULT_LTI_ID = LABSTER_SETTINGS.get('LABSTER_DEFAULT_LTI_ID', 'MC')
 
+# Batching of voucher activations, see labster_vouchers.tasks.DEFAULT_ACTIVATION_SETTINGS
+LABSTER_VOUCHER_ACTIVATION = LABSTER_SETTINGS.get('LABSTER_VOUCHER_ACTIVATION', {})
+
 # Sentry integration config
 RAVEN_CONFIG = AUTH_TOKENS.get('RAVEN_CONFIG', {})
 if RAVEN_CONFIG.get('dsn'):
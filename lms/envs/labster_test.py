@@ -10,6 +10,7 @@ LABSTER_FEATURES = {
 
 INSTALLED_APPS += (
     'labster_course_license',
+    'labster_vouchers',
 )
 
 LABSTER_WIKI_LINK = 'https://theory.labster.com/'
@@ -24,3 +25,10 @@ LABSTER_ENDPOINTS = {
 }
 
 LABSTER_DEFAULT_LTI_ID = 'MC'
+
+# Send voucher activations one at a time, right away.
+LABSTER_VOUCHER_ACTIVATION = {
+    'BATCH_DELAY': 0,
+    'CONCURRENCY': 1,
+    'BACKOFF': 0,
+}
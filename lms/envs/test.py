@@ -53,6 +53,16 @@ FEATURES['DISABLE_START_DATES'] = True
 # the one in cms/envs/test.py
 FEATURES['ENABLE_DISCUSSION_SERVICE'] = False
 
+# Tests mock out `requests.request` to fake the comments service, so don't
+# send comments service calls through a pooled session.
+COMMENTS_SERVICE_POOL_SIZE = 0
+
+# The cache outlives the test database, so a user id reused by a later test
+# would see an earlier test's enrollments.
+COURSE_ENROLLMENT_CACHE_TIMEOUT = 0
+CERTIFICATES_CACHE_TIMEOUT = 0
+VERIFICATION_STATUS_CACHE_TIMEOUT = 0
+
 FEATURES['ENABLE_SERVICE_STATUS'] = True
 
 FEATURES['ENABLE_HINTER_INSTRUCTOR_VIEW'] = True
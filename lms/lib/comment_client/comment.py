@@ -1,6 +1,7 @@
 from .utils import CommentClientRequestError, perform_request
 
 from .thread import Thread, _url_for_flag_abuse_thread, _url_for_unflag_abuse_thread
+from .user import User
 from lms.lib.comment_client import models
 from lms.lib.comment_client import settings
 
@@ -49,6 +50,12 @@ class Comment(models.Model):
         else:
             return super(Comment, cls).url(action, params)
 
+    @classmethod
+    def after_save(cls, instance):
+        # The author's profile counts their comments.
+        if instance.attributes.get('user_id'):
+            User(id=instance.attributes['user_id']).invalidate_cache()
+
     def flagAbuse(self, user, voteable):
         if voteable.type == 'thread':
             url = _url_for_flag_abuse_thread(voteable.id)
@@ -4,3 +4,4 @@ from .comment import Comment
 from .thread import Thread
 from .user import User
 from .commentable import Commentable
+from .models import retrieve_many
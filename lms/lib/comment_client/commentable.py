@@ -1,6 +1,9 @@
 """Provides base Commentable model class"""
+from django.conf import settings as django_settings
+
 from lms.lib.comment_client import models
 from lms.lib.comment_client import settings
+from lms.lib.comment_client.utils import bump_cache_version, get_cache_version
 
 
 class Commentable(models.Model):
@@ -17,3 +20,20 @@ class Commentable(models.Model):
         self.attributes["commentable_id"] = self.attributes["id"]
         self.retrieved = True
         return self
+
+    def _cache_version_key(self):
+        return u"comment_client.commentable.{}.cache_version".format(self.id)
+
+    def cache_version(self):
+        """
+        Return the version of this commentable's cached thread lists.
+        """
+        return get_cache_version(self._cache_version_key())
+
+    def invalidate_cache(self):
+        """
+        Forget this commentable's cached thread lists (see
+        COMMENTS_SERVICE_COMMENTABLE_CACHE_TIMEOUT).
+        """
+        if getattr(django_settings, "COMMENTS_SERVICE_COMMENTABLE_CACHE_TIMEOUT", 0):
+            bump_cache_version(self._cache_version_key())
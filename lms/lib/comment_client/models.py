@@ -1,6 +1,6 @@
 import logging
 
-from .utils import extract, perform_request, CommentClientRequestError
+from .utils import extract, perform_request, perform_requests, CommentClientRequestError
 
 
 log = logging.getLogger(__name__)
@@ -67,16 +67,21 @@ class Model(object):
         return self
 
     def _retrieve(self, *args, **kwargs):
-        url = self.url(action='get', params=self.attributes)
-        response = perform_request(
-            'get',
-            url,
-            self.default_retrieve_params,
-            metric_tags=self._metric_tags,
-            metric_action='model.retrieve'
-        )
+        response = perform_request(**self._retrieve_call(*args, **kwargs))
         self._update_from_response(response)
 
+    def _retrieve_call(self, *args, **kwargs):
+        """
+        Return the `perform_request` keyword arguments that retrieve this model.
+        """
+        return {
+            'method': 'get',
+            'url': self.url(action='get', params=self.attributes),
+            'data_or_params': self.default_retrieve_params,
+            'metric_tags': self._metric_tags,
+            'metric_action': 'model.retrieve',
+        }
+
     @property
     def _metric_tags(self):
         """
@@ -175,3 +180,29 @@ class Model(object):
                 raise CommentClientRequestError("Cannot perform action {0} without id".format(action))
         else:   # action must be in DEFAULT_ACTIONS_WITHOUT_ID now
             return cls.url_without_id()
+
+
+def retrieve_many(*retrievals):
+    """
+    Retrieve several models from the comments service concurrently.
+
+    Each of `retrievals` is a model, or a (model, retrieve kwargs) pair.  If
+    any of the requests fail, the models are retrieved one by one instead, so
+    that each raises or recovers as its own `retrieve` would.
+    """
+    # pylint: disable=protected-access
+    retrievals = [
+        retrieval if isinstance(retrieval, tuple) else (retrieval, {})
+        for retrieval in retrievals
+    ]
+    pending = [(model, kwargs) for model, kwargs in retrievals if not model.retrieved]
+    try:
+        responses = perform_requests([model._retrieve_call(**kwargs) for model, kwargs in pending])
+    except CommentClientRequestError:
+        for model, kwargs in pending:
+            model.retrieve(**kwargs)
+    else:
+        for (model, __), response in zip(pending, responses):
+            model._update_from_response(response)
+            model.retrieved = True
+    return [model for model, __ in retrievals]
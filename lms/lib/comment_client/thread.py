@@ -1,8 +1,11 @@
 import logging
 
+from django.conf import settings as django_settings
 from eventtracking import tracker
 from .utils import merge_dict, strip_blank, strip_none, extract, perform_request
 from .utils import CommentClientRequestError
+from .commentable import Commentable
+from .user import User
 import models
 import settings
 
@@ -51,19 +54,24 @@ class Thread(models.Model):
                           'recursive': False}
         params = merge_dict(default_params, strip_blank(strip_none(query_params)))
 
+        cache_timeout = cache_version = None
         if query_params.get('text'):
             url = cls.url(action='search')
         else:
             url = cls.url(action='get_all', params=extract(params, 'commentable_id'))
             if params.get('commentable_id'):
-                del params['commentable_id']
+                commentable = Commentable(id=params.pop('commentable_id'))
+                cache_timeout = getattr(django_settings, "COMMENTS_SERVICE_COMMENTABLE_CACHE_TIMEOUT", 0)
+                cache_version = commentable.cache_version() if cache_timeout else None
         response = perform_request(
             'get',
             url,
             params,
             metric_tags=[u'course_id:{}'.format(query_params['course_id'])],
             metric_action='thread.search',
-            paged_results=True
+            paged_results=True,
+            cache_timeout=cache_timeout,
+            cache_version=cache_version,
         )
         if query_params.get('text'):
             search_query = query_params['text']
@@ -117,11 +125,23 @@ class Thread(models.Model):
         else:
             return super(Thread, cls).url(action, params)
 
-    # TODO: This is currently overriding Model._retrieve only to add parameters
-    # for the request. Model._retrieve should be modified to handle this such
-    # that subclasses don't need to override for this.
-    def _retrieve(self, *args, **kwargs):
-        url = self.url(action='get', params=self.attributes)
+    @classmethod
+    def after_save(cls, instance):
+        # The author's profile counts their threads and follows the ones they start.
+        if instance.attributes.get('user_id'):
+            User(id=instance.attributes['user_id']).invalidate_cache()
+        # The thread's commentable lists it.
+        if instance.attributes.get('commentable_id'):
+            Commentable(id=instance.attributes['commentable_id']).invalidate_cache()
+
+    def delete(self):
+        super(Thread, self).delete()
+        self.after_save(self)
+
+    # TODO: This is currently overriding Model._retrieve_call only to add
+    # parameters for the request. Model._retrieve_call should be modified to
+    # handle this such that subclasses don't need to override for this.
+    def _retrieve_call(self, *args, **kwargs):
         request_params = {
             'recursive': kwargs.get('recursive'),
             'user_id': kwargs.get('user_id'),
@@ -131,14 +151,13 @@ class Thread(models.Model):
         }
         request_params = strip_none(request_params)
 
-        response = perform_request(
-            'get',
-            url,
-            request_params,
-            metric_action='model.retrieve',
-            metric_tags=self._metric_tags
-        )
-        self._update_from_response(response)
+        return {
+            'method': 'get',
+            'url': self.url(action='get', params=self.attributes),
+            'data_or_params': request_params,
+            'metric_action': 'model.retrieve',
+            'metric_tags': self._metric_tags,
+        }
 
     def flagAbuse(self, user, voteable):
         if voteable.type == 'thread':
@@ -1,4 +1,7 @@
+from django.conf import settings as django_settings
+
 from .utils import merge_dict, perform_request, CommentClientRequestError
+from .utils import bump_cache_version, get_cache_version
 
 import models
 import settings
@@ -38,6 +41,7 @@ class User(models.Model):
             metric_action='user.follow',
             metric_tags=self._metric_tags + ['target.type:{}'.format(source.type)],
         )
+        self.invalidate_cache()
 
     def unfollow(self, source):
         params = {'source_type': source.type, 'source_id': source.id}
@@ -48,6 +52,7 @@ class User(models.Model):
             metric_action='user.unfollow',
             metric_tags=self._metric_tags + ['target.type:{}'.format(source.type)],
         )
+        self.invalidate_cache()
 
     def vote(self, voteable, value):
         if voteable.type == 'thread':
@@ -65,6 +70,7 @@ class User(models.Model):
             metric_tags=self._metric_tags + ['target.type:{}'.format(voteable.type)],
         )
         voteable._update_from_response(response)
+        self.invalidate_cache()
 
     def unvote(self, voteable):
         if voteable.type == 'thread':
@@ -82,6 +88,7 @@ class User(models.Model):
             metric_tags=self._metric_tags + ['target.type:{}'.format(voteable.type)],
         )
         voteable._update_from_response(response)
+        self.invalidate_cache()
 
     def active_threads(self, query_params={}):
         if not self.course_id:
@@ -115,34 +122,56 @@ class User(models.Model):
         )
         return response.get('collection', []), response.get('page', 1), response.get('num_pages', 1)
 
-    def _retrieve(self, *args, **kwargs):
-        url = self.url(action='get', params=self.attributes)
+    def _cache_version_key(self):
+        return u"comment_client.user.{}.cache_version".format(self.id)
+
+    def _cache_version(self):
+        """
+        Return the version of this user's cached data, starting a new one if
+        there is none, so that a lost version never matches responses cached
+        under an earlier one.
+        """
+        return get_cache_version(self._cache_version_key())
+
+    def invalidate_cache(self):
+        """
+        Forget this user's cached data (see COMMENTS_SERVICE_USER_CACHE_TIMEOUT).
+        """
+        if getattr(django_settings, "COMMENTS_SERVICE_USER_CACHE_TIMEOUT", 0):
+            bump_cache_version(self._cache_version_key())
+
+    @classmethod
+    def after_save(cls, instance):
+        instance.invalidate_cache()
+
+    def _retrieve_call(self, *args, **kwargs):
+        cache_timeout = getattr(django_settings, "COMMENTS_SERVICE_USER_CACHE_TIMEOUT", 0)
         retrieve_params = self.default_retrieve_params.copy()
         retrieve_params.update(kwargs)
         if self.attributes.get('course_id'):
             retrieve_params['course_id'] = self.course_id.to_deprecated_string()
         if self.attributes.get('group_id'):
             retrieve_params['group_id'] = self.group_id
+        return {
+            'method': 'get',
+            'url': self.url(action='get', params=self.attributes),
+            'data_or_params': retrieve_params,
+            'metric_action': 'model.retrieve',
+            'metric_tags': self._metric_tags,
+            'cache_timeout': cache_timeout,
+            'cache_version': self._cache_version() if cache_timeout else None,
+        }
+
+    def _retrieve(self, *args, **kwargs):
         try:
-            response = perform_request(
-                'get',
-                url,
-                retrieve_params,
-                metric_action='model.retrieve',
-                metric_tags=self._metric_tags,
-            )
+            response = perform_request(**self._retrieve_call(*args, **kwargs))
         except CommentClientRequestError as e:
             if e.status_code == 404:
                 # attempt to gracefully recover from a previous failure
                 # to sync this user to the comments service.
                 self.save()
-                response = perform_request(
-                    'get',
-                    url,
-                    retrieve_params,
-                    metric_action='model.retrieve',
-                    metric_tags=self._metric_tags,
-                )
+                call = self._retrieve_call(*args, **kwargs)
+                response = perform_request(**dict(call, cache_timeout=None, cache_version=None))
             else:
                 raise
         self._update_from_response(response)
@@ -1,14 +1,29 @@
 from contextlib import contextmanager
+from cookielib import DefaultCookiePolicy
 import dogstats_wrapper as dog_stats_api
+import hashlib
+import json
 import logging
+import os
 import requests
+import threading
 from django.conf import settings
+from django.core.cache import cache
+from multiprocessing.pool import ThreadPool
 from time import time
 from uuid import uuid4
 from django.utils.translation import get_language
 
 log = logging.getLogger(__name__)
 
+_SESSION = None
+_SESSION_PID = None
+_SESSION_LOCK = threading.Lock()
+
+# How long, in seconds, cache versions are kept.  Much longer than any
+# response is cached for, and the longest relative timeout memcached accepts.
+CACHE_VERSION_TIMEOUT = 60 * 60 * 24 * 30
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -50,9 +65,74 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
+def get_session():
+    """
+    Return the `requests.Session` that keeps connections to the comments
+    service alive between requests, or None if
+    settings.COMMENTS_SERVICE_POOL_SIZE is not set.
+
+    The session keeps up to COMMENTS_SERVICE_POOL_SIZE connections per host.
+    Each process gets its own session, since connections can't be shared
+    across a fork.
+    """
+    global _SESSION, _SESSION_PID  # pylint: disable=global-statement
+    pool_size = getattr(settings, "COMMENTS_SERVICE_POOL_SIZE", 0)
+    if not pool_size:
+        return None
+
+    with _SESSION_LOCK:
+        if _SESSION is None or _SESSION_PID != os.getpid():
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            # The session is shared by all users, so never keep cookies.
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            _SESSION, _SESSION_PID = session, os.getpid()
+        return _SESSION
+
+
+def _response_cache_key(url, params, language, raw):
+    """
+    Return the cache key for the response to a GET request.
+    """
+    request_hash = hashlib.md5(
+        json.dumps([url, params, language, raw], sort_keys=True, default=unicode)
+    ).hexdigest()
+    return u"comment_client.response.{}".format(request_hash)
+
+
+def get_cache_version(key):
+    """
+    Return the cache version stored under `key`, starting a new one if there
+    is none, so that a lost version never matches responses cached under an
+    earlier one.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, CACHE_VERSION_TIMEOUT)
+        version = cache.get(key) or uuid4().hex
+    return version
+
+
+def bump_cache_version(key):
+    """
+    Start a new cache version under `key`, invalidating the responses cached
+    under the old one.
+    """
+    cache.set(key, uuid4().hex, CACHE_VERSION_TIMEOUT)
+
+
 def perform_request(method, url, data_or_params=None, raw=False,
-                    metric_action=None, metric_tags=None, paged_results=False):
+                    metric_action=None, metric_tags=None, paged_results=False,
+                    cache_timeout=None, cache_version=None, language=None):
+    """
+    Make a request to the comments service, and return its decoded response.
 
+    GET responses are cached for `cache_timeout` seconds, if given, under
+    `cache_version` (bump it to invalidate them).  Requests are sent in
+    `language`, or the current language.
+    """
     if metric_tags is None:
         metric_tags = []
 
@@ -64,8 +144,17 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data_or_params = {}
     headers = {
         'X-Edx-Api-Key': getattr(settings, "COMMENTS_SERVICE_KEY", None),
-        'Accept-Language': get_language(),
+        'Accept-Language': language or get_language(),
     }
+
+    cache_key = None
+    if cache_timeout and method == 'get':
+        cache_key = _response_cache_key(url, data_or_params, headers['Accept-Language'], raw)
+        cached_response = cache.get(cache_key, version=cache_version)
+        if cached_response is not None:
+            dog_stats_api.increment('comment_client.request.cached', tags=metric_tags)
+            return cached_response
+
     request_id = uuid4()
     request_id_dict = {'request_id': request_id}
 
@@ -76,7 +165,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = (get_session() or requests).request(
             method,
             url,
             data=data,
@@ -102,7 +191,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         raise CommentClient500Error(response.text)
     else:
         if raw:
-            return response.text
+            data = response.text
         else:
             try:
                 data = response.json()
@@ -129,7 +218,32 @@ def perform_request(method, url, data_or_params=None, raw=False,
                     value=data.get('num_pages', 1),
                     tags=metric_tags
                 )
-            return data
+        if cache_key:
+            cache.set(cache_key, data, cache_timeout, version=cache_version)
+        return data
+
+
+def perform_requests(calls):
+    """
+    Make several requests to the comments service concurrently.
+
+    `calls` is a list of dicts of `perform_request` keyword arguments.
+    Returns the list of their results, in the same order.  If any of the
+    requests fail, raises the exception of the first one that did.
+    """
+    # Requests are made from other threads, which don't share our language.
+    language = get_language()
+    calls = [dict({'language': language}, **call) for call in calls]
+    workers = min(len(calls), getattr(settings, "COMMENTS_SERVICE_POOL_SIZE", 0))
+    if workers < 2:
+        return [perform_request(**call) for call in calls]
+
+    pool = ThreadPool(workers)
+    try:
+        return pool.map(lambda call: perform_request(**call), calls)
+    finally:
+        pool.close()
+        pool.join()
 
 
 class CommentClientError(Exception):
@@ -41,6 +41,9 @@ def run():
     if settings.FEATURES.get('ENABLE_THIRD_PARTY_AUTH', False):
         enable_third_party_auth()
 
+    if settings.CODE_JAIL.get('pool_size'):
+        configure_safe_exec_pool()
+
     # Initialize Segment analytics module by setting the write_key.
     if settings.LMS_SEGMENT_KEY:
         analytics.write_key = settings.LMS_SEGMENT_KEY
@@ -66,6 +69,14 @@ def run():
     xmodule.x_module.descriptor_global_local_resource_url = lms_xblock.runtime.local_resource_url
 
 
+def configure_safe_exec_pool():
+    """
+    Keep a pool of warm sandbox workers for capa problem code.
+    """
+    from capa.safe_exec import configure_pool
+    configure_pool(settings.CODE_JAIL['pool_size'], settings.CODE_JAIL.get('pool_max_uses', 100))
+
+
 def add_mimetypes():
     """
     Add extra mimetypes. Used in xblock_resource.
@@ -2,9 +2,11 @@
 Command to load course overviews.
 """
 import logging
+from multiprocessing.pool import ThreadPool
 from optparse import make_option
 
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
 from xmodule.modulestore.django import modulestore
@@ -15,11 +17,37 @@ from openedx.core.djangoapps.content.course_overviews.models import CourseOvervi
 log = logging.getLogger(__name__)
 
 
+def generate_course_overview(course_key):
+    """
+    Load the course overview of a course, generating it if it is missing or
+    out of date, and log any error.
+    """
+    try:
+        CourseOverview.get_from_id(course_key)
+    except Exception as ex:  # pylint: disable=broad-except
+        log.exception('An error occurred while generating course overview for %s: %s', unicode(
+            course_key), ex.message)
+
+
+def generate_course_overview_in_thread(course_key):
+    """
+    Generate a course overview from a worker thread, which has its own
+    database connection.
+    """
+    try:
+        generate_course_overview(course_key)
+    finally:
+        connection.close()
+
+
 class Command(BaseCommand):
     """
     Example usage:
         $ ./manage.py lms generate_course_overview --all --settings=devstack
         $ ./manage.py lms generate_course_overview 'edX/DemoX/Demo_Course' --settings=devstack
+
+    To warm the overviews of all courses after a deployment, several at a time:
+        $ ./manage.py lms generate_course_overview --all --workers=8 --settings=aws
     """
     args = '<course_id course_id ...>'
     help = 'Generates and stores course overview for one or more courses.'
@@ -29,6 +57,12 @@ class Command(BaseCommand):
                     action='store_true',
                     default=False,
                     help='Generate course overview for all courses.'),
+        make_option('--workers',
+                    action='store',
+                    dest='workers',
+                    type='int',
+                    default=1,
+                    help='Number of course overviews generated at the same time (default: 1).'),
     )
 
     def handle(self, *args, **options):
@@ -50,11 +84,16 @@ class Command(BaseCommand):
         log.info('Generating course overview for %d courses.', len(course_keys))
         log.debug('Generating course overview(s) for the following courses: %s', course_keys)
 
-        for course_key in course_keys:
+        workers = options.get('workers', 1)
+        if workers > 1:
+            pool = ThreadPool(workers)
             try:
-                CourseOverview.get_from_id(course_key)
-            except Exception as ex:  # pylint: disable=broad-except
-                log.exception('An error occurred while generating course overview for %s: %s', unicode(
-                    course_key), ex.message)
+                pool.map(generate_course_overview_in_thread, course_keys)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for course_key in course_keys:
+                generate_course_overview(course_key)
 
         log.info('Finished generating course overviews.')
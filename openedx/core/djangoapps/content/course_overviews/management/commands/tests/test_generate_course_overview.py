@@ -56,6 +56,22 @@ class TestGenerateCourseOverview(ModuleStoreTestCase):
         self._assert_courses_in_overview(self.course_key_1)
         self._assert_courses_not_in_overview(self.course_key_2)
 
+    @patch('openedx.core.djangoapps.content.course_overviews.management.commands.generate_course_overview.ThreadPool')
+    def test_generate_with_workers(self, mock_pool_class):
+        """
+        Test that course overviews are generated by a pool of workers.
+        """
+        mock_pool = mock_pool_class.return_value
+        # The workers' own database connections can't see the test's data, so run them here.
+        mock_pool.map.side_effect = lambda func, keys: [
+            generate_course_overview.generate_course_overview(key) for key in keys
+        ]
+        self.command.handle(all=True, workers=4)
+
+        mock_pool_class.assert_called_once_with(4)
+        self._assert_courses_in_overview(self.course_key_1, self.course_key_2)
+        self.assertTrue(mock_pool.join.called)
+
     @patch('openedx.core.djangoapps.content.course_overviews.management.commands.generate_course_overview.log')
     def test_invalid_key(self, mock_log):
         """
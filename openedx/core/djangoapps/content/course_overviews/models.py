@@ -2,6 +2,9 @@
 Declaration of CourseOverview model
 """
 import json
+import logging
+
+from django.core.cache import cache
 from django.db import models
 
 from django.db.models.fields import BooleanField, DateTimeField, DecimalField, TextField, FloatField, IntegerField
@@ -22,6 +25,12 @@ from xmodule_django.models import CourseKeyField, UsageKeyField
 from ccx_keys.locator import CCXLocator
 
 
+log = logging.getLogger(__name__)
+
+# Seconds for which a stale overview isn't queued for regeneration again.
+REGENERATION_QUEUED_TIMEOUT = 5 * 60
+
+
 class CourseOverview(TimeStampedModel):
     """
     Model for storing and caching basic information about a course.
@@ -234,6 +243,47 @@ class CourseOverview(TimeStampedModel):
             course_overview = None
         return course_overview or cls.load_from_module_store(course_id)
 
+    @classmethod
+    def get_from_ids(cls, course_ids):
+        """
+        Load the CourseOverview objects for many course IDs at once.
+
+        The overviews and their tabs are loaded from the database with two
+        queries.  Overviews of an older version are returned as they are,
+        rather than being regenerated while the caller waits, and are queued
+        to be regenerated in the background.  Overviews that don't exist yet
+        are loaded from the module store, as `get_from_id` does.
+
+        Arguments:
+            course_ids (iterable[CourseKey]): the IDs of the course overviews
+                to be loaded.
+
+        Returns:
+            dict[CourseKey, CourseOverview]: overview of each requested
+                course, or None for courses that couldn't be loaded.
+        """
+        # Import here to avoid a circular import.
+        from .tasks import regenerate_course_overview
+
+        course_ids = set(course_ids)
+        course_overviews = {
+            course_overview.id: course_overview
+            for course_overview in cls.objects.filter(id__in=course_ids).prefetch_related('tabs')
+        }
+        for course_id in course_ids:
+            course_overview = course_overviews.get(course_id)
+            if course_overview is None:
+                try:
+                    course_overviews[course_id] = cls.load_from_module_store(course_id)
+                except (cls.DoesNotExist, IOError):
+                    log.warning("Could not load the course overview of %s", course_id, exc_info=True)
+                    course_overviews[course_id] = None
+            elif course_overview.version < cls.VERSION:
+                queued_key = u'course_overviews.regeneration_queued.{}'.format(course_id)
+                if cache.add(queued_key, True, REGENERATION_QUEUED_TIMEOUT):
+                    regenerate_course_overview.apply_async([unicode(course_id)], countdown=0)
+        return course_overviews
+
     def clean_id(self, padding_char='='):
         """
         Returns a unique deterministic base32-encoded ID for the course.
@@ -12,9 +12,16 @@ def _listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable
     """
     Catches the signal that a course has been published in Studio and
     updates the corresponding CourseOverview cache entry.
+
+    The overview is regenerated by a task rather than while Studio waits;
+    until the task has run, the old overview is served.
     """
-    CourseOverview.objects.filter(id=course_key).delete()
-    CourseOverview.load_from_module_store(course_key)
+    # Import tasks here to avoid a circular import.
+    from .tasks import regenerate_course_overview
+
+    # Note: The countdown=0 kwarg ensures the task does not access the course before the signal emitter has
+    # finished all operations.
+    regenerate_course_overview.apply_async([unicode(course_key)], countdown=0)
 
 
 @receiver(SignalHandler.course_deleted)
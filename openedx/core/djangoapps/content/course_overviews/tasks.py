@@ -0,0 +1,36 @@
+"""
+Asynchronous tasks related to the Course Overviews sub-application
+"""
+import logging
+
+from celery.task import task
+from django.db import transaction
+from opaque_keys.edx.keys import CourseKey
+
+
+log = logging.getLogger('edx.celery.task')
+
+
+@task(name=u'openedx.core.djangoapps.content.course_overviews.tasks.regenerate_course_overview')
+def regenerate_course_overview(course_key):
+    """
+    Regenerates the course overview (in the database) for the specified course.
+
+    The old overview is replaced in a single transaction, so it is served
+    until the new one is ready.
+    """
+    # Import here to avoid circular import.
+    from .models import CourseOverview
+
+    # Callers pass the course key as a Unicode string, since Celery can't serialize a CourseLocator.
+    if not isinstance(course_key, basestring):
+        raise ValueError('course_key must be a string. {} is not acceptable.'.format(type(course_key)))
+
+    course_key = CourseKey.from_string(course_key)
+
+    with transaction.commit_on_success():
+        CourseOverview.objects.filter(id=course_key).delete()
+        try:
+            CourseOverview.load_from_module_store(course_key)
+        except CourseOverview.DoesNotExist:
+            log.info('Course %s no longer exists, so its course overview was removed.', unicode(course_key))
@@ -407,3 +407,64 @@ class CourseOverviewTestCase(ModuleStoreTestCase):
             # knows how to write, it's not going to overwrite what's there.
             unmodified_overview = CourseOverview.get_from_id(course.id)
             self.assertEqual(unmodified_overview.version, 11)
+
+    def test_get_from_ids(self):
+        """
+        Test that get_from_ids loads overviews and their tabs all at once.
+        """
+        courses = [CourseFactory.create() for __ in range(3)]
+        for course in courses:
+            CourseOverview.get_from_id(course.id)
+
+        with self.assertNumQueries(2):
+            with check_mongo_calls(0):
+                course_overviews = CourseOverview.get_from_ids([course.id for course in courses])
+                for course in courses:
+                    tab_ids = {tab.tab_id for tab in course_overviews[course.id].tabs.all()}
+                    self.assertEqual(tab_ids, self.COURSE_OVERVIEW_TABS)
+
+    def test_get_from_ids_missing(self):
+        """
+        Test that get_from_ids loads missing overviews from the module store,
+        and returns None for courses that don't exist.
+        """
+        course = CourseFactory.create()
+        non_existent_key = self.store.make_course_key('Non', 'Existent', 'Course')
+
+        course_overviews = CourseOverview.get_from_ids([course.id, non_existent_key])
+        self.assertEqual(course_overviews[course.id].id, course.id)
+        self.assertIsNone(course_overviews[non_existent_key])
+        self.assertTrue(CourseOverview.objects.filter(id=course.id).exists())
+
+    @mock.patch('openedx.core.djangoapps.content.course_overviews.tasks.regenerate_course_overview.apply_async')
+    def test_get_from_ids_stale(self, mock_apply_async):
+        """
+        Test that get_from_ids returns overviews of an older version without
+        waiting for them to be regenerated, and queues them up once.
+        """
+        course = CourseFactory.create()
+        course_overview = CourseOverview.get_from_id(course.id)
+        course_overview.version = CourseOverview.VERSION - 1
+        course_overview.save()
+
+        for __ in range(2):
+            with check_mongo_calls(0):
+                course_overviews = CourseOverview.get_from_ids([course.id])
+            self.assertEqual(course_overviews[course.id].version, CourseOverview.VERSION - 1)
+        mock_apply_async.assert_called_once_with([unicode(course.id)], countdown=0)
+
+    def test_regenerate_course_overview(self):
+        """
+        Test that the regeneration task replaces an overview with a fresh one.
+        """
+        from .tasks import regenerate_course_overview
+
+        course = CourseFactory.create()
+        course_overview = CourseOverview.get_from_id(course.id)
+        course_overview.version = CourseOverview.VERSION - 1
+        course_overview.save()
+
+        regenerate_course_overview.apply([unicode(course.id)])
+        course_overview = CourseOverview.objects.get(id=course.id)
+        self.assertEqual(course_overview.version, CourseOverview.VERSION)
+        self.assertEqual({tab.tab_id for tab in course_overview.tabs.all()}, self.COURSE_OVERVIEW_TABS)
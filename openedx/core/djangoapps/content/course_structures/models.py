@@ -3,6 +3,8 @@ Django ORM model specifications for the Course Structures sub-application
 """
 import json
 import logging
+import threading
+import zlib
 
 from collections import OrderedDict
 from model_utils.models import TimeStampedModel
@@ -13,6 +15,71 @@ from xmodule_django.models import CourseKeyField, UsageKey
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
+# Maximum number of decoded course structures kept by each process
+PARSED_STRUCTURE_CACHE_SIZE = 20
+
+# (course_id, modified, checksum of structure_json) -> ParsedCourseStructure,
+# least recently used first
+_PARSED_STRUCTURE_CACHE = OrderedDict()
+_PARSED_STRUCTURE_CACHE_LOCK = threading.Lock()
+
+
+def serialize_structure(structure):
+    """
+    Serialize a course structure for `CourseStructure.structure_json`, as
+    compactly as possible.
+    """
+    return json.dumps(structure, separators=(',', ':'))
+
+
+class ParsedCourseStructure(object):
+    """
+    A decoded course structure, with its blocks in the order in which they're
+    seen in the courseware and each block's parent.
+
+    Instances are shared between callers, so they must not be modified.
+    """
+    def __init__(self, structure):
+        self.structure = structure
+        self.root = structure['root']
+        self.blocks = structure['blocks']
+        self.ordered_block_ids = []
+        self.parents = {}
+
+        # Walk the tree depth first, without recursing, since courses can be deep.
+        # Blocks with several parents keep their first position and their last parent.
+        seen = set()
+        stack = [(self.root, None)]
+        while stack:
+            block_id, parent = stack.pop()
+            if parent:
+                self.parents[block_id] = parent
+            if block_id not in seen:
+                seen.add(block_id)
+                self.ordered_block_ids.append(block_id)
+            children = self.blocks[block_id]['children']
+            stack.extend((child, block_id) for child in reversed(children))
+
+
+def get_parsed_structure(course_id, modified, structure_json):
+    """
+    Return the `ParsedCourseStructure` for `structure_json`, decoding it only
+    if it isn't in this process's cache already.
+    """
+    key = (course_id, modified, zlib.crc32(structure_json))
+    with _PARSED_STRUCTURE_CACHE_LOCK:
+        parsed = _PARSED_STRUCTURE_CACHE.pop(key, None)
+        if parsed is not None:
+            _PARSED_STRUCTURE_CACHE[key] = parsed
+            return parsed
+
+    parsed = ParsedCourseStructure(json.loads(structure_json))
+    with _PARSED_STRUCTURE_CACHE_LOCK:
+        _PARSED_STRUCTURE_CACHE[key] = parsed
+        while len(_PARSED_STRUCTURE_CACHE) > PARSED_STRUCTURE_CACHE_SIZE:
+            _PARSED_STRUCTURE_CACHE.popitem(last=False)
+    return parsed
+
 
 class CourseStructure(TimeStampedModel):
     """
@@ -30,13 +97,28 @@ class CourseStructure(TimeStampedModel):
     # JSON mapping of discussion ids to usage keys for the corresponding discussion modules
     discussion_id_map_json = CompressedTextField(verbose_name='Discussion ID Map JSON', blank=True, null=True)
 
+    @property
+    def parsed_structure(self):
+        """
+        Return the decoded course structure as a shared, read-only
+        `ParsedCourseStructure`, or None if there isn't one.
+        """
+        if self.structure_json:
+            structure_json = self.structure_json
+            if isinstance(structure_json, unicode):
+                structure_json = structure_json.encode('utf8')
+            return get_parsed_structure(self.course_id, self.modified, structure_json)
+        return None
+
     @property
     def structure(self):
         """
         Deserializes a course structure JSON object
         """
-        if self.structure_json:
-            return json.loads(self.structure_json)
+        parsed = self.parsed_structure
+        if parsed:
+            # Callers may replace the blocks, so give them their own copy.
+            return dict(parsed.structure, blocks=dict(parsed.blocks))
         return None
 
     @property
@@ -44,9 +126,13 @@ class CourseStructure(TimeStampedModel):
         """
         Return the blocks in the order with which they're seen in the courseware. Parents are ordered before children.
         """
-        if self.structure:
+        parsed = self.parsed_structure
+        if parsed:
             ordered_blocks = OrderedDict()
-            self._traverse_tree(self.structure['root'], self.structure['blocks'], ordered_blocks)
+            for block_id in parsed.ordered_block_ids:
+                block = ordered_blocks[block_id] = dict(parsed.blocks[block_id])
+                if block_id in parsed.parents:
+                    block['parent'] = parsed.parents[block_id]
             return ordered_blocks
 
     @property
@@ -61,19 +147,3 @@ class CourseStructure(TimeStampedModel):
                 result[discussion_id] = UsageKey.from_string(result[discussion_id]).map_into_course(self.course_id)
             return result
         return None
-
-    def _traverse_tree(self, block, unordered_structure, ordered_blocks, parent=None):
-        """
-        Traverses the tree and fills in the ordered_blocks OrderedDict with the blocks in
-        the order that they appear in the course.
-        """
-        # find the dictionary entry for the current node
-        cur_block = unordered_structure[block]
-
-        if parent:
-            cur_block['parent'] = parent
-
-        ordered_blocks[block] = cur_block
-
-        for child_node in cur_block['children']:
-            self._traverse_tree(child_node, unordered_structure, ordered_blocks, parent=block)
@@ -1,7 +1,6 @@
 """
 Asynchronous tasks related to the Course Structure sub-application
 """
-import json
 import logging
 
 from celery.task import task
@@ -66,7 +65,7 @@ def update_course_structure(course_key):
     Regenerates and updates the course structure (in the database) for the specified course.
     """
     # Import here to avoid circular import.
-    from .models import CourseStructure
+    from .models import CourseStructure, serialize_structure
 
     # Ideally we'd like to accept a CourseLocator; however, CourseLocator is not JSON-serializable (by default) so
     # Celery's delayed tasks fail to start. For this reason, callers should pass the course key as a Unicode string.
@@ -81,8 +80,8 @@ def update_course_structure(course_key):
         log.exception('An error occurred while generating course structure: %s', ex.message)
         raise
 
-    structure_json = json.dumps(structure['structure'])
-    discussion_id_map_json = json.dumps(structure['discussion_id_map'])
+    structure_json = serialize_structure(structure['structure'])
+    discussion_id_map_json = serialize_structure(structure['discussion_id_map'])
 
     structure_model, created = CourseStructure.objects.get_or_create(
         course_id=course_key,
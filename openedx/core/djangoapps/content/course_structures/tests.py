@@ -3,11 +3,15 @@ Course Structure Content sub-application test cases
 """
 import json
 
+import mock
+
 from xmodule_django.models import UsageKey
 from xmodule.modulestore.django import SignalHandler
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
-from openedx.core.djangoapps.content.course_structures.models import CourseStructure
+from openedx.core.djangoapps.content.course_structures.models import (
+    CourseStructure, get_parsed_structure, serialize_structure, PARSED_STRUCTURE_CACHE_SIZE
+)
 from openedx.core.djangoapps.content.course_structures.signals import listen_for_course_publish
 from openedx.core.djangoapps.content.course_structures.tasks import _generate_course_structure, update_course_structure
 
@@ -145,6 +149,45 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
         )
 
         self.assertEqual(retrieved_course_structure.ordered_blocks.keys(), in_order_blocks)
+        self.assertEqual(retrieved_course_structure.ordered_blocks['j/k/l']['parent'], 'g/h/i')
+        self.assertNotIn('parent', retrieved_course_structure.ordered_blocks['a/b/c'])
+        self.assertNotIn('parent', retrieved_course_structure.structure['blocks']['j/k/l'])
+
+    def test_structure_decoded_once(self):
+        """
+        The structure JSON is only decoded again when the structure changes.
+        """
+        structure = {
+            'root': 'a/b/c',
+            'blocks': {
+                'a/b/c': {'id': 'a/b/c', 'children': []}
+            }
+        }
+        cs = CourseStructure.objects.create(course_id=self.course.id, structure_json=serialize_structure(structure))
+        with mock.patch('openedx.core.djangoapps.content.course_structures.models.json.loads',
+                        side_effect=json.loads) as mock_loads:
+            self.assertEqual(cs.structure, structure)
+            self.assertEqual(cs.ordered_blocks.keys(), ['a/b/c'])
+            CourseStructure.objects.get(course_id=self.course.id).structure  # pylint: disable=expression-not-assigned
+            self.assertEqual(mock_loads.call_count, 1)
+
+            structure['blocks']['a/b/c']['display_name'] = 'Changed'
+            cs.structure_json = serialize_structure(structure)
+            cs.save()
+            self.assertEqual(cs.structure, structure)
+            self.assertEqual(mock_loads.call_count, 2)
+
+    def test_structure_cache_size(self):
+        def parse(index):
+            """ Parse a course structure that differs for each `index`. """
+            structure = {'root': 'a/b/c', 'blocks': {'a/b/c': {'id': index, 'children': []}}}
+            return get_parsed_structure(self.course.id, None, serialize_structure(structure))
+
+        structures = [parse(index) for index in range(PARSED_STRUCTURE_CACHE_SIZE + 1)]
+        # The oldest structure was evicted, the newest is still there.
+        first, last = parse(0), parse(PARSED_STRUCTURE_CACHE_SIZE)
+        self.assertIsNot(first, structures[0])
+        self.assertIs(last, structures[-1])
 
     def test_block_with_missing_fields(self):
         """
@@ -5,7 +5,9 @@ forums, and to the cohort admin views.
 
 import logging
 import random
+from collections import defaultdict
 
+from django.db import IntegrityError, transaction
 from django.db.models.signals import post_save, m2m_changed
 from django.dispatch import receiver
 from django.http import Http404
@@ -195,16 +197,7 @@ def get_cohort(user, course_key, assign=True, use_cached=False):
             return None
 
     # Otherwise assign the user a cohort.
-    course = courses.get_course(course_key)
-    cohorts = get_course_cohorts(course, assignment_type=CourseCohort.RANDOM)
-    if cohorts:
-        cohort = local_random().choice(cohorts)
-    else:
-        cohort = CourseCohort.create(
-            cohort_name=DEFAULT_COHORT_NAME,
-            course_id=course_key,
-            assignment_type=CourseCohort.RANDOM
-        ).course_user_group
+    cohort = local_random().choice(_get_random_cohorts(course_key))
 
     membership = CohortMembership(course_user_group=cohort, user=user)
     membership.save()
@@ -212,6 +205,121 @@ def get_cohort(user, course_key, assign=True, use_cached=False):
     return request_cache.data.setdefault(cache_key, cohort)
 
 
+def _get_random_cohorts(course_key):
+    """
+    Return the cohorts of a course that users may be randomly assigned to,
+    creating the default cohort if there aren't any.
+    """
+    course = courses.get_course(course_key)
+    cohorts = get_course_cohorts(course, assignment_type=CourseCohort.RANDOM)
+    if not cohorts:
+        cohorts = [
+            CourseCohort.create(
+                cohort_name=DEFAULT_COHORT_NAME,
+                course_id=course_key,
+                assignment_type=CourseCohort.RANDOM
+            ).course_user_group
+        ]
+    return cohorts
+
+
+def get_cohorts_for_users(course_key, user_ids):
+    """
+    Return a dict that maps the ids of the users in `user_ids` who are in a
+    cohort of the given course to their cohort, using a single query.
+
+    Unlike `get_cohort`, this doesn't check whether the course is cohorted,
+    and doesn't assign users to cohorts.
+
+    Arguments:
+        course_key: CourseKey
+        user_ids: a list of user ids, or a `values_list` queryset of them.
+
+    Returns:
+        A dict of CourseUserGroup objects by user id.  Users who aren't in
+        a cohort are left out.
+    """
+    memberships = CourseUserGroup.users.through.objects.filter(
+        courseusergroup__course_id=course_key,
+        courseusergroup__group_type=CourseUserGroup.COHORT,
+        user_id__in=user_ids,
+    ).select_related('courseusergroup')
+
+    cohorts = {}
+    cohorts_by_user = {}
+    for membership in memberships:
+        cohort = cohorts.setdefault(membership.courseusergroup_id, membership.courseusergroup)
+        cohorts_by_user[membership.user_id] = cohort
+    return cohorts_by_user
+
+
+def get_cohorts(users, course_key, assign=True):
+    """
+    Return the cohorts of several users in the specified course, as
+    `get_cohort` does for one.
+
+    Users who don't have a cohort yet are randomly assigned to one, all at
+    once, unless `assign` is False.  The cohorts are cached for the duration
+    of the request, so later calls to `get_cohort` with use_cached=True don't
+    look them up again.
+
+    Arguments:
+        users: a list of Django User objects.
+        course_key: CourseKey
+        assign (bool): if False then we don't assign a group to users
+
+    Returns:
+        A dict that maps each user's id to their CourseUserGroup, or to None
+        if the course isn't cohorted or the user has no cohort.
+    """
+    if not users:
+        return {}
+    if not get_course_cohort_settings(course_key).is_cohorted:
+        return {user.id: None for user in users}
+
+    cohorts_by_user = get_cohorts_for_users(course_key, [user.id for user in users])
+    unassigned = [user for user in users if user.id not in cohorts_by_user]
+    if unassigned and assign:
+        cohorts_by_user.update(_assign_random_cohorts(unassigned, course_key))
+
+    request_cache = RequestCache.get_request_cache()
+    result = {}
+    for user in users:
+        cohort = result[user.id] = cohorts_by_user.get(user.id)
+        if cohort is not None:
+            request_cache.data[u"cohorts.get_cohort.{}.{}".format(user.id, course_key)] = cohort
+    return result
+
+
+def _assign_random_cohorts(users, course_key):
+    """
+    Randomly assign `users`, who have no cohort in the course, to its random
+    cohorts, and return a dict of their new cohorts by user id.
+
+    Memberships are created in bulk.  If another process assigns one of the
+    users at the same time, falls back to assigning them one by one.
+    """
+    cohorts = _get_random_cohorts(course_key)
+    users_by_cohort = defaultdict(list)
+    for user in users:
+        users_by_cohort[local_random().choice(cohorts)].append(user)
+
+    try:
+        with transaction.commit_on_success():
+            CohortMembership.objects.bulk_create([
+                CohortMembership(course_user_group=cohort, user=user, course_id=course_key)
+                for cohort, cohort_users in users_by_cohort.iteritems()
+                for user in cohort_users
+            ])
+            for cohort, cohort_users in users_by_cohort.iteritems():
+                cohort.users.add(*cohort_users)
+    except IntegrityError:
+        log.info("Cohort assignment raced for some users of %s, assigning them one by one", course_key)
+        return {user.id: get_cohort(user, course_key) for user in users}
+
+    return {user.id: cohort for cohort, cohort_users in users_by_cohort.iteritems() for user in cohort_users}
+
+
 def migrate_cohort_settings(course):
     """
     Migrate all the cohort settings associated with this course from modulestore to mysql.
@@ -268,7 +376,13 @@ def get_course_cohorts(course, assignment_type=None):
 
 def get_cohort_names(course):
     """Return a dict that maps cohort ids to names for the given course"""
-    return {cohort.id: cohort.name for cohort in get_course_cohorts(course)}
+    migrate_cohort_settings(course)
+    return dict(
+        CourseUserGroup.objects.filter(
+            course_id=course.location.course_key,
+            group_type=CourseUserGroup.COHORT
+        ).values_list('id', 'name')
+    )
 
 
 ### Helpers for cohort management views
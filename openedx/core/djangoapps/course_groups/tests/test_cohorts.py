@@ -17,7 +17,7 @@ from student.tests.factories import UserFactory
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MIXED_TOY_MODULESTORE, ModuleStoreTestCase
 
-from ..models import CourseUserGroup, CourseCohort, CourseUserGroupPartitionGroup
+from ..models import CohortMembership, CourseUserGroup, CourseCohort, CourseUserGroupPartitionGroup
 from .. import cohorts
 from ..tests.helpers import (
     topic_name_to_id, config_course_cohorts, config_course_cohorts_legacy,
@@ -330,6 +330,65 @@ class TestCohorts(ModuleStoreTestCase):
 
         self.assertEquals(cohorts.get_cohort(user2, course.id).name, "AutoGroup", "user2 should be auto-cohorted")
 
+    def test_get_cohorts_for_users(self):
+        course = modulestore().get_course(self.toy_course_key)
+        cohort1 = CohortFactory(course_id=course.id, name="Cohort1")
+        cohort2 = CohortFactory(course_id=course.id, name="Cohort2")
+        other_course_cohort = CohortFactory(course_id=SlashSeparatedCourseKey("edX", "other", "run"), name="Other")
+        users = [UserFactory() for __ in range(4)]
+        cohort1.users.add(users[0], users[1])
+        cohort2.users.add(users[2])
+        other_course_cohort.users.add(users[3])
+
+        with self.assertNumQueries(1):
+            cohorts_by_user = cohorts.get_cohorts_for_users(course.id, [user.id for user in users])
+        self.assertEqual(
+            {user_id: cohort.name for user_id, cohort in cohorts_by_user.iteritems()},
+            {users[0].id: "Cohort1", users[1].id: "Cohort1", users[2].id: "Cohort2"}
+        )
+        # Users in the same cohort share one object.
+        self.assertIs(cohorts_by_user[users[0].id], cohorts_by_user[users[1].id])
+
+    def test_get_cohorts(self):
+        """
+        cohorts.get_cohorts() looks users' cohorts up, and assigns the rest,
+        all at once.
+        """
+        course = modulestore().get_course(self.toy_course_key)
+        users = [UserFactory() for __ in range(5)]
+        self.assertEqual(cohorts.get_cohorts(users, course.id), {user.id: None for user in users})
+
+        cohort = CohortFactory(course_id=course.id, name="TestCohort")
+        cohort.users.add(users[0])
+        config_course_cohorts(course, is_cohorted=True, auto_cohorts=["AutoGroup"])
+
+        self.assertEqual(
+            cohorts.get_cohorts(users, course.id, assign=False),
+            {users[0].id: cohort, users[1].id: None, users[2].id: None, users[3].id: None, users[4].id: None}
+        )
+
+        result = cohorts.get_cohorts(users, course.id)
+        self.assertEqual(result[users[0].id], cohort)
+        for user in users[1:]:
+            self.assertEqual(result[user.id].name, "AutoGroup")
+            # The assignment was saved, and get_cohort agrees with it.
+            self.assertEqual(cohorts.get_cohort(user, course.id, assign=False), result[user.id])
+            membership = CohortMembership.objects.get(user=user, course_id=course.id)
+            self.assertEqual(membership.course_user_group, result[user.id])
+
+    def test_get_cohorts_assignment_race(self):
+        """
+        If another process assigns users at the same time, cohorts.get_cohorts()
+        assigns them one by one.
+        """
+        course = modulestore().get_course(self.toy_course_key)
+        config_course_cohorts(course, is_cohorted=True, auto_cohorts=["AutoGroup"])
+        users = [UserFactory() for __ in range(2)]
+
+        with patch.object(CohortMembership.objects, 'bulk_create', side_effect=IntegrityError):
+            result = cohorts.get_cohorts(users, course.id)
+        self.assertEqual([result[user.id].name for user in users], ["AutoGroup", "AutoGroup"])
+
     def test_cohorting_with_migrations_done(self):
         """
         Verifies that cohort config changes on studio/moduletore side will
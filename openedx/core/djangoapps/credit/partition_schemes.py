@@ -121,10 +121,11 @@ def _get_user_statuses(user, course_key, checkpoint):
         cache.set(has_skipped_cache_key, has_skipped)
 
     # Retrieve the user's verification status for each checkpoint in the course.
+    # They're cached under the same key that reports grading many students
+    # fill in bulk beforehand.
     verification_statuses = cache_values.get(verification_status_cache_key)
     if verification_statuses is None:
-        verification_statuses = VerificationStatus.get_all_checkpoints(user.id, course_key)
-        cache.set(verification_status_cache_key, verification_statuses)
+        verification_statuses = VerificationStatus.get_all_checkpoints_many([user.id], course_key)[user.id]
 
     # Check whether the user has completed this checkpoint
     # "Completion" here means *any* submission, regardless of its status
@@ -1,47 +1,161 @@
 """
 Labster Course tasks.
 """
+import logging
+from collections import defaultdict
+
+from celery.exceptions import SoftTimeLimitExceeded
 from cms import CELERY_APP
 from django.conf import settings
+from django.db import transaction
 
 from opaque_keys.edx.keys import CourseKey
 from ccx_keys.locator import CCXLocator
 from search.search_engine_base import SearchEngine
 from student.roles import CourseCcxCoachRole
-from student.models import CourseEnrollment
+from student.models import CourseEnrollment, CourseEnrollmentAllowed
 
 from lms.djangoapps.ccx.models import CustomCourseForEdX, CcxFieldOverride
 from lms.djangoapps.labster_course_license.models import CourseLicense
-from lms.djangoapps.instructor.enrollment import unenroll_email
 
 from cms.djangoapps.contentstore.courseware_index import CoursewareSearchIndexer, CourseAboutSearchIndexer
 
 
-@CELERY_APP.task
-def course_delete(course_key_string):
+log = logging.getLogger(__name__)
+
+# How many CCXs are torn down per transaction.
+CCX_BATCH_SIZE = 50
+# How many rows are updated or deleted per query.
+ROW_BATCH_SIZE = 1000
+# How many search documents are removed per call to the search engine.
+SEARCH_BATCH_SIZE = 500
+# How many times a teardown that runs out of time is resumed.
+MAX_RESUMES = 10
+
+
+@CELERY_APP.task(bind=True)
+def course_delete(self, course_key_string):
     """
     Cleans the course up after removing. Removes ES indexes and CCX data.
+
+    CCXs are torn down in batches, each in its own transaction, and a CCX is
+    only deleted together with the last of its data.  The remaining CCXs are
+    the checkpoint: if the task runs out of time, it is retried and carries
+    on with them.
     """
     course_key = CourseKey.from_string(course_key_string)
-    if settings.FEATURES.get('CUSTOM_COURSES_EDX'):
-        # Remove all CCX Coaches
-        coach_role = CourseCcxCoachRole(course_key)
-        coach_role.remove_users(*coach_role.users_with_role())
-        # Remove all course_key related CCX data
-        ccxs = CustomCourseForEdX.objects.filter(course_id=course_key)
-        for ccx in ccxs:
-            ccx_locator = CCXLocator.from_course_locator(course_key, ccx.id)
-            CcxFieldOverride.objects.filter(ccx=ccx).delete()
-            enrollments = CourseEnrollment.objects.filter(course_id=ccx_locator)
-            for enrollment in enrollments:
-                unenroll_email(course_key, enrollment.user.email, email_students=False)
-            # Remove Labster Licenses
-            CourseLicense.objects.filter(course_id=ccx_locator).delete()
-        ccxs.delete()
-    # Remove indexes from ElasticSearch
-    if CoursewareSearchIndexer.indexing_is_enabled():
-        searcher = SearchEngine.get_search_engine(CoursewareSearchIndexer.INDEX_NAME)
-        if searcher:
-            CoursewareSearchIndexer.remove_deleted_items(searcher, course_key, [])
-            searcher.remove(CourseAboutSearchIndexer.DISCOVERY_DOCUMENT_TYPE, [course_key_string])
+    try:
+        if settings.FEATURES.get('CUSTOM_COURSES_EDX'):
+            # Remove all CCX Coaches
+            coach_role = CourseCcxCoachRole(course_key)
+            coach_role.remove_users(*coach_role.users_with_role())
+            # Remove all course_key related CCX data
+            delete_ccxs(course_key)
+        # Remove indexes from ElasticSearch
+        if CoursewareSearchIndexer.indexing_is_enabled():
+            searcher = SearchEngine.get_search_engine(CoursewareSearchIndexer.INDEX_NAME)
+            if searcher:
+                remove_search_documents(searcher, course_key)
+                searcher.remove(CourseAboutSearchIndexer.DISCOVERY_DOCUMENT_TYPE, [course_key_string])
+    except SoftTimeLimitExceeded as exc:
+        log.warning("Ran out of time deleting course %s, resuming", course_key_string)
+        raise self.retry(exc=exc, countdown=0, max_retries=MAX_RESUMES)
     return "succeeded"
+
+
+def _batches(queryset, batch_size=ROW_BATCH_SIZE):
+    """
+    Yield the ids of the rows of `queryset`, `batch_size` at a time.
+    """
+    ids = list(queryset.order_by('id').values_list('id', flat=True))
+    for start in xrange(0, len(ids), batch_size):
+        yield ids[start:start + batch_size]
+
+
+def delete_ccxs(course_key):
+    """
+    Delete the CCXs of a course, with their enrollments, field overrides and
+    licenses, using set-based queries.
+
+    Enrollments are deactivated in bulk rather than one by one, so no
+    unenrollment events or signals are sent for them; the course is gone.
+    As `unenroll_email` did before, the students are also unenrolled from
+    the course itself, and their invitations to it are removed.  Their
+    cached enrollment states are cleared once each batch is committed.
+    """
+    while True:
+        ccx_ids = list(
+            CustomCourseForEdX.objects.filter(course_id=course_key).order_by('id').values_list('id', flat=True)[
+                :CCX_BATCH_SIZE
+            ]
+        )
+        if not ccx_ids:
+            break
+        with transaction.commit_on_success():
+            unenrolled = _delete_ccx_batch(course_key, ccx_ids)
+        for key, user_ids in unenrolled.iteritems():
+            CourseEnrollment.clear_cached_states(user_ids, key)
+        log.info("Deleted CCXs %s of course %s", ccx_ids, course_key)
+
+
+def _delete_ccx_batch(course_key, ccx_ids):
+    """
+    Delete the CCXs of a course with ids `ccx_ids`, and everything that
+    belongs to them.
+
+    Returns a dict mapping the keys of the courses that students were
+    unenrolled from to the ids of those students.
+    """
+    ccx_locators = [CCXLocator.from_course_locator(course_key, ccx_id) for ccx_id in ccx_ids]
+    locators_by_id = {unicode(locator): locator for locator in ccx_locators}
+
+    ccx_enrollments = CourseEnrollment.objects.filter(course_id__in=ccx_locators, is_active=True)
+    unenrolled = defaultdict(list)
+    students = {}
+    for user_id, email, ccx_id in ccx_enrollments.values_list('user_id', 'user__email', 'course_id'):
+        unenrolled[locators_by_id[unicode(ccx_id)]].append(user_id)
+        students[user_id] = email
+    for ids in _batches(ccx_enrollments):
+        CourseEnrollment.objects.filter(id__in=ids).update(is_active=False)
+
+    user_ids = students.keys()
+    emails = students.values()
+    for start in xrange(0, len(user_ids), ROW_BATCH_SIZE):
+        CourseEnrollment.objects.filter(
+            course_id=course_key, user_id__in=user_ids[start:start + ROW_BATCH_SIZE], is_active=True
+        ).update(is_active=False)
+        CourseEnrollmentAllowed.objects.filter(
+            course_id=course_key, email__in=emails[start:start + ROW_BATCH_SIZE]
+        ).delete()
+    CourseEnrollmentAllowed.objects.filter(course_id__in=ccx_locators).delete()
+
+    for ids in _batches(CcxFieldOverride.objects.filter(ccx_id__in=ccx_ids)):
+        CcxFieldOverride.objects.filter(id__in=ids).delete()
+
+    # Remove Labster Licenses
+    CourseLicense.objects.filter(course_id__in=ccx_locators).delete()
+
+    # Deleting the CCXs marks them as done.
+    CustomCourseForEdX.objects.filter(id__in=ccx_ids).delete()
+
+    if user_ids:
+        unenrolled[course_key] = user_ids
+    return unenrolled
+
+
+def remove_search_documents(searcher, course_key):
+    """
+    Remove all the courseware search documents of a course, in batches.
+    """
+    location_info = CoursewareSearchIndexer._get_location_info(course_key)  # pylint: disable=protected-access
+    total = searcher.search(
+        doc_type=CoursewareSearchIndexer.DOCUMENT_TYPE, field_dictionary=location_info, size=0
+    )["total"]
+    if not total:
+        return
+    response = searcher.search(
+        doc_type=CoursewareSearchIndexer.DOCUMENT_TYPE, field_dictionary=location_info, size=total
+    )
+    doc_ids = [result["data"]["id"] for result in response["results"]]
+    for start in xrange(0, len(doc_ids), SEARCH_BATCH_SIZE):
+        searcher.remove(CoursewareSearchIndexer.DOCUMENT_TYPE, doc_ids[start:start + SEARCH_BATCH_SIZE])
@@ -0,0 +1,105 @@
+"""
+Tests for the Labster course tasks.
+"""
+import mock
+from django.conf import settings
+from django.test.utils import override_settings
+
+from ccx_keys.locator import CCXLocator
+from student.models import CourseEnrollment, CourseEnrollmentAllowed
+from student.tests.factories import UserFactory
+
+from lms.djangoapps.ccx.models import CustomCourseForEdX, CcxFieldOverride
+from lms.djangoapps.labster_course_license.models import CourseLicense
+from openedx.core.djangoapps.labster.course import tasks
+from openedx.core.djangoapps.labster.tests.base import CCXCourseTestBase
+
+
+@mock.patch.dict(settings.FEATURES, {'CUSTOM_COURSES_EDX': True})
+class CourseDeleteTest(CCXCourseTestBase):
+    """
+    Tests for the course_delete task.
+    """
+    def setUp(self):
+        super(CourseDeleteTest, self).setUp()
+        self.ccxs = [self.ccx] + [self.make_ccx() for __ in range(2)]
+        self.students = []
+        for index, ccx in enumerate(self.ccxs):
+            ccx_key = CCXLocator.from_course_locator(self.course.id, ccx.id)
+            for __ in range(2):
+                student = UserFactory.create()
+                CourseEnrollment.enroll(student, self.course.id)
+                CourseEnrollment.enroll(student, ccx_key)
+                self.students.append(student)
+            CourseEnrollmentAllowed.objects.create(course_id=ccx_key, email='invited{}@example.com'.format(index))
+            CcxFieldOverride.objects.create(ccx=ccx, location=self.course.location, field='display_name')
+            CourseLicense.set_license(ccx_key, 'LICENSE{}'.format(index))
+        self.other_student = UserFactory.create()
+        CourseEnrollment.enroll(self.other_student, self.course.id)
+
+    def assert_torn_down(self):
+        """
+        Check that all the CCX data of the course is gone.
+        """
+        self.assertFalse(CustomCourseForEdX.objects.filter(course_id=self.course.id).exists())
+        self.assertFalse(CcxFieldOverride.objects.exists())
+        self.assertFalse(CourseLicense.objects.exists())
+        self.assertFalse(CourseEnrollmentAllowed.objects.exists())
+        self.assertFalse(CourseEnrollment.objects.filter(user__in=self.students, is_active=True).exists())
+        self.assertFalse(any(CourseEnrollment.is_enrolled_many(self.students, self.course.id).values()))
+        # Students who weren't in a CCX are left alone.
+        self.assertTrue(CourseEnrollment.is_enrolled(self.other_student, self.course.id))
+
+    @mock.patch.object(tasks, 'CCX_BATCH_SIZE', 2)
+    @mock.patch.object(tasks, 'ROW_BATCH_SIZE', 3)
+    def test_course_delete(self):
+        self.assertEqual(tasks.course_delete(unicode(self.course.id)), "succeeded")
+        self.assert_torn_down()
+
+    @mock.patch.object(tasks, 'CCX_BATCH_SIZE', 2)
+    def test_cached_enrollments_cleared(self):
+        """
+        Students unenrolled in bulk aren't still seen as enrolled by the cache.
+        """
+        ccx_key = CCXLocator.from_course_locator(self.course.id, self.ccx.id)
+        student = self.students[0]
+        with override_settings(COURSE_ENROLLMENT_CACHE_TIMEOUT=60):
+            self.assertTrue(CourseEnrollment.is_enrolled(student, self.course.id))
+            self.assertTrue(CourseEnrollment.is_enrolled(student, ccx_key))
+            tasks.delete_ccxs(self.course.id)
+            self.assertFalse(CourseEnrollment.is_enrolled(student, self.course.id))
+            self.assertFalse(CourseEnrollment.is_enrolled(student, ccx_key))
+
+    @mock.patch.object(tasks, 'CCX_BATCH_SIZE', 1)
+    def test_resume(self):
+        """
+        A teardown that is interrupted carries on where it stopped.
+        """
+        delete_ccx_batch = tasks._delete_ccx_batch  # pylint: disable=protected-access
+
+        def delete_one_batch(*args):
+            """ Delete the first batch, then stop. """
+            if mock_delete.call_count > 1:
+                raise Exception("Stopped")
+            return delete_ccx_batch(*args)
+
+        with mock.patch.object(tasks, '_delete_ccx_batch', side_effect=delete_one_batch) as mock_delete:
+            with self.assertRaises(Exception):
+                tasks.delete_ccxs(self.course.id)
+        self.assertEqual(CustomCourseForEdX.objects.filter(course_id=self.course.id).count(), 2)
+
+        tasks.delete_ccxs(self.course.id)
+        self.assert_torn_down()
+
+    @mock.patch.object(tasks, 'SEARCH_BATCH_SIZE', 2)
+    def test_remove_search_documents(self):
+        searcher = mock.Mock()
+        searcher.search.side_effect = [
+            {"total": 3},
+            {"total": 3, "results": [{"data": {"id": doc_id}} for doc_id in ("a", "b", "c")]},
+        ]
+        tasks.remove_search_documents(searcher, self.course.id)
+        self.assertEqual(
+            searcher.remove.call_args_list,
+            [mock.call("courseware_content", ["a", "b"]), mock.call("courseware_content", ["c"])]
+        )